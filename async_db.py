@@ -13,14 +13,75 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
 import aiomysql
 
+from constant.db_schema import TABLE_UNIQUE_KEYS
+
 
 class AsyncMysqlDB:
     def __init__(self, pool: aiomysql.Pool) -> None:
         self.__pool = pool
+        # 连接池指标：获取连接的等待耗时、当前借出的连接数
+        self._acquire_count = 0
+        self._acquire_wait_total = 0.0
+        self._acquire_wait_max = 0.0
+        self._in_use = 0
+        self._in_use_max = 0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiomysql.Connection]:
+        """
+        从连接池借出一个连接，同时记录等待耗时和借出数量
+        :return:
+        """
+        start = time.perf_counter()
+        async with self.__pool.acquire() as conn:
+            wait = time.perf_counter() - start
+            self._acquire_count += 1
+            self._acquire_wait_total += wait
+            self._acquire_wait_max = max(self._acquire_wait_max, wait)
+            self._in_use += 1
+            self._in_use_max = max(self._in_use_max, self._in_use)
+            try:
+                yield conn
+            finally:
+                self._in_use -= 1
+
+    async def warmup(self) -> None:
+        """
+        预热连接池：并发借出 minsize 个连接各执行一次 SELECT 1，启动阶段就暴露连接问题，避免首批请求排队建连
+        :return:
+        """
+        async def ping() -> None:
+            async with self.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT 1")
+
+        await asyncio.gather(*[ping() for _ in range(max(self.__pool.minsize, 1))])
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        连接池状态，用来对照爬虫并发数调整连接池大小
+        acquire_wait_* 持续偏高、in_use_max 打满 maxsize 时说明连接池偏小
+        :return:
+        """
+        return {
+            "minsize": self.__pool.minsize,
+            "maxsize": self.__pool.maxsize,
+            "size": self.__pool.size,
+            "free": self.__pool.freesize,
+            "in_use": self._in_use,
+            "in_use_max": self._in_use_max,
+            "acquire_count": self._acquire_count,
+            "acquire_wait_avg_ms": round(self._acquire_wait_total * 1000 / self._acquire_count, 3)
+            if self._acquire_count else 0.0,
+            "acquire_wait_max_ms": round(self._acquire_wait_max * 1000, 3),
+        }
 
     async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
         """
@@ -29,7 +90,7 @@ class AsyncMysqlDB:
         :param args: sql中传递动态参数列表
         :return:
         """
-        async with self.__pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(sql, args)
                 data = await cur.fetchall()
@@ -42,7 +103,7 @@ class AsyncMysqlDB:
         :param args:sql中传递动态参数列表
         :return:
         """
-        async with self.__pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 await cur.execute(sql, args)
                 data = await cur.fetchone()
@@ -61,11 +122,19 @@ class AsyncMysqlDB:
         fieldstr = ','.join(fields)
         valstr = ','.join(['%s'] * len(item))
         sql = "INSERT INTO %s (%s) VALUES(%s)" % (table_name, fieldstr, valstr)
-        async with self.__pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                await cur.execute(sql, values)
-                lastrowid = cur.lastrowid
-                return lastrowid
+        return await self.insert(sql, *values)
+
+    async def insert(self, sql: str, *args: Any) -> int:
+        """
+        执行 insert 语句，返回自增ID
+        :param sql: insert sql
+        :param args: sql中传递动态参数列表
+        :return:
+        """
+        async with self.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, args)
+                return cur.lastrowid
 
     async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
                            value_where: Union[str, int, float]) -> int:
@@ -84,12 +153,13 @@ class AsyncMysqlDB:
             upsets.append(s)
             values.append(v)
         upsets = ','.join(upsets)
-        sql = 'UPDATE %s SET %s WHERE %s="%s"' % (
+        sql = 'UPDATE %s SET %s WHERE `%s`=%%s' % (
             table_name,
             upsets,
-            field_where, value_where,
+            field_where,
         )
-        async with self.__pool.acquire() as conn:
+        values.append(value_where)
+        async with self.acquire() as conn:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, values)
                 return rows
@@ -101,7 +171,76 @@ class AsyncMysqlDB:
         :param args:
         :return:
         """
-        async with self.__pool.acquire() as conn:
+        async with self.acquire() as conn:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, args)
                 return rows
+
+
+class TableQuery:
+    """
+    单表的参数化sql集合，供 store/*/*_store_sql.py 使用
+    存在性查询的sql在初始化时生成，insert/update 的sql按字段列表生成一次后缓存，之后每次只传参数
+    """
+
+    def __init__(self, table_name: str, key_fields: Optional[Sequence[str]] = None) -> None:
+        """
+        :param table_name: 表名
+        :param key_fields: 业务唯一键字段，默认取 constant.db_schema.TABLE_UNIQUE_KEYS 中的配置
+        """
+        self.table_name = table_name
+        self.key_fields: Tuple[str, ...] = tuple(key_fields or TABLE_UNIQUE_KEYS[table_name])
+        self.where_sql = " AND ".join(f"`{field}`=%s" for field in self.key_fields)
+        self.exists_sql = f"SELECT 1 FROM `{table_name}` WHERE {self.where_sql} LIMIT 1"
+        self._insert_sql_cache: Dict[Tuple[str, ...], str] = {}
+        self._update_sql_cache: Dict[Tuple[str, ...], str] = {}
+
+    def insert_sql(self, fields: Tuple[str, ...]) -> str:
+        sql = self._insert_sql_cache.get(fields)
+        if sql is None:
+            sql = "INSERT INTO `%s` (%s) VALUES (%s)" % (
+                self.table_name,
+                ",".join(f"`{field}`" for field in fields),
+                ",".join(["%s"] * len(fields)),
+            )
+            self._insert_sql_cache[fields] = sql
+        return sql
+
+    def update_sql(self, fields: Tuple[str, ...]) -> str:
+        sql = self._update_sql_cache.get(fields)
+        if sql is None:
+            sql = "UPDATE `%s` SET %s WHERE %s" % (
+                self.table_name,
+                ",".join(f"`{field}`=%s" for field in fields),
+                self.where_sql,
+            )
+            self._update_sql_cache[fields] = sql
+        return sql
+
+    async def exists(self, async_db: AsyncMysqlDB, *key_values: Union[str, int]) -> bool:
+        """
+        按唯一键判断记录是否存在，只走唯一索引，不回表
+        :param async_db:
+        :param key_values: 按 key_fields 的顺序传入唯一键的值
+        :return:
+        """
+        return await async_db.get_first(self.exists_sql, *key_values) is not None
+
+    async def insert(self, async_db: AsyncMysqlDB, item: Dict[str, Any]) -> int:
+        """
+        插入一条记录
+        :param async_db:
+        :param item: 一条记录的字典信息
+        :return: 自增ID
+        """
+        return await async_db.insert(self.insert_sql(tuple(item.keys())), *item.values())
+
+    async def update(self, async_db: AsyncMysqlDB, item: Dict[str, Any], *key_values: Union[str, int]) -> int:
+        """
+        按唯一键更新一条记录
+        :param async_db:
+        :param item: 需要更新的字段和值
+        :param key_values: 按 key_fields 的顺序传入唯一键的值
+        :return: 影响的行数
+        """
+        return await async_db.execute(self.update_sql(tuple(item.keys())), *item.values(), *key_values)
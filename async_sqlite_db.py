@@ -0,0 +1,238 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 异步SQLite封装，WAL模式 + 后台批量upsert写入任务
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from tools import utils
+
+# upsert 时不覆盖的字段，add_ts 只在第一次插入时写入
+UPSERT_IGNORE_UPDATE_FIELDS = ("add_ts",)
+
+UpsertKey = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+
+class AsyncSqliteDB:
+    def __init__(self, db_path: str, batch_size: int = 200, flush_interval: float = 0.5,
+                 max_queue_size: int = 10000) -> None:
+        """
+        sqlite3 连接只在一个专用线程中使用，所有读写都投递到该线程执行，不阻塞事件循环
+        :param db_path: 数据库文件路径
+        :param batch_size: 后台写入任务每个事务最多写入的记录数
+        :param flush_interval: 攒批的最长等待时间（秒）
+        :param max_queue_size: 写入队列最大长度，超过后 upsert 会等待，避免内存无限增长
+        """
+        self._db_path = db_path
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_queue_size = max_queue_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite_writer")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._upsert_sql_cache: Dict[UpsertKey, str] = {}
+
+    async def _run(self, func, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> None:
+        db_dir = os.path.dirname(self._db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # isolation_level=None 关闭隐式事务，由 _write_batch 显式 BEGIN/COMMIT
+        conn = sqlite3.connect(self._db_path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        self._conn = conn
+
+    async def connect(self) -> None:
+        """
+        打开数据库并启动后台写入任务
+        :return:
+        """
+        await self._run(self._connect)
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._writer_task = asyncio.create_task(self._writer_loop(), name="sqlite_writer")
+
+    async def execute_script(self, sql_script: str) -> None:
+        """
+        执行多条sql语句，一般用于建表
+        :param sql_script:
+        :return:
+        """
+        await self._run(self._conn.executescript, sql_script)
+
+    def _query(self, sql: str, args: Sequence[Any]) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._conn.execute(sql, args).fetchall()]
+
+    async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
+        """
+        从给定的 SQL 中查询记录，返回的是一个列表
+        :param sql: 查询的sql
+        :param args: sql中传递动态参数列表
+        :return:
+        """
+        return await self._run(self._query, sql, args)
+
+    async def get_first(self, sql: str, *args: Union[str, int]) -> Union[Dict[str, Any], None]:
+        """
+        从给定的 SQL 中查询记录，返回的是符合条件的第一个结果
+        :param sql: 查询的sql
+        :param args: sql中传递动态参数列表
+        :return:
+        """
+        rows = await self.query(sql, *args)
+        return rows[0] if rows else None
+
+    async def upsert(self, table_name: str, item: Dict[str, Any], conflict_keys: Sequence[str]) -> None:
+        """
+        将一条记录投递到后台写入队列，由写入任务批量执行 INSERT ... ON CONFLICT DO UPDATE
+        :param table_name: 表名
+        :param item: 一条记录的字典信息
+        :param conflict_keys: 表上唯一键对应的字段
+        :return:
+        """
+        await self._queue.put((table_name, dict(item), tuple(conflict_keys)))
+
+    async def flush(self) -> None:
+        """
+        等待队列中已投递的记录全部落库
+        :return:
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """
+        写完剩余数据后关闭数据库
+        :return:
+        """
+        await self.flush()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    async def _writer_loop(self) -> None:
+        """
+        后台写入任务：攒够 batch_size 条或者等待超过 flush_interval 后，在一个事务里写入
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._flush_interval
+            while len(batch) < self._batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._run(self._write_batch, batch)
+            except Exception as e:
+                utils.logger.error(f"[AsyncSqliteDB._writer_loop] write batch error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _build_upsert_sql(self, table_name: str, fields: Tuple[str, ...], conflict_keys: Tuple[str, ...]) -> str:
+        cache_key = (table_name, fields, conflict_keys)
+        sql = self._upsert_sql_cache.get(cache_key)
+        if sql is not None:
+            return sql
+        update_fields = [f for f in fields if f not in conflict_keys and f not in UPSERT_IGNORE_UPDATE_FIELDS]
+        sql = "INSERT INTO `%s` (%s) VALUES (%s) ON CONFLICT (%s) DO " % (
+            table_name,
+            ",".join(f"`{f}`" for f in fields),
+            ",".join(["?"] * len(fields)),
+            ",".join(f"`{k}`" for k in conflict_keys),
+        )
+        if update_fields:
+            sql += "UPDATE SET " + ",".join(f"`{f}`=excluded.`{f}`" for f in update_fields)
+        else:
+            sql += "NOTHING"
+        self._upsert_sql_cache[cache_key] = sql
+        return sql
+
+    @staticmethod
+    def _to_db_value(value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def _write_batch(self, batch: List[Tuple[str, Dict[str, Any], Tuple[str, ...]]]) -> None:
+        # 相同表、相同字段集合的记录合并成一个 executemany，组内保持投递顺序
+        groups: Dict[UpsertKey, List[Tuple]] = {}
+        for table_name, item, conflict_keys in batch:
+            fields = tuple(item.keys())
+            groups.setdefault((table_name, fields, conflict_keys), []).append(
+                tuple(self._to_db_value(v) for v in item.values())
+            )
+        try:
+            self._conn.execute("BEGIN")
+            for (table_name, fields, conflict_keys), rows in groups.items():
+                self._conn.executemany(self._build_upsert_sql(table_name, fields, conflict_keys), rows)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._conn.execute("ROLLBACK")
+            utils.logger.warning(f"[AsyncSqliteDB._write_batch] batch upsert failed: {e}, retry row by row")
+            self._write_rows_one_by_one(groups)
+
+    def _write_rows_one_by_one(self, groups: Dict[UpsertKey, List[Tuple]]) -> None:
+        # 批量写失败时逐条写入，避免一条脏数据导致整批数据丢失
+        # 整个回退过程在一个事务里，每条记录用 SAVEPOINT 隔离，失败只回滚这一条并记录它的唯一键
+        failed = 0
+        try:
+            self._conn.execute("BEGIN")
+            for (table_name, fields, conflict_keys), rows in groups.items():
+                sql = self._build_upsert_sql(table_name, fields, conflict_keys)
+                key_indexes = [fields.index(k) for k in conflict_keys if k in fields]
+                for row in rows:
+                    self._conn.execute("SAVEPOINT upsert_row")
+                    try:
+                        self._conn.execute(sql, row)
+                    except sqlite3.Error as e:
+                        self._conn.execute("ROLLBACK TO upsert_row")
+                        failed += 1
+                        row_key = {fields[i]: row[i] for i in key_indexes}
+                        utils.logger.error(
+                            f"[AsyncSqliteDB._write_rows_one_by_one] upsert {table_name} {row_key} error: {e}"
+                        )
+                    self._conn.execute("RELEASE upsert_row")
+            self._conn.execute("COMMIT")
+        except BaseException:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            raise
+        if failed:
+            utils.logger.warning(f"[AsyncSqliteDB._write_rows_one_by_one] {failed} rows failed, others committed")
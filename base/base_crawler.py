@@ -10,12 +10,35 @@
 
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from playwright.async_api import BrowserContext, BrowserType
 
+import config
+from tools.crawl_budget import CrawlBudget
+from tools.login_state import watch_auth_failure
+from tools.metrics import STORE_WRITE_SECONDS, instrument_request
+from tools.paginator import FetchPage, Paginator, paginate
+from tools.retry_policy import with_retry_policy
+from tools.run_report import track_client_stages, track_request, track_store
+
 
 class AbstractCrawler(ABC):
+    _budget: Optional[CrawlBudget] = None
+
+    @property
+    def budget(self) -> CrawlBudget:
+        """
+        整个爬取过程共享的并发预算，CrawlerFactory 创建爬虫时注入，未注入时按配置创建
+        """
+        if self._budget is None:
+            self._budget = CrawlBudget(config.PLATFORM)
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget: CrawlBudget) -> None:
+        self._budget = budget
+
     @abstractmethod
     async def start(self):
         """
@@ -63,6 +86,15 @@ class AbstractLogin(ABC):
 
 
 class AbstractStore(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 子类实现的写入方法统一记录耗时和保存条数
+        for kind in ("content", "comment", "creator"):
+            method = cls.__dict__.get(f"store_{kind}")
+            if method is not None:
+                method = STORE_WRITE_SECONDS.timed(store=cls.__name__, kind=kind)(method)
+                setattr(cls, f"store_{kind}", track_store(kind)(method))
+
     @abstractmethod
     async def store_content(self, content_item: Dict):
         pass
@@ -87,10 +119,33 @@ class AbstractStoreImage(ABC):
 
 
 class AbstractApiClient(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 子类实现的 request 统一套上重试策略，不需要各平台自己写 @retry，每次重试单独记录指标；
+        # 重试后仍然是登录失效的错误时交给登录态缓存的回退处理
+        if "request" in cls.__dict__:
+            cls.request = watch_auth_failure(
+                with_retry_policy(instrument_request(track_request(cls.__dict__["request"])))
+            )
+        # 搜索、详情、评论等方法按阶段计时，写入爬取报告
+        track_client_stages(cls)
+
     @abstractmethod
     async def request(self, method, url, **kwargs):
         pass
 
+    def paginate(self, fetch_page: FetchPage, cursor: Any = None, max_count: int = 0, crawl_interval: float = 0,
+                 **kwargs) -> Paginator:
+        """
+        通用分页，fetch_page 按游标返回一页（tools.paginator.PageResult），用法：async for items in self.paginate(...)
+        :param fetch_page:
+        :param cursor: 第一页的游标
+        :param max_count: 最多获取多少条，0 表示不限制
+        :param crawl_interval: 两次请求之间的间隔（秒）
+        :return:
+        """
+        return paginate(fetch_page, cursor=cursor, max_count=max_count, crawl_interval=crawl_interval, **kwargs)
+
     @abstractmethod
     async def update_cookies(self, browser_context: BrowserContext):
         pass
@@ -0,0 +1,53 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 对比两次 crawl_benchmark 的结果，吞吐量下降超过阈值时返回非 0 退出码，可以放在 CI 里检查性能回退
+#            用法: python -m benchmarks.compare base.json new.json [--threshold 0.2]
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def load_results(path: str) -> Tuple[str, Dict[Tuple[str, str, str], Dict]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("commit", path), {
+        (r["platform"], r["flow"], r["store"]): r for r in data.get("results", []) if "error" not in r
+    }
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    base_commit, base = load_results(base_path)
+    new_commit, new = load_results(new_path)
+    print(f"{'case':<24} {base_commit:>10} {new_commit:>10} {'change':>8}   items/s")
+    regressions = 0
+    for case in sorted(base.keys() & new.keys()):
+        before, after = base[case]["items_per_sec"], new[case]["items_per_sec"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change < -threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{'/'.join(case):<24} {before:>10.1f} {after:>10.1f} {change:>+8.1%}{flag}")
+    for case in sorted(base.keys() ^ new.keys()):
+        print(f"{'/'.join(case):<24} only in {'base' if case in base else 'new'}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare two crawl benchmark result files.')
+    parser.add_argument('base', help='result json of the base commit')
+    parser.add_argument('new', help='result json of the new commit')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed items/s drop ratio before failing')
+    args = parser.parse_args()
+    sys.exit(compare(args.base, args.new, args.threshold))
@@ -0,0 +1,269 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 端到端吞吐量压测：在本地模拟接口上跑各平台的 search/detail/creator 流程，分别写入各种存储，
+#            统计 items/s、请求耗时 p50/p99、峰值内存和事件循环延迟，结果保存为 JSON 方便和其他提交对比
+#            用法: python -m benchmarks.crawl_benchmark [--platforms xhs,bili] [--flows search,detail,creator]
+#                      [--stores csv,json,sqlite] [--items 200] [--latency 0.05]
+#            db 存储需要先配置好 config/db_config.py 中的 MySQL，默认用 sqlite 代替
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from functools import wraps
+from typing import Any, Callable, Dict, List
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PLATFORMS = ("xhs", "bili")
+FLOWS = ("search", "detail", "creator")
+STORES = ("csv", "json", "sqlite", "db")
+
+# 每个平台保存帖子/视频的 store 函数，用来统计爬取的条数
+CONTENT_STORE_FUNCS = {
+    "xhs": ("store.xhs", "update_xhs_note"),
+    "bili": ("store.bilibili", "update_bilibili_video"),
+}
+
+# 去掉爬取间隔，压测的是爬虫本身的开销而不是限速
+NO_INTERVAL_RANDOM = types.SimpleNamespace(random=lambda: 0.0, uniform=lambda a, b: 0.0)
+
+
+def percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def monitor_loop_lag(samples: List[float], interval: float = 0.01) -> None:
+    """
+    定时 sleep，实际醒来的时间比预期晚多少就是事件循环被阻塞的时间
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+def timed_request(request: Callable, latencies: List[float]) -> Callable:
+    @wraps(request)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await request(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    return wrapper
+
+
+def counted(func: Callable, counter: Dict[str, int]) -> Callable:
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        counter["items"] += 1
+        return await func(*args, **kwargs)
+
+    return wrapper
+
+
+def setup_crawler(platform_name: str, flow: str, mock_api) -> Any:
+    """
+    不启动浏览器，直接创建爬虫和客户端，返回本次要执行的流程
+    """
+    import config
+    from benchmarks.mock_api import FakeSignPage
+
+    if platform_name == "xhs":
+        from media_platform.xhs import XiaoHongShuCrawler
+        from media_platform.xhs.client import XiaoHongShuClient
+
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = XiaoHongShuClient(headers={"Cookie": ""}, playwright_page=FakeSignPage(),
+                                               cookie_dict={"a1": "a" * 52})
+        config.XHS_SPECIFIED_NOTE_URL_LIST = mock_api.note_urls()
+        config.XHS_CREATOR_ID_LIST = ["creator_0"]
+        flows = {
+            "search": crawler.search,
+            "detail": crawler.get_specified_notes,
+            "creator": crawler.get_creators_and_notes,
+        }
+        client = crawler.xhs_client
+    else:
+        from media_platform.bilibili import BilibiliCrawler
+        from media_platform.bilibili.client import BilibiliClient
+
+        crawler = BilibiliCrawler()
+        crawler.bili_client = BilibiliClient(headers={}, playwright_page=None, cookie_dict={})
+        config.BILI_SPECIFIED_ID_LIST = mock_api.bvids()
+        config.BILI_CREATOR_ID_LIST = ["1"]
+        config.CREATOR_MODE = True
+        flows = {"search": crawler.search, "detail": crawler.crawl, "creator": crawler.crawl}
+        client = crawler.bili_client
+    return crawler, client, flows[flow]
+
+
+async def run_case(platform_name: str, flow: str, store: str, items: int, latency: float,
+                   error_rate: float) -> Dict[str, Any]:
+    """
+    在当前进程中跑一个压测用例，需要在单独的进程里调用（会修改全局配置和工作目录）
+    """
+    import config
+    import db
+    from benchmarks.mock_api import MOCK_APIS
+    from tools.http_fixture import MODE_REPLAY, HttpFixture, install_http_fixture
+    from var import crawler_type_var
+
+    # 存储文件写到临时目录，sqlite 建表脚本通过软链接找到
+    work_dir = tempfile.mkdtemp(prefix="mediacrawler_bench_")
+    os.symlink(os.path.join(PROJECT_DIR, "schema"), os.path.join(work_dir, "schema"))
+    os.chdir(work_dir)
+
+    config.PLATFORM = platform_name
+    config.CRAWLER_TYPE = flow
+    config.SAVE_DATA_OPTION = store
+    config.KEYWORDS = "benchmark"
+    config.START_PAGE = 1
+    config.SORT_TYPE = ""
+    config.CRAWLER_MAX_NOTES_COUNT = max(20, items)
+    config.ENABLE_GET_COMMENTS = False
+    config.ENABLE_GET_IMAGES = False
+    crawler_type_var.set(flow)
+
+    mock_api = MOCK_APIS[platform_name](items)
+    fixture = HttpFixture(MODE_REPLAY, mock_api, latency=latency, latency_jitter=latency, error_rate=error_rate)
+    install_http_fixture(fixture)
+
+    crawler, client, crawl = setup_crawler(platform_name, flow, mock_api)
+    importlib.import_module(f"{type(crawler).__module__}").random = NO_INTERVAL_RANDOM
+    latencies: List[float] = []
+    client.request = timed_request(client.request, latencies)
+    counter = {"items": 0}
+    store_module_name, store_func_name = CONTENT_STORE_FUNCS[platform_name]
+    store_module = importlib.import_module(store_module_name)
+    setattr(store_module, store_func_name, counted(getattr(store_module, store_func_name), counter))
+
+    if store in ("db", "sqlite"):
+        await db.init_db()
+    lag_samples: List[float] = []
+    lag_task = asyncio.create_task(monitor_loop_lag(lag_samples))
+    start = time.perf_counter()
+    try:
+        await crawl()
+        await crawler.budget.join()
+        if store in ("db", "sqlite"):
+            await db.close()
+    finally:
+        cost = time.perf_counter() - start
+        lag_task.cancel()
+
+    return {
+        "platform": platform_name,
+        "flow": flow,
+        "store": store,
+        "items": counter["items"],
+        "seconds": round(cost, 3),
+        "items_per_sec": round(counter["items"] / cost, 2) if cost else 0,
+        "requests": len(latencies),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        # linux 下 ru_maxrss 单位是 KB，macOS 是字节
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+        "loop_lag_p99_ms": round(percentile(lag_samples, 99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lag_samples, default=0) * 1000, 2),
+        "transport": fixture.transport.stats(),
+    }
+
+
+def run_case_in_subprocess(platform_name: str, flow: str, store: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    每个用例在新的进程中执行，峰值内存和全局状态互不影响
+    """
+    command = [sys.executable, "-m", "benchmarks.crawl_benchmark", "--case", platform_name, flow, store,
+               "--items", str(args.items), "--latency", str(args.latency), "--error-rate", str(args.error_rate)]
+    output = subprocess.run(command, cwd=PROJECT_DIR, capture_output=True, text=True)
+    if output.returncode != 0:
+        return {"platform": platform_name, "flow": flow, "store": store, "error": output.stderr.strip()[-2000:]}
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'case':<24} {'items':>6} {'items/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'rss MB':>7} {'lag max ms':>10}")
+    for result in results:
+        case = f"{result['platform']}/{result['flow']}/{result['store']}"
+        if "error" in result:
+            print(f"{case:<24} error: {result['error'].splitlines()[-1] if result['error'] else ''}")
+            continue
+        print(f"{case:<24} {result['items']:>6} {result['items_per_sec']:>9.1f} {result['latency_p50_ms']:>8.1f} "
+              f"{result['latency_p99_ms']:>8.1f} {result['peak_rss_mb']:>7.1f} {result['loop_lag_max_ms']:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='End-to-end crawl throughput benchmark against a local mock API.')
+    parser.add_argument('--platforms', default=",".join(PLATFORMS), help='comma separated, supported: xhs,bili')
+    parser.add_argument('--flows', default=",".join(FLOWS), help='comma separated, supported: search,detail,creator')
+    parser.add_argument('--stores', default="csv,json,sqlite", help='comma separated, supported: csv,json,sqlite,db')
+    parser.add_argument('--items', type=int, default=200, help='number of notes/videos served by the mock API')
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated latency of each request (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of injected connection errors')
+    parser.add_argument('--output', default="", help='result json path, default benchmarks/results/<date>_<commit>.json')
+    parser.add_argument('--case', nargs=3, metavar=("PLATFORM", "FLOW", "STORE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        result = asyncio.get_event_loop().run_until_complete(
+            run_case(*args.case, items=args.items, latency=args.latency, error_rate=args.error_rate))
+        print(json.dumps(result))
+        return
+
+    results = []
+    for platform_name in args.platforms.split(","):
+        for flow in args.flows.split(","):
+            for store in args.stores.split(","):
+                if platform_name not in PLATFORMS or flow not in FLOWS or store not in STORES:
+                    raise ValueError(f"Unsupported benchmark case: {platform_name}/{flow}/{store}")
+                results.append(run_case_in_subprocess(platform_name, flow, store, args))
+    print_results(results)
+
+    commit = git_commit()
+    output = args.output or os.path.join(PROJECT_DIR, "benchmarks", "results",
+                                         f"{time.strftime('%Y%m%d%H%M%S')}_{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "options": {"items": args.items, "latency": args.latency, "error_rate": args.error_rate},
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
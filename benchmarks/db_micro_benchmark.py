@@ -0,0 +1,80 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 数据库存储层微基准：旧的 f-string + SELECT * 写法 vs TableQuery 参数化写法
+#            需要先配置好 config/db_config.py 中的 MySQL 并导入 schema/tables.sql
+#            用法: python -m benchmarks.db_micro_benchmark [--rows 1000]
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List
+
+from async_db import AsyncMysqlDB, TableQuery
+from db import close, init_mediacrawler_db
+from var import media_crawler_db_var
+
+TABLE_NAME = "xhs_note_comment"
+KEY_PREFIX = "bench_"
+
+
+def make_comment(i: int) -> Dict:
+    return {
+        "comment_id": f"{KEY_PREFIX}{i}",
+        "note_id": f"{KEY_PREFIX}note",
+        "content": f"benchmark comment {i}",
+        "like_count": str(i),
+        "add_ts": i,
+        "last_modify_ts": i,
+    }
+
+
+async def old_exists(async_db: AsyncMysqlDB, comment_id: str) -> bool:
+    rows = await async_db.query(f"select * from {TABLE_NAME} where comment_id = '{comment_id}'")
+    return len(rows) > 0
+
+
+async def old_update(async_db: AsyncMysqlDB, item: Dict) -> int:
+    return await async_db.update_table(TABLE_NAME, item, "comment_id", item["comment_id"])
+
+
+async def timeit(name: str, rows: List[Dict], func: Callable[[Dict], Awaitable]) -> None:
+    start = time.perf_counter()
+    for item in rows:
+        await func(item)
+    cost = time.perf_counter() - start
+    print(f"{name:<28} {len(rows) / cost:>10.1f} ops/s  {cost * 1000 / len(rows):>8.3f} ms/op")
+
+
+async def run(rows_count: int) -> None:
+    await init_mediacrawler_db()
+    async_db: AsyncMysqlDB = media_crawler_db_var.get()
+    query = TableQuery(TABLE_NAME)
+    rows = [make_comment(i) for i in range(rows_count)]
+    try:
+        await async_db.execute(f"DELETE FROM `{TABLE_NAME}` WHERE `comment_id` LIKE %s", KEY_PREFIX + "%")
+        await timeit("insert (item_to_table)", rows[: rows_count // 2],
+                     lambda item: async_db.item_to_table(TABLE_NAME, item))
+        await timeit("insert (TableQuery)", rows[rows_count // 2:], lambda item: query.insert(async_db, item))
+        await timeit("exists (select *)", rows, lambda item: old_exists(async_db, item["comment_id"]))
+        await timeit("exists (TableQuery)", rows, lambda item: query.exists(async_db, item["comment_id"]))
+        await timeit("update (update_table)", rows, lambda item: old_update(async_db, item))
+        await timeit("update (TableQuery)", rows, lambda item: query.update(async_db, item, item["comment_id"]))
+    finally:
+        await async_db.execute(f"DELETE FROM `{TABLE_NAME}` WHERE `comment_id` LIKE %s", KEY_PREFIX + "%")
+        await close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MySQL store layer micro benchmark.')
+    parser.add_argument('--rows', type=int, default=1000, help='number of rows to write and query')
+    args = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(run(args.rows))
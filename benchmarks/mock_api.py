@@ -0,0 +1,173 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 压测用的本地模拟接口：按请求路径和参数生成小红书、B站接口的响应，配合 tools.http_fixture 的 ReplayTransport 使用
+#            和录制文件一样提供 lookup(request) 方法，回放的延迟、错误注入对它同样生效
+import json
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import httpx
+
+BILI_WBI_IMG = "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png"
+BILI_WBI_SUB = "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png"
+
+
+def json_body(data: Any, status_code: int = 200) -> Dict[str, Any]:
+    return {
+        "status_code": status_code,
+        "headers": {"content-type": "application/json"},
+        "encoding": "text",
+        "body": json.dumps(data, ensure_ascii=False),
+    }
+
+
+def html_body(state: Dict) -> Dict[str, Any]:
+    return {
+        "status_code": 200,
+        "headers": {"content-type": "text/html"},
+        "encoding": "text",
+        "body": f"<html><script>window.__INITIAL_STATE__={json.dumps(state, ensure_ascii=False)}</script></html>",
+    }
+
+
+class FakeSignPage:
+    """
+    代替浏览器页面返回固定的签名结果，长度和真实签名一致
+    """
+
+    async def evaluate(self, expression, arg=None):
+        if "_webmsxyw" in expression:
+            return {"X-s": "X" * 48, "X-t": 1700000000000}
+        return {"b1": "b" * 40}
+
+
+class MockPlatformApi:
+    """
+    按路径路由的模拟接口，子类在 routes 中注册 路径片段 -> 处理函数
+    """
+
+    def __init__(self, total_items: int) -> None:
+        self.total_items = total_items
+        self.routes: Dict[str, Callable[[httpx.Request, Dict[str, str]], Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def lookup(self, request: httpx.Request) -> Optional[Dict[str, Any]]:
+        params = {k: v[0] for k, v in parse_qs(request.url.query.decode()).items()}
+        for path, handler in self.routes.items():
+            if path in request.url.path:
+                return handler(request, params)
+        return None
+
+
+class XhsMockApi(MockPlatformApi):
+    SEARCH_PAGE_SIZE = 20
+
+    def __init__(self, total_items: int) -> None:
+        super().__init__(total_items)
+        self.routes = {
+            "/api/sns/web/v1/search/notes": self.search_notes,
+            "/api/sns/web/v1/user_posted": self.user_posted,
+            "/explore/": self.note_detail,
+            "/user/profile/": self.creator_profile,
+        }
+
+    @staticmethod
+    def note_brief(note_id: str) -> Dict[str, Any]:
+        return {"id": note_id, "note_id": note_id, "xsec_source": "pc_search",
+                "xsec_token": f"token_{note_id}", "model_type": "note"}
+
+    def note_urls(self) -> List[str]:
+        return [f"https://www.xiaohongshu.com/explore/note_{i}?xsec_token=token_note_{i}&xsec_source=pc_search"
+                for i in range(self.total_items)]
+
+    def search_notes(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        page = json.loads(request.content).get("page", 1)
+        start = (page - 1) * self.SEARCH_PAGE_SIZE
+        items = [self.note_brief(f"note_{i}") for i in range(start, min(start + self.SEARCH_PAGE_SIZE, self.total_items))]
+        return json_body({"success": True, "data": {"has_more": bool(items), "items": items}})
+
+    def user_posted(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        start = int(params.get("cursor") or 0)
+        end = min(start + int(params.get("num", 30)), self.total_items)
+        notes = [self.note_brief(f"note_{i}") for i in range(start, end)]
+        return json_body({"success": True, "data": {"has_more": end < self.total_items, "cursor": str(end),
+                                                    "notes": notes}})
+
+    def note_detail(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        note_id = request.url.path.rsplit("/", 1)[-1]
+        return html_body({"note": {"noteDetailMap": {note_id: {"note": {
+            "noteId": note_id, "type": "normal", "title": f"title {note_id}", "desc": "模拟笔记内容 " * 20,
+            "time": 1700000000000, "lastUpdateTime": 1700000000000, "ipLocation": "上海",
+            "user": {"userId": "creator_0", "nickname": "模拟博主", "avatar": ""},
+            "interactInfo": {"likedCount": "10", "collectedCount": "2", "commentCount": "3", "shareCount": "1"},
+            "imageList": [{"urlDefault": f"https://sns-img.xhscdn.com/{note_id}_{i}"} for i in range(3)],
+            "tagList": [{"name": "编程", "type": "topic"}],
+        }}}}})
+
+    def creator_profile(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        return html_body({"user": {"userPageData": {
+            "basicInfo": {"nickname": "模拟博主", "gender": 0, "images": "", "desc": "", "ipLocation": "上海"},
+            "interactions": [{"type": "follows", "count": "1"}, {"type": "fans", "count": "100"},
+                             {"type": "interaction", "count": "1000"}],
+            "tags": [],
+        }}})
+
+
+class BiliMockApi(MockPlatformApi):
+
+    def __init__(self, total_items: int) -> None:
+        super().__init__(total_items)
+        self.routes = {
+            "/x/web-interface/nav": self.nav,
+            "/x/web-interface/wbi/search/type": self.search_videos,
+            "/x/web-interface/view/detail": self.video_detail,
+            "/x/space/wbi/arc/search": self.creator_videos,
+        }
+
+    def bvids(self) -> List[str]:
+        return [f"BV{i:010d}" for i in range(1, self.total_items + 1)]
+
+    def nav(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        return json_body({"code": 0, "data": {"isLogin": True,
+                                              "wbi_img": {"img_url": BILI_WBI_IMG, "sub_url": BILI_WBI_SUB}}})
+
+    def search_videos(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        page, page_size = int(params.get("page", 1)), int(params.get("page_size", 20))
+        start = (page - 1) * page_size + 1
+        result = [{"aid": aid} for aid in range(start, min(start + page_size, self.total_items + 1))]
+        return json_body({"code": 0, "data": {"result": result}})
+
+    def video_detail(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        aid = int(params["aid"]) if params.get("aid") else int(params["bvid"][2:])
+        return json_body({"code": 0, "data": {
+            "View": {"aid": aid, "cid": aid, "bvid": f"BV{aid:010d}", "title": f"video {aid}", "desc": "模拟视频简介",
+                     "pubdate": 1700000000, "pic": "", "owner": {"mid": 1, "name": "模拟UP主", "face": ""},
+                     "stat": {"like": 10, "dislike": 0, "view": 100, "favorite": 1, "share": 1, "coin": 1,
+                              "danmaku": 1, "reply": 1}},
+            "Card": {"card": {"mid": 1, "name": "模拟UP主", "sex": "保密", "sign": "", "face": "", "fans": 100,
+                              "level_info": {"current_level": 6}, "official_verify": {"type": -1}},
+                     "like_num": 1000},
+        }})
+
+    def creator_videos(self, request: httpx.Request, params: Dict[str, str]) -> Dict[str, Any]:
+        pn, ps = int(params.get("pn", 1)), int(params.get("ps", 30))
+        vlist = [{"bvid": bvid} for bvid in self.bvids()[(pn - 1) * ps: pn * ps]]
+        return json_body({"code": 0, "data": {"list": {"vlist": vlist}, "page": {"count": self.total_items}}})
+
+
+MOCK_APIS = {
+    "xhs": XhsMockApi,
+    "bili": BiliMockApi,
+}
@@ -16,7 +16,7 @@
 # @Desc    : 抽象类
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class AbstractCache(ABC):
@@ -51,3 +51,54 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+    @abstractmethod
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取多个键的值，返回顺序与keys一致，不存在的键为None
+        :param keys: 键列表
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置多个键的值，过期时间相同
+        :param mapping: 键值对
+        :param expire_time: 过期时间
+        :return:
+        """
+        raise NotImplementedError
+
+
+class AbstractAsyncCache(ABC):
+    """
+    异步缓存接口，方法含义与 AbstractCache 一致，供协程中调用，不阻塞事件循环
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def keys(self, pattern: str) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+        释放缓存占用的连接等资源
+        :return:
+        """
@@ -0,0 +1,97 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 redis.asyncio 的异步RedisCache实现
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from redis.asyncio import ConnectionPool, Redis
+
+from cache import codec
+from cache.abs_cache import AbstractAsyncCache
+from config import db_config
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+
+    def __init__(self) -> None:
+        self._pool = ConnectionPool(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+            max_connections=db_config.REDIS_MAX_CONNECTIONS,
+        )
+        self._redis_client = Redis(connection_pool=self._pool)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值, 并且反序列化
+        :param key:
+        :return:
+        """
+        value = await self._redis_client.get(key)
+        if value is None:
+            return None
+        return codec.decode(value)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中, 并且序列化
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        await self._redis_client.set(key, codec.encode(value), ex=expire_time)
+
+    async def iter_keys(self, pattern: str) -> AsyncIterator[str]:
+        """
+        使用 SCAN 分批遍历符合pattern的key
+        :param pattern:
+        :return:
+        """
+        async for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT):
+            yield key.decode()
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key
+        :param pattern:
+        :return:
+        """
+        return [key async for key in self.iter_keys(pattern)]
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        一次请求批量获取多个键的值
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        return [None if value is None else codec.decode(value) for value in await self._redis_client.mget(keys)]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        通过 pipeline 一次往返批量设置多个键的值
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, codec.encode(value), ex=expire_time)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._redis_client.close()
+        await self._pool.disconnect()
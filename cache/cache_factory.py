@@ -38,3 +38,21 @@ class CacheFactory:
             return RedisCache()
         else:
             raise ValueError(f'Unknown cache type: {cache_type}')
+
+    @staticmethod
+    def create_async_cache(cache_type: str, *args, **kwargs):
+        """
+        创建异步缓存对象，在协程中使用，不阻塞事件循环
+        :param cache_type: 缓存类型
+        :param args: 参数
+        :param kwargs: 关键字参数
+        :return:
+        """
+        if cache_type == 'memory':
+            from .local_cache import AsyncLocalCache
+            return AsyncLocalCache(*args, **kwargs)
+        elif cache_type == 'redis':
+            from .async_redis_cache import AsyncRedisCache
+            return AsyncRedisCache()
+        else:
+            raise ValueError(f'Unknown cache type: {cache_type}')
@@ -0,0 +1,77 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 缓存值的序列化编解码，安装了 msgpack 时使用 msgpack，否则使用 JSON
+#            编码结果带1个字节的格式前缀，两种格式写入的数据可以互相读取
+import base64
+import json
+from typing import Any, Dict
+
+from tools import utils
+
+try:
+    import msgpack
+except ImportError:  # msgpack 是可选依赖
+    msgpack = None
+
+MSGPACK_PREFIX = b"m"
+JSON_PREFIX = b"j"
+# 旧版本用 pickle 写入的值等无法识别的数据只提示一次
+_unknown_format_logged = False
+
+# JSON 不支持 bytes，编码成 {"__bytes__": "<base64>"} 这样的对象
+JSON_BYTES_TAG = "__bytes__"
+
+
+def _json_default(value: Any) -> Dict[str, str]:
+    if isinstance(value, (bytes, bytearray)):
+        return {JSON_BYTES_TAG: base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"cache value of type {type(value).__name__} is not serializable")
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and JSON_BYTES_TAG in obj:
+        return base64.b64decode(obj[JSON_BYTES_TAG])
+    return obj
+
+
+def encode(value: Any) -> bytes:
+    """
+    序列化缓存值，只支持 str/bytes/int/float/bool/None 以及由它们组成的 list/dict
+    :param value:
+    :return:
+    """
+    if msgpack is not None:
+        return MSGPACK_PREFIX + msgpack.packb(value, use_bin_type=True)
+    return JSON_PREFIX + json.dumps(value, ensure_ascii=False, separators=(",", ":"),
+                                    default=_json_default).encode("utf-8")
+
+
+def decode(data: bytes) -> Any:
+    """
+    反序列化缓存值，无法识别的格式（例如旧版本用 pickle 写入的值）当作缓存未命中，返回 None
+    :param data:
+    :return:
+    """
+    prefix, body = data[:1], data[1:]
+    if prefix == MSGPACK_PREFIX:
+        if msgpack is None:
+            raise ValueError("cache value is encoded by msgpack, please pip install msgpack")
+        return msgpack.unpackb(body, raw=False)
+    if prefix == JSON_PREFIX:
+        return json.loads(body, object_hook=_json_object_hook)
+    global _unknown_format_logged
+    if not _unknown_format_logged:
+        _unknown_format_logged = True
+        utils.logger.warning(f"[codec.decode] unknown cache value format: {data[:16]!r}, treat it as a cache miss "
+                             f"(values written by an older version are ignored until they expire)")
+    return None
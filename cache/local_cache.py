@@ -19,7 +19,7 @@ import asyncio
 import time
 from typing import Any, Dict, List, Optional, Tuple
 
-from cache.abs_cache import AbstractCache
+from cache.abs_cache import AbstractAsyncCache, AbstractCache
 
 
 class ExpiringLocalCache(AbstractCache):
@@ -86,6 +86,24 @@ class ExpiringLocalCache(AbstractCache):
 
         return [key for key in self._cache_container.keys() if pattern in key]
 
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取多个键的值
+        :param keys:
+        :return:
+        """
+        return [self.get(key) for key in keys]
+
+    def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置多个键的值
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        for key, value in mapping.items():
+            self.set(key, value, expire_time)
+
     def _schedule_clear(self):
         """
         开启定时清理任务,
@@ -119,6 +137,30 @@ class ExpiringLocalCache(AbstractCache):
             await asyncio.sleep(self._cron_interval)
 
 
+class AsyncLocalCache(AbstractAsyncCache):
+    """
+    ExpiringLocalCache 的异步接口，本地缓存的读写不会阻塞，直接调用同步实现
+    """
+
+    def __init__(self, cron_interval: int = 10):
+        self._cache = ExpiringLocalCache(cron_interval=cron_interval)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        self._cache.set(key, value, expire_time)
+
+    async def keys(self, pattern: str) -> List[str]:
+        return self._cache.keys(pattern)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        return self._cache.mget(keys)
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        self._cache.mset(mapping, expire_time)
+
+
 if __name__ == '__main__':
     cache = ExpiringLocalCache(cron_interval=2)
     cache.set('name', '程序员阿江-Relakkes', 3)
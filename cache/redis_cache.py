@@ -14,12 +14,12 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/5/29 22:57
 # @Desc    : RedisCache实现
-import pickle
 import time
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 from redis import Redis
 
+from cache import codec
 from cache.abs_cache import AbstractCache
 from config import db_config
 
@@ -52,7 +52,7 @@ class RedisCache(AbstractCache):
         value = self._redis_client.get(key)
         if value is None:
             return None
-        return pickle.loads(value)
+        return codec.decode(value)
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
@@ -62,13 +62,35 @@ class RedisCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+        self._redis_client.set(key, codec.encode(value), ex=expire_time)
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，使用 SCAN 分批遍历，避免 KEYS 阻塞redis
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT)]
+
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        一次请求批量获取多个键的值
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        return [None if value is None else codec.decode(value) for value in self._redis_client.mget(keys)]
+
+    def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        通过 pipeline 一次往返批量设置多个键的值
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        pipe = self._redis_client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(key, codec.encode(value), ex=expire_time)
+        pipe.execute()
 
 
 if __name__ == '__main__':
@@ -33,9 +33,19 @@ async def parse_cmd():
     parser.add_argument('--get_sub_comment', type=str2bool,
                         help=''''whether to crawl level two comment, supported values case insensitive ('yes', 'true', 't', 'y', '1', 'no', 'false', 'f', 'n', '0')''', default=config.ENABLE_GET_SUB_COMMENTS)
     parser.add_argument('--save_data_option', type=str,
-                        help='where to save the data (csv or db or json)', choices=['csv', 'db', 'json'], default=config.SAVE_DATA_OPTION)
+                        help='where to save the data (csv or db or json or sqlite)', choices=['csv', 'db', 'json', 'sqlite'], default=config.SAVE_DATA_OPTION)
     parser.add_argument('--cookies', type=str,
                         help='cookies used for cookie login type', default=config.COOKIES)
+    parser.add_argument('--api_mode', type=str2bool,
+                        help='reuse the saved login state and crawl without launching a browser (bili | wb | ks | zhihu)', default=config.ENABLE_API_MODE)
+    parser.add_argument('--account', type=str,
+                        help='account name, login states are cached per platform and account', default=config.LOGIN_ACCOUNT)
+    parser.add_argument('--watch_loop', type=str2bool,
+                        help='detect calls that block the event loop and report their stacks on exit', default=config.ENABLE_LOOP_WATCHDOG)
+    parser.add_argument('--profile', type=str2bool,
+                        help='sample the crawl with a profiler and save flamegraph stacks and a summary', default=config.ENABLE_PROFILE)
+    parser.add_argument('--profile_memory', type=str2bool,
+                        help='also trace memory allocations with tracemalloc when profiling', default=config.PROFILE_MEMORY)
 
     args = parser.parse_args()
 
@@ -49,3 +59,8 @@ async def parse_cmd():
     config.ENABLE_GET_SUB_COMMENTS = args.get_sub_comment
     config.SAVE_DATA_OPTION = args.save_data_option
     config.COOKIES = args.cookies
+    config.ENABLE_API_MODE = args.api_mode
+    config.LOGIN_ACCOUNT = args.account
+    config.ENABLE_LOOP_WATCHDOG = args.watch_loop
+    config.ENABLE_PROFILE = args.profile
+    config.PROFILE_MEMORY = args.profile_memory
@@ -45,12 +45,46 @@ HEADLESS = False
 # 是否保存登录状态
 SAVE_LOGIN_STATE = True
 
-# 数据保存类型选项配置,支持三种类型：csv、db、json, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json
+# 登录态缓存：按 平台+账号 缓存 cookies 和签名用到的 localStorage 值，多次运行、多个进程之间共享
+# file: 保存在 browser_data/login_state 目录下，redis: 保存在 redis 中（多台机器共享）
+LOGIN_STATE_CACHE_TYPE = "file"
+# 登录态 pong 校验通过后的有效期（秒），有效期内启动时跳过 pong 检查（小红书的 pong 是一次完整的关键词搜索）
+LOGIN_STATE_TTL = 6 * 3600
+# 当前使用的账号名，登录态缓存按账号区分
+LOGIN_ACCOUNT = "default"
+
+# 多账号池：每个请求轮流使用不同账号的cookie，每个账号单独限速，出现验证码/IP封禁的账号进入冷却，只支持 xhs，其他平台忽略该配置
+# 除当前登录的账号外，其他账号需要先分别设置 LOGIN_ACCOUNT 登录一次，登录态保存在登录态缓存中
+# 小红书的签名在当前浏览器中计算，依赖浏览器的 a1，其他账号必须在同一个浏览器（同一个 a1）中登录，a1 不一致的账号会被跳过
+ENABLE_ACCOUNT_POOL = False
+# 账号池中的账号名
+ACCOUNT_POOL_ACCOUNTS = []
+# 每个账号每秒最多发起的请求数，以及允许的突发请求数
+ACCOUNT_REQUESTS_PER_SECOND = 0.5
+ACCOUNT_REQUEST_BURST = 3
+# 账号出现验证码/被封禁后的冷却时间（秒），连续失败时翻倍
+ACCOUNT_COOLDOWN_SECONDS = 300
+
+# API 模式：不启动浏览器，直接复用登录态缓存中当前账号（LOGIN_ACCOUNT）的 cookies 和签名参数请求接口，
+# 在 LOGIN_STATE_TTL 有效期内不再 pong，登录态不存在或失效时才启动浏览器重新登录。支持 bili、wb、ks、zhihu，贴吧本身不需要浏览器
+ENABLE_API_MODE = False
+
+# 数据保存类型选项配置,支持四种类型：csv、db、json、sqlite, 最好保存到DB，有排重的功能。
+# sqlite 为本地嵌入式数据库（见 db_config.SQLITE_DB_PATH），无需部署MySQL也能排重
+SAVE_DATA_OPTION = "json"  # csv or db or json or sqlite
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
 
+# 是否拦截浏览器中的图片、视频、字体和统计埋点请求（只需要cookie和签名js），节省浏览器CPU和代理流量
+# 登录时会暂停拦截，保证二维码和滑块验证码能正常显示
+ENABLE_BLOCK_RESOURCES = False
+# 拦截的资源类型，取值见 playwright Request.resource_type
+BLOCK_RESOURCE_TYPES = ["image", "media", "font"]
+
+# 小红书、抖音、B站在浏览器里执行签名/读取localStorage 的页面数，并发数较高时可以调大，每多一个页面大约多占用几十MB内存
+BROWSER_PAGE_POOL_SIZE = 1
+
 # 爬取开始页数 默认从第一页开始
 START_PAGE = 1
 
@@ -60,6 +94,100 @@ CRAWLER_MAX_NOTES_COUNT = 200
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
+# 自适应并发（AIMD）：以 MAX_CONCURRENCY_NUM 作为初始并发数，请求成功且延迟正常时每轮并发+1（不超过 ADAPTIVE_CONCURRENCY_MAX），
+# 出现验证码、封禁、403 时并发减半，关闭后并发数固定为 MAX_CONCURRENCY_NUM
+ENABLE_ADAPTIVE_CONCURRENCY = True
+# 自适应并发的上限，默认等于 MAX_CONCURRENCY_NUM，即只会在被限流时降低并发、不会超过配置的并发数；
+# 需要自动提高并发时再调大，注意会相应增加对平台的请求压力
+ADAPTIVE_CONCURRENCY_MAX = MAX_CONCURRENCY_NUM
+# 请求平均耗时超过该秒数时不再增加并发
+ADAPTIVE_LATENCY_THRESHOLD = 3
+
+# 各类任务的初始并发数，整个爬取过程共享，不会因为多页、多个帖子同时处理而叠加
+# detail: 帖子/视频详情, comment: 一级评论, sub_comment: 二级评论, media: 图片/视频下载
+CRAWL_BUDGET_LANE_LIMITS = {
+    "detail": MAX_CONCURRENCY_NUM,
+    "comment": MAX_CONCURRENCY_NUM,
+    "sub_comment": MAX_CONCURRENCY_NUM,
+    "media": MAX_CONCURRENCY_NUM,
+}
+
+# 熔断：连续出现封禁类错误达到该次数后暂停该平台的请求（目前用于快手评论）
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+# 熔断后的冷却时间（秒），冷却结束后的探测请求仍然失败时翻倍，最长不超过 CIRCUIT_BREAKER_MAX_COOLDOWN
+CIRCUIT_BREAKER_COOLDOWN = 20
+CIRCUIT_BREAKER_MAX_COOLDOWN = 300
+# 因为封禁失败的任务最多重试的次数
+BLOCKED_TASK_MAX_RETRIES = 2
+
+# 请求重试策略：超时、网络错误、5xx 时重试，验证码/封禁类错误和平台返回的错误数据（data，例如笔记不存在、登录失效）默认不重试
+# 单个请求最多尝试的次数（包含第一次）
+RETRY_MAX_ATTEMPTS = 3
+# 指数退避的基础等待时间和最长等待时间（秒），实际等待时间在 [0, 退避时间] 之间随机
+RETRY_BASE_DELAY = 1
+RETRY_MAX_DELAY = 10
+# 全局重试预算：重试次数最多约为请求数的多少倍，平台大面积出错时避免重试风暴
+RETRY_BUDGET_RATIO = 0.2
+# 按接口覆盖重试策略，key 是URL片段，例如 {"/api/sns/web/v1/search/notes": {"max_attempts": 2, "retry_on": ["timeout", "network"]}}
+# 某个接口的错误数据是临时性的（例如系统繁忙）时，可以在 retry_on 中加上 "data"
+RETRY_ENDPOINT_POLICIES = {}
+
+# HTTP 录制回放（离线压测用）：record 录制平台接口的响应，replay 从录制文件返回响应、不访问网络，空字符串表示关闭
+HTTP_FIXTURE_MODE = ""
+# 录制文件路径，{platform} 会替换成平台名
+HTTP_FIXTURE_PATH = "fixtures/http/{platform}.json"
+# 是否录制图片、视频等二进制响应，默认不录制（录制文件会很大），set-cookie 等登录态响应头始终不录制
+HTTP_FIXTURE_RECORD_MEDIA = False
+# 回放时每个请求的模拟耗时（秒），实际耗时在 [LATENCY, LATENCY + LATENCY_JITTER] 之间
+HTTP_REPLAY_LATENCY = 0.05
+HTTP_REPLAY_LATENCY_JITTER = 0
+# 回放时注入错误的概率，ERROR_STATUS 为 0 时注入连接错误，否则返回该状态码
+HTTP_REPLAY_ERROR_RATE = 0
+HTTP_REPLAY_ERROR_STATUS = 0
+
+# 爬虫内部指标（请求数、状态码、签名/解析/存储耗时、并发队列、重试次数），Prometheus 文本格式
+ENABLE_METRICS = False
+# 指标 HTTP 端口，Prometheus 从 http://METRICS_HOST:METRICS_PORT/metrics 抓取，0 表示不启动
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+# 定时把指标写入文件（node_exporter textfile collector 或 pushgateway 推送用），空字符串表示不写
+METRICS_TEXTFILE_PATH = ""
+METRICS_TEXTFILE_INTERVAL = 15
+
+# 事件循环卡顿检测，阻塞事件循环超过阈值（秒）的调用会抓取调用栈，退出时按阻塞总时长输出，命令行 --watch_loop 开启
+ENABLE_LOOP_WATCHDOG = False
+LOOP_WATCHDOG_THRESHOLD = 0.1
+# 心跳间隔（秒）
+LOOP_WATCHDOG_INTERVAL = 0.05
+
+# 分页接口在处理（存储）当前页的同时请求下一页
+ENABLE_PAGE_PREFETCH = True
+
+# 爬取结束后按关键词/创作者输出爬取报告（请求页数、保存条数、下载字节数、各阶段耗时、重试和被限流次数）
+ENABLE_RUN_REPORT = True
+RUN_REPORT_DIR = "data/run_report"
+
+# 采样分析，命令行 --profile 开启，结束后在 PROFILE_OUTPUT_DIR 下生成火焰图用的 folded 文件和按子系统汇总的摘要
+ENABLE_PROFILE = False
+# 采样间隔（秒）
+PROFILE_INTERVAL = 0.005
+# 同时用 tracemalloc 统计内存分配（开销较大），命令行 --profile_memory 开启
+PROFILE_MEMORY = False
+PROFILE_TOP_N = 20
+PROFILE_OUTPUT_DIR = "data/profile"
+
+# 日志格式：text 或 json（每行一个 JSON，方便日志系统采集）
+LOG_FORMAT = "text"
+# 按类别设置日志级别，store: 每条数据的保存日志, api: 接口返回的完整数据（DEBUG 级别才输出）
+LOG_CATEGORY_LEVELS = {
+    "store": "INFO",
+    "api": "INFO",
+}
+# 每条数据的保存日志每隔多少条输出一条，1 表示全部输出
+LOG_ITEM_SAMPLE_EVERY = 100
+# 日志在后台线程中格式化和写入，爬取的协程里只做入队
+ENABLE_ASYNC_LOG = True
+
 # 是否开启爬图片模式, 默认不开启爬图片
 ENABLE_GET_IMAGES = False
 
@@ -73,6 +201,9 @@ CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = 10
 # 老版本项目使用了 db, 则需参考 schema/tables.sql line 287 增加表字段
 ENABLE_GET_SUB_COMMENTS = False
 
+# 一条笔记同时展开二级评论的一级评论数上限，所有笔记共享 CRAWL_BUDGET_LANE_LIMITS["sub_comment"] 的并发预算，1 表示串行
+SUB_COMMENT_CONCURRENCY_PER_NOTE = 4
+
 # 已废弃⚠️⚠️⚠️指定小红书需要爬虫的笔记ID列表
 # 已废弃⚠️⚠️⚠️ 指定笔记ID笔记列表会因为缺少xsec_token和xsec_source参数导致爬取失败
 # XHS_SPECIFIED_ID_LIST = [
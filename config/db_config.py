@@ -17,6 +17,25 @@ RELATION_DB_USER = os.getenv("RELATION_DB_USER", "root")
 RELATION_DB_HOST = os.getenv("RELATION_DB_HOST", "localhost")
 RELATION_DB_PORT = os.getenv("RELATION_DB_PORT", 3306)
 RELATION_DB_NAME = os.getenv("RELATION_DB_NAME", "media_crawler")
+# 连接池最小/最大连接数，最大连接数一般不小于 MAX_CONCURRENCY_NUM
+RELATION_DB_POOL_MINSIZE = int(os.getenv("RELATION_DB_POOL_MINSIZE", 1))
+RELATION_DB_POOL_MAXSIZE = int(os.getenv("RELATION_DB_POOL_MAXSIZE", 10))
+# 连接空闲超过该秒数后重建，需小于 MySQL 的 wait_timeout，-1 表示不回收
+RELATION_DB_POOL_RECYCLE = int(os.getenv("RELATION_DB_POOL_RECYCLE", 3600))
+# 建立连接的超时时间（秒）
+RELATION_DB_CONNECT_TIMEOUT = int(os.getenv("RELATION_DB_CONNECT_TIMEOUT", 10))
+# 启动时预热连接池
+RELATION_DB_POOL_WARMUP = os.getenv("RELATION_DB_POOL_WARMUP", "true").lower() == "true"
+# 关闭时等待借出的连接归还的最长时间（秒）
+RELATION_DB_POOL_DRAIN_TIMEOUT = int(os.getenv("RELATION_DB_POOL_DRAIN_TIMEOUT", 30))
+
+
+# sqlite config
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "data/media_crawler.db")
+# 后台写入任务每个事务最多写入的记录数
+SQLITE_WRITE_BATCH_SIZE = int(os.getenv("SQLITE_WRITE_BATCH_SIZE", 200))
+# 后台写入任务攒批的最长等待时间（秒）
+SQLITE_FLUSH_INTERVAL = float(os.getenv("SQLITE_FLUSH_INTERVAL", 0.5))
 
 
 # redis config
@@ -24,6 +43,8 @@ REDIS_DB_HOST = "127.0.0.1"  # your redis host
 REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20))  # 异步redis连接池最大连接数
+REDIS_SCAN_COUNT = int(os.getenv("REDIS_SCAN_COUNT", 500))  # SCAN 遍历key时每批的数量
 
 # cache type
 CACHE_TYPE_REDIS = "redis"
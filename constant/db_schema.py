@@ -0,0 +1,39 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+from typing import Dict, Tuple
+
+# 每张表的业务唯一键，和 schema/tables.sql、schema/sqlite_tables.sql 中的 UNIQUE KEY 保持一致
+TABLE_UNIQUE_KEYS: Dict[str, Tuple[str, ...]] = {
+    "bilibili_video": ("video_id",),
+    "bilibili_video_comment": ("comment_id",),
+    "bilibili_up_info": ("user_id",),
+    "bilibili_contact_info": ("up_id", "fan_id"),
+    "bilibili_up_dynamic": ("dynamic_id",),
+    "douyin_aweme": ("aweme_id",),
+    "douyin_aweme_comment": ("comment_id",),
+    "dy_creator": ("user_id",),
+    "kuaishou_video": ("video_id",),
+    "kuaishou_video_comment": ("comment_id",),
+    "weibo_note": ("note_id",),
+    "weibo_note_comment": ("comment_id",),
+    "weibo_creator": ("user_id",),
+    "xhs_creator": ("user_id",),
+    "xhs_note": ("note_id",),
+    "xhs_note_comment": ("comment_id",),
+    "tieba_note": ("note_id",),
+    "tieba_comment": ("comment_id",),
+    "tieba_creator": ("user_id",),
+    "zhihu_content": ("content_id",),
+    "zhihu_comment": ("comment_id",),
+    "zhihu_creator": ("user_id",),
+}
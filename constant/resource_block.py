@@ -0,0 +1,36 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# 浏览器请求拦截配置：爬虫只需要页面的 cookie 和 js 全局对象（签名函数、localStorage），
+# 图片、视频、字体和统计埋点请求都可以直接拦截掉
+from typing import Dict, Tuple
+
+# 按资源类型拦截，取值见 playwright Request.resource_type
+BLOCK_RESOURCE_TYPES: Tuple[str, ...] = ("image", "media", "font")
+
+# 所有平台都拦截的统计埋点
+COMMON_TRACKER_PATTERNS: Tuple[str, ...] = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "hm.baidu.com",
+    "cnzz.com",
+)
+
+# 各平台自己的统计埋点/广告域名，按 URL 子串匹配
+PLATFORM_TRACKER_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "xhs": ("apm-fe.xiaohongshu.com", "t2.xiaohongshu.com", "lng.xiaohongshu.com"),
+    "dy": ("mcs.zijieapi.com", "mon.zijieapi.com", "lf3-cdn-tos.bytegoofy.com/goofy/ies/douyin_web/slardar"),
+    "ks": ("log-sdk.ksapisrv.com", "wlog.kuaishou.com"),
+    "bili": ("data.bilibili.com", "cm.bilibili.com"),
+    "wb": ("beacon.sina.com.cn", "sbeacon.sina.com.cn", "wbclick.cn"),
+    "zhihu": ("datahub.zhihu.com", "zhihu-web-analytics.zhihu.com"),
+}
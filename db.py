@@ -22,8 +22,9 @@ import aiomysql
 
 import config
 from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
 from tools import utils
-from var import db_conn_pool_var, media_crawler_db_var
+from var import db_conn_pool_var, media_crawler_db_var, sqlite_db_var
 
 
 async def init_mediacrawler_db():
@@ -39,14 +40,37 @@ async def init_mediacrawler_db():
         password=config.RELATION_DB_PWD,
         db=config.RELATION_DB_NAME,
         autocommit=True,
+        minsize=config.RELATION_DB_POOL_MINSIZE,
+        maxsize=config.RELATION_DB_POOL_MAXSIZE,
+        pool_recycle=config.RELATION_DB_POOL_RECYCLE,
+        connect_timeout=config.RELATION_DB_CONNECT_TIMEOUT,
     )
     async_db_obj = AsyncMysqlDB(pool)
+    if config.RELATION_DB_POOL_WARMUP:
+        await async_db_obj.warmup()
 
     # 将连接池对象和封装的CRUD sql接口对象放到上下文变量中
     db_conn_pool_var.set(pool)
     media_crawler_db_var.set(async_db_obj)
 
 
+async def init_sqlite_db():
+    """
+    初始化本地sqlite数据库（WAL模式），自动创建不存在的表，并将该对象塞给sqlite_db_var上下文变量
+    Returns:
+
+    """
+    async_sqlite_obj = AsyncSqliteDB(
+        config.SQLITE_DB_PATH,
+        batch_size=config.SQLITE_WRITE_BATCH_SIZE,
+        flush_interval=config.SQLITE_FLUSH_INTERVAL,
+    )
+    await async_sqlite_obj.connect()
+    async with aiofiles.open("schema/sqlite_tables.sql", mode="r", encoding="utf-8") as f:
+        await async_sqlite_obj.execute_script(await f.read())
+    sqlite_db_var.set(async_sqlite_obj)
+
+
 async def init_db():
     """
     初始化db连接池
@@ -54,7 +78,10 @@ async def init_db():
 
     """
     utils.logger.info("[init_db] start init mediacrawler db connect object")
-    await init_mediacrawler_db()
+    if config.SAVE_DATA_OPTION == "sqlite":
+        await init_sqlite_db()
+    else:
+        await init_mediacrawler_db()
     utils.logger.info("[init_db] end init mediacrawler db connect object")
 
 
@@ -65,9 +92,25 @@ async def close():
 
     """
     utils.logger.info("[close] close mediacrawler db pool")
-    db_pool: aiomysql.Pool = db_conn_pool_var.get()
-    if db_pool is not None:
-        db_pool.close()
+    sqlite_db: AsyncSqliteDB = sqlite_db_var.get(None)
+    if sqlite_db is not None:
+        # 等待后台写入任务把队列中的数据全部落库
+        await sqlite_db.close()
+        return
+    db_pool: aiomysql.Pool = db_conn_pool_var.get(None)
+    if db_pool is None:
+        return
+    async_db_obj: AsyncMysqlDB = media_crawler_db_var.get(None)
+    if async_db_obj is not None:
+        utils.logger.info(f"[close] mediacrawler db pool stats: {async_db_obj.stats()}")
+    # close 之后不再发放新连接，wait_closed 等待借出的连接全部归还后再断开
+    db_pool.close()
+    try:
+        await asyncio.wait_for(db_pool.wait_closed(), timeout=config.RELATION_DB_POOL_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        utils.logger.warning("[close] wait db pool drain timeout, terminate the remaining connections")
+        db_pool.terminate()
+        await db_pool.wait_closed()
 
 
 async def init_table_schema():
@@ -0,0 +1,136 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 老版本数据库迁移工具：去重后给每张表加上业务唯一键
+#            用法: python db_migrate.py [--dry-run]
+import argparse
+import asyncio
+from typing import Dict, List, Tuple
+
+from async_db import AsyncMysqlDB
+from constant.db_schema import TABLE_UNIQUE_KEYS
+from db import close, init_mediacrawler_db
+from tools import utils
+from var import media_crawler_db_var
+
+
+async def get_table_indexes(async_db_obj: AsyncMysqlDB, table_name: str) -> Dict[str, Dict]:
+    """
+    查询表上已有的索引
+    Args:
+        async_db_obj:
+        table_name:
+
+    Returns: {index_name: {"unique": bool, "columns": (col1, col2, ...)}}
+
+    """
+    sql = ("SELECT INDEX_NAME, NON_UNIQUE, COLUMN_NAME FROM information_schema.STATISTICS "
+           "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY INDEX_NAME, SEQ_IN_INDEX")
+    rows = await async_db_obj.query(sql, table_name)
+    indexes: Dict[str, Dict] = {}
+    for row in rows:
+        index = indexes.setdefault(row["INDEX_NAME"], {"unique": not row["NON_UNIQUE"], "columns": ()})
+        index["columns"] += (row["COLUMN_NAME"],)
+    return indexes
+
+
+def _key_condition(keys: Tuple[str, ...], left: str, right: str) -> str:
+    return " AND ".join(f"{left}.`{k}` = {right}.`{k}`" for k in keys)
+
+
+async def count_duplicate_rows(async_db_obj: AsyncMysqlDB, table_name: str, keys: Tuple[str, ...]) -> int:
+    """
+    统计按唯一键去重时需要删除的行数
+    """
+    key_columns = ",".join(f"`{k}`" for k in keys)
+    not_null = " AND ".join(f"`{k}` IS NOT NULL" for k in keys)
+    sql = (f"SELECT COALESCE(SUM(cnt - 1), 0) AS dup FROM "
+           f"(SELECT COUNT(*) AS cnt FROM `{table_name}` WHERE {not_null} GROUP BY {key_columns} HAVING cnt > 1) d")
+    row = await async_db_obj.get_first(sql)
+    return int(row["dup"]) if row else 0
+
+
+async def dedupe_table(async_db_obj: AsyncMysqlDB, table_name: str, keys: Tuple[str, ...]) -> int:
+    """
+    按唯一键去重：保留id最大（最后写入）的一条，并把它的add_ts修正为这组记录里最早的add_ts
+    """
+    key_columns = ",".join(f"`{k}`" for k in keys)
+    # 唯一键里有NULL的行不会被删除（NULL不相等），也不能参与add_ts修正，和 count_duplicate_rows 保持一致
+    not_null = " AND ".join(f"`{k}` IS NOT NULL" for k in keys)
+    await async_db_obj.execute(
+        f"UPDATE `{table_name}` t1 INNER JOIN "
+        f"(SELECT {key_columns}, MIN(`add_ts`) AS min_add_ts, MAX(`id`) AS max_id FROM `{table_name}` "
+        f"WHERE {not_null} GROUP BY {key_columns} HAVING COUNT(*) > 1) d ON t1.`id` = d.max_id "
+        f"SET t1.`add_ts` = d.min_add_ts"
+    )
+    return await async_db_obj.execute(
+        f"DELETE t1 FROM `{table_name}` t1 INNER JOIN `{table_name}` t2 "
+        f"ON {_key_condition(keys, 't1', 't2')} AND t1.`id` < t2.`id`"
+    )
+
+
+async def migrate_table(async_db_obj: AsyncMysqlDB, table_name: str, keys: Tuple[str, ...], dry_run: bool) -> None:
+    """
+    迁移一张表：去重 -> 删除被唯一键覆盖的旧普通索引 -> 增加唯一键
+    """
+    indexes = await get_table_indexes(async_db_obj, table_name)
+    if not indexes:
+        utils.logger.warning(f"[migrate_table] table {table_name} not exists, skip")
+        return
+    if any(index["unique"] and index["columns"] == keys for index in indexes.values()):
+        utils.logger.info(f"[migrate_table] table {table_name} already has unique key {keys}, skip")
+        return
+
+    dup_count = await count_duplicate_rows(async_db_obj, table_name, keys)
+    if dry_run:
+        utils.logger.info(f"[migrate_table] [dry-run] table {table_name} has {dup_count} duplicate rows on {keys}")
+        return
+    if dup_count:
+        deleted = await dedupe_table(async_db_obj, table_name, keys)
+        utils.logger.info(f"[migrate_table] table {table_name} deleted {deleted} duplicate rows")
+
+    # 旧的普通索引如果是唯一键的前缀，加上唯一键之后就是多余的
+    alter_actions: List[str] = [
+        f"DROP INDEX `{name}`" for name, index in indexes.items()
+        if name != "PRIMARY" and not index["unique"] and index["columns"] == keys[:len(index["columns"])]
+    ]
+    unique_key_name = f"uk_{table_name}_{'_'.join(keys)}"
+    alter_actions.append(f"ADD UNIQUE KEY `{unique_key_name}` ({','.join(f'`{k}`' for k in keys)})")
+    await async_db_obj.execute(f"ALTER TABLE `{table_name}` {', '.join(alter_actions)}")
+    utils.logger.info(f"[migrate_table] table {table_name} add unique key {unique_key_name} successful")
+
+
+async def migrate(dry_run: bool = False) -> None:
+    """
+    给已有数据库的所有表加上业务唯一键，可重复执行
+    Args:
+        dry_run: 只统计重复数据，不修改数据库
+
+    Returns:
+
+    """
+    utils.logger.info("[migrate] begin migrate mediacrawler db unique keys ...")
+    await init_mediacrawler_db()
+    async_db_obj: AsyncMysqlDB = media_crawler_db_var.get()
+    try:
+        for table_name, keys in TABLE_UNIQUE_KEYS.items():
+            await migrate_table(async_db_obj, table_name, keys, dry_run)
+    finally:
+        await close()
+    utils.logger.info("[migrate] mediacrawler db unique keys migrate finished")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Add unique keys to an existing MediaCrawler database.')
+    parser.add_argument('--dry-run', action='store_true', help='only report duplicate rows, do not modify the db')
+    args = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(migrate(dry_run=args.dry_run))
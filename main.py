@@ -10,53 +10,79 @@
 
 
 import asyncio
+import importlib
 import sys
 
 import cmd_arg
 import config
 import db
 from base.base_crawler import AbstractCrawler
-from media_platform.bilibili import BilibiliCrawler
-from media_platform.douyin import DouYinCrawler
-from media_platform.kuaishou import KuaishouCrawler
-from media_platform.tieba import TieBaCrawler
-from media_platform.weibo import WeiboCrawler
-from media_platform.xhs import XiaoHongShuCrawler
-from media_platform.zhihu import ZhihuCrawler
+from tools import utils
+from tools.crawl_budget import CrawlBudget
+from tools.http_fixture import save_http_fixture
+from tools.loop_watchdog import start_loop_watchdog
+from tools.metrics import start_metrics_exporter
+from tools.profiler import start_profiler
+from tools.retry_policy import get_retry_policy
+from tools.run_report import save_run_report, start_run_report
+from tools.structured_log import setup_logging
 
 
 class CrawlerFactory:
+    # 平台对应的爬虫类，按需导入，只加载本次运行的平台及其依赖
     CRAWLERS = {
-        "xhs": XiaoHongShuCrawler,
-        "dy": DouYinCrawler,
-        "ks": KuaishouCrawler,
-        "bili": BilibiliCrawler,
-        "wb": WeiboCrawler,
-        "tieba": TieBaCrawler,
-        "zhihu": ZhihuCrawler
+        "xhs": "media_platform.xhs.XiaoHongShuCrawler",
+        "dy": "media_platform.douyin.DouYinCrawler",
+        "ks": "media_platform.kuaishou.KuaishouCrawler",
+        "bili": "media_platform.bilibili.BilibiliCrawler",
+        "wb": "media_platform.weibo.WeiboCrawler",
+        "tieba": "media_platform.tieba.TieBaCrawler",
+        "zhihu": "media_platform.zhihu.ZhihuCrawler"
     }
 
     @staticmethod
     def create_crawler(platform: str) -> AbstractCrawler:
-        crawler_class = CrawlerFactory.CRAWLERS.get(platform)
-        if not crawler_class:
+        crawler_path = CrawlerFactory.CRAWLERS.get(platform)
+        if not crawler_path:
             raise ValueError("Invalid Media Platform Currently only supported xhs or dy or ks or bili ...")
-        return crawler_class()
+        module_name, class_name = crawler_path.rsplit(".", 1)
+        crawler_class = getattr(importlib.import_module(module_name), class_name)
+        crawler = crawler_class()
+        crawler.budget = CrawlBudget(platform)
+        return crawler
 
 
 async def main():
     # parse cmd
     await cmd_arg.parse_cmd()
+    setup_logging()
 
     # init db
-    if config.SAVE_DATA_OPTION == "db":
+    if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.init_db()
 
+    profiler = start_profiler()
+    loop_watchdog = await start_loop_watchdog()
+    metrics_exporter = await start_metrics_exporter()
+    start_run_report()
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    try:
+        await crawler.start()
+    finally:
+        # 爬取中途抛异常或 Ctrl+C 时也要落盘报告、停掉后台任务、关闭数据库连接
+        save_run_report()
+        utils.logger.info(f"[main] crawl budget stats: {crawler.budget.stats()}")
+        utils.logger.info(f"[main] retry policy stats: {get_retry_policy().stats()}")
+        save_http_fixture()
+        if metrics_exporter:
+            await metrics_exporter.stop()
+        if loop_watchdog:
+            await loop_watchdog.stop()
+        if profiler:
+            profiler.finish(config.PROFILE_OUTPUT_DIR, f"{config.PLATFORM}_{config.CRAWLER_TYPE}")
 
-    if config.SAVE_DATA_OPTION == "db":
-        await db.close()
+        if config.SAVE_DATA_OPTION in ("db", "sqlite"):
+            await db.close()
 
     
 
@@ -13,17 +13,21 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 18:44
 # @Desc    : bilibili 请求客户端
-import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.adaptive_limiter import AdaptiveLimiter, limiter_feedback
+from tools.comment_stream import CommentPage, drain_comment_pages, fan_out_sub_comments
+from tools.http_fixture import create_http_client
+from tools.metrics import SIGN_SECONDS
+from tools.page_pool import PagePool
+from tools.paginator import PageResult
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
@@ -37,8 +41,9 @@ class BilibiliClient(AbstractApiClient):
             proxies=None,
             *,
             headers: Dict[str, str],
-            playwright_page: Page,
+            playwright_page: Optional[Union[Page, PagePool]],
             cookie_dict: Dict[str, str],
+            wbi_img_urls: str = "",
     ):
         self.proxies = proxies
         self.timeout = timeout
@@ -46,9 +51,13 @@ class BilibiliClient(AbstractApiClient):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # API 模式下使用登录态缓存里保存的 wbi_img_urls，没有时从 nav 接口获取
+        self._wbi_img_urls: Optional[Tuple[str, str]] = (
+            tuple(wbi_img_urls.split("-", 1)) if "-" in wbi_img_urls else None)
 
+    @limiter_feedback
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
@@ -59,6 +68,7 @@ class BilibiliClient(AbstractApiClient):
         else:
             return data.get("data", {})
 
+    @SIGN_SECONDS.timed(platform="bili")
     async def pre_request_data(self, req_data: Dict) -> Dict:
         """
         发送请求进行请求参数签名
@@ -77,15 +87,21 @@ class BilibiliClient(AbstractApiClient):
         获取最新的 img_key 和 sub_key
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        wbi_img_urls = local_storage.get("wbi_img_urls", "") or local_storage.get(
-            "wbi_img_url") + "-" + local_storage.get("wbi_sub_url")
+        # API 模式下没有浏览器页面，使用缓存的值或者从 nav 接口获取一次后缓存
+        local_storage = {}
+        if self.playwright_page is not None:
+            local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+        wbi_img_urls = local_storage.get("wbi_img_urls", "") or "-".join(
+            filter(None, [local_storage.get("wbi_img_url"), local_storage.get("wbi_sub_url")]))
         if wbi_img_urls and "-" in wbi_img_urls:
             img_url, sub_url = wbi_img_urls.split("-")
+        elif self._wbi_img_urls:
+            img_url, sub_url = self._wbi_img_urls
         else:
             resp = await self.request(method="GET", url=self._host + "/x/web-interface/nav")
             img_url: str = resp['wbi_img']['img_url']
             sub_url: str = resp['wbi_img']['sub_url']
+            self._wbi_img_urls = (img_url, sub_url)
         img_key = img_url.rsplit('/', 1)[1].split('.')[0]
         sub_key = sub_url.rsplit('/', 1)[1].split('.')[0]
         return img_key, sub_key
@@ -193,7 +209,7 @@ class BilibiliClient(AbstractApiClient):
         return await self.get(uri, params, enable_params_sign=True)
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
             if not response.reason_phrase == "OK":
                 utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
@@ -222,46 +238,86 @@ class BilibiliClient(AbstractApiClient):
         }
         return await self.get(uri, post_data)
 
+    async def iter_video_all_comments(self, video_id: str, crawl_interval: float = 1.0, is_fetch_sub_comments=False,
+                                      max_count: int = 10,
+                                      sub_comment_limiter: Optional[AdaptiveLimiter] = None
+                                      ) -> AsyncIterator[CommentPage]:
+        """
+        get video all comments include sub comments page by page
+        :param video_id:
+        :param crawl_interval:
+        :param is_fetch_sub_comments:
+        :param max_count: 一次笔记爬取的最大一级评论数量
+        :param sub_comment_limiter: 二级评论的并发预算，一页一级评论的二级评论并发展开
+        :return: (video_id, 一页评论)，每页一级评论之后紧跟它们的二级评论页
+        """
+        async def fetch_page(next_page: int) -> PageResult:
+            comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
+            cursor_info: Dict = comments_res.get("cursor")
+            return PageResult(comments_res.get("replies", []), cursor_info.get("next"), not cursor_info.get("is_end"))
+
+        if max_count <= 0:
+            return
+        async for comment_list in self.paginate(fetch_page, cursor=0, max_count=max_count,
+                                                crawl_interval=crawl_interval, stop_on_empty=False):
+            yield video_id, comment_list
+            if not is_fetch_sub_comments:
+                continue
+            async for page in fan_out_sub_comments(
+                    [comment for comment in comment_list if comment.get("rcount", 0) > 0],
+                    lambda comment: self.iter_video_all_level_two_comments(
+                        video_id, comment["rpid"], CommentOrderType.DEFAULT, 10, crawl_interval),
+                    limiter=sub_comment_limiter):
+                yield page
+
     async def get_video_all_comments(self, video_id: str, crawl_interval: float = 1.0, is_fetch_sub_comments=False,
                                      callback: Optional[Callable] = None,
-                                     max_count: int = 10,):
+                                     max_count: int = 10,
+                                     collect: bool = False,
+                                     sub_comment_limiter: Optional[AdaptiveLimiter] = None) -> List[Dict]:
         """
         get video all comments include sub comments
         :param video_id:
         :param crawl_interval:
         :param is_fetch_sub_comments:
         :param callback:
-        max_count: 一次笔记爬取的最大评论数量
+        :param max_count: 一次笔记爬取的最大一级评论数量
+        :param collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+        :param sub_comment_limiter: 二级评论的并发预算
 
         :return:
         """
+        return await drain_comment_pages(
+            self.iter_video_all_comments(video_id, crawl_interval, is_fetch_sub_comments, max_count,
+                                         sub_comment_limiter),
+            callback, collect
+        )
+
+    async def iter_video_all_level_two_comments(self,
+                                                video_id: str,
+                                                level_one_comment_id: int,
+                                                order_mode: CommentOrderType,
+                                                ps: int = 10,
+                                                crawl_interval: float = 1.0,
+                                                ) -> AsyncIterator[CommentPage]:
+        """
+        get video all level two comments for a level one comment page by page
+        :param video_id: 视频 ID
+        :param level_one_comment_id: 一级评论 ID
+        :param order_mode:
+        :param ps: 一页评论数
+        :param crawl_interval:
+        :return: (video_id, 一页评论)
+        """
+        async def fetch_page(pn: int) -> PageResult:
+            result = await self.get_video_level_two_comments(
+                video_id, level_one_comment_id, pn, ps, order_mode)
+            return PageResult(result.get("replies", []), pn + 1, int(result["page"]["count"]) > pn * ps)
 
-        result = []
-        is_end = False
-        next_page = 0
-        while not is_end and len(result) < max_count:
-            comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
-            cursor_info: Dict = comments_res.get("cursor")
-            comment_list: List[Dict] = comments_res.get("replies", [])
-            is_end = cursor_info.get("is_end")
-            next_page = cursor_info.get("next")
-            if is_fetch_sub_comments:
-                for comment in comment_list:
-                    comment_id = comment['rpid']
-                    if (comment.get("rcount", 0) > 0):
-                        {
-                            await self.get_video_all_level_two_comments(
-                                video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval,  callback)
-                        }
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
-                result.extend(comment_list)
-                continue
-        return result
+        # 由 fan_out_sub_comments 驱动，每次取页都要占用二级评论的并发预算，不能在预算之外预取下一页
+        async for comment_list in self.paginate(fetch_page, cursor=1, crawl_interval=crawl_interval,
+                                                stop_on_empty=False, prefetch=False):
+            yield video_id, comment_list
 
     async def get_video_all_level_two_comments(self,
                                                video_id: str,
@@ -270,7 +326,8 @@ class BilibiliClient(AbstractApiClient):
                                                ps: int = 10,
                                                crawl_interval: float = 1.0,
                                                callback: Optional[Callable] = None,
-                                               ) -> Dict:
+                                               collect: bool = False,
+                                               ) -> List[Dict]:
         """
         get video all level two comments for a level one comment
         :param video_id: 视频 ID
@@ -279,21 +336,13 @@ class BilibiliClient(AbstractApiClient):
         :param ps: 一页评论数
         :param crawl_interval:
         :param callback:
+        :param collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
         :return:
         """
-
-        pn = 1
-        while True:
-            result = await self.get_video_level_two_comments(
-                video_id, level_one_comment_id, pn, ps, order_mode)
-            comment_list: List[Dict] = result.get("replies", [])
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
-            if (int(result["page"]["count"]) <= pn * ps):
-                break
-
-            pn += 1
+        return await drain_comment_pages(
+            self.iter_video_all_level_two_comments(video_id, level_one_comment_id, order_mode, ps, crawl_interval),
+            callback, collect
+        )
 
     async def get_video_level_two_comments(self,
                                            video_id: str,
@@ -422,22 +471,19 @@ class BilibiliClient(AbstractApiClient):
         :return: up主粉丝数列表
         """
         creator_id = creator_info["id"]
-        result = []
-        pn = config.START_CONTACTS_PAGE
-        while len(result) < max_count:
+
+        async def fetch_page(pn: int) -> PageResult:
             fans_res: Dict = await self.get_creator_fans(creator_id, pn=pn)
-            fans_list: List[Dict] = fans_res.get("list", [])
+            return PageResult(fans_res.get("list", []), pn + 1)
 
-            pn += 1
-            if len(result) + len(fans_list) > max_count:
-                fans_list = fans_list[:max_count - len(result)]
+        async def on_page(fans_list: List[Dict]):
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(creator_info, fans_list)
-            await asyncio.sleep(crawl_interval)
-            if not fans_list:
-                break
-            result.extend(fans_list)
-        return result
+
+        if max_count <= 0:
+            return []
+        return await self.paginate(fetch_page, cursor=config.START_CONTACTS_PAGE, max_count=max_count,
+                                   crawl_interval=crawl_interval).collect(on_page)
 
     async def get_creator_all_followings(self, creator_info: Dict, crawl_interval: float = 1.0,
                                          callback: Optional[Callable] = None,
@@ -452,22 +498,19 @@ class BilibiliClient(AbstractApiClient):
         :return: up主关注者列表
         """
         creator_id = creator_info["id"]
-        result = []
-        pn = config.START_CONTACTS_PAGE
-        while len(result) < max_count:
+
+        async def fetch_page(pn: int) -> PageResult:
             followings_res: Dict = await self.get_creator_followings(creator_id, pn=pn)
-            followings_list: List[Dict] = followings_res.get("list", [])
+            return PageResult(followings_res.get("list", []), pn + 1)
 
-            pn += 1
-            if len(result) + len(followings_list) > max_count:
-                followings_list = followings_list[:max_count - len(result)]
+        async def on_page(followings_list: List[Dict]):
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(creator_info, followings_list)
-            await asyncio.sleep(crawl_interval)
-            if not followings_list:
-                break
-            result.extend(followings_list)
-        return result
+
+        if max_count <= 0:
+            return []
+        return await self.paginate(fetch_page, cursor=config.START_CONTACTS_PAGE, max_count=max_count,
+                                   crawl_interval=crawl_interval).collect(on_page)
 
     async def get_creator_all_dynamics(self, creator_info: Dict, crawl_interval: float = 1.0,
                                        callback: Optional[Callable] = None,
@@ -482,18 +525,16 @@ class BilibiliClient(AbstractApiClient):
         :return: up主关注者列表
         """
         creator_id = creator_info["id"]
-        result = []
-        offset = ""
-        has_more = True
-        while has_more and len(result) < max_count:
+
+        async def fetch_page(offset: str) -> PageResult:
             dynamics_res = await self.get_creator_dynamics(creator_id, offset)
-            dynamics_list: List[Dict] = dynamics_res["items"]
-            has_more = dynamics_res["has_more"]
-            offset = dynamics_res["offset"]
-            if len(result) + len(dynamics_list) > max_count:
-                dynamics_list = dynamics_list[:max_count - len(result)]
+            return PageResult(dynamics_res["items"], dynamics_res["offset"], dynamics_res["has_more"])
+
+        async def on_page(dynamics_list: List[Dict]):
             if callback:
                 await callback(creator_info, dynamics_list)
-            await asyncio.sleep(crawl_interval)
-            result.extend(dynamics_list)
-        return result
+
+        if max_count <= 0:
+            return []
+        return await self.paginate(fetch_page, cursor="", max_count=max_count, crawl_interval=crawl_interval,
+                                   stop_on_empty=False).collect(on_page)
@@ -20,7 +20,6 @@ import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-import pandas as pd
 
 from playwright.async_api import (BrowserContext, BrowserType, Page, async_playwright)
 
@@ -29,7 +28,11 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.adaptive_limiter import AdaptiveLimiter
+from tools.login_state import LoginStateCache, install_auth_failure_fallback
+from tools.page_pool import PagePool
+from tools.resource_blocker import install_resource_blocker
+from var import crawler_type_var, report_scope_var, source_keyword_var
 
 from .client import BilibiliClient
 from .exception import DataFetchError
@@ -39,6 +42,7 @@ from .login import BilibiliLogin
 
 class BilibiliCrawler(AbstractCrawler):
     context_page: Page
+    page_pool: Optional[PagePool]
     bili_client: BilibiliClient
     browser_context: BrowserContext
 
@@ -54,6 +58,10 @@ class BilibiliCrawler(AbstractCrawler):
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(
                 ip_proxy_info)
 
+        # API 模式：复用保存的登录态直接请求接口，登录态失效时才启动浏览器
+        if config.ENABLE_API_MODE and await self.start_api_mode(httpx_proxy_format):
+            return
+
         async with async_playwright() as playwright:
             # Launch a browser context.
             chromium = playwright.chromium
@@ -65,39 +73,93 @@ class BilibiliCrawler(AbstractCrawler):
             )
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
+            # 拦截图片、视频、字体和统计埋点请求，登录时暂停拦截
+            self.resource_blocker = await install_resource_blocker(self.browser_context, config.PLATFORM)
+            # 恢复缓存的登录态，校验有效期内跳过 pong 检查
+            self.login_state_cache = LoginStateCache(config.PLATFORM)
+            login_state_fresh = await self.login_state_cache.restore(self.browser_context)
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
+            # 签名等 evaluate 调用分散到页面池的多个页面上并发执行
+            self.page_pool = await PagePool(
+                self.browser_context, self.index_url, size=config.BROWSER_PAGE_POOL_SIZE, first_page=self.context_page
+            ).start()
 
             # Create a client to interact with the xiaohongshu website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
-            if not await self.bili_client.pong():
-                login_obj = BilibiliLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES
-                )
-                await login_obj.begin()
-                await self.bili_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
-            elif config.CRAWLER_TYPE == "creator":
-                if config.CREATOR_MODE:
-                    for creator_id in config.BILI_CREATOR_ID_LIST:
-                        await self.get_creator_videos(int(creator_id))
-                else:
-                    await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
+
+            async def check_login():
+                if not await self.bili_client.pong():
+                    login_obj = BilibiliLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES
+                    )
+                    self.resource_blocker.pause()
+                    await login_obj.begin()
+                    self.resource_blocker.resume()
+                    await self.bili_client.update_cookies(browser_context=self.browser_context)
+                await self.login_state_cache.save(self.browser_context, self.context_page)
+
+            if login_state_fresh:
+                # 有效期内跳过了 pong，爬取时第一次出现登录失效的错误再作废缓存、重新 pong/登录
+                install_auth_failure_fallback(self.bili_client, self.login_state_cache, check_login)
             else:
-                pass
-            utils.logger.info(
-                "[BilibiliCrawler.start] Bilibili Crawler finished ...")
+                await check_login()
+
+            await self.crawl()
+            utils.logger.info(f"[BilibiliCrawler.start] page pool stats: {self.page_pool.stats()}")
+            utils.logger.info(f"[BilibiliCrawler.start] resource blocker stats: {self.resource_blocker.stats()}")
+
+    async def start_api_mode(self, httpx_proxy: Optional[str]) -> bool:
+        """
+        不启动浏览器，使用保存的登录态创建客户端并开始爬取
+        :param httpx_proxy: httpx proxy
+        :return: 登录态不存在或者已失效时返回 False
+        """
+        self.login_state_cache = LoginStateCache(config.PLATFORM)
+        stored_context = await self.login_state_cache.restore_stored()
+        if not stored_context:
+            utils.logger.info("[BilibiliCrawler.start_api_mode] No saved login state, launch browser ...")
+            return False
+        self.browser_context = stored_context
+        self.context_page = None
+        self.page_pool = None
+        self.bili_client = await self.create_bilibili_client(httpx_proxy)
+        if self.login_state_cache.fresh:
+            # 有效期内跳过 pong，爬取时出现登录失效的错误只作废缓存，下次启动时重新 pong 或启动浏览器登录
+            install_auth_failure_fallback(self.bili_client, self.login_state_cache)
+        elif await self.bili_client.pong():
+            await self.login_state_cache.save(self.browser_context)
+        else:
+            utils.logger.info("[BilibiliCrawler.start_api_mode] Saved login state is invalid, launch browser ...")
+            return False
+        utils.logger.info("[BilibiliCrawler.start_api_mode] Use saved login state, start crawler without browser ...")
+        await self.crawl()
+        return True
+
+    async def crawl(self):
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        if config.CRAWLER_TYPE == "search":
+            # Search for video and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_videos(config.BILI_SPECIFIED_ID_LIST)
+        elif config.CRAWLER_TYPE == "creator":
+            if config.CREATOR_MODE:
+                for creator_id in config.BILI_CREATOR_ID_LIST:
+                    report_scope_var.set(f"creator:{creator_id}")
+                    await self.get_creator_videos(int(creator_id))
+            else:
+                await self.get_all_creator_details(config.BILI_CREATOR_ID_LIST)
+        else:
+            pass
+        await self.budget.join()
+        utils.logger.info(
+            "[BilibiliCrawler.start] Bilibili Crawler finished ...")
 
     @staticmethod
     async def get_pubtime_datetime(start: str = config.START_DAY, end: str = config.END_DAY) -> Tuple[str, str]:
@@ -163,7 +225,7 @@ class BilibiliCrawler(AbstractCrawler):
                     )
                     video_list: List[Dict] = videos_res.get("result")
 
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                    semaphore = self.budget.detail
                     task_list = []
                     try:
                         task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
@@ -180,7 +242,7 @@ class BilibiliCrawler(AbstractCrawler):
                     await self.batch_get_video_comments(video_id_list)
             # 按照 START_DAY 至 END_DAY 按照每一天进行筛选，这样能够突破 1000 条视频的限制，最大程度爬取该关键词下每一天的所有视频
             else:
-                for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq='D'):
+                for day in utils.get_date_range(config.START_DAY, config.END_DAY):
                     # 按照每一天进行爬取的时间戳参数
                     pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime('%Y-%m-%d'), end=day.strftime('%Y-%m-%d'))
                     page = 1
@@ -208,7 +270,7 @@ class BilibiliCrawler(AbstractCrawler):
                             )
                             video_list: List[Dict] = videos_res.get("result")
 
-                            semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                            semaphore = self.budget.detail
                             task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
                             video_items = await asyncio.gather(*task_list)
                             for video_item in video_items:
@@ -237,15 +299,16 @@ class BilibiliCrawler(AbstractCrawler):
 
         utils.logger.info(
             f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.comment
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(self.get_comments(
                 video_id, semaphore), name=video_id)
             task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论任务在后台执行，不阻塞下一页，爬取结束前统一等待
+        self.budget.add_background_tasks(task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: AdaptiveLimiter):
         """
         get comment for video id
         :param video_id:
@@ -262,6 +325,7 @@ class BilibiliCrawler(AbstractCrawler):
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=bilibili_store.batch_update_bilibili_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                    sub_comment_limiter=self.budget.sub_comment,
                 )
 
             except DataFetchError as ex:
@@ -294,7 +358,7 @@ class BilibiliCrawler(AbstractCrawler):
         get specified videos info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_video_info_task(aid=0, bvid=video_id, semaphore=semaphore) for video_id in
             bvids_list
@@ -312,7 +376,7 @@ class BilibiliCrawler(AbstractCrawler):
                 await self.get_bilibili_video(video_detail, semaphore)
         await self.batch_get_video_comments(video_aids_list)
 
-    async def get_video_info_task(self, aid: int, bvid: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_video_info_task(self, aid: int, bvid: str, semaphore: AdaptiveLimiter) -> Optional[Dict]:
         """
         Get video detail task
         :param aid:
@@ -333,7 +397,7 @@ class BilibiliCrawler(AbstractCrawler):
                     f"[BilibiliCrawler.get_video_info_task] have not fund note detail video_id:{bvid}, err: {ex}")
                 return None
 
-    async def get_video_play_url_task(self, aid: int, cid: int, semaphore: asyncio.Semaphore) -> Union[Dict, None]:
+    async def get_video_play_url_task(self, aid: int, cid: int, semaphore: AdaptiveLimiter) -> Union[Dict, None]:
         """
                 Get video play url
                 :param aid:
@@ -372,8 +436,9 @@ class BilibiliCrawler(AbstractCrawler):
                 "Referer": "https://www.bilibili.com",
                 "Content-Type": "application/json;charset=UTF-8"
             },
-            playwright_page=self.context_page,
+            playwright_page=self.page_pool,
             cookie_dict=cookie_dict,
+            wbi_img_urls=self.login_state_cache.tokens.get("wbi_img_urls", ""),
         )
         return bilibili_client_obj
 
@@ -434,7 +499,7 @@ class BilibiliCrawler(AbstractCrawler):
             )
             return browser_context
 
-    async def get_bilibili_video(self, video_item: Dict, semaphore: asyncio.Semaphore):
+    async def get_bilibili_video(self, video_item: Dict, semaphore: AdaptiveLimiter):
         """
         download bilibili video
         :param video_item:
@@ -463,7 +528,8 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.info("[BilibiliCrawler.get_bilibili_video] get video url failed")
             return
 
-        content = await self.bili_client.get_video_media(video_url)
+        async with self.budget.media:
+            content = await self.bili_client.get_video_media(video_url)
         if content is None:
             return
         extension_file_name = f"video.mp4"
@@ -478,7 +544,7 @@ class BilibiliCrawler(AbstractCrawler):
         utils.logger.info(
             f"[BilibiliCrawler.get_creator_details] creator ids:{creator_id_list}")
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list: List[Task] = []
         try:
             for creator_id in creator_id_list:
@@ -491,7 +557,7 @@ class BilibiliCrawler(AbstractCrawler):
 
         await asyncio.gather(*task_list)
 
-    async def get_creator_details(self, creator_id: int, semaphore: asyncio.Semaphore):
+    async def get_creator_details(self, creator_id: int, semaphore: AdaptiveLimiter):
         """
         get details for creator id
         :param creator_id:
@@ -510,7 +576,7 @@ class BilibiliCrawler(AbstractCrawler):
         await self.get_followings(creator_info, semaphore)
         await self.get_dynamics(creator_info, semaphore)
 
-    async def get_fans(self, creator_info: Dict, semaphore: asyncio.Semaphore):
+    async def get_fans(self, creator_info: Dict, semaphore: AdaptiveLimiter):
         """
         get fans for creator id
         :param creator_info:
@@ -536,7 +602,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.error(
                     f"[BilibiliCrawler.get_fans] may be been blocked, err:{e}")
 
-    async def get_followings(self, creator_info: Dict, semaphore: asyncio.Semaphore):
+    async def get_followings(self, creator_info: Dict, semaphore: AdaptiveLimiter):
         """
         get followings for creator id
         :param creator_info:
@@ -562,7 +628,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.error(
                     f"[BilibiliCrawler.get_followings] may be been blocked, err:{e}")
 
-    async def get_dynamics(self, creator_info: Dict, semaphore: asyncio.Semaphore):
+    async def get_dynamics(self, creator_info: Dict, semaphore: AdaptiveLimiter):
         """
         get dynamics for creator id
         :param creator_info:
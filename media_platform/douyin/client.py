@@ -9,17 +9,21 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
-import asyncio
 import copy
 import json
 import urllib.parse
-from typing import Any, Callable, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 
 import requests
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.adaptive_limiter import limiter_feedback
+from tools.comment_stream import CommentPage, drain_comment_pages
+from tools.metrics import SIGN_SECONDS
+from tools.page_pool import PagePool
+from tools.paginator import PageResult
 from var import request_keyword_var
 
 from .exception import *
@@ -34,7 +38,7 @@ class DOUYINClient(AbstractApiClient):
             proxies=None,
             *,
             headers: Dict,
-            playwright_page: Optional[Page],
+            playwright_page: Optional[Union[Page, PagePool]],
             cookie_dict: Dict
     ):
         self.proxies = proxies
@@ -44,6 +48,7 @@ class DOUYINClient(AbstractApiClient):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
 
+    @SIGN_SECONDS.timed(platform="dy")
     async def __process_req_params(
             self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
             request_method="GET"
@@ -91,6 +96,7 @@ class DOUYINClient(AbstractApiClient):
         a_bogus = await get_a_bogus(uri, query_string, post_data, headers["User-Agent"], self.playwright_page)
         params["a_bogus"] = a_bogus
 
+    @limiter_feedback
     async def request(self, method, url, **kwargs):
         response = None
         if method == "GET":
@@ -224,64 +230,90 @@ class DOUYINClient(AbstractApiClient):
         headers["Referer"] = urllib.parse.quote(referer_url, safe=':/')
         return await self.get(uri, params)
 
-    async def get_aweme_all_comments(
+    async def iter_aweme_all_comments(
             self,
             aweme_id: str,
             crawl_interval: float = 1.0,
             is_fetch_sub_comments=False,
-            callback: Optional[Callable] = None,
             max_count: int = 10,
-    ):
+    ) -> AsyncIterator[CommentPage]:
         """
-        获取帖子的所有评论，包括子评论
+        按页获取帖子的所有评论，每页一级评论之后紧跟它们的子评论页
         :param aweme_id: 帖子ID
         :param crawl_interval: 抓取间隔
         :param is_fetch_sub_comments: 是否抓取子评论
-        :param callback: 回调函数，用于处理抓取到的评论
         :param max_count: 一次帖子爬取的最大评论数量
-        :return: 评论列表
+        :return: (帖子ID, 一页评论)
         """
-        result = []
-        comments_has_more = 1
-        comments_cursor = 0
-        while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
-            comments_has_more = comments_res.get("has_more", 0)
-            comments_cursor = comments_res.get("cursor", 0)
-            comments = comments_res.get("comments", [])
+        async def fetch_page(cursor: int) -> PageResult:
+            comments_res = await self.get_aweme_comments(aweme_id, cursor)
+            return PageResult(comments_res.get("comments", []), comments_res.get("cursor", 0),
+                              bool(comments_res.get("has_more", 0)))
+
+        if max_count <= 0:
+            return
+        # 抖音偶尔会返回空页但 has_more 仍为 1，空页不结束分页
+        pages = self.paginate(fetch_page, cursor=0, max_count=max_count, crawl_interval=crawl_interval,
+                              stop_on_empty=False)
+        async for comments in pages:
             if not comments:
                 continue
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            result.extend(comments)
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(aweme_id, comments)
-
-            await asyncio.sleep(crawl_interval)
+            yield aweme_id, comments
             if not is_fetch_sub_comments:
                 continue
-            # 获取二级评论
-            for comment in comments:
-                reply_comment_total = comment.get("reply_comment_total")
+            async for _, sub_comments in self.iter_aweme_sub_comments(aweme_id, comments, crawl_interval):
+                yield aweme_id, sub_comments
+                # 二级评论也计入 max_count
+                pages.count += len(sub_comments)
+            if pages.count >= max_count:
+                break
+
+    async def iter_aweme_sub_comments(self, aweme_id: str, comments: List[Dict],
+                                      crawl_interval: float = 1.0) -> AsyncIterator[CommentPage]:
+        """
+        按页获取一级评论下的二级评论
+        :param aweme_id: 帖子ID
+        :param comments: 一级评论列表
+        :param crawl_interval: 抓取间隔
+        :return: (帖子ID, 一页评论)
+        """
+        for comment in comments:
+            if comment.get("reply_comment_total") <= 0:
+                continue
+            comment_id = comment.get("cid")
 
-                if reply_comment_total > 0:
-                    comment_id = comment.get("cid")
-                    sub_comments_has_more = 1
-                    sub_comments_cursor = 0
+            async def fetch_page(cursor: int) -> PageResult:
+                sub_comments_res = await self.get_sub_comments(comment_id, cursor)
+                return PageResult(sub_comments_res.get("comments", []), sub_comments_res.get("cursor", 0),
+                                  bool(sub_comments_res.get("has_more", 0)))
 
-                    while sub_comments_has_more:
-                        sub_comments_res = await self.get_sub_comments(comment_id, sub_comments_cursor)
-                        sub_comments_has_more = sub_comments_res.get("has_more", 0)
-                        sub_comments_cursor = sub_comments_res.get("cursor", 0)
-                        sub_comments = sub_comments_res.get("comments", [])
+            async for sub_comments in self.paginate(fetch_page, cursor=0, crawl_interval=crawl_interval,
+                                                    stop_on_empty=False):
+                if sub_comments:
+                    yield aweme_id, sub_comments
 
-                        if not sub_comments:
-                            continue
-                        result.extend(sub_comments)
-                        if callback:  # 如果有回调函数，就执行回调函数
-                            await callback(aweme_id, sub_comments)
-                        await asyncio.sleep(crawl_interval)
-        return result
+    async def get_aweme_all_comments(
+            self,
+            aweme_id: str,
+            crawl_interval: float = 1.0,
+            is_fetch_sub_comments=False,
+            callback: Optional[Callable] = None,
+            max_count: int = 10,
+            collect: bool = False,
+    ) -> List[Dict]:
+        """
+        获取帖子的所有评论，包括子评论
+        :param aweme_id: 帖子ID
+        :param crawl_interval: 抓取间隔
+        :param is_fetch_sub_comments: 是否抓取子评论
+        :param callback: 回调函数，用于处理抓取到的评论
+        :param max_count: 一次帖子爬取的最大评论数量
+        :param collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+        :return: 评论列表
+        """
+        return await drain_comment_pages(
+            self.iter_aweme_all_comments(aweme_id, crawl_interval, is_fetch_sub_comments, max_count), callback, collect
+        )
 
     async def get_user_info(self, sec_user_id: str):
         uri = "/aweme/v1/web/user/profile/other/"
@@ -306,17 +338,11 @@ class DOUYINClient(AbstractApiClient):
         return await self.get(uri, params)
 
     async def get_all_user_aweme_posts(self, sec_user_id: str, callback: Optional[Callable] = None):
-        posts_has_more = 1
-        max_cursor = ""
-        result = []
-        while posts_has_more == 1:
+        async def fetch_page(max_cursor: str) -> PageResult:
             aweme_post_res = await self.get_user_aweme_posts(sec_user_id, max_cursor)
-            posts_has_more = aweme_post_res.get("has_more", 0)
-            max_cursor = aweme_post_res.get("max_cursor")
             aweme_list = aweme_post_res.get("aweme_list") if aweme_post_res.get("aweme_list") else []
             utils.logger.info(
                 f"[DOUYINClient.get_all_user_aweme_posts] got sec_user_id:{sec_user_id} video len : {len(aweme_list)}")
-            if callback:
-                await callback(aweme_list)
-            result.extend(aweme_list)
-        return result
+            return PageResult(aweme_list, aweme_post_res.get("max_cursor"), aweme_post_res.get("has_more", 0) == 1)
+
+        return await self.paginate(fetch_page, cursor="", stop_on_empty=False).collect(callback)
@@ -23,7 +23,11 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.adaptive_limiter import AdaptiveLimiter
+from tools.login_state import LoginStateCache, install_auth_failure_fallback
+from tools.page_pool import PagePool
+from tools.resource_blocker import install_resource_blocker
+from var import crawler_type_var, report_scope_var, source_keyword_var
 
 from .client import DOUYINClient
 from .exception import DataFetchError
@@ -33,6 +37,7 @@ from .login import DouYinLogin
 
 class DouYinCrawler(AbstractCrawler):
     context_page: Page
+    page_pool: Optional[PagePool]
     dy_client: DOUYINClient
     browser_context: BrowserContext
 
@@ -57,20 +62,40 @@ class DouYinCrawler(AbstractCrawler):
             )
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
+            # 拦截图片、视频、字体和统计埋点请求，登录时暂停拦截
+            self.resource_blocker = await install_resource_blocker(self.browser_context, config.PLATFORM)
+            # 恢复缓存的登录态，校验有效期内跳过 pong 检查
+            self.login_state_cache = LoginStateCache(config.PLATFORM)
+            login_state_fresh = await self.login_state_cache.restore(self.browser_context)
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
+            # 签名等 evaluate 调用分散到页面池的多个页面上并发执行
+            self.page_pool = await PagePool(
+                self.browser_context, self.index_url, size=config.BROWSER_PAGE_POOL_SIZE, first_page=self.context_page
+            ).start()
 
             self.dy_client = await self.create_douyin_client(httpx_proxy_format)
-            if not await self.dy_client.pong(browser_context=self.browser_context):
-                login_obj = DouYinLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # you phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES
-                )
-                await login_obj.begin()
-                await self.dy_client.update_cookies(browser_context=self.browser_context)
+
+            async def check_login():
+                if not await self.dy_client.pong(browser_context=self.browser_context):
+                    login_obj = DouYinLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # you phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES
+                    )
+                    self.resource_blocker.pause()
+                    await login_obj.begin()
+                    self.resource_blocker.resume()
+                    await self.dy_client.update_cookies(browser_context=self.browser_context)
+                await self.login_state_cache.save(self.browser_context, self.context_page)
+
+            if login_state_fresh:
+                # 有效期内跳过了 pong，爬取时第一次出现登录失效的错误再作废缓存、重新 pong/登录
+                install_auth_failure_fallback(self.dy_client, self.login_state_cache, check_login)
+            else:
+                await check_login()
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
                 # Search for notes and retrieve their comment information.
@@ -82,7 +107,10 @@ class DouYinCrawler(AbstractCrawler):
                 # Get the information and comments of the specified creator
                 await self.get_creators_and_videos()
 
+            await self.budget.join()
             utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
+            utils.logger.info(f"[DouYinCrawler.start] page pool stats: {self.page_pool.stats()}")
+            utils.logger.info(f"[DouYinCrawler.start] resource blocker stats: {self.resource_blocker.stats()}")
 
     async def search(self) -> None:
         utils.logger.info("[DouYinCrawler.search] Begin search douyin keywords")
@@ -134,7 +162,7 @@ class DouYinCrawler(AbstractCrawler):
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_aweme_detail(aweme_id=aweme_id, semaphore=semaphore) for aweme_id in config.DY_SPECIFIED_ID_LIST
         ]
@@ -144,7 +172,7 @@ class DouYinCrawler(AbstractCrawler):
                 await douyin_store.update_douyin_aweme(aweme_detail)
         await self.batch_get_note_comments(config.DY_SPECIFIED_ID_LIST)
 
-    async def get_aweme_detail(self, aweme_id: str, semaphore: asyncio.Semaphore) -> Any:
+    async def get_aweme_detail(self, aweme_id: str, semaphore: AdaptiveLimiter) -> Any:
         """Get note detail"""
         async with semaphore:
             try:
@@ -166,15 +194,15 @@ class DouYinCrawler(AbstractCrawler):
             return
 
         task_list: List[Task] = []
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.comment
         for aweme_id in aweme_list:
             task = asyncio.create_task(
                 self.get_comments(aweme_id, semaphore), name=aweme_id)
             task_list.append(task)
-        if len(task_list) > 0:
-            await asyncio.wait(task_list)
+        # 评论任务在后台执行，不阻塞下一页，爬取结束前统一等待
+        self.budget.add_background_tasks(task_list)
 
-    async def get_comments(self, aweme_id: str, semaphore: asyncio.Semaphore) -> None:
+    async def get_comments(self, aweme_id: str, semaphore: AdaptiveLimiter) -> None:
         async with semaphore:
             try:
                 # 将关键词列表传递给 get_aweme_all_comments 方法
@@ -196,6 +224,7 @@ class DouYinCrawler(AbstractCrawler):
         """
         utils.logger.info("[DouYinCrawler.get_creators_and_videos] Begin get douyin creators")
         for user_id in config.DY_CREATOR_ID_LIST:
+            report_scope_var.set(f"creator:{user_id}")
             creator_info: Dict = await self.dy_client.get_user_info(user_id)
             if creator_info:
                 await douyin_store.save_creator(user_id, creator=creator_info)
@@ -213,7 +242,7 @@ class DouYinCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_aweme_detail(post_item.get("aweme_id"), semaphore) for post_item in video_list
         ]
@@ -249,7 +278,7 @@ class DouYinCrawler(AbstractCrawler):
                 "Referer": "https://www.douyin.com/",
                 "Content-Type": "application/json;charset=UTF-8"
             },
-            playwright_page=self.context_page,
+            playwright_page=self.page_pool,
             cookie_dict=cookie_dict,
         )
         return douyin_client
@@ -20,7 +20,7 @@ import random
 import execjs
 from playwright.async_api import Page
 
-douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
+douyin_sign_obj = None
 
 def get_web_id():
     """
@@ -61,6 +61,11 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     Returns:
 
     """
+    global douyin_sign_obj
+    if not douyin_sign_obj:
+        with open('libs/douyin.js', encoding='utf-8-sig') as f:
+            douyin_sign_obj = execjs.compile(f.read())
+
     sign_js_name = "sign_datail"
     if "/reply" in url:
         sign_js_name = "sign_reply"
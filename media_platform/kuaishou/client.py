@@ -10,22 +10,40 @@
 
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.adaptive_limiter import limiter_feedback
+from tools.comment_stream import CommentPage, drain_comment_pages
+from tools.http_fixture import create_http_client
+from tools.paginator import PageResult
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
 
 
+class CommentProgress:
+    """
+    一个视频评论的爬取进度，疑似被封禁重试时从中断的位置继续，已经存储的评论不会重复获取
+    """
+
+    def __init__(self) -> None:
+        # 下一页一级评论的游标
+        self.pcursor = ""
+        # 已经获取的评论数，包括二级评论，计入 max_count
+        self.count = 0
+        # 最近一页一级评论中，二级评论还没有取完的一级评论
+        self.pending: List[Dict] = []
+        # pending[0] 下一页二级评论的游标，None 表示一级评论里自带的二级评论还没有返回
+        self.sub_pcursor: Optional[str] = None
+
+
 class KuaiShouClient(AbstractApiClient):
     def __init__(
         self,
@@ -44,8 +62,9 @@ class KuaiShouClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
         self.graphql = KuaiShouGraphQL()
 
+    @limiter_feedback
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
         data: Dict = response.json()
         if data.get("errors"):
@@ -177,41 +196,136 @@ class KuaiShouClient(AbstractApiClient):
         }
         return await self.post("", post_data)
 
+    async def iter_video_all_comments(
+        self,
+        photo_id: str,
+        crawl_interval: float = 1.0,
+        max_count: int = 10,
+        progress: Optional[CommentProgress] = None,
+    ) -> AsyncIterator[CommentPage]:
+        """
+        get video all comments include sub comments page by page
+        :param photo_id:
+        :param crawl_interval:
+        :param max_count:
+        :param progress: 爬取进度，出错后传入同一个对象重试时从中断的位置继续，已经返回的评论不会重复获取
+        :return:
+        """
+        async def fetch_page(pcursor: str) -> PageResult:
+            comments_res = await self.get_video_comments(photo_id, pcursor)
+            vision_commen_list = comments_res.get("visionCommentList", {})
+            next_pcursor = vision_commen_list.get("pcursor", "")
+            return PageResult(vision_commen_list.get("rootComments", []), next_pcursor, next_pcursor != "no_more")
+
+        if progress is None:
+            progress = CommentProgress()
+        # 重试时先取完中断的那一页一级评论的二级评论
+        async for page in self._iter_pending_sub_comments(photo_id, progress, crawl_interval):
+            yield page
+        start_count = progress.count
+        if max_count - start_count <= 0 or progress.pcursor == "no_more":
+            return
+        pages = self.paginate(fetch_page, cursor=progress.pcursor, max_count=max_count - start_count,
+                              crawl_interval=crawl_interval)
+        async for comments in pages:
+            progress.pcursor = pages.cursor
+            progress.count += len(comments)
+            progress.pending = list(comments)
+            progress.sub_pcursor = None
+            yield photo_id, comments
+            async for page in self._iter_pending_sub_comments(photo_id, progress, crawl_interval):
+                yield page
+            # 二级评论也计入 max_count
+            pages.count = progress.count - start_count
+            if progress.count >= max_count:
+                break
+
     async def get_video_all_comments(
         self,
         photo_id: str,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
-    ):
+        collect: bool = False,
+        progress: Optional[CommentProgress] = None,
+    ) -> List[Dict]:
         """
         get video all comments include sub comments
         :param photo_id:
         :param crawl_interval:
         :param callback:
         :param max_count:
+        :param collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+        :param progress: 爬取进度，重试时传入上一次的进度
         :return:
         """
+        return await drain_comment_pages(
+            self.iter_video_all_comments(photo_id, crawl_interval, max_count, progress), callback, collect
+        )
 
-        result = []
-        pcursor = ""
+    async def iter_comments_all_sub_comments(
+        self,
+        comments: List[Dict],
+        photo_id,
+        crawl_interval: float = 1.0,
+    ) -> AsyncIterator[CommentPage]:
+        """
+        按页获取指定一级评论下的所有二级评论
+        Args:
+            comments: 评论列表
+            photo_id: 视频id
+            crawl_interval: 爬取一次评论的延迟单位（秒）
+        Returns:
 
-        while pcursor != "no_more" and len(result) < max_count:
-            comments_res = await self.get_video_comments(photo_id, pcursor)
-            vision_commen_list = comments_res.get("visionCommentList", {})
-            pcursor = vision_commen_list.get("pcursor", "")
-            comments = vision_commen_list.get("rootComments", [])
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(photo_id, comments)
-            result.extend(comments)
-            await asyncio.sleep(crawl_interval)
-            sub_comments = await self.get_comments_all_sub_comments(
-                comments, photo_id, crawl_interval, callback
+        """
+        progress = CommentProgress()
+        progress.pending = list(comments)
+        async for page in self._iter_pending_sub_comments(photo_id, progress, crawl_interval):
+            yield page
+
+    async def _iter_pending_sub_comments(self, photo_id: str, progress: CommentProgress,
+                                         crawl_interval: float) -> AsyncIterator[CommentPage]:
+        """
+        按页获取 progress.pending 中一级评论的二级评论，每返回一页更新一次进度
+        """
+        if not progress.pending:
+            return
+        if not config.ENABLE_GET_SUB_COMMENTS:
+            utils.logger.info(
+                f"[KuaiShouClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
-            result.extend(sub_comments)
-        return result
+            progress.pending = []
+            return
+
+        while progress.pending:
+            comment = progress.pending[0]
+            if progress.sub_pcursor is None:
+                progress.sub_pcursor = "no_more" if comment.get("subCommentsPcursor") == "no_more" else ""
+                sub_comments = comment.get("subComments")
+                if sub_comments:
+                    progress.count += len(sub_comments)
+                    yield photo_id, sub_comments
+
+            if progress.sub_pcursor != "no_more":
+                root_comment_id = comment.get("commentId")
+
+                async def fetch_page(pcursor: str) -> PageResult:
+                    comments_res = await self.get_video_sub_comments(photo_id, root_comment_id, pcursor)
+                    vision_sub_comment_list = comments_res.get("visionSubCommentList", {})
+                    next_pcursor = vision_sub_comment_list.get("pcursor", "no_more")
+                    return PageResult(vision_sub_comment_list.get("subComments", []), next_pcursor,
+                                      next_pcursor != "no_more")
+
+                # 不预取，出错时进度停在最后一页已经返回的位置
+                pages = self.paginate(fetch_page, cursor=progress.sub_pcursor, crawl_interval=crawl_interval,
+                                      prefetch=False)
+                async for sub_comments in pages:
+                    progress.sub_pcursor = pages.cursor
+                    progress.count += len(sub_comments)
+                    yield photo_id, sub_comments
+
+            progress.pending.pop(0)
+            progress.sub_pcursor = None
 
     async def get_comments_all_sub_comments(
         self,
@@ -219,6 +333,7 @@ class KuaiShouClient(AbstractApiClient):
         photo_id,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        collect: bool = False,
     ) -> List[Dict]:
         """
         获取指定一级评论下的所有二级评论, 该方法会一直查找一级评论下的所有二级评论信息
@@ -227,41 +342,13 @@ class KuaiShouClient(AbstractApiClient):
             photo_id: 视频id
             crawl_interval: 爬取一次评论的延迟单位（秒）
             callback: 一次评论爬取结束后
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
-            utils.logger.info(
-                f"[KuaiShouClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
-            )
-            return []
-
-        result = []
-        for comment in comments:
-            sub_comments = comment.get("subComments")
-            if sub_comments and callback:
-                await callback(photo_id, sub_comments)
-
-            sub_comment_pcursor = comment.get("subCommentsPcursor")
-            if sub_comment_pcursor == "no_more":
-                continue
-
-            root_comment_id = comment.get("commentId")
-            sub_comment_pcursor = ""
-
-            while sub_comment_pcursor != "no_more":
-                comments_res = await self.get_video_sub_comments(
-                    photo_id, root_comment_id, sub_comment_pcursor
-                )
-                vision_sub_comment_list = comments_res.get("visionSubCommentList", {})
-                sub_comment_pcursor = vision_sub_comment_list.get("pcursor", "no_more")
-
-                comments = vision_sub_comment_list.get("subComments", {})
-                if callback:
-                    await callback(photo_id, comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
+        return await drain_comment_pages(
+            self.iter_comments_all_sub_comments(comments, photo_id, crawl_interval), callback, collect
+        )
 
     async def get_creator_info(self, user_id: str) -> Dict:
         """
@@ -287,27 +374,20 @@ class KuaiShouClient(AbstractApiClient):
         Returns:
 
         """
-        result = []
-        pcursor = ""
-
-        while pcursor != "no_more":
+        async def fetch_page(pcursor: str) -> Optional[PageResult]:
             videos_res = await self.get_video_by_creater(user_id, pcursor)
             if not videos_res:
                 utils.logger.error(
                     f"[KuaiShouClient.get_all_videos_by_creator] The current creator may have been banned by ks, so they cannot access the data."
                 )
-                break
+                return None
 
             vision_profile_photo_list = videos_res.get("visionProfilePhotoList", {})
-            pcursor = vision_profile_photo_list.get("pcursor", "")
-
+            next_pcursor = vision_profile_photo_list.get("pcursor", "")
             videos = vision_profile_photo_list.get("feeds", [])
             utils.logger.info(
                 f"[KuaiShouClient.get_all_videos_by_creator] got user_id:{user_id} videos len : {len(videos)}"
             )
+            return PageResult(videos, next_pcursor, next_pcursor != "no_more")
 
-            if callback:
-                await callback(videos)
-            await asyncio.sleep(crawl_interval)
-            result.extend(videos)
-        return result
+        return await self.paginate(fetch_page, cursor="", crawl_interval=crawl_interval).collect(callback)
@@ -12,7 +12,6 @@
 import asyncio
 import os
 import random
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -23,9 +22,13 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
-from var import comment_tasks_var, crawler_type_var, source_keyword_var
+from tools.adaptive_limiter import AdaptiveLimiter, is_throttle_error
+from tools.circuit_breaker import create_circuit_breaker
+from tools.login_state import LoginStateCache, install_auth_failure_fallback
+from tools.resource_blocker import install_resource_blocker
+from var import crawler_type_var, report_scope_var, source_keyword_var
 
-from .client import KuaiShouClient
+from .client import CommentProgress, KuaiShouClient
 from .exception import DataFetchError
 from .login import KuaishouLogin
 
@@ -38,6 +41,8 @@ class KuaishouCrawler(AbstractCrawler):
     def __init__(self):
         self.index_url = "https://www.kuaishou.com"
         self.user_agent = utils.get_user_agent()
+        # 快手疑似封禁时暂停请求的熔断器
+        self.circuit_breaker = create_circuit_breaker(config.PLATFORM)
 
     async def start(self):
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -50,6 +55,10 @@ class KuaishouCrawler(AbstractCrawler):
                 ip_proxy_info
             )
 
+        # API 模式：复用保存的登录态直接请求接口，登录态失效时才启动浏览器
+        if config.ENABLE_API_MODE and await self.start_api_mode(httpx_proxy_format):
+            return
+
         async with async_playwright() as playwright:
             # Launch a browser context.
             chromium = playwright.chromium
@@ -58,38 +67,85 @@ class KuaishouCrawler(AbstractCrawler):
             )
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
+            # 拦截图片、视频、字体和统计埋点请求，登录时暂停拦截
+            self.resource_blocker = await install_resource_blocker(self.browser_context, config.PLATFORM)
+            # 恢复缓存的登录态，校验有效期内跳过 pong 检查
+            self.login_state_cache = LoginStateCache(config.PLATFORM)
+            login_state_fresh = await self.login_state_cache.restore(self.browser_context)
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(f"{self.index_url}?isHome=1")
 
             # Create a client to interact with the kuaishou website.
             self.ks_client = await self.create_ks_client(httpx_proxy_format)
-            if not await self.ks_client.pong():
-                login_obj = KuaishouLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone=httpx_proxy_format,
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for videos and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_videos()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their videos and comments
-                await self.get_creators_and_videos()
+            async def check_login():
+                if not await self.ks_client.pong():
+                    login_obj = KuaishouLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone=httpx_proxy_format,
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    self.resource_blocker.pause()
+                    await login_obj.begin()
+                    self.resource_blocker.resume()
+                    await self.ks_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
+                await self.login_state_cache.save(self.browser_context, self.context_page)
+
+            if login_state_fresh:
+                # 有效期内跳过了 pong，爬取时第一次出现登录失效的错误再作废缓存、重新 pong/登录
+                install_auth_failure_fallback(self.ks_client, self.login_state_cache, check_login)
             else:
-                pass
+                await check_login()
+
+            await self.crawl()
+            utils.logger.info(f"[KuaishouCrawler.start] resource blocker stats: {self.resource_blocker.stats()}")
+
+    async def start_api_mode(self, httpx_proxy: Optional[str]) -> bool:
+        """
+        不启动浏览器，使用保存的登录态创建客户端并开始爬取
+        :param httpx_proxy: httpx proxy
+        :return: 登录态不存在或者已失效时返回 False
+        """
+        self.login_state_cache = LoginStateCache(config.PLATFORM)
+        stored_context = await self.login_state_cache.restore_stored()
+        if not stored_context:
+            utils.logger.info("[KuaishouCrawler.start_api_mode] No saved login state, launch browser ...")
+            return False
+        self.browser_context = stored_context
+        self.context_page = None
+        self.ks_client = await self.create_ks_client(httpx_proxy)
+        if self.login_state_cache.fresh:
+            # 有效期内跳过 pong，爬取时出现登录失效的错误只作废缓存，下次启动时重新 pong 或启动浏览器登录
+            install_auth_failure_fallback(self.ks_client, self.login_state_cache)
+        elif await self.ks_client.pong():
+            await self.login_state_cache.save(self.browser_context)
+        else:
+            utils.logger.info("[KuaishouCrawler.start_api_mode] Saved login state is invalid, launch browser ...")
+            return False
+        utils.logger.info("[KuaishouCrawler.start_api_mode] Use saved login state, start crawler without browser ...")
+        await self.crawl()
+        return True
+
+    async def crawl(self):
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        if config.CRAWLER_TYPE == "search":
+            # Search for videos and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_videos()
+        elif config.CRAWLER_TYPE == "creator":
+            # Get creator's information and their videos and comments
+            await self.get_creators_and_videos()
+        else:
+            pass
 
-            utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
+        await self.budget.join()
+        utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
 
     async def search(self):
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
@@ -143,7 +199,7 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_video_info_task(video_id=video_id, semaphore=semaphore)
             for video_id in config.KS_SPECIFIED_ID_LIST
@@ -155,7 +211,7 @@ class KuaishouCrawler(AbstractCrawler):
         await self.batch_get_video_comments(config.KS_SPECIFIED_ID_LIST)
 
     async def get_video_info_task(
-        self, video_id: str, semaphore: asyncio.Semaphore
+        self, video_id: str, semaphore: AdaptiveLimiter
     ) -> Optional[Dict]:
         """Get video detail task"""
         async with semaphore:
@@ -191,7 +247,7 @@ class KuaishouCrawler(AbstractCrawler):
         utils.logger.info(
             f"[KuaishouCrawler.batch_get_video_comments] video ids:{video_id_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.comment
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(
@@ -199,45 +255,66 @@ class KuaishouCrawler(AbstractCrawler):
             )
             task_list.append(task)
 
-        comment_tasks_var.set(task_list)
-        await asyncio.gather(*task_list)
+        # 评论任务在后台执行，不阻塞下一页，爬取结束前统一等待
+        self.budget.add_background_tasks(task_list)
 
-    async def get_comments(self, video_id: str, semaphore: asyncio.Semaphore):
+    async def get_comments(self, video_id: str, semaphore: AdaptiveLimiter):
         """
         get comment for video id
+        疑似被封禁时只重试当前视频：熔断器打开期间异步等待冷却，不影响其他任务和事件循环，
+        重试从中断的分页位置继续，已经存储的评论不会重复存储
         :param video_id:
         :param semaphore:
         :return:
         """
-        async with semaphore:
-            try:
-                utils.logger.info(
-                    f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
-                )
-                await self.ks_client.get_video_all_comments(
-                    photo_id=video_id,
-                    crawl_interval=random.random(),
-                    callback=kuaishou_store.batch_update_ks_video_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
-            except DataFetchError as ex:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {ex}"
-                )
-            except Exception as e:
-                utils.logger.error(
-                    f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
-                )
-                # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
-                # maybe kuaishou block our request, we will take a nap and update the cookie again
-                current_running_tasks = comment_tasks_var.get()
-                for task in current_running_tasks:
-                    task.cancel()
-                time.sleep(20)
-                await self.context_page.goto(f"{self.index_url}?isHome=1")
-                await self.ks_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+        progress = CommentProgress()
+        for attempt in range(config.BLOCKED_TASK_MAX_RETRIES + 1):
+            await self.circuit_breaker.wait_ready()
+            async with semaphore:
+                try:
+                    utils.logger.info(
+                        f"[KuaishouCrawler.get_comments] begin get video_id: {video_id} comments ..."
+                    )
+                    await self.ks_client.get_video_all_comments(
+                        photo_id=video_id,
+                        crawl_interval=random.random(),
+                        callback=kuaishou_store.batch_update_ks_video_comments,
+                        max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                        progress=progress,
+                    )
+                    self.circuit_breaker.record_success()
+                    return
+                except Exception as e:
+                    if not is_throttle_error(e):
+                        if not isinstance(e, DataFetchError):
+                            raise
+                        # 接口正常返回了错误信息，不是封禁
+                        self.circuit_breaker.record_success()
+                        utils.logger.error(
+                            f"[KuaishouCrawler.get_comments] get video_id: {video_id} comment error: {e}"
+                        )
+                        return
+                    utils.logger.error(
+                        f"[KuaishouCrawler.get_comments] may be been blocked, video_id: {video_id}, "
+                        f"attempt: {attempt + 1}, resume from {progress.count} comments, err:{e}"
+                    )
+                    if self.circuit_breaker.record_failure():
+                        await self.refresh_cookies()
+        utils.logger.error(f"[KuaishouCrawler.get_comments] give up video_id: {video_id} comments after retries")
+
+    async def refresh_cookies(self):
+        """
+        疑似被封禁后重新打开首页，刷新cookie
+        :return:
+        """
+        # API 模式下没有浏览器页面，沿用保存的cookie
+        if self.context_page is None:
+            return
+        try:
+            await self.context_page.goto(f"{self.index_url}?isHome=1")
+            await self.ks_client.update_cookies(browser_context=self.browser_context)
+        except Exception as e:
+            utils.logger.error(f"[KuaishouCrawler.refresh_cookies] refresh cookies error: {e}")
 
     @staticmethod
     def format_proxy_info(
@@ -313,6 +390,7 @@ class KuaishouCrawler(AbstractCrawler):
             "[KuaiShouCrawler.get_creators_and_videos] Begin get kuaishou creators"
         )
         for user_id in config.KS_CREATOR_ID_LIST:
+            report_scope_var.set(f"creator:{user_id}")
             # get creator detail info from web html content
             createor_info: Dict = await self.ks_client.get_creator_info(user_id=user_id)
             if createor_info:
@@ -334,7 +412,7 @@ class KuaishouCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_video_info_task(post_item.get("photo", {}).get("id"), semaphore)
             for post_item in video_list
@@ -11,18 +11,21 @@
 
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext
-from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.adaptive_limiter import limiter_feedback
+from tools.comment_stream import CommentPage, drain_comment_pages
+from tools.http_fixture import create_http_client
+from tools.paginator import PageResult
+from tools.retry_policy import PROXY_SWITCH_ERRORS, classify_error
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
@@ -45,7 +48,7 @@ class BaiduTieBaClient(AbstractApiClient):
         self._page_extractor = TieBaExtractor()
         self.default_ip_proxy = default_ip_proxy
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @limiter_feedback
     async def request(self, method, url, return_ori_content=False, proxies=None, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
@@ -60,7 +63,7 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         actual_proxies = proxies if proxies else self.default_ip_proxy
-        async with httpx.AsyncClient(proxies=actual_proxies) as client:
+        async with create_http_client(proxies=actual_proxies) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 headers=self.headers, **kwargs
@@ -100,7 +103,10 @@ class BaiduTieBaClient(AbstractApiClient):
                                      return_ori_content=return_ori_content,
                                      **kwargs)
             return res
-        except RetryError as e:
+        except Exception as e:
+            # 重试策略已经用完重试次数的网络错误或者IP被封时，换一个代理IP再试一次，解析错误等直接抛出
+            if classify_error(e) not in PROXY_SWITCH_ERRORS:
+                raise
             if self.ip_pool:
                 proxie_model = await self.ip_pool.get_proxy()
                 _, proxies = utils.format_proxy_info(proxie_model)
@@ -203,89 +209,123 @@ class BaiduTieBaClient(AbstractApiClient):
         page_content = await self.get(uri, return_ori_content=True)
         return self._page_extractor.extract_note_detail(page_content)
 
-    async def get_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 1.0,
-                                    callback: Optional[Callable] = None,
-                                    max_count: int = 10,
-                                    ) -> List[TiebaComment]:
+    async def iter_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 1.0,
+                                     max_count: int = 10) -> AsyncIterator[CommentPage]:
         """
-        获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        按页获取指定帖子下的一级评论，每页一级评论之后紧跟它们的子评论页
         Args:
             note_detail: 帖子详情对象
             crawl_interval: 爬取一次笔记的延迟单位（秒）
-            callback: 一次笔记爬取结束后
-            max_count: 一次帖子爬取的最大评论数量
+            max_count: 一次帖子爬取的最大一级评论数量
         Returns:
 
         """
         uri = f"/p/{note_detail.note_id}"
-        result: List[TiebaComment] = []
-        current_page = 1
-        while note_detail.total_replay_page >= current_page and len(result) < max_count:
+
+        async def fetch_page(current_page: int) -> PageResult:
             params = {
                 "pn": current_page
             }
             page_content = await self.get(uri, params=params, return_ori_content=True)
             comments = self._page_extractor.extract_tieba_note_parment_comments(page_content,
                                                                                 note_id=note_detail.note_id)
-            if not comments:
-                break
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            if callback:
-                await callback(note_detail.note_id, comments)
-            result.extend(comments)
+            return PageResult(comments, current_page + 1, note_detail.total_replay_page > current_page)
+
+        if max_count <= 0 or note_detail.total_replay_page < 1:
+            return
+        async for comments in self.paginate(fetch_page, cursor=1, max_count=max_count, crawl_interval=crawl_interval):
+            yield note_detail.note_id, comments
             # 获取所有子评论
-            await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
-            current_page += 1
-        return result
+            async for page in self.iter_comments_all_sub_comments(comments, crawl_interval=crawl_interval):
+                yield page
 
-    async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
-                                            callback: Optional[Callable] = None) -> List[TiebaComment]:
+    async def get_note_all_comments(self, note_detail: TiebaNote, crawl_interval: float = 1.0,
+                                    callback: Optional[Callable] = None,
+                                    max_count: int = 10,
+                                    collect: bool = False,
+                                    ) -> List[TiebaComment]:
         """
-        获取指定评论下的所有子评论
+        获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        Args:
+            note_detail: 帖子详情对象
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            callback: 每页评论爬取结束后的回调
+            max_count: 一次帖子爬取的最大评论数量
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+        Returns:
+
+        """
+        return await drain_comment_pages(
+            self.iter_note_all_comments(note_detail, crawl_interval, max_count), callback, collect
+        )
+
+    async def get_note_sub_comments(self, parment_comment: TiebaComment, page: int) -> List[TiebaComment]:
+        """
+        获取一级评论下某一页的子评论
+        Args:
+            parment_comment: 一级评论
+            page: 页码
+
+        Returns:
+
+        """
+        params = {
+            "tid": parment_comment.note_id,  # 帖子ID
+            "pid": parment_comment.comment_id,  # 父级评论ID
+            "fid": parment_comment.tieba_id,  # 贴吧ID
+            "pn": page  # 页码
+        }
+        page_content = await self.get("/p/comment", params=params, return_ori_content=True)
+        return self._page_extractor.extract_tieba_note_sub_comments(page_content, parent_comment=parment_comment)
+
+    async def iter_comments_all_sub_comments(self, comments: List[TiebaComment],
+                                             crawl_interval: float = 1.0) -> AsyncIterator[CommentPage]:
+        """
+        按页获取指定评论下的所有子评论
         Args:
             comments: 评论列表
             crawl_interval: 爬取一次笔记的延迟单位（秒）
-            callback: 一次笔记爬取结束后
 
         Returns:
 
         """
-        uri = "/p/comment"
         if not config.ENABLE_GET_SUB_COMMENTS:
-            return []
+            return
 
         # # 贴吧获取所有子评论需要登录态
         # if self.headers.get("Cookies") == "" or not self.pong():
         #     raise Exception(f"[BaiduTieBaClient.pong] Cookies is empty, please login first...")
 
-        all_sub_comments: List[TiebaComment] = []
         for parment_comment in comments:
             if parment_comment.sub_comment_count == 0:
                 continue
 
-            current_page = 1
             max_sub_page_num = parment_comment.sub_comment_count // 10 + 1
-            while max_sub_page_num >= current_page:
-                params = {
-                    "tid": parment_comment.note_id,  # 帖子ID
-                    "pid": parment_comment.comment_id,  # 父级评论ID
-                    "fid": parment_comment.tieba_id,  # 贴吧ID
-                    "pn": current_page  # 页码
-                }
-                page_content = await self.get(uri, params=params, return_ori_content=True)
-                sub_comments = self._page_extractor.extract_tieba_note_sub_comments(page_content,
-                                                                                    parent_comment=parment_comment)
-
-                if not sub_comments:
-                    break
-                if callback:
-                    await callback(parment_comment.note_id, sub_comments)
-                all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
-                current_page += 1
-        return all_sub_comments
+
+            async def fetch_page(current_page: int) -> PageResult:
+                sub_comments = await self.get_note_sub_comments(parment_comment, current_page)
+                return PageResult(sub_comments, current_page + 1, max_sub_page_num > current_page)
+
+            async for sub_comments in self.paginate(fetch_page, cursor=1, crawl_interval=crawl_interval):
+                yield parment_comment.note_id, sub_comments
+
+    async def get_comments_all_sub_comments(self, comments: List[TiebaComment], crawl_interval: float = 1.0,
+                                            callback: Optional[Callable] = None,
+                                            collect: bool = False) -> List[TiebaComment]:
+        """
+        获取指定评论下的所有子评论
+        Args:
+            comments: 评论列表
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            callback: 每页评论爬取结束后的回调
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+
+        Returns:
+
+        """
+        return await drain_comment_pages(
+            self.iter_comments_all_sub_comments(comments, crawl_interval), callback, collect
+        )
 
     async def get_notes_by_tieba_name(self, tieba_name: str, page_num: int) -> List[TiebaNote]:
         """
@@ -370,28 +410,28 @@ class BaiduTieBaClient(AbstractApiClient):
                 await callback(notes)
             result.extend(notes)
 
-        notes_has_more = 1
-        page_number = 1
         page_per_count = 20
-        total_get_count = 0
-        while notes_has_more == 1 and (max_note_count == 0 or total_get_count < max_note_count):
+
+        async def fetch_page(page_number: int) -> Optional[PageResult]:
             notes_res = await self.get_notes_by_creator(user_name, page_number)
             if not notes_res or notes_res.get("no") != 0:
                 utils.logger.error(
                     f"[WeiboClient.get_notes_by_creator] got user_name:{user_name} notes failed, notes_res: {notes_res}")
-                break
+                return None
             notes_data = notes_res.get("data")
-            notes_has_more = notes_data.get("has_more")
             notes = notes_data["thread_list"]
             utils.logger.info(
                 f"[WeiboClient.get_all_notes_by_creator] got user_name:{user_name} notes len : {len(notes)}")
 
             note_detail_task = [self.get_note_by_id(note['thread_id']) for note in notes]
             notes = await asyncio.gather(*note_detail_task)
+            # 按页数估算已获取数量，和接口每页条数一致
+            has_more = notes_data.get("has_more") == 1 and (
+                    max_note_count == 0 or page_number * page_per_count < max_note_count)
+            return PageResult(list(notes), page_number + 1, has_more)
+
+        async for notes in self.paginate(fetch_page, cursor=1, crawl_interval=crawl_interval):
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
             result.extend(notes)
-            page_number += 1
-            total_get_count += page_per_count
         return result
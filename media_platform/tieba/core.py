@@ -24,14 +24,18 @@ from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
+from tools.adaptive_limiter import AdaptiveLimiter
 from tools.crawler_util import format_proxy_info
-from var import crawler_type_var, source_keyword_var
+from tools.structured_log import get_logger
+from var import crawler_type_var, report_scope_var, source_keyword_var
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
 from .login import BaiduTieBaLogin
 
+api_logger = get_logger("api")
+
 
 class TieBaCrawler(AbstractCrawler):
     context_page: Page
@@ -76,6 +80,7 @@ class TieBaCrawler(AbstractCrawler):
         else:
             pass
 
+        await self.budget.join()
         utils.logger.info("[BaiduTieBaCrawler.start] Tieba Crawler finished ...")
 
     async def search(self) -> None:
@@ -155,7 +160,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore) for note_id in note_id_list
         ]
@@ -167,7 +172,7 @@ class TieBaCrawler(AbstractCrawler):
                 await tieba_store.update_tieba_note(note_detail)
         await self.batch_get_note_comments(note_details_model)
 
-    async def get_note_detail_async_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[TiebaNote]:
+    async def get_note_detail_async_task(self, note_id: str, semaphore: AdaptiveLimiter) -> Optional[TiebaNote]:
         """
         Get note detail
         Args:
@@ -206,14 +211,15 @@ class TieBaCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.comment
         task_list: List[Task] = []
         for note_detail in note_detail_list:
             task = asyncio.create_task(self.get_comments_async_task(note_detail, semaphore), name=note_detail.note_id)
             task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论任务在后台执行，不阻塞下一页，爬取结束前统一等待
+        self.budget.add_background_tasks(task_list)
 
-    async def get_comments_async_task(self, note_detail: TiebaNote, semaphore: asyncio.Semaphore):
+    async def get_comments_async_task(self, note_detail: TiebaNote, semaphore: AdaptiveLimiter):
         """
         Get comments async task
         Args:
@@ -240,10 +246,11 @@ class TieBaCrawler(AbstractCrawler):
         """
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
         for creator_url in config.TIEBA_CREATOR_URL_LIST:
+            report_scope_var.set(f"creator:{creator_url}")
             creator_page_html_content = await self.tieba_client.get_creator_info_by_url(creator_url=creator_url)
             creator_info: TiebaCreator = self._page_extractor.extract_creator_info(creator_page_html_content)
             if creator_info:
-                utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {creator_info}")
+                api_logger.debug("[BaiduTieBaCrawler.get_creators_and_notes] creator info: %s", creator_info)
                 if not creator_info:
                     raise Exception("Get creator info error")
 
@@ -21,11 +21,13 @@ from parsel import Selector
 from constant import baidu_tieba as const
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from tools import utils
+from tools.metrics import timed_extractor
 
 GENDER_MALE = "sex_male"
 GENDER_FEMALE = "sex_female"
 
 
+@timed_extractor("tieba")
 class TieBaExtractor:
     def __init__(self):
         pass
@@ -14,25 +14,28 @@
 # @Time    : 2023/12/23 15:40
 # @Desc    : 微博爬虫 API 请求 client
 
-import asyncio
 import copy
 import json
 import re
-from typing import Callable, Dict, List, Optional, Union
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
+from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.adaptive_limiter import limiter_feedback
+from tools.comment_stream import CommentPage, drain_comment_pages
+from tools.http_fixture import create_http_client
+from tools.paginator import PageResult
 
 from .exception import DataFetchError
 from .field import SearchType
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
     def __init__(
             self,
             timeout=10,
@@ -50,9 +53,10 @@ class WeiboClient:
         self.cookie_dict = cookie_dict
         self._image_agent_host = "https://i1.wp.com/"
 
+    @limiter_feedback
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
@@ -151,50 +155,67 @@ class WeiboClient:
 
         return await self.get(uri, params, headers=headers)
 
+    async def iter_note_all_comments(
+        self,
+        note_id: str,
+        crawl_interval: float = 1.0,
+        max_count: int = 10,
+    ) -> AsyncIterator[CommentPage]:
+        """
+        get note all comments include sub comments page by page
+        :param note_id:
+        :param crawl_interval:
+        :param max_count:
+        :return: (note_id, 一页评论)，每页一级评论之后紧跟它们的子评论
+        """
+        async def fetch_page(cursor: Tuple[int, int]) -> PageResult:
+            max_id, max_id_type = cursor
+            comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
+            next_max_id: int = comments_res.get("max_id")
+            return PageResult(comments_res.get("data", []), (next_max_id, comments_res.get("max_id_type")),
+                              next_max_id != 0)
+
+        if max_count <= 0:
+            return
+        pages = self.paginate(fetch_page, cursor=(-1, 0), max_count=max_count, crawl_interval=crawl_interval,
+                              stop_on_empty=False)
+        async for comment_list in pages:
+            yield note_id, comment_list
+            async for _, sub_comments in self.iter_comments_all_sub_comments(note_id, comment_list):
+                yield note_id, sub_comments
+                # 子评论也计入 max_count
+                pages.count += len(sub_comments)
+            if pages.count >= max_count:
+                break
+
     async def get_note_all_comments(
         self,
         note_id: str,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
-    ):
+        collect: bool = False,
+    ) -> List[Dict]:
         """
         get note all comments include sub comments
         :param note_id:
         :param crawl_interval:
         :param callback:
         :param max_count:
+        :param collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
         :return:
         """
-        result = []
-        is_end = False
-        max_id = -1
-        max_id_type = 0
-        while not is_end and len(result) < max_count:
-            comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
-            max_id: int = comments_res.get("max_id")
-            max_id_type: int = comments_res.get("max_id_type")
-            comment_list: List[Dict] = comments_res.get("data", [])
-            is_end = max_id == 0
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(note_id, comment_list)
-            await asyncio.sleep(crawl_interval)
-            result.extend(comment_list)
-            sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
-            result.extend(sub_comment_result)
-        return result
+        return await drain_comment_pages(
+            self.iter_note_all_comments(note_id, crawl_interval, max_count), callback, collect
+        )
 
     @staticmethod
-    async def get_comments_all_sub_comments(note_id: str, comment_list: List[Dict],
-                                            callback: Optional[Callable] = None) -> List[Dict]:
+    async def iter_comments_all_sub_comments(note_id: str, comment_list: List[Dict]) -> AsyncIterator[CommentPage]:
         """
-        获取评论的所有子评论
+        评论接口已经带上了子评论，逐条评论 yield 出来
         Args:
             note_id:
             comment_list:
-            callback:
 
         Returns:
 
@@ -202,15 +223,30 @@ class WeiboClient:
         if not config.ENABLE_GET_SUB_COMMENTS:
             utils.logger.info(
                 f"[WeiboClient.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled")
-            return []
+            return
 
-        res_sub_comments = []
         for comment in comment_list:
             sub_comments = comment.get("comments")
             if sub_comments and isinstance(sub_comments, list):
-                await callback(note_id, sub_comments)
-                res_sub_comments.extend(sub_comments)
-        return res_sub_comments
+                yield note_id, sub_comments
+
+    @staticmethod
+    async def get_comments_all_sub_comments(note_id: str, comment_list: List[Dict],
+                                            callback: Optional[Callable] = None,
+                                            collect: bool = False) -> List[Dict]:
+        """
+        获取评论的所有子评论
+        Args:
+            note_id:
+            comment_list:
+            callback:
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+
+        Returns:
+
+        """
+        return await drain_comment_pages(WeiboClient.iter_comments_all_sub_comments(note_id, comment_list),
+                                         callback, collect)
 
     async def get_note_info_by_id(self, note_id: str) -> Dict:
         """
@@ -219,7 +255,7 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request(
                 "GET", url, timeout=self.timeout, headers=self.headers
             )
@@ -252,7 +288,7 @@ class WeiboClient:
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
         final_uri = (f"{self._image_agent_host}" f"{image_url}")
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request("GET", final_uri, timeout=self.timeout)
             if not response.reason_phrase == "OK":
                 utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
@@ -350,31 +386,28 @@ class WeiboClient:
         Returns:
 
         """
-        result = []
-        notes_has_more = True
-        since_id = ""
-        crawler_total_count = 0
-        while notes_has_more:
+        async def fetch_page(cursor: Tuple[str, int]) -> Optional[PageResult]:
+            since_id, crawler_total_count = cursor
             notes_res = await self.get_notes_by_creator(creator_id, container_id, since_id)
             if not notes_res:
                 utils.logger.error(
                     f"[WeiboClient.get_notes_by_creator] The current creator may have been banned by xhs, so they cannot access the data.")
-                break
-            since_id = notes_res.get("cardlistInfo", {}).get("since_id", "0")
+                return None
+            next_since_id = notes_res.get("cardlistInfo", {}).get("since_id", "0")
             if "cards" not in notes_res:
                 utils.logger.info(
                     f"[WeiboClient.get_all_notes_by_creator] No 'notes' key found in response: {notes_res}")
-                break
+                return None
 
             notes = notes_res["cards"]
             utils.logger.info(
                 f"[WeiboClient.get_all_notes_by_creator] got user_id:{creator_id} notes len : {len(notes)}")
-            notes = [note for note  in notes if note.get("card_type") == 9]
-            if callback:
-                await callback(notes)
-            await asyncio.sleep(crawl_interval)
-            result.extend(notes)
+            notes = [note for note in notes if note.get("card_type") == 9]
             crawler_total_count += 10
             notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
-        return result
+            return PageResult(notes, (next_since_id, crawler_total_count), notes_has_more)
+
+        # 过滤掉非微博卡片后可能是空页，不能当作结束
+        return await self.paginate(fetch_page, cursor=("", 0), crawl_interval=crawl_interval,
+                                   stop_on_empty=False).collect(callback)
 
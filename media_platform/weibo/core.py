@@ -29,7 +29,11 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.adaptive_limiter import AdaptiveLimiter
+from tools.login_state import LoginStateCache, install_auth_failure_fallback
+from tools.resource_blocker import install_resource_blocker
+from tools.structured_log import get_logger
+from var import crawler_type_var, report_scope_var, source_keyword_var
 
 from .client import WeiboClient
 from .exception import DataFetchError
@@ -37,6 +41,8 @@ from .field import SearchType
 from .help import filter_search_result_card
 from .login import WeiboLogin
 
+api_logger = get_logger("api")
+
 
 class WeiboCrawler(AbstractCrawler):
     context_page: Page
@@ -56,6 +62,10 @@ class WeiboCrawler(AbstractCrawler):
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
+        # API 模式：复用保存的登录态直接请求接口，登录态失效时才启动浏览器
+        if config.ENABLE_API_MODE and await self.start_api_mode(httpx_proxy_format):
+            return
+
         async with async_playwright() as playwright:
             # Launch a browser context.
             chromium = playwright.chromium
@@ -67,40 +77,87 @@ class WeiboCrawler(AbstractCrawler):
             )
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
+            # 拦截图片、视频、字体和统计埋点请求，登录时暂停拦截
+            self.resource_blocker = await install_resource_blocker(self.browser_context, config.PLATFORM)
+            # 恢复缓存的登录态，校验有效期内跳过 pong 检查
+            self.login_state_cache = LoginStateCache(config.PLATFORM)
+            login_state_fresh = await self.login_state_cache.restore(self.browser_context)
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.mobile_index_url)
 
             # Create a client to interact with the xiaohongshu website.
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
-            if not await self.wb_client.pong():
-                login_obj = WeiboLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES
-                )
-                await login_obj.begin()
-
-                # 登录成功后重定向到手机端的网站，再更新手机端登录成功的cookie
-                utils.logger.info("[WeiboCrawler.start] redirect weibo mobile homepage and update cookies on mobile platform")
-                await self.context_page.goto(self.mobile_index_url)
-                await asyncio.sleep(2)
-                await self.wb_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
+
+            async def check_login():
+                if not await self.wb_client.pong():
+                    login_obj = WeiboLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES
+                    )
+                    self.resource_blocker.pause()
+                    await login_obj.begin()
+                    self.resource_blocker.resume()
+
+                    # 登录成功后重定向到手机端的网站，再更新手机端登录成功的cookie
+                    utils.logger.info("[WeiboCrawler.start] redirect weibo mobile homepage and update cookies on mobile platform")
+                    await self.context_page.goto(self.mobile_index_url)
+                    await asyncio.sleep(2)
+                    await self.wb_client.update_cookies(browser_context=self.browser_context)
+                await self.login_state_cache.save(self.browser_context, self.context_page)
+
+            if login_state_fresh:
+                # 有效期内跳过了 pong，爬取时第一次出现登录失效的错误再作废缓存、重新 pong/登录
+                install_auth_failure_fallback(self.wb_client, self.login_state_cache, check_login)
             else:
-                pass
-            utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
+                await check_login()
+
+            await self.crawl()
+            utils.logger.info(f"[WeiboCrawler.start] resource blocker stats: {self.resource_blocker.stats()}")
+
+    async def start_api_mode(self, httpx_proxy: Optional[str]) -> bool:
+        """
+        不启动浏览器，使用保存的登录态创建客户端并开始爬取
+        :param httpx_proxy: httpx proxy
+        :return: 登录态不存在或者已失效时返回 False
+        """
+        self.login_state_cache = LoginStateCache(config.PLATFORM)
+        stored_context = await self.login_state_cache.restore_stored()
+        if not stored_context:
+            utils.logger.info("[WeiboCrawler.start_api_mode] No saved login state, launch browser ...")
+            return False
+        self.browser_context = stored_context
+        self.context_page = None
+        self.wb_client = await self.create_weibo_client(httpx_proxy)
+        if self.login_state_cache.fresh:
+            # 有效期内跳过 pong，爬取时出现登录失效的错误只作废缓存，下次启动时重新 pong 或启动浏览器登录
+            install_auth_failure_fallback(self.wb_client, self.login_state_cache)
+        elif await self.wb_client.pong():
+            await self.login_state_cache.save(self.browser_context)
+        else:
+            utils.logger.info("[WeiboCrawler.start_api_mode] Saved login state is invalid, launch browser ...")
+            return False
+        utils.logger.info("[WeiboCrawler.start_api_mode] Use saved login state, start crawler without browser ...")
+        await self.crawl()
+        return True
+
+    async def crawl(self):
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        if config.CRAWLER_TYPE == "search":
+            # Search for video and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_notes()
+        elif config.CRAWLER_TYPE == "creator":
+            # Get creator's information and their notes and comments
+            await self.get_creators_and_notes()
+        else:
+            pass
+        await self.budget.join()
+        utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
 
     async def search(self):
         """
@@ -145,7 +202,7 @@ class WeiboCrawler(AbstractCrawler):
         get specified notes info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in
             config.WEIBO_SPECIFIED_ID_LIST
@@ -156,7 +213,7 @@ class WeiboCrawler(AbstractCrawler):
                 await weibo_store.update_weibo_note(note_item)
         await self.batch_get_notes_comments(config.WEIBO_SPECIFIED_ID_LIST)
 
-    async def get_note_info_task(self, note_id: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
+    async def get_note_info_task(self, note_id: str, semaphore: AdaptiveLimiter) -> Optional[Dict]:
         """
         Get note detail task
         :param note_id:
@@ -186,14 +243,15 @@ class WeiboCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.comment
         task_list: List[Task] = []
         for note_id in note_id_list:
             task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
             task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论任务在后台执行，不阻塞下一页，爬取结束前统一等待
+        self.budget.add_background_tasks(task_list)
 
-    async def get_note_comments(self, note_id: str, semaphore: asyncio.Semaphore):
+    async def get_note_comments(self, note_id: str, semaphore: AdaptiveLimiter):
         """
         get comment for note id
         :param note_id:
@@ -231,7 +289,8 @@ class WeiboCrawler(AbstractCrawler):
             url = pic.get("url")
             if not url:
                 continue
-            content = await self.wb_client.get_note_image(url)
+            async with self.budget.media:
+                content = await self.wb_client.get_note_image(url)
             if content != None:
                 extension_file_name = url.split(".")[-1]
                 await weibo_store.update_weibo_note_image(pic["pid"], content, extension_file_name)
@@ -245,10 +304,11 @@ class WeiboCrawler(AbstractCrawler):
         """
         utils.logger.info("[WeiboCrawler.get_creators_and_notes] Begin get weibo creators")
         for user_id in config.WEIBO_CREATOR_ID_LIST:
+            report_scope_var.set(f"creator:{user_id}")
             createor_info_res: Dict = await self.wb_client.get_creator_info_by_id(creator_id=user_id)
             if createor_info_res:
                 createor_info: Dict = createor_info_res.get("userInfo", {})
-                utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {createor_info}")
+                api_logger.debug("[WeiboCrawler.get_creators_and_notes] creator info: %s", createor_info)
                 if not createor_info:
                     raise DataFetchError("Get creator info error")
                 await weibo_store.save_creator(user_id, user_info=createor_info)
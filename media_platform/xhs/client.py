@@ -9,19 +9,23 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 
-import asyncio
 import json
 import re
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
-from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.account_pool import AccountPool, AccountSession
+from tools.adaptive_limiter import AdaptiveLimiter, is_throttle_error, limiter_feedback
+from tools.comment_stream import CommentPage, drain_comment_pages, fan_out_sub_comments
+from tools.http_fixture import create_http_client
+from tools.metrics import PARSE_SECONDS, SIGN_SECONDS
+from tools.page_pool import PagePool
+from tools.paginator import PageResult
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
@@ -36,8 +40,9 @@ class XiaoHongShuClient(AbstractApiClient):
         proxies=None,
         *,
         headers: Dict[str, str],
-        playwright_page: Page,
+        playwright_page: Union[Page, PagePool],
         cookie_dict: Dict[str, str],
+        account_pool: Optional[AccountPool] = None,
     ):
         self.proxies = proxies
         self.timeout = timeout
@@ -50,13 +55,19 @@ class XiaoHongShuClient(AbstractApiClient):
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # localStorage 中的 b1 是设备指纹，不会变化，读取一次后缓存，也可以从登录态缓存中恢复
+        self.b1 = ""
+        # 开启账号池时每个请求从账号池中选一个账号的cookie
+        self.account_pool = account_pool
 
-    async def _pre_headers(self, url: str, data=None) -> Dict:
+    @SIGN_SECONDS.timed(platform="xhs")
+    async def _pre_headers(self, url: str, data=None, account: Optional[AccountSession] = None) -> Dict:
         """
         请求头参数签名
         Args:
             url:
             data:
+            account: 账号池中本次请求使用的账号
 
         Returns:
 
@@ -64,10 +75,12 @@ class XiaoHongShuClient(AbstractApiClient):
         encrypt_params = await self.playwright_page.evaluate(
             "([url, data]) => window._webmsxyw(url,data)", [url, data]
         )
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+        if not self.b1:
+            local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+            self.b1 = local_storage.get("b1", "")
         signs = sign(
-            a1=self.cookie_dict.get("a1", ""),
-            b1=local_storage.get("b1", ""),
+            a1=(account.cookie_dict if account else self.cookie_dict).get("a1", ""),
+            b1=self.b1,
             x_s=encrypt_params.get("X-s", ""),
             x_t=str(encrypt_params.get("X-t", "")),
         )
@@ -78,31 +91,50 @@ class XiaoHongShuClient(AbstractApiClient):
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
+        if account:
+            return {**self.headers, **headers, "Cookie": account.cookie_str}
         self.headers.update(headers)
         return self.headers
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @limiter_feedback
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
         Args:
             method: 请求方法
             url: 请求的URL
-            **kwargs: 其他请求参数，例如请求头、请求体等
+            **kwargs: 其他请求参数，例如请求头、请求体等，sign=(uri, data) 时每次请求前对请求头签名
 
         Returns:
 
         """
         # return response.text
         return_response = kwargs.pop("return_response", False)
-
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        sign_uri, sign_data = kwargs.pop("sign", (None, None))
+        while True:
+            # 每次请求（包括重试策略的重试）都重新选账号、重新签名，不会在刚出现验证码的账号上重试
+            account = await self.account_pool.acquire() if self.account_pool and sign_uri is not None else None
+            if sign_uri is not None:
+                kwargs["headers"] = await self._pre_headers(sign_uri, sign_data, account=account)
+            try:
+                return await self._send(method, url, return_response, account, **kwargs)
+            except Exception as e:
+                # 账号出现验证码/IP封禁时已经进入冷却，还有其他可用账号时换一个账号重试
+                if not account or not is_throttle_error(e) or not self.account_pool.has_available():
+                    raise
+                utils.logger.warning(f"[XiaoHongShuClient.request] account {account.account} error: {e}, "
+                                     f"retry with another account")
+
+    async def _send(self, method, url, return_response: bool, account: Optional[AccountSession], **kwargs):
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
             verify_type = response.headers["Verifytype"]
             verify_uuid = response.headers["Verifyuuid"]
+            if account:
+                self.account_pool.report_failure(account, f"captcha {response.status_code}")
             raise Exception(
                 f"出现验证码，请求失败，Verifytype: {verify_type}，Verifyuuid: {verify_uuid}, Response: {response}"
             )
@@ -111,8 +143,12 @@ class XiaoHongShuClient(AbstractApiClient):
             return response.text
         data: Dict = response.json()
         if data["success"]:
+            if account:
+                self.account_pool.report_success(account)
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
+            if account:
+                self.account_pool.report_failure(account, "ip blocked")
             raise IPBlockError(self.IP_ERROR_STR)
         else:
             raise DataFetchError(data.get("msg", None))
@@ -130,10 +166,7 @@ class XiaoHongShuClient(AbstractApiClient):
         final_uri = uri
         if isinstance(params, dict):
             final_uri = f"{uri}?" f"{urlencode(params)}"
-        headers = await self._pre_headers(final_uri)
-        return await self.request(
-            method="GET", url=f"{self._host}{final_uri}", headers=headers
-        )
+        return await self.request(method="GET", url=f"{self._host}{final_uri}", sign=(final_uri, None))
 
     async def post(self, uri: str, data: dict, **kwargs) -> Dict:
         """
@@ -145,18 +178,17 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        headers = await self._pre_headers(uri, data)
         json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
         return await self.request(
             method="POST",
             url=f"{self._host}{uri}",
             data=json_str,
-            headers=headers,
+            sign=(uri, data),
             **kwargs,
         )
 
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxies=self.proxies) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request("GET", url, timeout=self.timeout)
             if not response.reason_phrase == "OK":
                 utils.logger.error(
@@ -198,6 +230,8 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        if self.account_pool:
+            self.account_pool.update_cookies(config.LOGIN_ACCOUNT, cookie_dict)
 
     async def get_note_by_keyword(
         self,
@@ -320,69 +354,93 @@ class XiaoHongShuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_note_all_comments(
+    async def iter_note_all_comments(
         self,
         note_id: str,
         xsec_token: str,
         crawl_interval: float = 1.0,
-        callback: Optional[Callable] = None,
         max_count: int = 10,
-    ) -> List[Dict]:
+        sub_comment_limiter: Optional[AdaptiveLimiter] = None,
+    ) -> AsyncIterator[CommentPage]:
         """
-        获取指定笔记下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        按页获取指定笔记下的一级评论，每页一级评论之后紧跟它们的二级评论页
         Args:
             note_id: 笔记ID
             xsec_token: 验证token
             crawl_interval: 爬取一次笔记的延迟单位（秒）
-            callback: 一次笔记爬取结束后
-            max_count: 一次笔记爬取的最大评论数量
+            max_count: 一次笔记爬取的最大评论数量（含二级评论）
+            sub_comment_limiter: 二级评论的并发预算
         Returns:
 
         """
-        result = []
-        comments_has_more = True
-        comments_cursor = ""
-        while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_note_comments(
-                note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
-            )
-            comments_has_more = comments_res.get("has_more", False)
-            comments_cursor = comments_res.get("cursor", "")
+        async def fetch_page(cursor: str) -> Optional[PageResult]:
+            comments_res = await self.get_note_comments(note_id=note_id, xsec_token=xsec_token, cursor=cursor)
             if "comments" not in comments_res:
                 utils.logger.info(
                     f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}"
                 )
-                break
-            comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
-            if callback:
-                await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
-            result.extend(comments)
-            sub_comments = await self.get_comments_all_sub_comments(
+                return None
+            return PageResult(comments_res["comments"], comments_res.get("cursor", ""), comments_res.get("has_more", False))
+
+        if max_count <= 0:
+            return
+        pages = self.paginate(fetch_page, cursor="", max_count=max_count, crawl_interval=crawl_interval)
+        async for comments in pages:
+            yield note_id, comments
+            async for sub_note_id, sub_comments in self.iter_comments_all_sub_comments(
                 comments=comments,
                 xsec_token=xsec_token,
                 crawl_interval=crawl_interval,
-                callback=callback,
-            )
-            result.extend(sub_comments)
-        return result
+                limiter=sub_comment_limiter,
+            ):
+                yield sub_note_id, sub_comments
+                # 二级评论也计入 max_count
+                pages.count += len(sub_comments)
+            if pages.count >= max_count:
+                break
 
-    async def get_comments_all_sub_comments(
+    async def get_note_all_comments(
         self,
-        comments: List[Dict],
+        note_id: str,
         xsec_token: str,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        max_count: int = 10,
+        collect: bool = False,
+        sub_comment_limiter: Optional[AdaptiveLimiter] = None,
     ) -> List[Dict]:
         """
-        获取指定一级评论下的所有二级评论, 该方法会一直查找一级评论下的所有二级评论信息
+        获取指定笔记下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        Args:
+            note_id: 笔记ID
+            xsec_token: 验证token
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            callback: 每页评论爬取结束后的回调
+            max_count: 一次笔记爬取的最大评论数量
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+            sub_comment_limiter: 二级评论的并发预算
+        Returns:
+
+        """
+        return await drain_comment_pages(
+            self.iter_note_all_comments(note_id, xsec_token, crawl_interval, max_count, sub_comment_limiter),
+            callback, collect
+        )
+
+    async def iter_comments_all_sub_comments(
+        self,
+        comments: List[Dict],
+        xsec_token: str,
+        crawl_interval: float = 1.0,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ) -> AsyncIterator[CommentPage]:
+        """
+        按页获取指定一级评论下的所有二级评论，多条一级评论并发展开，按一级评论的顺序返回
         Args:
             comments: 评论列表
             xsec_token: 验证token
             crawl_interval: 爬取一次评论的延迟单位（秒）
-            callback: 一次评论爬取结束后
+            limiter: 二级评论的并发预算
 
         Returns:
 
@@ -391,49 +449,77 @@ class XiaoHongShuClient(AbstractApiClient):
             utils.logger.info(
                 f"[XiaoHongShuCrawler.get_comments_all_sub_comments] Crawling sub_comment mode is not enabled"
             )
-            return []
-
-        result = []
-        for comment in comments:
-            note_id = comment.get("note_id")
-            sub_comments = comment.get("sub_comments")
-            if sub_comments and callback:
-                await callback(note_id, sub_comments)
-
-            sub_comment_has_more = comment.get("sub_comment_has_more")
-            if not sub_comment_has_more:
-                continue
-
-            root_comment_id = comment.get("id")
-            sub_comment_cursor = comment.get("sub_comment_cursor")
-
-            while sub_comment_has_more:
-                comments_res = await self.get_note_sub_comments(
-                    note_id=note_id,
-                    root_comment_id=root_comment_id,
-                    xsec_token=xsec_token,
-                    num=10,
-                    cursor=sub_comment_cursor,
+            return
+
+        async for page in fan_out_sub_comments(
+                comments, lambda comment: self._iter_comment_sub_comments(comment, xsec_token, crawl_interval),
+                limiter=limiter):
+            yield page
+
+    async def _iter_comment_sub_comments(self, comment: Dict, xsec_token: str,
+                                         crawl_interval: float) -> AsyncIterator[CommentPage]:
+        """
+        按页获取一条一级评论下的二级评论，先返回一级评论里自带的二级评论
+        """
+        note_id = comment.get("note_id")
+        sub_comments = comment.get("sub_comments")
+        if sub_comments:
+            yield note_id, sub_comments
+
+        if not comment.get("sub_comment_has_more"):
+            return
+
+        root_comment_id = comment.get("id")
+
+        async def fetch_page(cursor: str) -> Optional[PageResult]:
+            comments_res = await self.get_note_sub_comments(
+                note_id=note_id,
+                root_comment_id=root_comment_id,
+                xsec_token=xsec_token,
+                num=10,
+                cursor=cursor,
+            )
+            if comments_res is None:
+                utils.logger.info(
+                    f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
                 )
-                
-                if comments_res is None:
-                    utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
-                    )
-                    continue
-                sub_comment_has_more = comments_res.get("has_more", False)
-                sub_comment_cursor = comments_res.get("cursor", "")
-                if "comments" not in comments_res:
-                    utils.logger.info(
-                        f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
-                    )
-                    break
-                comments = comments_res["comments"]
-                if callback:
-                    await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
+                return None
+            if "comments" not in comments_res:
+                utils.logger.info(
+                    f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
+                )
+                return None
+            return PageResult(comments_res["comments"], comments_res.get("cursor", ""),
+                              comments_res.get("has_more", False))
+
+        # 由 fan_out_sub_comments 驱动，每次取页都要占用二级评论的并发预算，不能在预算之外预取下一页
+        async for sub_comments in self.paginate(fetch_page, cursor=comment.get("sub_comment_cursor"),
+                                                crawl_interval=crawl_interval, prefetch=False):
+            yield note_id, sub_comments
+
+    async def get_comments_all_sub_comments(
+        self,
+        comments: List[Dict],
+        xsec_token: str,
+        crawl_interval: float = 1.0,
+        callback: Optional[Callable] = None,
+        collect: bool = False,
+    ) -> List[Dict]:
+        """
+        获取指定一级评论下的所有二级评论, 该方法会一直查找一级评论下的所有二级评论信息
+        Args:
+            comments: 评论列表
+            xsec_token: 验证token
+            crawl_interval: 爬取一次评论的延迟单位（秒）
+            callback: 每页评论爬取结束后的回调
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+
+        Returns:
+
+        """
+        return await drain_comment_pages(
+            self.iter_comments_all_sub_comments(comments, xsec_token, crawl_interval), callback, collect
+        )
 
     async def get_creator_info(self, user_id: str) -> Dict:
         """
@@ -452,7 +538,8 @@ class XiaoHongShuClient(AbstractApiClient):
         if match is None:
             return {}
 
-        info = json.loads(match.group(1).replace(":undefined", ":null"), strict=False)
+        with PARSE_SECONDS.time(platform="xhs", parser="creator_html"):
+            info = json.loads(match.group(1).replace(":undefined", ":null"), strict=False)
         if info is None:
             return {}
         return info.get("user").get("userPageData")
@@ -495,40 +582,27 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        result = []
-        notes_has_more = True
-        notes_cursor = ""
-        while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
-            notes_res = await self.get_notes_by_creator(user_id, notes_cursor)
+        async def fetch_page(cursor: str) -> Optional[PageResult]:
+            notes_res = await self.get_notes_by_creator(user_id, cursor)
             if not notes_res:
                 utils.logger.error(
                     f"[XiaoHongShuClient.get_notes_by_creator] The current creator may have been banned by xhs, so they cannot access the data."
                 )
-                break
-
-            notes_has_more = notes_res.get("has_more", False)
-            notes_cursor = notes_res.get("cursor", "")
+                return None
             if "notes" not in notes_res:
                 utils.logger.info(
                     f"[XiaoHongShuClient.get_all_notes_by_creator] No 'notes' key found in response: {notes_res}"
                 )
-                break
-
+                return None
             notes = notes_res["notes"]
             utils.logger.info(
                 f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}"
             )
+            return PageResult(notes, notes_res.get("cursor", ""), notes_res.get("has_more", False))
 
-            remaining = config.CRAWLER_MAX_NOTES_COUNT - len(result)
-            if remaining <= 0:
-                break
-
-            notes_to_add = notes[:remaining]
-            if callback:
-                await callback(notes_to_add)
-
-            result.extend(notes_to_add)
-            await asyncio.sleep(crawl_interval)
+        result = await self.paginate(
+            fetch_page, cursor="", max_count=config.CRAWLER_MAX_NOTES_COUNT, crawl_interval=crawl_interval
+        ).collect(callback)
 
         utils.logger.info(
             f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}"
@@ -548,7 +622,6 @@ class XiaoHongShuClient(AbstractApiClient):
         data = {"original_url": f"{self._domain}/discovery/item/{note_id}"}
         return await self.post(uri, data=data, return_response=True)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_note_by_id_from_html(
         self,
         note_id: str,
@@ -557,7 +630,7 @@ class XiaoHongShuClient(AbstractApiClient):
         enable_cookie: bool = False,
     ) -> Optional[Dict]:
         """
-        通过解析网页版的笔记详情页HTML，获取笔记详情, 该接口可能会出现失败的情况，这里尝试重试3次
+        通过解析网页版的笔记详情页HTML，获取笔记详情, 该接口可能会出现失败的情况，失败重试由 request 的重试策略处理
         copy from https://github.com/ReaJason/xhs/blob/eb1c5a0213f6fbb592f0a2897ee552847c69ea2d/xhs/core.py#L217-L259
         thanks for ReaJason
         Args:
@@ -619,6 +692,7 @@ class XiaoHongShuClient(AbstractApiClient):
             return {}
 
         try:
-            return get_note_dict(html)
+            with PARSE_SECONDS.time(platform="xhs", parser="note_html"):
+                return get_note_dict(html)
         except:
             return None
@@ -12,7 +12,6 @@
 import asyncio
 import os
 import random
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -26,7 +25,13 @@ from model.m_xiaohongshu import NoteUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.account_pool import create_account_pool
+from tools.adaptive_limiter import AdaptiveLimiter
+from tools.login_state import LoginStateCache, install_auth_failure_fallback
+from tools.page_pool import PagePool
+from tools.resource_blocker import install_resource_blocker
+from tools.structured_log import get_logger
+from var import crawler_type_var, report_scope_var, source_keyword_var
 
 from .client import XiaoHongShuClient
 from .exception import DataFetchError
@@ -34,9 +39,12 @@ from .field import SearchSortType
 from .help import parse_note_info_from_note_url, get_search_id
 from .login import XiaoHongShuLogin
 
+api_logger = get_logger("api")
+
 
 class XiaoHongShuCrawler(AbstractCrawler):
     context_page: Page
+    page_pool: Optional[PagePool]
     xhs_client: XiaoHongShuClient
     browser_context: BrowserContext
 
@@ -64,6 +72,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
+            # 拦截图片、视频、字体和统计埋点请求，登录时暂停拦截
+            self.resource_blocker = await install_resource_blocker(self.browser_context, config.PLATFORM)
+            # 恢复缓存的登录态，校验有效期内跳过 pong 检查
+            self.login_state_cache = LoginStateCache(config.PLATFORM)
+            login_state_fresh = await self.login_state_cache.restore(self.browser_context)
             # add a cookie attribute webId to avoid the appearance of a sliding captcha on the webpage
             await self.browser_context.add_cookies(
                 [
@@ -77,21 +90,42 @@ class XiaoHongShuCrawler(AbstractCrawler):
             )
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url)
+            # 签名等 evaluate 调用分散到页面池的多个页面上并发执行
+            self.page_pool = await PagePool(
+                self.browser_context, self.index_url, size=config.BROWSER_PAGE_POOL_SIZE, first_page=self.context_page
+            ).start()
 
             # Create a client to interact with the xiaohongshu website.
             self.xhs_client = await self.create_xhs_client(httpx_proxy_format)
-            if not await self.xhs_client.pong():
-                login_obj = XiaoHongShuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
-                )
-                await login_obj.begin()
-                await self.xhs_client.update_cookies(
-                    browser_context=self.browser_context
-                )
+            self.xhs_client.b1 = self.login_state_cache.tokens.get("b1", "")
+
+            async def check_login():
+                if not await self.xhs_client.pong():
+                    login_obj = XiaoHongShuLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    self.resource_blocker.pause()
+                    await login_obj.begin()
+                    self.resource_blocker.resume()
+                    await self.xhs_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
+                await self.login_state_cache.save(self.browser_context, self.context_page)
+
+            if login_state_fresh:
+                # 有效期内跳过了 pong，爬取时第一次出现登录失效的错误再作废缓存、重新 pong/登录
+                install_auth_failure_fallback(self.xhs_client, self.login_state_cache, check_login)
+            else:
+                await check_login()
+            # 当前账号登录完成后再创建账号池，其他账号的登录态来自登录态缓存
+            # 签名在当前浏览器中计算，只有 a1 和浏览器一致的账号才能共用签名
+            self.xhs_client.account_pool = await create_account_pool(
+                config.PLATFORM, self.xhs_client.cookie_dict, shared_cookie_keys=("a1",)
+            )
 
             crawler_type_var.set(config.CRAWLER_TYPE)
             if config.CRAWLER_TYPE == "search":
@@ -106,7 +140,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
             else:
                 pass
 
+            await self.budget.join()
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
+            utils.logger.info(f"[XiaoHongShuCrawler.start] page pool stats: {self.page_pool.stats()}")
+            if self.xhs_client.account_pool:
+                utils.logger.info(f"[XiaoHongShuCrawler.start] account pool stats: {self.xhs_client.account_pool.stats()}")
+            utils.logger.info(f"[XiaoHongShuCrawler.start] resource blocker stats: {self.resource_blocker.stats()}")
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
@@ -148,13 +187,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
                             else SearchSortType.GENERAL
                         ),
                     )
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Search notes res:{notes_res}"
-                    )
+                    api_logger.debug("[XiaoHongShuCrawler.search] Search notes res:%s", notes_res)
                     if not notes_res or not notes_res.get("has_more", False):
                         utils.logger.info("No more content!")
                         break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                    semaphore = self.budget.detail
                     task_list = [
                         self.get_note_detail_async_task(
                             note_id=post_item.get("id"),
@@ -173,9 +210,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                             note_ids.append(note_detail.get("note_id"))
                             xsec_tokens.append(note_detail.get("xsec_token"))
                     page += 1
-                    utils.logger.info(
-                        f"[XiaoHongShuCrawler.search] Note details: {note_details}"
-                    )
+                    api_logger.debug("[XiaoHongShuCrawler.search] Note details: %s", note_details)
                     await self.batch_get_note_comments(note_ids, xsec_tokens)
                 except DataFetchError:
                     utils.logger.error(
@@ -189,6 +224,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             "[XiaoHongShuCrawler.get_creators_and_notes] Begin get xiaohongshu creators"
         )
         for user_id in config.XHS_CREATOR_ID_LIST:
+            report_scope_var.set(f"creator:{user_id}")
             # get creator detail info from web html content
             createor_info: Dict = await self.xhs_client.get_creator_info(
                 user_id=user_id
@@ -219,7 +255,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.detail
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
@@ -252,7 +288,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 note_id=note_url_info.note_id,
                 xsec_source=note_url_info.xsec_source,
                 xsec_token=note_url_info.xsec_token,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=self.budget.detail,
             )
             get_note_detail_task_list.append(crawler_task)
 
@@ -271,7 +307,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         note_id: str,
         xsec_source: str,
         xsec_token: str,
-        semaphore: asyncio.Semaphore,
+        semaphore: AdaptiveLimiter,
     ) -> Optional[Dict]:
         """Get note detail
 
@@ -298,7 +334,8 @@ class XiaoHongShuCrawler(AbstractCrawler):
                         note_id, xsec_source, xsec_token, enable_cookie=True
                     )
                 )
-                time.sleep(crawl_interval)
+                # 异步等待，不阻塞事件循环里其他笔记和后台评论任务
+                await asyncio.sleep(crawl_interval)
                 if not note_detail_from_html:
                     # 如果网页版笔记详情获取失败，则尝试不使用cookie获取
                     note_detail_from_html = (
@@ -346,7 +383,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         utils.logger.info(
             f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}"
         )
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.comment
         task_list: List[Task] = []
         for index, note_id in enumerate(note_list):
             task = asyncio.create_task(
@@ -356,10 +393,11 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 name=note_id,
             )
             task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论任务在后台执行，不阻塞下一页，爬取结束前统一等待
+        self.budget.add_background_tasks(task_list)
 
     async def get_comments(
-        self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore
+        self, note_id: str, xsec_token: str, semaphore: AdaptiveLimiter
     ):
         """Get note comments with keyword filtering and quantity limitation"""
         async with semaphore:
@@ -377,6 +415,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 crawl_interval=crawl_interval,
                 callback=xhs_store.batch_update_xhs_note_comments,
                 max_count=CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                sub_comment_limiter=self.budget.sub_comment,
             )
 
     @staticmethod
@@ -411,7 +450,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 "Referer": "https://www.xiaohongshu.com",
                 "Content-Type": "application/json;charset=UTF-8",
             },
-            playwright_page=self.context_page,
+            playwright_page=self.page_pool,
             cookie_dict=cookie_dict,
         )
         return xhs_client_obj
@@ -460,8 +499,9 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 f"[XiaoHongShuCrawler.get_notice_media] Crawling image mode is not enabled"
             )
             return
-        await self.get_note_images(note_detail)
-        await self.get_notice_video(note_detail)
+        async with self.budget.media:
+            await self.get_note_images(note_detail)
+            await self.get_notice_video(note_detail)
 
     async def get_note_images(self, note_item: Dict):
         """
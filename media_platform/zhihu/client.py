@@ -10,26 +10,31 @@
 
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
+from tools.adaptive_limiter import AdaptiveLimiter, limiter_feedback
+from tools.comment_stream import CommentPage, drain_comment_pages, fan_out_sub_comments
+from tools.http_fixture import create_http_client
+from tools.metrics import SIGN_SECONDS
+from tools.paginator import PageResult
+from tools.structured_log import get_logger
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
 from .help import ZhihuExtractor, sign
 
+api_logger = get_logger("api")
+
 
 class ZhiHuClient(AbstractApiClient):
     def __init__(
@@ -47,6 +52,7 @@ class ZhiHuClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
         self._extractor = ZhihuExtractor()
 
+    @SIGN_SECONDS.timed(platform="zhihu")
     async def _pre_headers(self, url: str) -> Dict:
         """
         请求头参数签名
@@ -64,7 +70,7 @@ class ZhiHuClient(AbstractApiClient):
         headers['x-zse-96'] = sign_res["x-zse-96"]
         return headers
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @limiter_feedback
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
@@ -79,7 +85,7 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxies=self.proxies, ) as client:
+        async with create_http_client(proxies=self.proxies) as client:
             response = await client.request(
                 method, url, timeout=self.timeout,
                 **kwargs
@@ -210,7 +216,7 @@ class ZhiHuClient(AbstractApiClient):
             "vertical": note_type.value,
         }
         search_res = await self.get(uri, params)
-        utils.logger.info(f"[ZhiHuClient.get_note_by_keyword] Search result: {search_res}")
+        api_logger.debug("[ZhiHuClient.get_note_by_keyword] Search result: %s", search_res)
         return self._extractor.extract_contents_from_search(search_res)
 
     async def get_root_comments(self, content_id: str, content_type: str, offset: str = "", limit: int = 10,
@@ -259,84 +265,124 @@ class ZhiHuClient(AbstractApiClient):
         }
         return await self.get(uri, params)
 
-    async def get_note_all_comments(self, content: ZhihuContent, crawl_interval: float = 1.0,
-                                    callback: Optional[Callable] = None) -> List[ZhihuComment]:
+    async def iter_note_all_comments(self, content: ZhihuContent, crawl_interval: float = 1.0,
+                                     sub_comment_limiter: Optional[AdaptiveLimiter] = None
+                                     ) -> AsyncIterator[CommentPage]:
         """
-        获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        按页获取指定帖子下的一级评论，每页一级评论之后紧跟它们的子评论页
         Args:
             content: 内容详情对象(问题｜文章｜视频)
             crawl_interval: 爬取一次笔记的延迟单位（秒）
-            callback: 一次笔记爬取结束后
+            sub_comment_limiter: 子评论的并发预算
 
         Returns:
 
         """
-        result: List[ZhihuComment] = []
-        is_end: bool = False
-        offset: str = ""
-        limit: int = 10
-        while not is_end:
-            root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
+        async def fetch_page(offset: str) -> Optional[PageResult]:
+            root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, 10)
             if not root_comment_res:
-                break
+                return None
             paging_info = root_comment_res.get("paging", {})
-            is_end = paging_info.get("is_end")
-            offset = self._extractor.extract_offset(paging_info)
             comments = self._extractor.extract_comments(content, root_comment_res.get("data"))
+            return PageResult(comments, self._extractor.extract_offset(paging_info), not paging_info.get("is_end"))
+
+        async for comments in self.paginate(fetch_page, cursor="", crawl_interval=crawl_interval):
+            yield content.content_id, comments
+            async for page in self.iter_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval,
+                                                                  limiter=sub_comment_limiter):
+                yield page
+
+    async def get_note_all_comments(self, content: ZhihuContent, crawl_interval: float = 1.0,
+                                    callback: Optional[Callable] = None,
+                                    collect: bool = False,
+                                    sub_comment_limiter: Optional[AdaptiveLimiter] = None) -> List[ZhihuComment]:
+        """
+        获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
+        Args:
+            content: 内容详情对象(问题｜文章｜视频)
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            callback: 每页评论爬取结束后的回调，参数为评论列表
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
+            sub_comment_limiter: 子评论的并发预算
+
+        Returns:
+
+        """
+        return await drain_comment_pages(self.iter_note_all_comments(content, crawl_interval, sub_comment_limiter),
+                                         self._page_callback(callback), collect)
+
+    async def iter_comments_all_sub_comments(self, content: ZhihuContent, comments: List[ZhihuComment],
+                                             crawl_interval: float = 1.0,
+                                             limiter: Optional[AdaptiveLimiter] = None) -> AsyncIterator[CommentPage]:
+        """
+        按页获取指定评论下的所有子评论，多条评论并发展开，按评论的顺序返回
+        Args:
+            content: 内容详情对象(问题｜文章｜视频)
+            comments: 评论列表
+            crawl_interval: 爬取一次笔记的延迟单位（秒）
+            limiter: 子评论的并发预算
 
-            if not comments:
-                break
+        Returns:
 
-            if callback:
-                await callback(comments)
+        """
+        if not config.ENABLE_GET_SUB_COMMENTS:
+            return
 
-            result.extend(comments)
-            await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
-        return result
+        async for page in fan_out_sub_comments(
+                [parment_comment for parment_comment in comments if parment_comment.sub_comment_count != 0],
+                lambda parment_comment: self._iter_comment_sub_comments(content, parment_comment, crawl_interval),
+                limiter=limiter):
+            yield page
+
+    async def _iter_comment_sub_comments(self, content: ZhihuContent, parment_comment: ZhihuComment,
+                                         crawl_interval: float) -> AsyncIterator[CommentPage]:
+        """
+        按页获取一条评论下的子评论
+        """
+        async def fetch_page(offset: str) -> Optional[PageResult]:
+            child_comment_res = await self.get_child_comments(parment_comment.comment_id, offset, 10)
+            if not child_comment_res:
+                return None
+            paging_info = child_comment_res.get("paging", {})
+            sub_comments = self._extractor.extract_comments(content, child_comment_res.get("data"))
+            return PageResult(sub_comments, self._extractor.extract_offset(paging_info),
+                              not paging_info.get("is_end"))
+
+        # 由 fan_out_sub_comments 驱动，每次取页都要占用二级评论的并发预算，不能在预算之外预取下一页
+        async for sub_comments in self.paginate(fetch_page, cursor="", crawl_interval=crawl_interval,
+                                                prefetch=False):
+            yield content.content_id, sub_comments
 
     async def get_comments_all_sub_comments(self, content: ZhihuContent, comments: List[ZhihuComment], crawl_interval: float = 1.0,
-                                            callback: Optional[Callable] = None) -> List[ZhihuComment]:
+                                            callback: Optional[Callable] = None,
+                                            collect: bool = False) -> List[ZhihuComment]:
         """
         获取指定评论下的所有子评论
         Args:
             content: 内容详情对象(问题｜文章｜视频)
             comments: 评论列表
             crawl_interval: 爬取一次笔记的延迟单位（秒）
-            callback: 一次笔记爬取结束后
+            callback: 每页评论爬取结束后的回调，参数为评论列表
+            collect: 是否汇总返回所有评论，默认只交给 callback，不在内存中保留
 
         Returns:
 
         """
-        if not config.ENABLE_GET_SUB_COMMENTS:
-            return []
-
-        all_sub_comments: List[ZhihuComment] = []
-        for parment_comment in comments:
-            if parment_comment.sub_comment_count == 0:
-                continue
-
-            is_end: bool = False
-            offset: str = ""
-            limit: int = 10
-            while not is_end:
-                child_comment_res = await self.get_child_comments(parment_comment.comment_id, offset, limit)
-                if not child_comment_res:
-                    break
-                paging_info = child_comment_res.get("paging", {})
-                is_end = paging_info.get("is_end")
-                offset = self._extractor.extract_offset(paging_info)
-                sub_comments = self._extractor.extract_comments(content, child_comment_res.get("data"))
-
-                if not sub_comments:
-                    break
-
-                if callback:
-                    await callback(sub_comments)
-
-                all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
-        return all_sub_comments
+        return await drain_comment_pages(self.iter_comments_all_sub_comments(content, comments, crawl_interval),
+                                         self._page_callback(callback), collect)
+
+    @staticmethod
+    def _page_callback(callback: Optional[Callable]) -> Optional[Callable]:
+        """
+        知乎的评论回调只接收评论列表
+        """
+        if callback is None:
+            return None
+
+        async def page_callback(_content_id: str, comments: List[ZhihuComment]):
+            await callback(comments)
+
+        return page_callback
 
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
         """
@@ -424,24 +470,19 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
-        is_end: bool = False
-        offset: int = 0
         limit: int = 20
-        while not is_end:
+
+        async def fetch_page(offset: int) -> Optional[PageResult]:
             res = await self.get_creator_answers(creator.url_token, offset, limit)
             if not res:
-                break
-            utils.logger.info(f"[ZhiHuClient.get_all_anwser_by_creator] Get creator {creator.url_token} answers: {res}")
+                return None
+            api_logger.debug("[ZhiHuClient.get_all_anwser_by_creator] Get creator %s answers: %s", creator.url_token, res)
             paging_info = res.get("paging", {})
-            is_end = paging_info.get("is_end")
             contents = self._extractor.extract_content_list_from_creator(res.get("data"))
-            if callback:
-                await callback(contents)
-            all_contents.extend(contents)
-            offset += limit
-            await asyncio.sleep(crawl_interval)
-        return all_contents
+            return PageResult(contents, offset + limit, not paging_info.get("is_end"))
+
+        return await self.paginate(fetch_page, cursor=0, crawl_interval=crawl_interval,
+                                   stop_on_empty=False).collect(callback)
 
 
     async def get_all_articles_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
@@ -456,23 +497,18 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
-        is_end: bool = False
-        offset: int = 0
         limit: int = 20
-        while not is_end:
+
+        async def fetch_page(offset: int) -> Optional[PageResult]:
             res = await self.get_creator_articles(creator.url_token, offset, limit)
             if not res:
-                break
+                return None
             paging_info = res.get("paging", {})
-            is_end = paging_info.get("is_end")
             contents = self._extractor.extract_content_list_from_creator(res.get("data"))
-            if callback:
-                await callback(contents)
-            all_contents.extend(contents)
-            offset += limit
-            await asyncio.sleep(crawl_interval)
-        return all_contents
+            return PageResult(contents, offset + limit, not paging_info.get("is_end"))
+
+        return await self.paginate(fetch_page, cursor=0, crawl_interval=crawl_interval,
+                                   stop_on_empty=False).collect(callback)
 
 
     async def get_all_videos_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0,
@@ -487,23 +523,18 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        all_contents: List[ZhihuContent] = []
-        is_end: bool = False
-        offset: int = 0
         limit: int = 20
-        while not is_end:
+
+        async def fetch_page(offset: int) -> Optional[PageResult]:
             res = await self.get_creator_videos(creator.url_token, offset, limit)
             if not res:
-                break
+                return None
             paging_info = res.get("paging", {})
-            is_end = paging_info.get("is_end")
             contents = self._extractor.extract_content_list_from_creator(res.get("data"))
-            if callback:
-                await callback(contents)
-            all_contents.extend(contents)
-            offset += limit
-            await asyncio.sleep(crawl_interval)
-        return all_contents
+            return PageResult(contents, offset + limit, not paging_info.get("is_end"))
+
+        return await self.paginate(fetch_page, cursor=0, crawl_interval=crawl_interval,
+                                   stop_on_empty=False).collect(callback)
 
 
     async def get_answer_info(
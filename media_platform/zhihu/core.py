@@ -26,13 +26,19 @@ from model.m_zhihu import ZhihuContent, ZhihuCreator
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
-from var import crawler_type_var, source_keyword_var
+from tools.adaptive_limiter import AdaptiveLimiter
+from tools.login_state import LoginStateCache, install_auth_failure_fallback
+from tools.resource_blocker import install_resource_blocker
+from tools.structured_log import get_logger
+from var import crawler_type_var, report_scope_var, source_keyword_var
 
 from .client import ZhiHuClient
 from .exception import DataFetchError
 from .help import ZhihuExtractor, judge_zhihu_url
 from .login import ZhiHuLogin
 
+api_logger = get_logger("api")
+
 
 class ZhihuCrawler(AbstractCrawler):
     context_page: Page
@@ -57,6 +63,10 @@ class ZhihuCrawler(AbstractCrawler):
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = self.format_proxy_info(ip_proxy_info)
 
+        # API 模式：复用保存的登录态直接请求接口，登录态失效时才启动浏览器
+        if config.ENABLE_API_MODE and await self.start_api_mode(httpx_proxy_format):
+            return
+
         async with async_playwright() as playwright:
             # Launch a browser context.
             chromium = playwright.chromium
@@ -68,22 +78,38 @@ class ZhihuCrawler(AbstractCrawler):
             )
             # stealth.min.js is a js script to prevent the website from detecting the crawler.
             await self.browser_context.add_init_script(path="libs/stealth.min.js")
+            # 拦截图片、视频、字体和统计埋点请求，登录时暂停拦截
+            self.resource_blocker = await install_resource_blocker(self.browser_context, config.PLATFORM)
+            # 恢复缓存的登录态，校验有效期内跳过 pong 检查
+            self.login_state_cache = LoginStateCache(config.PLATFORM)
+            login_state_fresh = await self.login_state_cache.restore(self.browser_context)
 
             self.context_page = await self.browser_context.new_page()
             await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
 
             # Create a client to interact with the zhihu website.
             self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
-            if not await self.zhihu_client.pong():
-                login_obj = ZhiHuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES
-                )
-                await login_obj.begin()
-                await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+
+            async def check_login():
+                if not await self.zhihu_client.pong():
+                    login_obj = ZhiHuLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES
+                    )
+                    self.resource_blocker.pause()
+                    await login_obj.begin()
+                    self.resource_blocker.resume()
+                    await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+                await self.login_state_cache.save(self.browser_context, self.context_page)
+
+            if login_state_fresh:
+                # 有效期内跳过了 pong，爬取时第一次出现登录失效的错误再作废缓存、重新 pong/登录
+                install_auth_failure_fallback(self.zhihu_client, self.login_state_cache, check_login)
+            else:
+                await check_login()
 
             # 知乎的搜索接口需要打开搜索页面之后cookies才能访问API，单独的首页不行
             utils.logger.info("[ZhihuCrawler.start] Zhihu跳转到搜索页面获取搜索页面的Cookies，该过程需要5秒左右")
@@ -91,20 +117,51 @@ class ZhihuCrawler(AbstractCrawler):
             await asyncio.sleep(5)
             await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            await self.crawl()
+            utils.logger.info(f"[ZhihuCrawler.start] resource blocker stats: {self.resource_blocker.stats()}")
+
+    async def start_api_mode(self, httpx_proxy: Optional[str]) -> bool:
+        """
+        不启动浏览器，使用保存的登录态创建客户端并开始爬取
+        :param httpx_proxy: httpx proxy
+        :return: 登录态不存在或者已失效时返回 False
+        """
+        self.login_state_cache = LoginStateCache(config.PLATFORM)
+        stored_context = await self.login_state_cache.restore_stored()
+        if not stored_context:
+            utils.logger.info("[ZhihuCrawler.start_api_mode] No saved login state, launch browser ...")
+            return False
+        self.browser_context = stored_context
+        self.context_page = None
+        self.zhihu_client = await self.create_zhihu_client(httpx_proxy)
+        if self.login_state_cache.fresh:
+            # 有效期内跳过 pong，爬取时出现登录失效的错误只作废缓存，下次启动时重新 pong 或启动浏览器登录
+            install_auth_failure_fallback(self.zhihu_client, self.login_state_cache)
+        elif await self.zhihu_client.pong():
+            await self.login_state_cache.save(self.browser_context)
+        else:
+            utils.logger.info("[ZhihuCrawler.start_api_mode] Saved login state is invalid, launch browser ...")
+            return False
+        utils.logger.info("[ZhihuCrawler.start_api_mode] Use saved login state, start crawler without browser ...")
+        await self.crawl()
+        return True
+
+    async def crawl(self):
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        if config.CRAWLER_TYPE == "search":
+            # Search for notes and retrieve their comment information.
+            await self.search()
+        elif config.CRAWLER_TYPE == "detail":
+            # Get the information and comments of the specified post
+            await self.get_specified_notes()
+        elif config.CRAWLER_TYPE == "creator":
+            # Get creator's information and their notes and comments
+            await self.get_creators_and_notes()
+        else:
+            pass
 
-            utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+        await self.budget.join()
+        utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
@@ -129,7 +186,7 @@ class ZhihuCrawler(AbstractCrawler):
                         keyword=keyword,
                         page=page,
                     )
-                    utils.logger.info(f"[ZhihuCrawler.search] Search contents :{content_list}")
+                    api_logger.debug("[ZhihuCrawler.search] Search contents :%s", content_list)
                     if not content_list:
                         utils.logger.info("No more content!")
                         break
@@ -156,14 +213,15 @@ class ZhihuCrawler(AbstractCrawler):
             utils.logger.info(f"[ZhihuCrawler.batch_get_content_comments] Crawling comment mode is not enabled")
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = self.budget.comment
         task_list: List[Task] = []
         for content_item in content_list:
             task = asyncio.create_task(self.get_comments(content_item, semaphore), name=content_item.content_id)
             task_list.append(task)
-        await asyncio.gather(*task_list)
+        # 评论任务在后台执行，不阻塞下一页，爬取结束前统一等待
+        self.budget.add_background_tasks(task_list)
 
-    async def get_comments(self, content_item: ZhihuContent, semaphore: asyncio.Semaphore):
+    async def get_comments(self, content_item: ZhihuContent, semaphore: AdaptiveLimiter):
         """
         Get note comments with keyword filtering and quantity limitation
         Args:
@@ -178,7 +236,8 @@ class ZhihuCrawler(AbstractCrawler):
             await self.zhihu_client.get_note_all_comments(
                 content=content_item,
                 crawl_interval=random.random(),
-                callback=zhihu_store.batch_update_zhihu_note_comments
+                callback=zhihu_store.batch_update_zhihu_note_comments,
+                sub_comment_limiter=self.budget.sub_comment,
             )
 
     async def get_creators_and_notes(self) -> None:
@@ -189,6 +248,7 @@ class ZhihuCrawler(AbstractCrawler):
         """
         utils.logger.info("[ZhihuCrawler.get_creators_and_notes] Begin get xiaohongshu creators")
         for user_link in config.ZHIHU_CREATOR_URL_LIST:
+            report_scope_var.set(f"creator:{user_link}")
             utils.logger.info(f"[ZhihuCrawler.get_creators_and_notes] Begin get creator {user_link}")
             user_url_token = user_link.split("/")[-1]
             # get creator detail info from web html content
@@ -197,7 +257,7 @@ class ZhihuCrawler(AbstractCrawler):
                 utils.logger.info(f"[ZhihuCrawler.get_creators_and_notes] Creator {user_url_token} not found")
                 continue
 
-            utils.logger.info(f"[ZhihuCrawler.get_creators_and_notes] Creator info: {createor_info}")
+            api_logger.debug("[ZhihuCrawler.get_creators_and_notes] Creator info: %s", createor_info)
             await zhihu_store.save_creator(creator=createor_info)
 
             # 默认只提取回答信息，如果需要文章和视频，把下面的注释打开即可
@@ -228,7 +288,7 @@ class ZhihuCrawler(AbstractCrawler):
             await self.batch_get_content_comments(all_content_list)
 
     async def get_note_detail(
-        self, full_note_url: str, semaphore: asyncio.Semaphore
+        self, full_note_url: str, semaphore: AdaptiveLimiter
     ) -> Optional[ZhihuContent]:
         """
         Get note detail
@@ -279,7 +339,7 @@ class ZhihuCrawler(AbstractCrawler):
             full_note_url = full_note_url.split("?")[0]
             crawler_task = self.get_note_detail(
                 full_note_url=full_note_url,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=self.budget.detail,
             )
             get_note_detail_task_list.append(crawler_task)
 
@@ -20,6 +20,7 @@ from parsel import Selector
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools.crawler_util import extract_text_from_html
+from tools.metrics import timed_extractor
 
 ZHIHU_SGIN_JS = None
 
@@ -42,6 +43,7 @@ def sign(url: str, cookies: str) -> Dict:
     return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
 
 
+@timed_extractor("zhihu")
 class ZhihuExtractor:
     def __init__(self):
         pass
@@ -0,0 +1,547 @@
+-- SQLite 表结构，与 schema/tables.sql 的实体字段保持一致，每张表都带有唯一业务主键用于 upsert
+-- 由 SAVE_DATA_OPTION = "sqlite" 时自动执行，可重复执行
+
+-- ----------------------------
+-- B站视频
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `bilibili_video`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `video_id` TEXT NOT NULL,
+    `video_type` TEXT,
+    `title` TEXT,
+    `desc` TEXT,
+    `create_time` INTEGER,
+    `liked_count` TEXT,
+    `disliked_count` TEXT,
+    `video_play_count` TEXT,
+    `video_favorite_count` TEXT,
+    `video_share_count` TEXT,
+    `video_coin_count` TEXT,
+    `video_danmaku` TEXT,
+    `video_comment` TEXT,
+    `video_url` TEXT,
+    `video_cover_url` TEXT,
+    `source_keyword` TEXT DEFAULT '',
+    UNIQUE (`video_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_bilibili_video_create_time` ON `bilibili_video` (`create_time`);
+
+-- ----------------------------
+-- B 站视频评论
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `bilibili_video_comment`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `sex` TEXT,
+    `sign` TEXT,
+    `avatar` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `comment_id` TEXT NOT NULL,
+    `video_id` TEXT,
+    `content` TEXT,
+    `create_time` INTEGER,
+    `sub_comment_count` TEXT,
+    `parent_comment_id` TEXT,
+    UNIQUE (`comment_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_bilibili_video_comment_video_id` ON `bilibili_video_comment` (`video_id`);
+
+-- ----------------------------
+-- B 站UP主信息
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `bilibili_up_info`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT NOT NULL,
+    `nickname` TEXT,
+    `sex` TEXT,
+    `sign` TEXT,
+    `avatar` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `total_fans` INTEGER,
+    `total_liked` INTEGER,
+    `user_rank` INTEGER,
+    `is_official` INTEGER,
+    UNIQUE (`user_id`)
+);
+
+-- ----------------------------
+-- B 站联系人信息
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `bilibili_contact_info`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `up_id` TEXT NOT NULL,
+    `fan_id` TEXT NOT NULL,
+    `up_name` TEXT,
+    `fan_name` TEXT,
+    `up_sign` TEXT,
+    `fan_sign` TEXT,
+    `up_avatar` TEXT,
+    `fan_avatar` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    UNIQUE (`up_id`, `fan_id`)
+);
+
+-- ----------------------------
+-- B 站up主动态信息
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `bilibili_up_dynamic`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `dynamic_id` TEXT NOT NULL,
+    `user_id` TEXT,
+    `user_name` TEXT,
+    `text` TEXT,
+    `type` TEXT,
+    `pub_ts` INTEGER,
+    `total_comments` INTEGER,
+    `total_forwards` INTEGER,
+    `total_liked` INTEGER,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    UNIQUE (`dynamic_id`)
+);
+
+-- ----------------------------
+-- 抖音视频
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `douyin_aweme`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `sec_uid` TEXT,
+    `short_user_id` TEXT,
+    `user_unique_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `user_signature` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `aweme_id` TEXT NOT NULL,
+    `aweme_type` TEXT,
+    `title` TEXT,
+    `desc` TEXT,
+    `create_time` INTEGER,
+    `liked_count` TEXT,
+    `comment_count` TEXT,
+    `share_count` TEXT,
+    `collected_count` TEXT,
+    `aweme_url` TEXT,
+    `cover_url` TEXT,
+    `video_download_url` TEXT,
+    `source_keyword` TEXT DEFAULT '',
+    UNIQUE (`aweme_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_douyin_aweme_create_time` ON `douyin_aweme` (`create_time`);
+
+-- ----------------------------
+-- 抖音视频评论
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `douyin_aweme_comment`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `sec_uid` TEXT,
+    `short_user_id` TEXT,
+    `user_unique_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `user_signature` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `comment_id` TEXT NOT NULL,
+    `aweme_id` TEXT,
+    `content` TEXT,
+    `create_time` INTEGER,
+    `sub_comment_count` TEXT,
+    `parent_comment_id` TEXT,
+    `like_count` TEXT DEFAULT '0',
+    `pictures` TEXT DEFAULT '',
+    UNIQUE (`comment_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_douyin_aweme_comment_aweme_id` ON `douyin_aweme_comment` (`aweme_id`);
+
+-- ----------------------------
+-- 抖音博主信息
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `dy_creator`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT NOT NULL,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `desc` TEXT,
+    `gender` TEXT,
+    `follows` TEXT,
+    `fans` TEXT,
+    `interaction` TEXT,
+    `videos_count` TEXT,
+    UNIQUE (`user_id`)
+);
+
+-- ----------------------------
+-- 快手视频
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `kuaishou_video`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `video_id` TEXT NOT NULL,
+    `video_type` TEXT,
+    `title` TEXT,
+    `desc` TEXT,
+    `create_time` INTEGER,
+    `liked_count` TEXT,
+    `viewd_count` TEXT,
+    `video_url` TEXT,
+    `video_cover_url` TEXT,
+    `video_play_url` TEXT,
+    `source_keyword` TEXT DEFAULT '',
+    UNIQUE (`video_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_kuaishou_video_create_time` ON `kuaishou_video` (`create_time`);
+
+-- ----------------------------
+-- 快手视频评论
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `kuaishou_video_comment`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `comment_id` TEXT NOT NULL,
+    `video_id` TEXT,
+    `content` TEXT,
+    `create_time` INTEGER,
+    `sub_comment_count` TEXT,
+    UNIQUE (`comment_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_kuaishou_video_comment_video_id` ON `kuaishou_video_comment` (`video_id`);
+
+-- ----------------------------
+-- 微博帖子
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `weibo_note`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `gender` TEXT,
+    `profile_url` TEXT,
+    `ip_location` TEXT DEFAULT '发布微博的地理信息',
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `note_id` TEXT NOT NULL,
+    `content` TEXT,
+    `create_time` INTEGER,
+    `create_date_time` TEXT,
+    `liked_count` TEXT,
+    `comments_count` TEXT,
+    `shared_count` TEXT,
+    `note_url` TEXT,
+    `source_keyword` TEXT DEFAULT '',
+    UNIQUE (`note_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_create_time` ON `weibo_note` (`create_time`);
+
+-- ----------------------------
+-- 微博帖子评论
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `weibo_note_comment`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `gender` TEXT,
+    `profile_url` TEXT,
+    `ip_location` TEXT DEFAULT '发布微博的地理信息',
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `comment_id` TEXT NOT NULL,
+    `note_id` TEXT,
+    `content` TEXT,
+    `create_time` INTEGER,
+    `create_date_time` TEXT,
+    `comment_like_count` TEXT,
+    `sub_comment_count` TEXT,
+    `parent_comment_id` TEXT,
+    UNIQUE (`comment_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_weibo_note_comment_note_id` ON `weibo_note_comment` (`note_id`);
+
+-- ----------------------------
+-- 小红书博主
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `xhs_creator`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT NOT NULL,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `desc` TEXT,
+    `gender` TEXT,
+    `follows` TEXT,
+    `fans` TEXT,
+    `interaction` TEXT,
+    `tag_list` TEXT,
+    UNIQUE (`user_id`)
+);
+
+-- ----------------------------
+-- 小红书笔记
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `xhs_note`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `note_id` TEXT NOT NULL,
+    `type` TEXT,
+    `title` TEXT,
+    `desc` TEXT,
+    `video_url` TEXT,
+    `time` INTEGER,
+    `last_update_time` INTEGER,
+    `liked_count` TEXT,
+    `collected_count` TEXT,
+    `comment_count` TEXT,
+    `share_count` TEXT,
+    `image_list` TEXT,
+    `tag_list` TEXT,
+    `note_url` TEXT,
+    `source_keyword` TEXT DEFAULT '',
+    `xsec_token` TEXT,
+    UNIQUE (`note_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_xhs_note_time` ON `xhs_note` (`time`);
+
+-- ----------------------------
+-- 小红书笔记评论
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `xhs_note_comment`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `comment_id` TEXT NOT NULL,
+    `create_time` INTEGER,
+    `note_id` TEXT,
+    `content` TEXT,
+    `sub_comment_count` INTEGER,
+    `pictures` TEXT,
+    `parent_comment_id` TEXT,
+    `like_count` TEXT,
+    UNIQUE (`comment_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_xhs_note_comment_note_id` ON `xhs_note_comment` (`note_id`);
+
+-- ----------------------------
+-- 贴吧帖子表
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `tieba_note`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `note_id` TEXT NOT NULL,
+    `title` TEXT,
+    `desc` TEXT,
+    `note_url` TEXT,
+    `publish_time` TEXT,
+    `user_link` TEXT DEFAULT '',
+    `user_nickname` TEXT DEFAULT '',
+    `user_avatar` TEXT DEFAULT '',
+    `tieba_id` TEXT DEFAULT '',
+    `tieba_name` TEXT,
+    `tieba_link` TEXT,
+    `total_replay_num` INTEGER DEFAULT 0,
+    `total_replay_page` INTEGER DEFAULT 0,
+    `ip_location` TEXT DEFAULT '',
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `source_keyword` TEXT DEFAULT '',
+    UNIQUE (`note_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_tieba_note_publish_time` ON `tieba_note` (`publish_time`);
+
+-- ----------------------------
+-- 贴吧评论表
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `tieba_comment`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `comment_id` TEXT NOT NULL,
+    `parent_comment_id` TEXT DEFAULT '',
+    `content` TEXT,
+    `user_link` TEXT DEFAULT '',
+    `user_nickname` TEXT DEFAULT '',
+    `user_avatar` TEXT DEFAULT '',
+    `tieba_id` TEXT DEFAULT '',
+    `tieba_name` TEXT,
+    `tieba_link` TEXT,
+    `publish_time` TEXT DEFAULT '',
+    `ip_location` TEXT DEFAULT '',
+    `sub_comment_count` INTEGER DEFAULT 0,
+    `note_id` TEXT,
+    `note_url` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    UNIQUE (`comment_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_tieba_comment_note_id` ON `tieba_comment` (`note_id`);
+
+-- ----------------------------
+-- 微博博主
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `weibo_creator`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT NOT NULL,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `desc` TEXT,
+    `gender` TEXT,
+    `follows` TEXT,
+    `fans` TEXT,
+    `tag_list` TEXT,
+    UNIQUE (`user_id`)
+);
+
+-- ----------------------------
+-- 贴吧创作者
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `tieba_creator`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT NOT NULL,
+    `user_name` TEXT,
+    `nickname` TEXT,
+    `avatar` TEXT,
+    `ip_location` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    `gender` TEXT,
+    `follows` TEXT,
+    `fans` TEXT,
+    `registration_duration` TEXT,
+    UNIQUE (`user_id`)
+);
+
+-- ----------------------------
+-- 知乎内容（回答、文章、视频）
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `zhihu_content`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `content_id` TEXT NOT NULL,
+    `content_type` TEXT,
+    `content_text` TEXT,
+    `content_url` TEXT,
+    `question_id` TEXT,
+    `title` TEXT,
+    `desc` TEXT,
+    `created_time` TEXT,
+    `updated_time` TEXT,
+    `voteup_count` INTEGER DEFAULT '0',
+    `comment_count` INTEGER DEFAULT '0',
+    `source_keyword` TEXT,
+    `user_id` TEXT,
+    `user_link` TEXT,
+    `user_nickname` TEXT,
+    `user_avatar` TEXT,
+    `user_url_token` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    UNIQUE (`content_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_zhihu_content_created_time` ON `zhihu_content` (`created_time`);
+
+-- ----------------------------
+-- 知乎评论
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `zhihu_comment`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `comment_id` TEXT NOT NULL,
+    `parent_comment_id` TEXT,
+    `content` TEXT,
+    `publish_time` TEXT,
+    `ip_location` TEXT,
+    `sub_comment_count` INTEGER DEFAULT '0',
+    `like_count` INTEGER DEFAULT '0',
+    `dislike_count` INTEGER DEFAULT '0',
+    `content_id` TEXT,
+    `content_type` TEXT,
+    `user_id` TEXT,
+    `user_link` TEXT,
+    `user_nickname` TEXT,
+    `user_avatar` TEXT,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    UNIQUE (`comment_id`)
+);
+CREATE INDEX IF NOT EXISTS `idx_zhihu_comment_content_id` ON `zhihu_comment` (`content_id`);
+
+-- ----------------------------
+-- 知乎创作者
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `zhihu_creator`
+(
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` TEXT NOT NULL,
+    `user_link` TEXT,
+    `user_nickname` TEXT,
+    `user_avatar` TEXT,
+    `url_token` TEXT,
+    `gender` TEXT,
+    `ip_location` TEXT,
+    `follows` INTEGER DEFAULT 0,
+    `fans` INTEGER DEFAULT 0,
+    `anwser_count` INTEGER DEFAULT 0,
+    `video_count` INTEGER DEFAULT 0,
+    `question_count` INTEGER DEFAULT 0,
+    `article_count` INTEGER DEFAULT 0,
+    `column_count` INTEGER DEFAULT 0,
+    `get_voteup_count` INTEGER DEFAULT 0,
+    `add_ts` INTEGER NOT NULL,
+    `last_modify_ts` INTEGER NOT NULL,
+    UNIQUE (`user_id`)
+);
@@ -17,17 +17,21 @@
 from typing import List
 
 import config
+from tools.structured_log import get_logger, log_event
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
 from .bilibilli_store_video import *
 
+store_logger = get_logger("store")
+
 
 class BiliStoreFactory:
     STORES = {
         "csv": BiliCsvStoreImplement,
         "db": BiliDbStoreImplement,
-        "json": BiliJsonStoreImplement
+        "json": BiliJsonStoreImplement,
+        "sqlite": BiliSqliteStoreImplement,
     }
 
     @staticmethod
@@ -35,7 +39,7 @@ class BiliStoreFactory:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
         return store_class()
 
 
@@ -66,8 +70,8 @@ async def update_bilibili_video(video_item: Dict):
         "video_cover_url": video_item_view.get("pic", ""),
         "source_keyword": source_keyword_var.get(),
     }
-    utils.logger.info(
-        f"[store.bilibili.update_bilibili_video] bilibili video id:{video_id}, title:{save_content_item.get('title')}")
+    log_event(store_logger, "store.bilibili.update_bilibili_video",
+              {"video_id": video_id, "title": save_content_item.get("title")}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await BiliStoreFactory.create_store().store_content(content_item=save_content_item)
 
 
@@ -86,8 +90,7 @@ async def update_up_info(video_item: Dict):
         "user_rank": video_item_card.get("level_info").get("current_level"),
         "is_official": video_item_card.get("official_verify").get("type"),
     }
-    utils.logger.info(
-        f"[store.bilibili.update_up_info] bilibili user_id:{video_item_card.get('mid')}")
+    log_event(store_logger, "store.bilibili.update_up_info", {"user_id": video_item_card.get("mid")}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await BiliStoreFactory.create_store().store_creator(creator=saver_up_info)
 
 
@@ -117,8 +120,8 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
         "sub_comment_count": str(comment_item.get("rcount", 0)),
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(
-        f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
+    log_event(store_logger, "store.bilibili.update_bilibili_video_comment",
+              {"comment_id": comment_id, "content": save_comment_item.get("content")}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
 
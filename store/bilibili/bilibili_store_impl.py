@@ -25,7 +25,7 @@ import aiofiles
 import config
 from base.base_crawler import AbstractStore
 from tools import utils, words
-from var import crawler_type_var
+from var import crawler_type_var, sqlite_db_var
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -144,11 +144,11 @@ class BiliDbStoreImplement(AbstractStore):
         """
 
         from .bilibili_store_sql import (add_new_content,
-                                         query_content_by_content_id,
+                                         exists_content_by_content_id,
                                          update_content_by_content_id)
         video_id = content_item.get("video_id")
-        video_detail: Dict = await query_content_by_content_id(content_id=video_id)
-        if not video_detail:
+        video_exists = await exists_content_by_content_id(content_id=video_id)
+        if not video_exists:
             content_item["add_ts"] = utils.get_current_timestamp()
             await add_new_content(content_item)
         else:
@@ -165,11 +165,11 @@ class BiliDbStoreImplement(AbstractStore):
         """
 
         from .bilibili_store_sql import (add_new_comment,
-                                         query_comment_by_comment_id,
+                                         exists_comment_by_comment_id,
                                          update_comment_by_comment_id)
         comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
+        comment_exists = await exists_comment_by_comment_id(comment_id=comment_id)
+        if not comment_exists:
             comment_item["add_ts"] = utils.get_current_timestamp()
             await add_new_comment(comment_item)
         else:
@@ -186,11 +186,11 @@ class BiliDbStoreImplement(AbstractStore):
         """
 
         from .bilibili_store_sql import (add_new_creator,
-                                         query_creator_by_creator_id,
+                                         exists_creator_by_creator_id,
                                          update_creator_by_creator_id)
         creator_id = creator.get("user_id")
-        creator_detail: Dict = await query_creator_by_creator_id(creator_id=creator_id)
-        if not creator_detail:
+        creator_exists = await exists_creator_by_creator_id(creator_id=creator_id)
+        if not creator_exists:
             creator["add_ts"] = utils.get_current_timestamp()
             await add_new_creator(creator)
         else:
@@ -207,18 +207,17 @@ class BiliDbStoreImplement(AbstractStore):
         """
 
         from .bilibili_store_sql import (add_new_contact,
-                                         query_contact_by_up_and_fan,
-                                         update_contact_by_id, )
+                                         exists_contact_by_up_and_fan,
+                                         update_contact_by_up_and_fan)
 
         up_id = contact_item.get("up_id")
         fan_id = contact_item.get("fan_id")
-        contact_detail: Dict = await query_contact_by_up_and_fan(up_id=up_id, fan_id=fan_id)
-        if not contact_detail:
+        contact_exists = await exists_contact_by_up_and_fan(up_id=up_id, fan_id=fan_id)
+        if not contact_exists:
             contact_item["add_ts"] = utils.get_current_timestamp()
             await add_new_contact(contact_item)
         else:
-            key_id = contact_detail.get("id")
-            await update_contact_by_id(id=key_id, contact_item=contact_item)
+            await update_contact_by_up_and_fan(up_id=up_id, fan_id=fan_id, contact_item=contact_item)
 
     async def store_dynamic(self, dynamic_item):
         """
@@ -231,18 +230,80 @@ class BiliDbStoreImplement(AbstractStore):
         """
 
         from .bilibili_store_sql import (add_new_dynamic,
-                                         query_dynamic_by_dynamic_id,
+                                         exists_dynamic_by_dynamic_id,
                                          update_dynamic_by_dynamic_id)
 
         dynamic_id = dynamic_item.get("dynamic_id")
-        dynamic_detail = await query_dynamic_by_dynamic_id(dynamic_id=dynamic_id)
-        if not dynamic_detail:
+        dynamic_exists = await exists_dynamic_by_dynamic_id(dynamic_id=dynamic_id)
+        if not dynamic_exists:
             dynamic_item["add_ts"] = utils.get_current_timestamp()
             await add_new_dynamic(dynamic_item)
         else:
             await update_dynamic_by_dynamic_id(dynamic_id, dynamic_item=dynamic_item)
 
 
+class BiliSqliteStoreImplement(AbstractStore):
+    async def store_content(self, content_item: Dict):
+        """
+        Bilibili content SQLite storage implementation
+        Args:
+            content_item: content item dict
+
+        Returns:
+
+        """
+        content_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("bilibili_video", content_item, conflict_keys=("video_id",))
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        Bilibili comment SQLite storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("bilibili_video_comment", comment_item, conflict_keys=("comment_id",))
+
+    async def store_creator(self, creator: Dict):
+        """
+        Bilibili creator SQLite storage implementation
+        Args:
+            creator: creator item dict
+
+        Returns:
+
+        """
+        creator["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("bilibili_up_info", creator, conflict_keys=("user_id",))
+
+    async def store_contact(self, contact_item: Dict):
+        """
+        Bilibili contact SQLite storage implementation
+        Args:
+            contact_item: contact item dict
+
+        Returns:
+
+        """
+        contact_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("bilibili_contact_info", contact_item, conflict_keys=("up_id", "fan_id"))
+
+    async def store_dynamic(self, dynamic_item: Dict):
+        """
+        Bilibili dynamic SQLite storage implementation
+        Args:
+            dynamic_item: dynamic item dict
+
+        Returns:
+
+        """
+        dynamic_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("bilibili_up_dynamic", dynamic_item, conflict_keys=("dynamic_id",))
+
+
 class BiliJsonStoreImplement(AbstractStore):
     json_store_path: str = "data/bilibili/json"
     words_store_path: str = "data/bilibili/words"
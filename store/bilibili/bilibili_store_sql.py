@@ -14,15 +14,22 @@
 # @Time    : 2024/4/6 15:30
 # @Desc    : sql接口集合
 
-from typing import Dict, List
+from typing import Dict
 
+from async_db import TableQuery
 from db import AsyncMysqlDB
 from var import media_crawler_db_var
 
+BILIBILI_VIDEO_QUERY = TableQuery("bilibili_video")
+BILIBILI_VIDEO_COMMENT_QUERY = TableQuery("bilibili_video_comment")
+BILIBILI_UP_INFO_QUERY = TableQuery("bilibili_up_info")
+BILIBILI_CONTACT_INFO_QUERY = TableQuery("bilibili_contact_info")
+BILIBILI_UP_DYNAMIC_QUERY = TableQuery("bilibili_up_dynamic")
 
-async def query_content_by_content_id(content_id: str) -> Dict:
+
+async def exists_content_by_content_id(content_id: str) -> bool:
     """
-    查询一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
+    查询是否已存在一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
     Args:
         content_id:
 
@@ -30,11 +37,7 @@ async def query_content_by_content_id(content_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video where video_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await BILIBILI_VIDEO_QUERY.exists(async_db_conn, content_id)
 
 
 async def add_new_content(content_item: Dict) -> int:
@@ -47,7 +50,7 @@ async def add_new_content(content_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_video", content_item)
+    last_row_id: int = await BILIBILI_VIDEO_QUERY.insert(async_db_conn, content_item)
     return last_row_id
 
 
@@ -62,14 +65,14 @@ async def update_content_by_content_id(content_id: str, content_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_video", content_item, "video_id", content_id)
+    effect_row: int = await BILIBILI_VIDEO_QUERY.update(async_db_conn, content_item, content_id)
     return effect_row
 
 
 
-async def query_comment_by_comment_id(comment_id: str) -> Dict:
+async def exists_comment_by_comment_id(comment_id: str) -> bool:
     """
-    查询一条评论内容
+    查询是否已存在一条评论内容
     Args:
         comment_id:
 
@@ -77,11 +80,7 @@ async def query_comment_by_comment_id(comment_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_video_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await BILIBILI_VIDEO_COMMENT_QUERY.exists(async_db_conn, comment_id)
 
 
 async def add_new_comment(comment_item: Dict) -> int:
@@ -94,7 +93,7 @@ async def add_new_comment(comment_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_video_comment", comment_item)
+    last_row_id: int = await BILIBILI_VIDEO_COMMENT_QUERY.insert(async_db_conn, comment_item)
     return last_row_id
 
 
@@ -109,11 +108,11 @@ async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_video_comment", comment_item, "comment_id", comment_id)
+    effect_row: int = await BILIBILI_VIDEO_COMMENT_QUERY.update(async_db_conn, comment_item, comment_id)
     return effect_row
 
 
-async def query_creator_by_creator_id(creator_id: str) -> Dict:
+async def exists_creator_by_creator_id(creator_id: str) -> bool:
     """
     查询up主信息
     Args:
@@ -123,11 +122,7 @@ async def query_creator_by_creator_id(creator_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_up_info where user_id = '{creator_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await BILIBILI_UP_INFO_QUERY.exists(async_db_conn, creator_id)
 
 
 async def add_new_creator(creator_item: Dict) -> int:
@@ -140,7 +135,7 @@ async def add_new_creator(creator_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_up_info", creator_item)
+    last_row_id: int = await BILIBILI_UP_INFO_QUERY.insert(async_db_conn, creator_item)
     return last_row_id
 
 
@@ -155,13 +150,13 @@ async def update_creator_by_creator_id(creator_id: str, creator_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_up_info", creator_item, "user_id", creator_id)
+    effect_row: int = await BILIBILI_UP_INFO_QUERY.update(async_db_conn, creator_item, creator_id)
     return effect_row
 
 
-async def query_contact_by_up_and_fan(up_id: str, fan_id: str) -> Dict:
+async def exists_contact_by_up_and_fan(up_id: str, fan_id: str) -> bool:
     """
-    查询一条关联关系
+    查询是否已存在一条关联关系
     Args:
         up_id:
         fan_id:
@@ -170,11 +165,7 @@ async def query_contact_by_up_and_fan(up_id: str, fan_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_contact_info where up_id = '{up_id}' and fan_id = '{fan_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await BILIBILI_CONTACT_INFO_QUERY.exists(async_db_conn, up_id, fan_id)
 
 
 async def add_new_contact(contact_item: Dict) -> int:
@@ -187,28 +178,29 @@ async def add_new_contact(contact_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_contact_info", contact_item)
+    last_row_id: int = await BILIBILI_CONTACT_INFO_QUERY.insert(async_db_conn, contact_item)
     return last_row_id
 
 
-async def update_contact_by_id(id: str, contact_item: Dict) -> int:
+async def update_contact_by_up_and_fan(up_id: str, fan_id: str, contact_item: Dict) -> int:
     """
     更新关联关系
     Args:
-        id:
+        up_id:
+        fan_id:
         contact_item:
 
     Returns:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_contact_info", contact_item, "id", id)
+    effect_row: int = await BILIBILI_CONTACT_INFO_QUERY.update(async_db_conn, contact_item, up_id, fan_id)
     return effect_row
 
 
-async def query_dynamic_by_dynamic_id(dynamic_id: str) -> Dict:
+async def exists_dynamic_by_dynamic_id(dynamic_id: str) -> bool:
     """
-    查询一条动态信息
+    查询是否已存在一条动态信息
     Args:
         dynamic_id:
 
@@ -216,11 +208,7 @@ async def query_dynamic_by_dynamic_id(dynamic_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from bilibili_up_dynamic where dynamic_id = '{dynamic_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await BILIBILI_UP_DYNAMIC_QUERY.exists(async_db_conn, dynamic_id)
 
 
 async def add_new_dynamic(dynamic_item: Dict) -> int:
@@ -233,7 +221,7 @@ async def add_new_dynamic(dynamic_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("bilibili_up_dynamic", dynamic_item)
+    last_row_id: int = await BILIBILI_UP_DYNAMIC_QUERY.insert(async_db_conn, dynamic_item)
     return last_row_id
 
 
@@ -248,5 +236,5 @@ async def update_dynamic_by_dynamic_id(dynamic_id: str, dynamic_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("bilibili_up_dynamic", dynamic_item, "dynamic_id", dynamic_id)
+    effect_row: int = await BILIBILI_UP_DYNAMIC_QUERY.update(async_db_conn, dynamic_item, dynamic_id)
     return effect_row
@@ -16,16 +16,20 @@
 from typing import List
 
 import config
+from tools.structured_log import get_logger, log_event
 from var import source_keyword_var
 
 from .douyin_store_impl import *
 
+store_logger = get_logger("store")
+
 
 class DouyinStoreFactory:
     STORES = {
         "csv": DouyinCsvStoreImplement,
         "db": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "sqlite": DouyinSqliteStoreImplement,
     }
 
     @staticmethod
@@ -33,7 +37,7 @@ class DouyinStoreFactory:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json ..."
+                "[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ..."
             )
         return store_class()
 
@@ -132,9 +136,8 @@ async def update_douyin_aweme(aweme_item: Dict):
         "video_download_url": _extract_video_download_url(aweme_item),
         "source_keyword": source_keyword_var.get(),
     }
-    utils.logger.info(
-        f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}"
-    )
+    log_event(store_logger, "store.douyin.update_douyin_aweme",
+              {"aweme_id": aweme_id, "title": save_content_item.get("title")}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await DouyinStoreFactory.create_store().store_content(
         content_item=save_content_item
     )
@@ -185,9 +188,8 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
         "parent_comment_id": parent_comment_id,
         "pictures": ",".join(_extract_comment_image_list(comment_item)),
     }
-    utils.logger.info(
-        f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}"
-    )
+    log_event(store_logger, "store.douyin.update_dy_aweme_comment",
+              {"comment_id": comment_id, "content": save_comment_item.get("content")}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
 
     await DouyinStoreFactory.create_store().store_comment(
         comment_item=save_comment_item
@@ -212,5 +214,5 @@ async def save_creator(user_id: str, creator: Dict):
         "videos_count": user_info.get("aweme_count", 0),
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(f"[store.douyin.save_creator] creator:{local_db_item}")
+    log_event(store_logger, "store.douyin.save_creator", local_db_item)
     await DouyinStoreFactory.create_store().store_creator(local_db_item)
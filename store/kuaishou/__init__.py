@@ -16,16 +16,20 @@
 from typing import List
 
 import config
+from tools.structured_log import get_logger, log_event
 from var import source_keyword_var
 
 from .kuaishou_store_impl import *
 
+store_logger = get_logger("store")
+
 
 class KuaishouStoreFactory:
     STORES = {
         "csv": KuaishouCsvStoreImplement,
         "db": KuaishouDbStoreImplement,
-        "json": KuaishouJsonStoreImplement
+        "json": KuaishouJsonStoreImplement,
+        "sqlite": KuaishouSqliteStoreImplement,
     }
 
     @staticmethod
@@ -33,7 +37,7 @@ class KuaishouStoreFactory:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
         return store_class()
 
 
@@ -60,13 +64,14 @@ async def update_kuaishou_video(video_item: Dict):
         "video_play_url": photo_info.get("photoUrl", ""),
         "source_keyword": source_keyword_var.get(),
     }
-    utils.logger.info(
-        f"[store.kuaishou.update_kuaishou_video] Kuaishou video id:{video_id}, title:{save_content_item.get('title')}")
+    log_event(store_logger, "store.kuaishou.update_kuaishou_video",
+              {"video_id": video_id, "title": save_content_item.get("title")}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await KuaishouStoreFactory.create_store().store_content(content_item=save_content_item)
 
 
 async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
-    utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
+    log_event(store_logger, "store.kuaishou.batch_update_ks_video_comments",
+              {"video_id": video_id, "comment_count": len(comments)})
     if not comments:
         return
     for comment_item in comments:
@@ -86,8 +91,8 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
         "sub_comment_count": str(comment_item.get("subCommentCount", 0)),
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(
-        f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
+    log_event(store_logger, "store.kuaishou.update_ks_video_comment",
+              {"comment_id": comment_id, "content": save_comment_item.get("content")}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
 async def save_creator(user_id: str, creator: Dict):
@@ -106,5 +111,5 @@ async def save_creator(user_id: str, creator: Dict):
         'interaction': ownerCount.get("photo_public"),
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(f"[store.kuaishou.save_creator] creator:{local_db_item}")
+    log_event(store_logger, "store.kuaishou.save_creator", local_db_item)
     await KuaishouStoreFactory.create_store().store_creator(local_db_item)
\ No newline at end of file
@@ -25,7 +25,7 @@ import aiofiles
 import config
 from base.base_crawler import AbstractStore
 from tools import utils, words
-from var import crawler_type_var
+from var import crawler_type_var, sqlite_db_var
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -117,11 +117,11 @@ class KuaishouDbStoreImplement(AbstractStore):
         """
 
         from .kuaishou_store_sql import (add_new_content,
-                                         query_content_by_content_id,
+                                         exists_content_by_content_id,
                                          update_content_by_content_id)
         video_id = content_item.get("video_id")
-        video_detail: Dict = await query_content_by_content_id(content_id=video_id)
-        if not video_detail:
+        video_exists = await exists_content_by_content_id(content_id=video_id)
+        if not video_exists:
             content_item["add_ts"] = utils.get_current_timestamp()
             await add_new_content(content_item)
         else:
@@ -137,17 +137,46 @@ class KuaishouDbStoreImplement(AbstractStore):
 
         """
         from .kuaishou_store_sql import (add_new_comment,
-                                         query_comment_by_comment_id,
+                                         exists_comment_by_comment_id,
                                          update_comment_by_comment_id)
         comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
+        comment_exists = await exists_comment_by_comment_id(comment_id=comment_id)
+        if not comment_exists:
             comment_item["add_ts"] = utils.get_current_timestamp()
             await add_new_comment(comment_item)
         else:
             await update_comment_by_comment_id(comment_id, comment_item=comment_item)
 
 
+class KuaishouSqliteStoreImplement(AbstractStore):
+    async def store_content(self, content_item: Dict):
+        """
+        Kuaishou content SQLite storage implementation
+        Args:
+            content_item: content item dict
+
+        Returns:
+
+        """
+        content_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("kuaishou_video", content_item, conflict_keys=("video_id",))
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        Kuaishou comment SQLite storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("kuaishou_video_comment", comment_item, conflict_keys=("comment_id",))
+
+    async def store_creator(self, creator: Dict):
+        pass
+
+
 class KuaishouJsonStoreImplement(AbstractStore):
     json_store_path: str = "data/kuaishou/json"
     words_store_path: str = "data/kuaishou/words"
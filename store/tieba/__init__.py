@@ -12,18 +12,23 @@
 # -*- coding: utf-8 -*-
 from typing import List
 
+import config
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from tools.structured_log import get_logger, log_event
 from var import source_keyword_var
 
 from . import tieba_store_impl
 from .tieba_store_impl import *
 
+store_logger = get_logger("store")
+
 
 class TieBaStoreFactory:
     STORES = {
         "csv": TieBaCsvStoreImplement,
         "db": TieBaDbStoreImplement,
-        "json": TieBaJsonStoreImplement
+        "json": TieBaJsonStoreImplement,
+        "sqlite": TieBaSqliteStoreImplement,
     }
 
     @staticmethod
@@ -31,7 +36,7 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
         return store_class()
 
 
@@ -62,7 +67,7 @@ async def update_tieba_note(note_item: TiebaNote):
     note_item.source_keyword = source_keyword_var.get()
     save_note_item = note_item.model_dump()
     save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
+    log_event(store_logger, "store.tieba.update_tieba_note", save_note_item, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
 
     await TieBaStoreFactory.create_store().store_content(save_note_item)
 
@@ -95,7 +100,7 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     """
     save_comment_item = comment_item.model_dump()
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
+    log_event(store_logger, "store.tieba.update_tieba_note_comment", save_comment_item, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await TieBaStoreFactory.create_store().store_comment(save_comment_item)
 
 
@@ -110,5 +115,5 @@ async def save_creator(user_info: TiebaCreator):
     """
     local_db_item = user_info.model_dump()
     local_db_item["last_modify_ts"] = utils.get_current_timestamp()
-    utils.logger.info(f"[store.tieba.save_creator] creator:{local_db_item}")
+    log_event(store_logger, "store.tieba.save_creator", local_db_item)
     await TieBaStoreFactory.create_store().store_creator(local_db_item)
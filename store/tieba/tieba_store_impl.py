@@ -22,7 +22,7 @@ import aiofiles
 import config
 from base.base_crawler import AbstractStore
 from tools import utils, words
-from var import crawler_type_var
+from var import crawler_type_var, sqlite_db_var
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -119,11 +119,11 @@ class TieBaDbStoreImplement(AbstractStore):
 
         """
         from .tieba_store_sql import (add_new_content,
-                                      query_content_by_content_id,
+                                      exists_content_by_content_id,
                                       update_content_by_content_id)
         note_id = content_item.get("note_id")
-        note_detail: Dict = await query_content_by_content_id(content_id=note_id)
-        if not note_detail:
+        note_exists = await exists_content_by_content_id(content_id=note_id)
+        if not note_exists:
             content_item["add_ts"] = utils.get_current_timestamp()
             await add_new_content(content_item)
         else:
@@ -139,11 +139,11 @@ class TieBaDbStoreImplement(AbstractStore):
 
         """
         from .tieba_store_sql import (add_new_comment,
-                                      query_comment_by_comment_id,
+                                      exists_comment_by_comment_id,
                                       update_comment_by_comment_id)
         comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
+        comment_exists = await exists_comment_by_comment_id(comment_id=comment_id)
+        if not comment_exists:
             comment_item["add_ts"] = utils.get_current_timestamp()
             await add_new_comment(comment_item)
         else:
@@ -159,17 +159,55 @@ class TieBaDbStoreImplement(AbstractStore):
 
         """
         from .tieba_store_sql import (add_new_creator,
-                                      query_creator_by_user_id,
+                                      exists_creator_by_user_id,
                                       update_creator_by_user_id)
         user_id = creator.get("user_id")
-        user_detail: Dict = await query_creator_by_user_id(user_id)
-        if not user_detail:
+        user_exists = await exists_creator_by_user_id(user_id)
+        if not user_exists:
             creator["add_ts"] = utils.get_current_timestamp()
             await add_new_creator(creator)
         else:
             await update_creator_by_user_id(user_id, creator)
 
 
+class TieBaSqliteStoreImplement(AbstractStore):
+    async def store_content(self, content_item: Dict):
+        """
+        Tieba content SQLite storage implementation
+        Args:
+            content_item: content item dict
+
+        Returns:
+
+        """
+        content_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("tieba_note", content_item, conflict_keys=("note_id",))
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        Tieba comment SQLite storage implementation
+        Args:
+            comment_item: comment item dict
+
+        Returns:
+
+        """
+        comment_item["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("tieba_comment", comment_item, conflict_keys=("comment_id",))
+
+    async def store_creator(self, creator: Dict):
+        """
+        Tieba creator SQLite storage implementation
+        Args:
+            creator: creator item dict
+
+        Returns:
+
+        """
+        creator["add_ts"] = utils.get_current_timestamp()
+        await sqlite_db_var.get().upsert("tieba_creator", creator, conflict_keys=("user_id",))
+
+
 class TieBaJsonStoreImplement(AbstractStore):
     json_store_path: str = "data/tieba/json"
     words_store_path: str = "data/tieba/words"
@@ -17,17 +17,22 @@
 import re
 from typing import List
 
+import config
+from tools.structured_log import get_logger, log_event
 from var import source_keyword_var
 
 from .weibo_store_image import *
 from .weibo_store_impl import *
 
+store_logger = get_logger("store")
+
 
 class WeibostoreFactory:
     STORES = {
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "sqlite": WeiboSqliteStoreImplement,
     }
 
     @staticmethod
@@ -35,7 +40,7 @@ class WeibostoreFactory:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
         return store_class()
 
 
@@ -93,8 +98,8 @@ async def update_weibo_note(note_item: Dict):
 
         "source_keyword": source_keyword_var.get(),
     }
-    utils.logger.info(
-        f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
+    log_event(store_logger, "store.weibo.update_weibo_note",
+              {"note_id": note_id, "content": save_content_item.get("content")[:24]}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
 
 
@@ -149,8 +154,8 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "profile_url": user_info.get("profile_url", ""),
         "avatar": user_info.get("profile_image_url", ""),
     }
-    utils.logger.info(
-        f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
+    log_event(store_logger, "store.weibo.update_weibo_note_comment",
+              {"comment_id": comment_id, "content": save_comment_item.get("content", "")[:24]}, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
 
 
@@ -191,5 +196,5 @@ async def save_creator(user_id: str, user_info: Dict):
         'tag_list': '',
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(f"[store.weibo.save_creator] creator:{local_db_item}")
+    log_event(store_logger, "store.weibo.save_creator", local_db_item)
     await WeibostoreFactory.create_store().store_creator(local_db_item)
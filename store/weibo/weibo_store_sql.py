@@ -14,15 +14,20 @@
 # @Time    : 2024/4/6 15:30
 # @Desc    : sql接口集合
 
-from typing import Dict, List
+from typing import Dict
 
+from async_db import TableQuery
 from db import AsyncMysqlDB
 from var import media_crawler_db_var
 
+WEIBO_NOTE_QUERY = TableQuery("weibo_note")
+WEIBO_NOTE_COMMENT_QUERY = TableQuery("weibo_note_comment")
+WEIBO_CREATOR_QUERY = TableQuery("weibo_creator")
 
-async def query_content_by_content_id(content_id: str) -> Dict:
+
+async def exists_content_by_content_id(content_id: str) -> bool:
     """
-    查询一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
+    查询是否已存在一条内容记录（xhs的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
     Args:
         content_id:
 
@@ -30,11 +35,7 @@ async def query_content_by_content_id(content_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from weibo_note where note_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await WEIBO_NOTE_QUERY.exists(async_db_conn, content_id)
 
 
 async def add_new_content(content_item: Dict) -> int:
@@ -47,7 +48,7 @@ async def add_new_content(content_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("weibo_note", content_item)
+    last_row_id: int = await WEIBO_NOTE_QUERY.insert(async_db_conn, content_item)
     return last_row_id
 
 
@@ -62,14 +63,14 @@ async def update_content_by_content_id(content_id: str, content_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("weibo_note", content_item, "note_id", content_id)
+    effect_row: int = await WEIBO_NOTE_QUERY.update(async_db_conn, content_item, content_id)
     return effect_row
 
 
 
-async def query_comment_by_comment_id(comment_id: str) -> Dict:
+async def exists_comment_by_comment_id(comment_id: str) -> bool:
     """
-    查询一条评论内容
+    查询是否已存在一条评论内容
     Args:
         comment_id:
 
@@ -77,11 +78,7 @@ async def query_comment_by_comment_id(comment_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from weibo_note_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await WEIBO_NOTE_COMMENT_QUERY.exists(async_db_conn, comment_id)
 
 
 async def add_new_comment(comment_item: Dict) -> int:
@@ -94,7 +91,7 @@ async def add_new_comment(comment_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("weibo_note_comment", comment_item)
+    last_row_id: int = await WEIBO_NOTE_COMMENT_QUERY.insert(async_db_conn, comment_item)
     return last_row_id
 
 
@@ -109,13 +106,13 @@ async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("weibo_note_comment", comment_item, "comment_id", comment_id)
+    effect_row: int = await WEIBO_NOTE_COMMENT_QUERY.update(async_db_conn, comment_item, comment_id)
     return effect_row
 
 
-async def query_creator_by_user_id(user_id: str) -> Dict:
+async def exists_creator_by_user_id(user_id: str) -> bool:
     """
-    查询一条创作者记录
+    查询是否已存在一条创作者记录
     Args:
         user_id:
 
@@ -123,11 +120,7 @@ async def query_creator_by_user_id(user_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from weibo_creator where user_id = '{user_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await WEIBO_CREATOR_QUERY.exists(async_db_conn, user_id)
 
 
 async def add_new_creator(creator_item: Dict) -> int:
@@ -140,7 +133,7 @@ async def add_new_creator(creator_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("weibo_creator", creator_item)
+    last_row_id: int = await WEIBO_CREATOR_QUERY.insert(async_db_conn, creator_item)
     return last_row_id
 
 
@@ -155,5 +148,5 @@ async def update_creator_by_user_id(user_id: str, creator_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("weibo_creator", creator_item, "user_id", user_id)
+    effect_row: int = await WEIBO_CREATOR_QUERY.update(async_db_conn, creator_item, user_id)
     return effect_row
\ No newline at end of file
@@ -16,25 +16,29 @@
 from typing import List
 
 import config
+from tools.structured_log import get_logger, log_event
 from var import source_keyword_var
 
 from . import xhs_store_impl
 from .xhs_store_image import *
 from .xhs_store_impl import *
 
+store_logger = get_logger("store")
+
 
 class XhsStoreFactory:
     STORES = {
         "csv": XhsCsvStoreImplement,
         "db": XhsDbStoreImplement,
-        "json": XhsJsonStoreImplement
+        "json": XhsJsonStoreImplement,
+        "sqlite": XhsSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
         return store_class()
 
 
@@ -109,7 +113,7 @@ async def update_xhs_note(note_item: Dict):
         "source_keyword": source_keyword_var.get(), # 搜索关键词
         "xsec_token": note_item.get("xsec_token"), # xsec_token
     }
-    utils.logger.info(f"[store.xhs.update_xhs_note] xhs note: {local_db_item}")
+    log_event(store_logger, "store.xhs.update_xhs_note", local_db_item, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await XhsStoreFactory.create_store().store_content(local_db_item)
 
 
@@ -158,7 +162,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
         "like_count": comment_item.get("like_count", 0),
     }
-    utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
+    log_event(store_logger, "store.xhs.update_xhs_note_comment", local_db_item, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await XhsStoreFactory.create_store().store_comment(local_db_item)
 
 
@@ -207,7 +211,7 @@ async def save_creator(user_id: str, creator: Dict):
                                ensure_ascii=False), # 标签
         "last_modify_ts": utils.get_current_timestamp(), # 最后更新时间戳（MediaCrawler程序生成的，主要用途在db存储的时候记录一条记录最新更新时间）
     }
-    utils.logger.info(f"[store.xhs.save_creator] creator:{local_db_item}")
+    log_event(store_logger, "store.xhs.save_creator", local_db_item)
     await XhsStoreFactory.create_store().store_creator(local_db_item)
 
 
@@ -17,23 +17,28 @@ from base.base_crawler import AbstractStore
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from store.zhihu.zhihu_store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
-                                          ZhihuJsonStoreImplement)
+                                          ZhihuJsonStoreImplement,
+                                          ZhihuSqliteStoreImplement)
 from tools import utils
+from tools.structured_log import get_logger, log_event
 from var import source_keyword_var
 
+store_logger = get_logger("store")
+
 
 class ZhihuStoreFactory:
     STORES = {
         "csv": ZhihuCsvStoreImplement,
         "db": ZhihuDbStoreImplement,
-        "json": ZhihuJsonStoreImplement
+        "json": ZhihuJsonStoreImplement,
+        "sqlite": ZhihuSqliteStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json ...")
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite ...")
         return store_class()
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
@@ -63,7 +68,7 @@ async def update_zhihu_content(content_item: ZhihuContent):
     content_item.source_keyword = source_keyword_var.get()
     local_db_item = content_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
+    log_event(store_logger, "store.zhihu.update_zhihu_content", local_db_item, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await ZhihuStoreFactory.create_store().store_content(local_db_item)
 
 
@@ -95,7 +100,7 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     """
     local_db_item = comment_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
+    log_event(store_logger, "store.zhihu.update_zhihu_note_comment", local_db_item, sample_every=config.LOG_ITEM_SAMPLE_EVERY)
     await ZhihuStoreFactory.create_store().store_comment(local_db_item)
 
 
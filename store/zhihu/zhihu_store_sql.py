@@ -10,15 +10,20 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import Dict, List
+from typing import Dict
 
+from async_db import TableQuery
 from db import AsyncMysqlDB
 from var import media_crawler_db_var
 
+ZHIHU_CONTENT_QUERY = TableQuery("zhihu_content")
+ZHIHU_COMMENT_QUERY = TableQuery("zhihu_comment")
+ZHIHU_CREATOR_QUERY = TableQuery("zhihu_creator")
 
-async def query_content_by_content_id(content_id: str) -> Dict:
+
+async def exists_content_by_content_id(content_id: str) -> bool:
     """
-    查询一条内容记录（zhihu的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
+    查询是否已存在一条内容记录（zhihu的帖子 ｜ 抖音的视频 ｜ 微博 ｜ 快手视频 ...）
     Args:
         content_id:
 
@@ -26,11 +31,7 @@ async def query_content_by_content_id(content_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from zhihu_content where content_id = '{content_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await ZHIHU_CONTENT_QUERY.exists(async_db_conn, content_id)
 
 
 async def add_new_content(content_item: Dict) -> int:
@@ -43,7 +44,7 @@ async def add_new_content(content_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("zhihu_content", content_item)
+    last_row_id: int = await ZHIHU_CONTENT_QUERY.insert(async_db_conn, content_item)
     return last_row_id
 
 
@@ -58,14 +59,14 @@ async def update_content_by_content_id(content_id: str, content_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("zhihu_content", content_item, "content_id", content_id)
+    effect_row: int = await ZHIHU_CONTENT_QUERY.update(async_db_conn, content_item, content_id)
     return effect_row
 
 
 
-async def query_comment_by_comment_id(comment_id: str) -> Dict:
+async def exists_comment_by_comment_id(comment_id: str) -> bool:
     """
-    查询一条评论内容
+    查询是否已存在一条评论内容
     Args:
         comment_id:
 
@@ -73,11 +74,7 @@ async def query_comment_by_comment_id(comment_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from zhihu_comment where comment_id = '{comment_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await ZHIHU_COMMENT_QUERY.exists(async_db_conn, comment_id)
 
 
 async def add_new_comment(comment_item: Dict) -> int:
@@ -90,7 +87,7 @@ async def add_new_comment(comment_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("zhihu_comment", comment_item)
+    last_row_id: int = await ZHIHU_COMMENT_QUERY.insert(async_db_conn, comment_item)
     return last_row_id
 
 
@@ -105,13 +102,13 @@ async def update_comment_by_comment_id(comment_id: str, comment_item: Dict) -> i
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("zhihu_comment", comment_item, "comment_id", comment_id)
+    effect_row: int = await ZHIHU_COMMENT_QUERY.update(async_db_conn, comment_item, comment_id)
     return effect_row
 
 
-async def query_creator_by_user_id(user_id: str) -> Dict:
+async def exists_creator_by_user_id(user_id: str) -> bool:
     """
-    查询一条创作者记录
+    查询是否已存在一条创作者记录
     Args:
         user_id:
 
@@ -119,11 +116,7 @@ async def query_creator_by_user_id(user_id: str) -> Dict:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    sql: str = f"select * from zhihu_creator where user_id = '{user_id}'"
-    rows: List[Dict] = await async_db_conn.query(sql)
-    if len(rows) > 0:
-        return rows[0]
-    return dict()
+    return await ZHIHU_CREATOR_QUERY.exists(async_db_conn, user_id)
 
 
 async def add_new_creator(creator_item: Dict) -> int:
@@ -136,7 +129,7 @@ async def add_new_creator(creator_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    last_row_id: int = await async_db_conn.item_to_table("zhihu_creator", creator_item)
+    last_row_id: int = await ZHIHU_CREATOR_QUERY.insert(async_db_conn, creator_item)
     return last_row_id
 
 
@@ -151,5 +144,5 @@ async def update_creator_by_user_id(user_id: str, creator_item: Dict) -> int:
 
     """
     async_db_conn: AsyncMysqlDB = media_crawler_db_var.get()
-    effect_row: int = await async_db_conn.update_table("zhihu_creator", creator_item, "user_id", user_id)
+    effect_row: int = await ZHIHU_CREATOR_QUERY.update(async_db_conn, creator_item, user_id)
     return effect_row
\ No newline at end of file
@@ -0,0 +1,150 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+import config
+from media_platform.xhs.client import XiaoHongShuClient
+from tools.account_pool import AccountPool, AccountSession, TokenBucket, create_account_pool
+
+
+def new_pool(accounts, rate=100.0, burst=1.0, cooldown_seconds=60.0):
+    sessions = [AccountSession(account, {"a1": account, "web_session": account}, rate, burst) for account in accounts]
+    return AccountPool("xhs", sessions, cooldown_seconds)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_wait_time(self):
+        bucket = TokenBucket(rate=2, capacity=1)
+        now = time.monotonic()
+        self.assertEqual(bucket.wait_time(now), 0)
+        bucket.take(now)
+        self.assertAlmostEqual(bucket.wait_time(now), 0.5, places=2)
+        self.assertEqual(bucket.wait_time(now + 0.5), 0)
+
+
+class TestAccountPool(IsolatedAsyncioTestCase):
+
+    async def test_round_robin(self):
+        pool = new_pool(["a", "b", "c"])
+        accounts = [(await pool.acquire()).account for _ in range(3)]
+        self.assertEqual(accounts, ["a", "b", "c"])
+        self.assertEqual(pool.sessions[0].cookie_str, "a1=a;web_session=a")
+
+    async def test_cooldown_skips_account(self):
+        pool = new_pool(["a", "b"], rate=1000, burst=10)
+        session = await pool.acquire()
+        pool.report_failure(session, "captcha 461")
+        accounts = {(await pool.acquire()).account for _ in range(5)}
+        self.assertEqual(accounts, {"b"})
+        self.assertEqual(pool.stats()[0], {"account": "a", "requests": 1, "failures": 1, "cooling_down": True})
+
+        # 连续失败冷却时间翻倍，成功后重置
+        pool.report_failure(session, "ip blocked")
+        self.assertGreater(session.cooldown_until - time.monotonic(), 60)
+        pool.report_success(session)
+        self.assertEqual(session.continuous_failures, 0)
+
+    async def test_rate_limit_scales_with_accounts(self):
+        # 每个账号 20 次/秒，没有突发，两个账号 10 次请求大约需要 0.2 秒
+        pool = new_pool(["a", "b"], rate=20, burst=1)
+        start = time.monotonic()
+        await asyncio.gather(*[pool.acquire() for _ in range(10)])
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual([s.requests for s in pool.sessions], [5, 5])
+
+    async def test_update_cookies_rebuilds_session(self):
+        cookie_dict = {"a1": "a", "web_session": "old"}
+        pool = AccountPool("xhs", [AccountSession("a", cookie_dict, 100, 1)], 60)
+        # 会话保存的是副本，调用方的字典变化不影响账号池
+        cookie_dict["web_session"] = "changed"
+        self.assertEqual(pool.sessions[0].cookie_str, "a1=a;web_session=old")
+
+        pool.update_cookies("a", {"a1": "a", "web_session": "new"})
+        self.assertEqual(pool.sessions[0].cookie_dict["web_session"], "new")
+        self.assertEqual(pool.sessions[0].cookie_str, "a1=a;web_session=new")
+
+    async def test_skip_accounts_with_different_shared_cookie(self):
+        states = {
+            "same": [{"name": "a1", "value": "device"}, {"name": "web_session", "value": "s1"}],
+            "other": [{"name": "a1", "value": "another"}, {"name": "web_session", "value": "s2"}],
+        }
+
+        def login_state_cache(platform, account):
+            return SimpleNamespace(load=mock.AsyncMock(return_value=SimpleNamespace(cookies=states[account])))
+
+        with mock.patch.object(config, "ENABLE_ACCOUNT_POOL", True), \
+                mock.patch.object(config, "LOGIN_ACCOUNT", "default"), \
+                mock.patch.object(config, "ACCOUNT_POOL_ACCOUNTS", ["same", "other"]), \
+                mock.patch("tools.account_pool.LoginStateCache", login_state_cache):
+            pool = await create_account_pool("xhs", {"a1": "device", "web_session": "s0"}, shared_cookie_keys=("a1",))
+        self.assertEqual([session.account for session in pool.sessions], ["default", "same"])
+
+
+class FakeSignPage:
+    async def evaluate(self, expression, arg=None):
+        if "localStorage" in expression:
+            return {"b1": "b1"}
+        return {"X-s": "sign", "X-t": 1}
+
+
+class TestXhsClientAccountPool(IsolatedAsyncioTestCase):
+
+    async def request_with(self, pool, blocked_accounts):
+        cookies = []
+
+        async def platform(request: httpx.Request):
+            account = request.headers["cookie"].split("web_session=")[1]
+            cookies.append(account)
+            if account in blocked_accounts:
+                return httpx.Response(461, headers={"Verifytype": "1", "Verifyuuid": "u"})
+            return httpx.Response(200, json={"success": True, "data": {"account": account}})
+
+        def create_http_client(**kwargs):
+            return httpx.AsyncClient(transport=httpx.MockTransport(platform))
+
+        client = XiaoHongShuClient(headers={"Cookie": ""}, playwright_page=FakeSignPage(), cookie_dict={},
+                                   account_pool=pool)
+        signs = {"x-s": "s", "x-t": "t", "x-s-common": "c", "x-b3-traceid": "id"}
+        with mock.patch("media_platform.xhs.client.create_http_client", create_http_client), \
+                mock.patch("media_platform.xhs.client.sign", return_value=signs):
+            try:
+                return await client.get("/api/sns/web/v1/feed", {"id": 1}), cookies
+            except Exception as e:
+                return e, cookies
+
+    async def test_captcha_retries_on_another_account(self):
+        pool = new_pool(["a", "b", "c"])
+        result, cookies = await self.request_with(pool, blocked_accounts={"a"})
+        self.assertEqual(result, {"account": "b"})
+        self.assertEqual(cookies, ["a", "b"])
+        self.assertEqual([stat["cooling_down"] for stat in pool.stats()], [True, False, False])
+
+    async def test_gives_up_when_all_accounts_cool_down(self):
+        pool = new_pool(["a", "b"])
+        result, cookies = await self.request_with(pool, blocked_accounts={"a", "b"})
+        self.assertIn("出现验证码", str(result))
+        self.assertEqual(cookies, ["a", "b"])
+        self.assertFalse(pool.has_available())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.adaptive_limiter import AdaptiveLimiter, is_throttle_error, limiter_feedback
+
+
+class IPBlockError(Exception):
+    """和各平台 exception.py 中的 IPBlockError 同名"""
+
+
+class DataFetchError(Exception):
+    pass
+
+
+@limiter_feedback
+async def fake_request(error=None):
+    await asyncio.sleep(0)
+    if error:
+        raise error
+    return "ok"
+
+
+class TestAdaptiveLimiter(IsolatedAsyncioTestCase):
+
+    async def test_limit_concurrency(self):
+        limiter = AdaptiveLimiter("xhs.detail", initial_limit=2, max_limit=2)
+        running, max_running = 0, 0
+
+        async def task():
+            nonlocal running, max_running
+            async with limiter:
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[task() for _ in range(10)])
+        self.assertEqual(max_running, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_additive_increase(self):
+        limiter = AdaptiveLimiter("xhs.detail", initial_limit=1, max_limit=3, latency_threshold=1)
+        for _ in range(10):
+            async with limiter:
+                await fake_request()
+        self.assertEqual(limiter.current_limit, 3)
+        self.assertEqual(limiter.stats()["successes"], 10)
+
+    async def test_no_increase_when_slow(self):
+        limiter = AdaptiveLimiter("xhs.detail", initial_limit=1, max_limit=3, latency_threshold=0)
+        for _ in range(10):
+            async with limiter:
+                await fake_request()
+        self.assertEqual(limiter.current_limit, 1)
+
+    async def test_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter("xhs.detail", initial_limit=4, max_limit=8)
+        for _ in range(3):
+            async with limiter:
+                with self.assertRaises(IPBlockError):
+                    await fake_request(IPBlockError("blocked"))
+        # 退避窗口内的多个限流信号只减一次
+        self.assertEqual(limiter.current_limit, 2)
+        self.assertEqual(limiter.stats()["throttles"], 3)
+
+        async with limiter:
+            with self.assertRaises(DataFetchError):
+                await fake_request(DataFetchError("note not found"))
+        self.assertEqual(limiter.stats()["throttles"], 3)
+
+    async def test_feedback_without_limiter(self):
+        self.assertEqual(await fake_request(), "ok")
+
+    def test_is_throttle_error(self):
+        self.assertTrue(is_throttle_error(IPBlockError("")))
+        self.assertTrue(is_throttle_error(Exception("出现验证码，请求失败")))
+        self.assertTrue(is_throttle_error(DataFetchError("account blocked, blocked")))
+        self.assertFalse(is_throttle_error(DataFetchError("note not found")))
+
+
+if __name__ == '__main__':
+    unittest.main()
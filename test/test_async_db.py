@@ -0,0 +1,103 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+from contextlib import asynccontextmanager
+from unittest import IsolatedAsyncioTestCase
+
+from async_db import AsyncMysqlDB, TableQuery
+
+
+class RecordingDB:
+    """记录执行的sql和参数，代替真实的 AsyncMysqlDB"""
+
+    def __init__(self, first_row=None):
+        self.first_row = first_row
+        self.calls = []
+
+    async def get_first(self, sql, *args):
+        self.calls.append((sql, args))
+        return self.first_row
+
+    async def insert(self, sql, *args):
+        self.calls.append((sql, args))
+        return 1
+
+    async def execute(self, sql, *args):
+        self.calls.append((sql, args))
+        return 1
+
+
+class TestTableQuery(IsolatedAsyncioTestCase):
+
+    async def test_exists_uses_unique_key(self):
+        db = RecordingDB(first_row={"1": 1})
+        query = TableQuery("bilibili_contact_info")
+        self.assertTrue(await query.exists(db, "up", "fan' OR '1'='1"))
+        self.assertEqual(db.calls, [(
+            "SELECT 1 FROM `bilibili_contact_info` WHERE `up_id`=%s AND `fan_id`=%s LIMIT 1",
+            ("up", "fan' OR '1'='1"),
+        )])
+        self.assertFalse(await TableQuery("xhs_note").exists(RecordingDB(), "n1"))
+
+    async def test_insert_and_update_are_parameterized(self):
+        db = RecordingDB()
+        query = TableQuery("xhs_note")
+        await query.insert(db, {"note_id": "n1", "title": "t"})
+        await query.update(db, {"title": "t2"}, "n1")
+        self.assertEqual(db.calls, [
+            ("INSERT INTO `xhs_note` (`note_id`,`title`) VALUES (%s,%s)", ("n1", "t")),
+            ("UPDATE `xhs_note` SET `title`=%s WHERE `note_id`=%s", ("t2", "n1")),
+        ])
+
+    async def test_sql_text_is_cached(self):
+        query = TableQuery("xhs_note")
+        fields = ("note_id", "title")
+        self.assertIs(query.insert_sql(fields), query.insert_sql(fields))
+        self.assertIs(query.update_sql(fields), query.update_sql(fields))
+
+
+class FakePool:
+    """只有一个连接的连接池，用来模拟获取连接时的排队"""
+    minsize = 1
+    maxsize = 1
+    size = 1
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+
+    @property
+    def freesize(self):
+        return 0 if self.lock.locked() else 1
+
+    @asynccontextmanager
+    async def acquire(self):
+        async with self.lock:
+            yield object()
+
+
+class TestAsyncMysqlDBStats(IsolatedAsyncioTestCase):
+
+    async def test_acquire_metrics(self):
+        db = AsyncMysqlDB(FakePool())
+
+        async def hold():
+            async with db.acquire():
+                self.assertEqual(db.stats()["in_use"], 1)
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(hold(), hold())
+        stats = db.stats()
+        self.assertEqual(stats["acquire_count"], 2)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertEqual(stats["in_use_max"], 1)
+        self.assertGreaterEqual(stats["acquire_wait_max_ms"], 40)
@@ -0,0 +1,122 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import fnmatch
+import pickle
+import unittest
+from typing import Dict, List, Optional
+from unittest import IsolatedAsyncioTestCase
+
+from cache import codec
+from cache.async_redis_cache import AsyncRedisCache
+
+
+class FakePipeline:
+
+    def __init__(self, client: "FakeRedis"):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        self.commands.append((key, value, ex))
+
+    async def execute(self):
+        for key, value, ex in self.commands:
+            await self.client.set(key, value, ex=ex)
+        self.client.round_trips += 1
+        return [True] * len(self.commands)
+
+
+class FakeRedis:
+    """只实现 AsyncRedisCache 用到的命令，值和真实的 redis 一样都是 bytes"""
+
+    def __init__(self):
+        self.data: Dict[str, bytes] = {}
+        self.expires: Dict[str, Optional[int]] = {}
+        self.round_trips = 0
+        self.closed = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        assert isinstance(value, bytes)
+        self.data[key] = value
+        self.expires[key] = ex
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    async def scan_iter(self, match: str, count: int):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key.encode()
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cache = AsyncRedisCache()
+        self.fake = FakeRedis()
+        self.cache._redis_client = self.fake
+
+    async def test_set_and_get(self):
+        await self.cache.set('key', {'ip': '127.0.0.1', 'port': 80}, 10)
+        self.assertEqual(await self.cache.get('key'), {'ip': '127.0.0.1', 'port': 80})
+        self.assertEqual(self.fake.expires['key'], 10)
+        self.assertEqual(codec.decode(self.fake.data['key']), {'ip': '127.0.0.1', 'port': 80})
+        self.assertIsNone(await self.cache.get('missing'))
+
+    async def test_bytes_value(self):
+        await self.cache.set('cookie', b'\x00\xffa1', 10)
+        self.assertEqual(await self.cache.get('cookie'), b'\x00\xffa1')
+
+    async def test_legacy_pickled_value_is_a_miss(self):
+        self.fake.data['ip_pool:1'] = pickle.dumps({'ip': '127.0.0.1', 'port': 80})
+        await self.cache.set('ip_pool:2', {'ip': '127.0.0.2', 'port': 80}, 10)
+        self.assertIsNone(await self.cache.get('ip_pool:1'))
+        self.assertEqual(await self.cache.mget(['ip_pool:1', 'ip_pool:2']), [None, {'ip': '127.0.0.2', 'port': 80}])
+
+    async def test_keys(self):
+        await self.cache.set('ip_pool:1', 1, 10)
+        await self.cache.set('ip_pool:2', 2, 10)
+        await self.cache.set('other', 3, 10)
+        self.assertEqual(sorted(await self.cache.keys('ip_pool:*')), ['ip_pool:1', 'ip_pool:2'])
+
+    async def test_mget_and_mset(self):
+        await self.cache.mset({'a': 1, 'b': [1, 'b']}, 10)
+        self.assertEqual(self.fake.round_trips, 1)
+        self.assertEqual(await self.cache.mget(['a', 'missing', 'b']), [1, None, [1, 'b']])
+        self.assertEqual(self.fake.round_trips, 2)
+        self.assertEqual(await self.cache.mget([]), [])
+        self.assertEqual(self.fake.round_trips, 2)
+
+    async def test_close(self):
+        await self.cache.close()
+        self.assertTrue(self.fake.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import pickle
+import unittest
+from unittest import mock
+
+from cache import codec
+from tools import utils
+
+
+class TestCacheCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        for value in ['程序员阿江-Relakkes', 1, 1.5, True, None, [1, 'a'], {'ip': '127.0.0.1', 'port': 80}]:
+            self.assertEqual(codec.decode(codec.encode(value)), value)
+
+    def test_round_trip_bytes_without_msgpack(self):
+        value = {'raw': b'\x00\xffcookie', 'list': [b'a', 'b'], 'text': '程序员阿江'}
+        with mock.patch.object(codec, 'msgpack', None):
+            data = codec.encode(value)
+            self.assertTrue(data.startswith(codec.JSON_PREFIX))
+            self.assertEqual(codec.decode(data), value)
+
+    def test_decode_json(self):
+        data = codec.JSON_PREFIX + json.dumps({'a': [1, 2]}).encode()
+        self.assertEqual(codec.decode(data), {'a': [1, 2]})
+
+    def test_legacy_pickle_is_a_miss(self):
+        legacy = pickle.dumps({'ip': '127.0.0.1', 'port': 80})
+        with mock.patch.object(codec, '_unknown_format_logged', False), \
+                self.assertLogs(utils.logger, level='WARNING') as logs:
+            self.assertIsNone(codec.decode(legacy))
+            self.assertIsNone(codec.decode(b'\x80\x04unknown'))
+        # 只提示一次
+        self.assertEqual(len(logs.records), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from media_platform.kuaishou import KuaishouCrawler
+from media_platform.kuaishou.client import KuaiShouClient
+from tools.adaptive_limiter import AdaptiveLimiter
+from tools.circuit_breaker import CircuitBreaker
+
+
+class TestCircuitBreaker(IsolatedAsyncioTestCase):
+
+    def new_breaker(self, **kwargs):
+        return CircuitBreaker("ks", failure_threshold=2, cooldown=0.05, max_cooldown=0.2,
+                              probe_poll_interval=0.01, **kwargs)
+
+    async def test_open_after_threshold(self):
+        breaker = self.new_breaker()
+        self.assertFalse(breaker.record_failure())
+        breaker.record_success()
+        self.assertFalse(breaker.record_failure())
+        self.assertTrue(breaker.record_failure())
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        # 打开期间的其他失败不会重复触发恢复
+        self.assertFalse(breaker.record_failure())
+
+    async def test_wait_does_not_block_event_loop(self):
+        breaker = self.new_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while breaker.state == CircuitBreaker.OPEN:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        start = time.monotonic()
+        await asyncio.gather(breaker.wait_ready(), ticker())
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+        self.assertGreater(ticks, 3)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+    async def test_half_open_single_probe(self):
+        breaker = self.new_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        events = []
+
+        async def request(name):
+            await breaker.wait_ready()
+            events.append(f"start {name}")
+            await asyncio.sleep(0.02)
+            breaker.record_success()
+            events.append(f"end {name}")
+
+        await asyncio.gather(request("a"), request("b"))
+        # 探测请求结束之前，另一个请求不会发出
+        self.assertEqual(events[1][:3], "end")
+        self.assertEqual(len(events), 4)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_failed_probe_doubles_cooldown(self):
+        breaker = self.new_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        await breaker.wait_ready()
+        self.assertTrue(breaker.record_failure())
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertAlmostEqual(breaker.cooldown, 0.1)
+        self.assertEqual(breaker.stats()["open_count"], 2)
+
+
+class TestKuaishouBlockedRetry(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.crawler = KuaishouCrawler()
+        self.crawler.context_page = None
+        self.crawler.circuit_breaker = CircuitBreaker("ks", failure_threshold=1, cooldown=0.01)
+        self.crawler.ks_client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+        self.stored = []
+        self.blocked_once = {"sc2"}
+
+        async def get_video_comments(photo_id, pcursor):
+            if pcursor == "":
+                root = {"commentId": "r1", "subComments": [{"commentId": "s0"}], "subCommentsPcursor": "sc1"}
+                return {"visionCommentList": {"rootComments": [root], "pcursor": "p2"}}
+            return {"visionCommentList": {"rootComments": [{"commentId": "r2", "subCommentsPcursor": "no_more"}],
+                                          "pcursor": "no_more"}}
+
+        async def get_video_sub_comments(photo_id, root_comment_id, pcursor):
+            if pcursor in self.blocked_once:
+                self.blocked_once.discard(pcursor)
+                raise Exception("出现验证码，请求失败")
+            if pcursor == "":
+                return {"visionSubCommentList": {"subComments": [{"commentId": "s1"}], "pcursor": "sc2"}}
+            return {"visionSubCommentList": {"subComments": [{"commentId": "s2"}], "pcursor": "no_more"}}
+
+        async def store(video_id, comments):
+            self.stored.append([comment["commentId"] for comment in comments])
+
+        for patcher in (mock.patch.object(self.crawler.ks_client, "get_video_comments", get_video_comments),
+                        mock.patch.object(self.crawler.ks_client, "get_video_sub_comments", get_video_sub_comments),
+                        mock.patch("store.kuaishou.batch_update_ks_video_comments", store),
+                        mock.patch("random.random", return_value=0),
+                        mock.patch.object(config, "ENABLE_GET_SUB_COMMENTS", True),
+                        mock.patch.object(config, "CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES", 100)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_retry_resumes_from_cursor(self):
+        await self.crawler.get_comments("v1", AdaptiveLimiter("test.comment", initial_limit=1))
+        # 被封禁的那一页重试，已经存储的评论不会重复存储
+        self.assertEqual(self.stored, [["r1"], ["s0"], ["s1"], ["s2"], ["r2"]])
+        self.assertEqual(self.crawler.circuit_breaker.open_count, 1)
+        self.assertEqual(self.crawler.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_coding_error_is_not_a_block(self):
+        with mock.patch.object(self.crawler.ks_client, "get_video_sub_comments", side_effect=KeyError("pcursor")):
+            with self.assertRaises(KeyError):
+                await self.crawler.get_comments("v1", AdaptiveLimiter("test.comment", initial_limit=1))
+        self.assertEqual(self.crawler.circuit_breaker.failures, 0)
+        self.assertEqual(self.crawler.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
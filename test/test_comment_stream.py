@@ -0,0 +1,248 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from typing import Dict, List, Optional
+from unittest import IsolatedAsyncioTestCase, mock
+
+import config
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.xhs.client import XiaoHongShuClient
+from tools.adaptive_limiter import AdaptiveLimiter, current_limiter_var
+from tools.comment_stream import drain_comment_pages, fan_out_sub_comments
+
+
+def xhs_comment(comment_id: str, sub_count: int = 0, sub_has_more: bool = False) -> Dict:
+    return {
+        "id": comment_id,
+        "note_id": "n1",
+        "sub_comments": [{"id": f"{comment_id}-s{i}", "note_id": "n1"} for i in range(sub_count)],
+        "sub_comment_has_more": sub_has_more,
+        "sub_comment_cursor": "c0",
+    }
+
+
+class TestCommentStream(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.xhs_client = XiaoHongShuClient(headers={"Cookie": ""}, playwright_page=None, cookie_dict={})
+        self.root_pages = [
+            {"comments": [xhs_comment("c1", sub_count=1, sub_has_more=True), xhs_comment("c2")],
+             "has_more": True, "cursor": "p2"},
+            {"comments": [xhs_comment("c3"), xhs_comment("c4")], "has_more": False, "cursor": ""},
+        ]
+        self.sub_pages = [{"comments": [{"id": "c1-s1", "note_id": "n1"}], "has_more": False, "cursor": ""}]
+        patcher = mock.patch.object(config, "ENABLE_GET_SUB_COMMENTS", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def patch_xhs(self):
+        return (
+            mock.patch.object(self.xhs_client, "get_note_comments", mock.AsyncMock(side_effect=self.root_pages)),
+            mock.patch.object(self.xhs_client, "get_note_sub_comments", mock.AsyncMock(side_effect=self.sub_pages)),
+        )
+
+    async def test_pages_are_streamed_to_callback(self):
+        pages: List[List[str]] = []
+
+        async def callback(note_id, comments):
+            pages.append([comment["id"] for comment in comments])
+
+        root_patch, sub_patch = self.patch_xhs()
+        with root_patch, sub_patch:
+            result = await self.xhs_client.get_note_all_comments("n1", "token", crawl_interval=0, callback=callback,
+                                                                 max_count=100)
+        self.assertEqual(result, [])
+        self.assertEqual(pages, [["c1", "c2"], ["c1-s0"], ["c1-s1"], ["c3", "c4"]])
+
+    async def test_collect(self):
+        root_patch, sub_patch = self.patch_xhs()
+        with root_patch, sub_patch:
+            result = await self.xhs_client.get_note_all_comments("n1", "token", crawl_interval=0, max_count=100,
+                                                                 collect=True)
+        self.assertEqual([comment["id"] for comment in result], ["c1", "c2", "c1-s0", "c1-s1", "c3", "c4"])
+
+    async def test_max_count_stops_paging(self):
+        root_patch, sub_patch = self.patch_xhs()
+        with root_patch as get_note_comments, sub_patch:
+            # 预取下一页前会等待 crawl_interval，期间二级评论已经计入 max_count
+            result = await self.xhs_client.get_note_all_comments("n1", "token", crawl_interval=0.05, max_count=3,
+                                                                 collect=True)
+        self.assertEqual(get_note_comments.await_count, 1)
+        self.assertEqual(len(result), 4)
+
+    async def test_consumer_can_stop_early(self):
+        root_patch, sub_patch = self.patch_xhs()
+        with root_patch as get_note_comments, sub_patch as get_note_sub_comments:
+            pages = self.xhs_client.iter_note_all_comments("n1", "token", crawl_interval=0, max_count=100)
+            async for _, comments in pages:
+                break
+            await pages.aclose()
+        self.assertEqual(get_note_comments.await_count, 1)
+        self.assertEqual(get_note_sub_comments.await_count, 0)
+
+    async def test_bilibili_sub_comments_respect_max_count(self):
+        client = BilibiliClient(headers={}, playwright_page=None, cookie_dict={})
+        root_page = {"cursor": {"is_end": False, "next": 1},
+                     "replies": [{"rpid": i, "rcount": 1} for i in range(20)]}
+        sub_page = {"replies": [{"rpid": 100}], "page": {"count": 1}}
+        with mock.patch.object(client, "get_video_comments", mock.AsyncMock(return_value=root_page)) as get_root, \
+                mock.patch.object(client, "get_video_level_two_comments",
+                                  mock.AsyncMock(return_value=sub_page)) as get_sub:
+            result = await client.get_video_all_comments("v1", crawl_interval=0, is_fetch_sub_comments=True,
+                                                         max_count=10, collect=True)
+        self.assertEqual(get_root.await_count, 1)
+        self.assertEqual(get_sub.await_count, 10)
+        self.assertEqual(len(result), 20)
+
+    async def test_drain_without_callback(self):
+        async def pages():
+            yield "n1", [1, 2]
+            yield "n1", [3]
+
+        self.assertEqual(await drain_comment_pages(pages()), [])
+        self.assertEqual(await drain_comment_pages(pages(), collect=True), [1, 2, 3])
+
+
+class TestFanOutSubComments(IsolatedAsyncioTestCase):
+    def setUp(self):
+        # 同时在请求中的页数
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # 还没结束的展开
+        self.running = 0
+        self.started: List[int] = []
+        self.produced: Dict[int, int] = {}
+        self.limiters: List[AdaptiveLimiter] = []
+
+    async def expand(self, parent: int, pages: int = 2, delay: Optional[float] = None):
+        self.started.append(parent)
+        self.running += 1
+        try:
+            for page in range(pages):
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                self.limiters.append(current_limiter_var.get())
+                # 前面的一级评论更慢，验证输出顺序不受完成顺序影响
+                await asyncio.sleep(0.01 * (5 - parent) if delay is None else delay)
+                self.in_flight -= 1
+                self.produced[parent] = self.produced.get(parent, 0) + 1
+                yield "n1", [f"{parent}-{page}"]
+        finally:
+            self.running -= 1
+
+    async def collect(self, pages) -> List[str]:
+        return [item for _, comments in [page async for page in pages] for item in comments]
+
+    async def test_keeps_parent_order(self):
+        result = await self.collect(fan_out_sub_comments(range(5), self.expand, concurrency=3))
+        self.assertEqual(result, [f"{parent}-{page}" for parent in range(5) for page in range(2)])
+        self.assertEqual(self.max_in_flight, 3)
+
+    async def test_serial_when_concurrency_is_one(self):
+        result = await self.collect(fan_out_sub_comments(range(3), self.expand, concurrency=1))
+        self.assertEqual(result, ["0-0", "0-1", "1-0", "1-1", "2-0", "2-1"])
+        self.assertEqual(self.max_in_flight, 1)
+
+    async def test_limiter_shared_across_notes(self):
+        limiter = AdaptiveLimiter("test.sub_comment", initial_limit=2)
+        await asyncio.gather(
+            self.collect(fan_out_sub_comments(range(3), self.expand, limiter=limiter, concurrency=4)),
+            self.collect(fan_out_sub_comments(range(3), self.expand, limiter=limiter, concurrency=4)),
+        )
+        self.assertEqual(self.max_in_flight, 2)
+        # 请求结果反馈给二级评论的限流器
+        self.assertEqual(set(self.limiters), {limiter})
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_error_is_raised_in_order(self):
+        async def expand(parent: int):
+            if parent == 1:
+                raise ValueError("boom")
+            await asyncio.sleep(0.01)
+            yield "n1", [parent]
+
+        seen = []
+        with self.assertRaises(ValueError):
+            async for _, comments in fan_out_sub_comments(range(3), expand, concurrency=3):
+                seen.extend(comments)
+        self.assertEqual(seen, [0])
+
+    async def test_consumer_stop_cancels_pending(self):
+        pages = fan_out_sub_comments(range(5), self.expand, concurrency=2)
+        async for _ in pages:
+            break
+        await pages.aclose()
+        await asyncio.sleep(0)
+        self.assertEqual(self.running, 0)
+        self.assertLess(len(self.started), 5)
+
+    async def test_buffer_bounded_while_first_parent_is_slow(self):
+        def expand(parent: int):
+            if parent == 0:
+                return self.expand(parent, pages=1, delay=0.1)
+            return self.expand(parent, pages=20, delay=0)
+
+        pages = fan_out_sub_comments(range(4), expand, concurrency=4, buffer_pages=1)
+        async for _, comments in pages:
+            self.assertEqual(comments, ["0-0"])
+            # 第一条一级评论取完之前，后面的每条最多缓存 1 页，再加上等待放入缓存的 1 页
+            self.assertLessEqual(max(self.produced.get(parent, 0) for parent in range(1, 4)), 2)
+            break
+        await pages.aclose()
+        result = await self.collect(fan_out_sub_comments(range(4), expand, concurrency=4, buffer_pages=1))
+        self.assertEqual(len(result), 61)
+
+    async def test_xhs_sub_comments_run_concurrently(self):
+        client = XiaoHongShuClient(headers={"Cookie": ""}, playwright_page=None, cookie_dict={})
+        comments = [xhs_comment(f"c{i}", sub_has_more=True) for i in range(4)]
+
+        async def get_note_sub_comments(note_id, root_comment_id, xsec_token, num, cursor):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            return {"comments": [{"id": f"{root_comment_id}-s"}], "has_more": False, "cursor": ""}
+
+        with mock.patch.object(config, "ENABLE_GET_SUB_COMMENTS", True), \
+                mock.patch.object(config, "SUB_COMMENT_CONCURRENCY_PER_NOTE", 4), \
+                mock.patch.object(client, "get_note_sub_comments", get_note_sub_comments):
+            result = await client.get_comments_all_sub_comments(comments, "token", crawl_interval=0, collect=True)
+        self.assertEqual([comment["id"] for comment in result], ["c0-s", "c1-s", "c2-s", "c3-s"])
+        self.assertEqual(self.max_in_flight, 4)
+
+    async def test_xhs_sub_comment_pages_stay_within_limiter(self):
+        client = XiaoHongShuClient(headers={"Cookie": ""}, playwright_page=None, cookie_dict={})
+        comments = [xhs_comment(f"c{i}", sub_has_more=True) for i in range(4)]
+        limiter = AdaptiveLimiter("test.sub_comment", initial_limit=2, max_limit=2)
+
+        async def get_note_sub_comments(note_id, root_comment_id, xsec_token, num, cursor):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            page = int(cursor[1:])
+            return {"comments": [{"id": f"{root_comment_id}-s{page}"}], "has_more": page < 3, "cursor": f"c{page + 1}"}
+
+        with mock.patch.object(config, "ENABLE_GET_SUB_COMMENTS", True), \
+                mock.patch.object(config, "ENABLE_PAGE_PREFETCH", True), \
+                mock.patch.object(config, "SUB_COMMENT_CONCURRENCY_PER_NOTE", 4), \
+                mock.patch.object(client, "get_note_sub_comments", get_note_sub_comments):
+            pages = client.iter_comments_all_sub_comments(comments, "token", crawl_interval=0, limiter=limiter)
+            result = await self.collect(pages)
+        self.assertEqual(len(result), 16)
+        # 开启预取时，下一页的请求也要在二级评论的预算之内
+        self.assertEqual(self.max_in_flight, limiter.current_limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
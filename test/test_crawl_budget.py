@@ -0,0 +1,86 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from collections import defaultdict
+from unittest import IsolatedAsyncioTestCase
+
+from tools import utils
+from tools.crawl_budget import CrawlBudget
+
+
+class FakeCrawler:
+    """模拟爬虫的一页：并发抓取详情，评论任务放到后台"""
+
+    def __init__(self, budget: CrawlBudget):
+        self.budget = budget
+        self.running = defaultdict(int)
+        self.max_running = defaultdict(int)
+        self.events = []
+
+    async def run_in_lane(self, lane: str, name: str):
+        async with getattr(self.budget, lane):
+            self.running[lane] += 1
+            self.max_running[lane] = max(self.max_running[lane], self.running[lane])
+            await asyncio.sleep(0.01)
+            self.running[lane] -= 1
+            self.events.append((lane, name))
+
+    async def crawl_page(self, page: int):
+        await asyncio.gather(*[self.run_in_lane("detail", f"{page}-{i}") for i in range(6)])
+        self.budget.add_background_tasks(
+            [asyncio.create_task(self.run_in_lane("comment", f"{page}-{i}")) for i in range(6)]
+        )
+
+
+class TestCrawlBudget(IsolatedAsyncioTestCase):
+
+    async def test_global_limit_under_overlapping_pages(self):
+        budget = CrawlBudget("xhs", {"detail": 2, "comment": 3, "sub_comment": 1, "media": 1})
+        crawler = FakeCrawler(budget)
+        # 多个关键词/多页同时抓取，每页都使用同一个预算
+        await asyncio.gather(*[crawler.crawl_page(page) for page in range(4)])
+        await budget.join()
+
+        self.assertEqual(crawler.max_running["detail"], 2)
+        self.assertEqual(crawler.max_running["comment"], 3)
+        self.assertEqual(len([e for e in crawler.events if e[0] == "comment"]), 24)
+        self.assertEqual(budget.stats()["detail"]["in_flight"], 0)
+
+    async def test_comments_do_not_block_next_page(self):
+        budget = CrawlBudget("xhs", {"detail": 2, "comment": 1, "sub_comment": 1, "media": 1})
+        crawler = FakeCrawler(budget)
+        await crawler.crawl_page(1)
+        await crawler.crawl_page(2)
+        # 第二页的详情抓完时，第一页的评论还没有全部完成
+        page1_comments = [e for e in crawler.events if e[0] == "comment" and e[1].startswith("1-")]
+        self.assertLess(len(page1_comments), 6)
+
+        await budget.join()
+        self.assertEqual(len([e for e in crawler.events if e[0] == "comment"]), 12)
+
+    async def test_join_logs_errors(self):
+        budget = CrawlBudget("xhs")
+
+        async def fail():
+            raise ValueError("boom")
+
+        budget.add_background_tasks([asyncio.create_task(fail(), name="fail")])
+        with self.assertLogs(utils.logger, level="ERROR") as logs:
+            await budget.join()
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("background task fail error: ValueError('boom')", logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# -*- coding: utf-8 -*-
+from unittest import IsolatedAsyncioTestCase, mock
+
+import db_migrate
+from constant.db_schema import TABLE_UNIQUE_KEYS
+
+
+class FakeMigrateDB:
+    """按表返回 information_schema 里的索引，记录执行的sql，代替真实的 AsyncMysqlDB"""
+
+    def __init__(self, indexes=None, dup_count=0):
+        # indexes: {table_name: [(index_name, non_unique, column_name), ...]}
+        self.indexes = indexes or {}
+        self.dup_count = dup_count
+        self.calls = []
+
+    async def query(self, sql, *args):
+        self.calls.append((sql, args))
+        return [{"INDEX_NAME": name, "NON_UNIQUE": non_unique, "COLUMN_NAME": column}
+                for name, non_unique, column in self.indexes.get(args[0], [])]
+
+    async def get_first(self, sql, *args):
+        self.calls.append((sql, args))
+        return {"dup": self.dup_count}
+
+    async def execute(self, sql, *args):
+        self.calls.append((sql, args))
+        return self.dup_count
+
+    def executed(self):
+        return [sql for sql, _ in self.calls if not sql.startswith("SELECT")]
+
+
+class TestDbMigrate(IsolatedAsyncioTestCase):
+
+    async def test_dedupe_sql_for_every_table(self):
+        for table_name, keys in TABLE_UNIQUE_KEYS.items():
+            db = FakeMigrateDB()
+            await db_migrate.dedupe_table(db, table_name, keys)
+            key_columns = ",".join(f"`{k}`" for k in keys)
+            not_null = " AND ".join(f"`{k}` IS NOT NULL" for k in keys)
+            key_condition = " AND ".join(f"t1.`{k}` = t2.`{k}`" for k in keys)
+            self.assertEqual(db.executed(), [
+                f"UPDATE `{table_name}` t1 INNER JOIN "
+                f"(SELECT {key_columns}, MIN(`add_ts`) AS min_add_ts, MAX(`id`) AS max_id FROM `{table_name}` "
+                f"WHERE {not_null} GROUP BY {key_columns} HAVING COUNT(*) > 1) d ON t1.`id` = d.max_id "
+                f"SET t1.`add_ts` = d.min_add_ts",
+                f"DELETE t1 FROM `{table_name}` t1 INNER JOIN `{table_name}` t2 "
+                f"ON {key_condition} AND t1.`id` < t2.`id`",
+            ], table_name)
+
+    async def test_migrate_drops_prefix_index_and_adds_unique_key(self):
+        db = FakeMigrateDB({"bilibili_contact_info": [
+            ("PRIMARY", 0, "id"),
+            ("idx_up_id", 1, "up_id"),
+            ("idx_fan_id", 1, "fan_id"),
+        ]}, dup_count=3)
+        await db_migrate.migrate_table(db, "bilibili_contact_info", ("up_id", "fan_id"), dry_run=False)
+        executed = db.executed()
+        self.assertEqual(len(executed), 3)
+        self.assertTrue(executed[0].startswith("UPDATE `bilibili_contact_info`"))
+        self.assertTrue(executed[1].startswith("DELETE t1 FROM `bilibili_contact_info`"))
+        self.assertEqual(executed[2], "ALTER TABLE `bilibili_contact_info` DROP INDEX `idx_up_id`, "
+                                      "ADD UNIQUE KEY `uk_bilibili_contact_info_up_id_fan_id` (`up_id`,`fan_id`)")
+
+    async def test_migrate_without_old_index(self):
+        db = FakeMigrateDB({"xhs_note": [("PRIMARY", 0, "id")]})
+        await db_migrate.migrate_table(db, "xhs_note", ("note_id",), dry_run=False)
+        # 没有重复数据时不去重，没有旧索引时只加唯一键
+        self.assertEqual(db.executed(), ["ALTER TABLE `xhs_note` ADD UNIQUE KEY `uk_xhs_note_note_id` (`note_id`)"])
+
+    async def test_migrate_skips_missing_table_and_existing_unique_key(self):
+        db = FakeMigrateDB({"xhs_note": [("PRIMARY", 0, "id"), ("uk_xhs_note_note_id", 0, "note_id")]},
+                           dup_count=3)
+        await db_migrate.migrate_table(db, "xhs_note", ("note_id",), dry_run=False)
+        await db_migrate.migrate_table(db, "xhs_creator", ("user_id",), dry_run=False)
+        self.assertEqual(db.executed(), [])
+
+    async def test_dry_run_does_not_modify(self):
+        db = FakeMigrateDB({"xhs_note": [("PRIMARY", 0, "id"), ("idx_note_id", 1, "note_id")]}, dup_count=3)
+        await db_migrate.migrate_table(db, "xhs_note", ("note_id",), dry_run=True)
+        self.assertEqual(db.executed(), [])
+
+    async def test_migrate_covers_every_table(self):
+        db = FakeMigrateDB({table_name: [("PRIMARY", 0, "id")] for table_name in TABLE_UNIQUE_KEYS})
+        init_db = mock.AsyncMock(side_effect=lambda: db_migrate.media_crawler_db_var.set(db))
+        with mock.patch.object(db_migrate, "init_mediacrawler_db", init_db), \
+                mock.patch.object(db_migrate, "close", mock.AsyncMock()) as close:
+            await db_migrate.migrate()
+        self.assertEqual(len(db.executed()), len(TABLE_UNIQUE_KEYS))
+        close.assert_awaited_once()
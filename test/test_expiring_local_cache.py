@@ -42,6 +42,10 @@ class TestExpiringLocalCache(unittest.TestCase):
         time.sleep(12)
         self.assertIsNone(self.cache.get('key'))
 
+    def test_mget_and_mset(self):
+        self.cache.mset({'key1': 'value1', 'key2': [1, 2]}, 10)
+        self.assertEqual(self.cache.mget(['key1', 'key2', 'key3']), ['value1', [1, 2], None])
+
     def tearDown(self):
         del self.cache
 
@@ -0,0 +1,211 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+import config
+from benchmarks.mock_api import BILI_WBI_IMG, BILI_WBI_SUB, FakeSignPage
+from tools.http_fixture import (MODE_RECORD, MODE_REPLAY, FixtureArchive, HttpFixture, install_http_fixture,
+                                request_key)
+
+
+def json_response(archive: FixtureArchive, method: str, url: str, data, body=None):
+    content = json.dumps(body, ensure_ascii=False).encode() if body is not None else b""
+    archive.add(httpx.Request(method, url, content=content), 200, {"content-type": "application/json"},
+                json.dumps(data, ensure_ascii=False).encode())
+
+
+def build_xhs_archive(note_count: int) -> FixtureArchive:
+    archive = FixtureArchive()
+    items = [{"id": f"note{i}", "xsec_source": "pc_search", "xsec_token": f"token{i}", "model_type": "note"}
+             for i in range(note_count)]
+    json_response(archive, "POST", "https://edith.xiaohongshu.com/api/sns/web/v1/search/notes",
+                  {"success": True, "data": {"has_more": True, "items": items}},
+                  body={"keyword": "python", "page": 1, "page_size": 20, "search_id": "any",
+                        "sort": "general", "note_type": 0})
+    for item in items:
+        note_id = item["id"]
+        state = {"note": {"noteDetailMap": {note_id: {"note": {
+            "noteId": note_id, "type": "normal", "title": f"title {note_id}", "desc": "desc",
+            "time": 1700000000000, "user": {"userId": "u1", "nickname": "nick"},
+            "interactInfo": {"likedCount": "1"}, "imageList": [], "tagList": [],
+        }}}}}
+        html = f"<html><script>window.__INITIAL_STATE__={json.dumps(state)}</script></html>"
+        archive.add(httpx.Request("GET", f"https://www.xiaohongshu.com/explore/{note_id}"
+                                         f"?xsec_token={item['xsec_token']}&xsec_source=pc_search"),
+                    200, {"content-type": "text/html"}, html.encode())
+    return archive
+
+
+def build_bili_archive(video_count: int) -> FixtureArchive:
+    archive = FixtureArchive()
+    json_response(archive, "GET", "https://api.bilibili.com/x/web-interface/nav",
+                  {"code": 0, "data": {"wbi_img": {"img_url": BILI_WBI_IMG, "sub_url": BILI_WBI_SUB}}})
+    json_response(archive, "GET", "https://api.bilibili.com/x/web-interface/wbi/search/type?search_type=video"
+                                  "&keyword=python&page=1&page_size=20&order=&pubtime_begin_s=0&pubtime_end_s=0"
+                                  "&wts=1&w_rid=abc",
+                  {"code": 0, "data": {"result": [{"aid": aid} for aid in range(1, video_count + 1)]}})
+    for aid in range(1, video_count + 1):
+        json_response(archive, "GET", f"https://api.bilibili.com/x/web-interface/view/detail?aid={aid}", {
+            "code": 0, "data": {
+                "View": {"aid": aid, "cid": aid, "title": f"video {aid}", "desc": "", "pubdate": 1700000000,
+                         "owner": {"mid": 1, "name": "up"}, "stat": {"like": 1}},
+                "Card": {"card": {"mid": 1, "name": "up", "level_info": {"current_level": 6},
+                                  "official_verify": {"type": -1}}, "like_num": 1},
+            }})
+    return archive
+
+
+class TestHttpFixture(IsolatedAsyncioTestCase):
+
+    def tearDown(self):
+        install_http_fixture(None)
+
+    def test_request_key_ignores_signing_and_volatile_fields(self):
+        self.assertEqual(
+            request_key("GET", "https://a.com/x?b=2&a=1&w_rid=1&wts=2"),
+            request_key("get", "https://a.com/x?a=1&b=2&a_bogus=3"),
+        )
+        self.assertEqual(
+            request_key("POST", "https://a.com/x", b'{"keyword": "k", "search_id": "1"}'),
+            request_key("POST", "https://a.com/x", b'{"search_id": "2", "keyword": "k"}'),
+        )
+        self.assertNotEqual(request_key("POST", "https://a.com/x", b'{"page": 1}'),
+                            request_key("POST", "https://a.com/x", b'{"page": 2}'))
+
+    async def test_record_save_and_replay(self):
+        async def live_platform(request: httpx.Request):
+            return httpx.Response(200, json={"path": request.url.path})
+
+        archive = FixtureArchive(os.path.join(tempfile.mkdtemp(), "xhs.json"))
+        fixture = HttpFixture(MODE_RECORD, archive)
+        kwargs = fixture.client_kwargs({"transport": httpx.MockTransport(live_platform)})
+        async with httpx.AsyncClient(**kwargs) as client:
+            await client.get("https://a.com/api?id=1&a_bogus=xx", headers={"X-s": "sign", "Referer": "r"})
+        archive.save()
+
+        entry = json.load(open(archive.path, encoding="utf-8"))["entries"][0]
+        self.assertEqual(entry["request"]["url"], "https://a.com/api?id=1")
+        self.assertNotIn("x-s", entry["request"]["headers"])
+        self.assertEqual(entry["request"]["headers"]["referer"], "r")
+
+        fixture = HttpFixture(MODE_REPLAY, FixtureArchive(archive.path).load())
+        async with httpx.AsyncClient(**fixture.client_kwargs({"proxies": None})) as client:
+            response = await client.get("https://a.com/api?a_bogus=yy&id=1")
+            missing = await client.get("https://a.com/other")
+        self.assertEqual(response.json(), {"path": "/api"})
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(fixture.transport.stats(), {"hits": 1, "misses": 1, "injected_errors": 0})
+
+    async def test_record_skips_session_headers_and_media(self):
+        async def live_platform(request: httpx.Request):
+            if request.url.path.endswith(".jpg"):
+                return httpx.Response(200, headers={"content-type": "image/jpeg"}, content=b"\xff\xd8" * 1024)
+            return httpx.Response(200, json={"ok": 1},
+                                  headers={"set-cookie": "web_session=secret", "x-trace": "t"})
+
+        archive = FixtureArchive()
+        fixture = HttpFixture(MODE_RECORD, archive)
+        transport = httpx.MockTransport(live_platform)
+        async with httpx.AsyncClient(**fixture.client_kwargs({"transport": transport})) as client:
+            await client.get("https://a.com/api")
+            image = await client.get("https://a.com/cover.jpg")
+        self.assertEqual(len(image.content), 2048)
+        self.assertEqual(len(archive.entries), 1)
+        self.assertEqual(fixture.skipped_media, 1)
+        headers = archive.entries[0]["response"]["headers"]
+        self.assertNotIn("set-cookie", headers)
+        self.assertEqual(headers["x-trace"], "t")
+
+        fixture = HttpFixture(MODE_RECORD, FixtureArchive(), record_media=True)
+        async with httpx.AsyncClient(**fixture.client_kwargs({"transport": transport})) as client:
+            await client.get("https://a.com/cover.jpg")
+        self.assertEqual(len(fixture.archive.entries), 1)
+
+    async def test_replay_error_injection(self):
+        archive = FixtureArchive()
+        json_response(archive, "GET", "https://a.com/api", {"ok": 1})
+        fixture = HttpFixture(MODE_REPLAY, archive, error_rate=1, error_status=503)
+        async with httpx.AsyncClient(**fixture.client_kwargs({})) as client:
+            self.assertEqual((await client.get("https://a.com/api")).status_code, 503)
+        fixture = HttpFixture(MODE_REPLAY, archive, error_rate=1)
+        async with httpx.AsyncClient(**fixture.client_kwargs({})) as client:
+            with self.assertRaises(httpx.ConnectError):
+                await client.get("https://a.com/api")
+
+
+class TestOfflineSearch(IsolatedAsyncioTestCase):
+    """回放录制文件，离线跑完整的搜索流程"""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(tempfile.mkdtemp())
+        self.patches = [
+            mock.patch.object(config, "KEYWORDS", "python"),
+            mock.patch.object(config, "CRAWLER_MAX_NOTES_COUNT", 20),
+            mock.patch.object(config, "START_PAGE", 1),
+            mock.patch.object(config, "SORT_TYPE", ""),
+            mock.patch.object(config, "ENABLE_GET_COMMENTS", False),
+            mock.patch.object(config, "ENABLE_GET_IMAGES", False),
+            mock.patch.object(config, "SAVE_DATA_OPTION", "json"),
+            mock.patch("time.sleep"),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        install_http_fixture(None)
+        os.chdir(self.cwd)
+
+    async def test_xhs_search(self):
+        from media_platform.xhs import XiaoHongShuCrawler
+        from media_platform.xhs.client import XiaoHongShuClient
+
+        fixture = HttpFixture(MODE_REPLAY, build_xhs_archive(3))
+        install_http_fixture(fixture)
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = XiaoHongShuClient(headers={"Cookie": ""}, playwright_page=FakeSignPage(),
+                                               cookie_dict={"a1": "fake-a1"})
+        with mock.patch("store.xhs.XhsStoreFactory.create_store") as create_store:
+            create_store.return_value.store_content = mock.AsyncMock()
+            await crawler.search()
+            await crawler.budget.join()
+        self.assertEqual(create_store.return_value.store_content.await_count, 3)
+        self.assertEqual(fixture.transport.stats()["misses"], 0)
+
+    async def test_bilibili_search(self):
+        from media_platform.bilibili import BilibiliCrawler
+        from media_platform.bilibili.client import BilibiliClient
+
+        fixture = HttpFixture(MODE_REPLAY, build_bili_archive(4))
+        install_http_fixture(fixture)
+        crawler = BilibiliCrawler()
+        crawler.bili_client = BilibiliClient(headers={}, playwright_page=None, cookie_dict={})
+        with mock.patch("store.bilibili.BiliStoreFactory.create_store") as create_store:
+            create_store.return_value.store_content = mock.AsyncMock()
+            create_store.return_value.store_creator = mock.AsyncMock()
+            await crawler.search()
+            await crawler.budget.join()
+        self.assertEqual(create_store.return_value.store_content.await_count, 4)
+        self.assertEqual(fixture.transport.stats()["misses"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# main.py 及所有平台爬虫的导入耗时上限（秒），较慢的机器上可以通过环境变量调大
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", 3))
+
+# 只在用到时才加载的重依赖
+LAZY_MODULES = ("pandas", "matplotlib", "wordcloud", "jieba", "cv2", "numpy")
+
+IMPORT_SCRIPT = f"""
+import importlib, json, sys, time
+start = time.perf_counter()
+import main
+main_cost = time.perf_counter() - start
+for crawler_path in main.CrawlerFactory.CRAWLERS.values():
+    importlib.import_module(crawler_path.rsplit(".", 1)[0])
+print(json.dumps({{
+    "main_cost": main_cost,
+    "total_cost": time.perf_counter() - start,
+    "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+
+    def run_import(self):
+        # 在新的解释器中导入，避免受到当前进程已导入模块的影响
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], cwd=project_dir)
+        return json.loads(output.decode().strip().splitlines()[-1])
+
+    def test_heavy_modules_are_lazy(self):
+        result = self.run_import()
+        self.assertEqual(result["loaded"], [])
+
+    def test_import_time_budget(self):
+        result = self.run_import()
+        self.assertLess(result["main_cost"], IMPORT_TIME_BUDGET)
+        self.assertLess(result["total_cost"], IMPORT_TIME_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
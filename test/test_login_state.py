@@ -0,0 +1,180 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+from base.base_crawler import AbstractApiClient
+from media_platform.bilibili import BilibiliCrawler
+from media_platform.bilibili.client import BilibiliClient
+from tools import utils
+from tools.login_state import LoginState, LoginStateCache, install_auth_failure_fallback
+
+COOKIES = [
+    {"name": "SESSDATA", "value": "abc", "domain": ".bilibili.com", "path": "/", "expires": -1},
+    {"name": "bili_jct", "value": "def", "domain": ".bilibili.com", "path": "/", "expires": -1},
+]
+
+
+class FakeBrowserContext:
+    def __init__(self, cookies=None):
+        self._cookies = list(cookies or [])
+
+    async def cookies(self, urls=None):
+        return self._cookies
+
+    async def add_cookies(self, cookies):
+        self._cookies.extend(cookies)
+
+
+WBI_IMG_URLS = "https://i0.hdslb.com/bfs/wbi/a.png-https://i0.hdslb.com/bfs/wbi/b.png"
+
+
+class FakePage:
+    async def evaluate(self, expression, arg=None):
+        return {"wbi_img_urls": WBI_IMG_URLS, "other": "x"}
+
+
+class TestLoginStateCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        patcher = mock.patch("os.getcwd", return_value=self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_save_and_restore(self):
+        self.assertFalse(await LoginStateCache("bili", "a").restore(FakeBrowserContext()))
+
+        await LoginStateCache("bili", "a").save(FakeBrowserContext(COOKIES), FakePage())
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, "browser_data", "login_state", "bili_a.json")))
+
+        browser_context = FakeBrowserContext()
+        cache = LoginStateCache("bili", "a")
+        self.assertTrue(await cache.restore(browser_context))
+        self.assertEqual(await browser_context.cookies(), COOKIES)
+        self.assertEqual(cache.tokens, {"wbi_img_urls": WBI_IMG_URLS})
+
+        # 不同账号互不影响
+        self.assertFalse(await LoginStateCache("bili", "b").restore(FakeBrowserContext()))
+
+    async def test_expired_state_still_restore_cookies(self):
+        await LoginStateCache("bili", "a").save(FakeBrowserContext(COOKIES))
+        browser_context = FakeBrowserContext()
+        with mock.patch("config.LOGIN_STATE_TTL", -1):
+            self.assertFalse(await LoginStateCache("bili", "a").restore(browser_context))
+        self.assertEqual(await browser_context.cookies(), COOKIES)
+
+    async def test_cookie_login_skips_cache(self):
+        await LoginStateCache("bili", "a").save(FakeBrowserContext(COOKIES))
+        browser_context = FakeBrowserContext()
+        with mock.patch("config.LOGIN_TYPE", "cookie"), mock.patch("config.COOKIES", "SESSDATA=new"):
+            self.assertFalse(await LoginStateCache("bili", "a").restore(browser_context))
+        self.assertEqual(await browser_context.cookies(), [])
+
+    async def test_restore_stored_for_api_mode(self):
+        self.assertIsNone(await LoginStateCache("bili", "a").restore_stored())
+        await LoginStateCache("bili", "a").save(FakeBrowserContext(COOKIES), FakePage())
+
+        cache = LoginStateCache("bili", "a")
+        stored_context = await cache.restore_stored()
+        self.assertTrue(cache.fresh)
+        cookie_str, _ = utils.convert_cookies(await stored_context.cookies())
+        self.assertEqual(cookie_str, "SESSDATA=abc;bili_jct=def")
+        # 没有页面时保存，沿用缓存里的签名参数
+        await cache.save(stored_context)
+        self.assertEqual((await LoginStateCache("bili", "a").load()).tokens, {"wbi_img_urls": WBI_IMG_URLS})
+
+        with mock.patch("config.LOGIN_TYPE", "cookie"), mock.patch("config.COOKIES", "SESSDATA=new"):
+            self.assertIsNone(await LoginStateCache("bili", "a").restore_stored())
+
+    async def test_api_mode_skips_pong_while_fresh(self):
+        await LoginStateCache("bili", "default").save(FakeBrowserContext(COOKIES), FakePage())
+        crawler = BilibiliCrawler()
+        with mock.patch("config.PLATFORM", "bili"), \
+                mock.patch.object(BilibiliClient, "pong", mock.AsyncMock(return_value=True)) as pong, \
+                mock.patch.object(BilibiliCrawler, "crawl", mock.AsyncMock()) as crawl:
+            self.assertTrue(await crawler.start_api_mode(None))
+            pong.assert_not_awaited()
+            crawl.assert_awaited_once()
+            self.assertEqual(crawler.bili_client.headers["Cookie"], "SESSDATA=abc;bili_jct=def")
+            # 签名参数来自登录态缓存，不需要浏览器页面也不用请求 nav 接口
+            self.assertEqual(await crawler.bili_client.get_wbi_keys(), ("a", "b"))
+
+            with mock.patch("config.LOGIN_STATE_TTL", -1):
+                self.assertTrue(await BilibiliCrawler().start_api_mode(None))
+            pong.assert_awaited_once()
+
+    async def test_api_mode_launches_browser_when_pong_fails(self):
+        await LoginStateCache("bili", "default").save(FakeBrowserContext(COOKIES))
+        crawler = BilibiliCrawler()
+        with mock.patch("config.PLATFORM", "bili"), mock.patch("config.LOGIN_STATE_TTL", -1), \
+                mock.patch.object(BilibiliClient, "pong", mock.AsyncMock(return_value=False)), \
+                mock.patch.object(crawler, "crawl", mock.AsyncMock()) as crawl:
+            self.assertFalse(await crawler.start_api_mode(None))
+        crawl.assert_not_awaited()
+
+    async def test_auth_failure_invalidates_and_checks_login_once(self):
+        await LoginStateCache("bili", "a").save(FakeBrowserContext(COOKIES))
+        cache = LoginStateCache("bili", "a")
+        self.assertTrue(await cache.restore(FakeBrowserContext()))
+        client = AuthTestClient()
+        check_login = mock.AsyncMock()
+        install_auth_failure_fallback(client, cache, check_login)
+
+        with self.assertRaises(Exception):
+            await client.request("GET", "https://example.com")
+        with self.assertRaises(Exception):
+            await client.request("GET", "https://example.com")
+        check_login.assert_awaited_once()
+        self.assertFalse(await LoginStateCache("bili", "a").restore(FakeBrowserContext()))
+
+    async def test_other_errors_keep_cache(self):
+        client = AuthTestClient(message="网络连接异常")
+        check_login = mock.AsyncMock()
+        install_auth_failure_fallback(client, LoginStateCache("bili", "a"), check_login)
+        with self.assertRaises(Exception):
+            await client.request("GET", "https://example.com")
+        check_login.assert_not_awaited()
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+
+class AuthTestClient(AbstractApiClient):
+    def __init__(self, message: str = "账号未登录"):
+        self.message = message
+
+    async def request(self, method, url, **kwargs):
+        raise Exception(self.message)
+
+    async def update_cookies(self, browser_context):
+        pass
+
+
+class TestLoginState(unittest.TestCase):
+
+    def test_is_fresh(self):
+        now = int(time.time())
+        state = LoginState(platform="bili", account="a", cookies=COOKIES, validated_at=now)
+        self.assertTrue(state.is_fresh(3600))
+        self.assertFalse(state.model_copy(update={"validated_at": now - 7200}).is_fresh(3600))
+        self.assertFalse(state.model_copy(update={"cookies": COOKIES[1:]}).is_fresh(3600))
+        expired_cookie = dict(COOKIES[0], expires=now - 1)
+        self.assertFalse(state.model_copy(update={"cookies": [expired_cookie]}).is_fresh(3600))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.loop_watchdog import LoopWatchdog
+
+
+def blocking_work(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+class TestLoopWatchdog(IsolatedAsyncioTestCase):
+    async def test_captures_blocking_call(self):
+        watchdog = await LoopWatchdog(threshold=0.05, interval=0.01).start()
+        await asyncio.sleep(0.05)
+        blocking_work(0.2)
+        await asyncio.sleep(0.05)
+        blocking_work(0.2)
+        await asyncio.sleep(0.05)
+        await watchdog.stop(report=False)
+
+        report = watchdog.report()
+        self.assertEqual(len(report), 2)
+        self.assertTrue(all("blocking_work" in item["stack"] for item in report))
+        self.assertTrue(all(item["count"] == 1 for item in report))
+        self.assertGreaterEqual(report[0]["max_seconds"], 0.1)
+        stats = watchdog.stats()
+        self.assertEqual(stats["stalls"], 2)
+        self.assertGreaterEqual(stats["lag_max_ms"], 100)
+
+    async def test_same_stack_is_aggregated(self):
+        watchdog = await LoopWatchdog(threshold=0.05, interval=0.01).start()
+        for _ in range(3):
+            await asyncio.sleep(0.03)
+            blocking_work(0.12)
+        await asyncio.sleep(0.03)
+        await watchdog.stop(report=False)
+
+        report = watchdog.report()
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report[0]["count"], 3)
+        self.assertGreaterEqual(report[0]["total_seconds"], 0.2)
+
+    async def test_no_stalls_when_loop_is_free(self):
+        watchdog = await LoopWatchdog(threshold=0.1, interval=0.01).start()
+        await asyncio.gather(*(asyncio.sleep(0.02) for _ in range(100)))
+        await asyncio.sleep(0.1)
+        await watchdog.stop(report=False)
+
+        self.assertEqual(watchdog.report(), [])
+        self.assertGreater(watchdog.stats()["ticks"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
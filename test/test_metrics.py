@@ -0,0 +1,110 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from base.base_crawler import AbstractApiClient, AbstractStore
+from tools.metrics import (PARSE_SECONDS, REQUESTS_TOTAL, STORE_WRITE_SECONDS, Counter, Histogram, MetricsExporter,
+                           MetricsRegistry, endpoint_label, timed_extractor)
+
+
+class MetricsTestClient(AbstractApiClient):
+    async def request(self, method, url, **kwargs):
+        if kwargs.get("fail"):
+            raise KeyError("data")
+        return {}
+
+    async def update_cookies(self, browser_context):
+        pass
+
+
+class MetricsTestStore(AbstractStore):
+    async def store_content(self, content_item):
+        pass
+
+    async def store_comment(self, comment_item):
+        pass
+
+    async def store_creator(self, creator):
+        pass
+
+
+class TestMetrics(IsolatedAsyncioTestCase):
+
+    def test_render_prometheus_text(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("test_total", "test counter", ("endpoint",)))
+        histogram = registry.register(Histogram("test_seconds", "test histogram", ("endpoint",), buckets=(0.1, 1)))
+        counter.inc(endpoint='a"b')
+        histogram.observe(0.05, endpoint="a")
+        histogram.observe(0.5, endpoint="a")
+        histogram.observe(5, endpoint="a")
+        text = registry.render()
+        self.assertIn("# TYPE test_total counter", text)
+        self.assertIn('test_total{endpoint="a\\"b"} 1.0', text)
+        self.assertIn('test_seconds_bucket{endpoint="a",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{endpoint="a",le="1"} 2', text)
+        self.assertIn('test_seconds_bucket{endpoint="a",le="+Inf"} 3', text)
+        self.assertIn('test_seconds_count{endpoint="a"} 3', text)
+
+    def test_endpoint_label_merges_ids(self):
+        self.assertEqual(endpoint_label("https://www.xiaohongshu.com/explore/66fad51c000000001b0224b8?xsec_token=1"),
+                         "www.xiaohongshu.com/explore/:id")
+        self.assertEqual(endpoint_label("https://edith.xiaohongshu.com/api/sns/web/v1/search/notes"),
+                         "edith.xiaohongshu.com/api/sns/web/v1/search/notes")
+
+    async def test_client_requests_and_store_writes_recorded(self):
+        client = MetricsTestClient()
+        endpoint = "example.com/api/:id"
+        await client.request("GET", "https://example.com/api/123456")
+        with self.assertRaises(KeyError):
+            await client.request("GET", "https://example.com/api/654321", fail=True)
+        self.assertEqual(REQUESTS_TOTAL.value(client="MetricsTestClient", endpoint=endpoint, outcome="ok"), 1)
+        self.assertEqual(REQUESTS_TOTAL.value(client="MetricsTestClient", endpoint=endpoint, outcome="KeyError"), 1)
+
+        await MetricsTestStore().store_content({})
+        self.assertEqual(STORE_WRITE_SECONDS.count(store="MetricsTestStore", kind="content"), 1)
+
+    def test_timed_extractor(self):
+        @timed_extractor("test")
+        class Extractor:
+            def extract_items(self, text):
+                return text.split(",")
+
+        self.assertEqual(Extractor().extract_items("a,b"), ["a", "b"])
+        self.assertEqual(PARSE_SECONDS.count(platform="test", parser="extract_items"), 1)
+
+    async def test_exporter_http_and_textfile(self):
+        registry = MetricsRegistry()
+        registry.register(Counter("exporter_test_total", "")).inc()
+        textfile_path = os.path.join(tempfile.mkdtemp(), "metrics.prom")
+        exporter = MetricsExporter(registry, port=0, textfile_path=textfile_path, interval=60)
+        await exporter.start()
+        exporter._server = await asyncio.start_server(exporter._handle, "127.0.0.1", 0)
+        port = exporter._server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+        await exporter.stop()
+        self.assertIn("200 OK", response)
+        self.assertIn("exporter_test_total 1.0", response)
+        with open(textfile_path, encoding="utf-8") as f:
+            self.assertIn("exporter_test_total 1.0", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from playwright.async_api import Error
+
+from tools.page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self):
+        self.url = "about:blank"
+        self.closed = False
+        self.running = 0
+        self.max_running = 0
+        self.fail_next = False
+        self.fail_goto = False
+
+    def on(self, event, callback):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    async def goto(self, url):
+        if self.fail_goto:
+            raise Error("net::ERR_CONNECTION_RESET")
+        self.url = url
+
+    async def evaluate(self, expression, arg=None):
+        if self.fail_next:
+            self.fail_next = False
+            raise Error("Execution context was destroyed")
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.02)
+        self.running -= 1
+        return arg
+
+
+class FakeBrowserContext:
+    def __init__(self):
+        self.pages = []
+        self.fail_goto = False
+
+    async def new_page(self):
+        page = FakePage()
+        page.fail_goto = self.fail_goto
+        self.pages.append(page)
+        return page
+
+
+class TestPagePool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.browser_context = FakeBrowserContext()
+        self.pool = await PagePool(self.browser_context, "https://www.xiaohongshu.com", size=2).start()
+
+    async def test_pages_are_not_shared(self):
+        results = await asyncio.gather(*[self.pool.evaluate("(x) => x", i) for i in range(6)])
+        self.assertEqual(results, list(range(6)))
+        self.assertEqual(len(self.browser_context.pages), 2)
+        for page in self.browser_context.pages:
+            self.assertEqual(page.max_running, 1)
+        stats = self.pool.stats()
+        self.assertEqual(stats["evaluate_count"], 6)
+        self.assertEqual(stats["in_use_max"], 2)
+        self.assertEqual(stats["in_use"], 0)
+
+    async def test_recycle_navigated_and_closed_pages(self):
+        first, second = self.browser_context.pages
+        await first.goto("https://passport.example.com")
+        second.closed = True
+        await asyncio.gather(self.pool.evaluate("1"), self.pool.evaluate("2"))
+        self.assertEqual(first.url, "https://www.xiaohongshu.com")
+        self.assertEqual(len(self.browser_context.pages), 3)
+        self.assertEqual(self.pool.stats()["recycle_count"], 2)
+
+    async def test_failed_recycle_keeps_slot(self):
+        pool = await PagePool(self.browser_context, "https://www.xiaohongshu.com", size=1).start()
+        self.browser_context.pages[-1].closed = True
+        self.browser_context.fail_goto = True
+        with self.assertRaises(Error):
+            await pool.evaluate("1")
+        # 打开失败的新页面被关闭，旧页面仍然在池中，下次借出时再重新打开
+        self.assertTrue(self.browser_context.pages[-1].closed)
+        self.browser_context.fail_goto = False
+        self.assertEqual(await pool.evaluate("(x) => x", "ok"), "ok")
+        self.assertEqual(len(pool._pages), 1)
+        self.assertFalse(pool._pages[0].closed)
+
+    async def test_retry_after_evaluate_error(self):
+        self.browser_context.pages[0].fail_next = True
+        self.assertEqual(await self.pool.evaluate("(x) => x", "ok"), "ok")
+        # 出错的页面在下次借出时重新打开首页
+        await self.pool.evaluate("1")
+        stats = self.pool.stats()
+        self.assertEqual(stats["error_count"], 1)
+        self.assertEqual(stats["recycle_count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
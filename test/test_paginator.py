@@ -0,0 +1,135 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from typing import List, Optional
+from unittest import IsolatedAsyncioTestCase
+
+from tools.paginator import PageResult, Paginator
+
+
+class FakePages:
+    """按页码返回固定数据，记录请求顺序"""
+
+    def __init__(self, pages: List[List[int]], delay: float = 0):
+        self.pages = pages
+        self.delay = delay
+        self.calls: List[int] = []
+        self.events: List[str] = []
+        self.cancelled = 0
+
+    async def __call__(self, cursor: int) -> Optional[PageResult]:
+        self.calls.append(cursor)
+        self.events.append(f"fetch:{cursor}")
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if cursor >= len(self.pages):
+            return None
+        return PageResult(self.pages[cursor], cursor + 1, cursor + 1 < len(self.pages))
+
+
+class TestPaginator(IsolatedAsyncioTestCase):
+    async def test_iterates_all_pages(self):
+        fetch = FakePages([[1, 2], [3], [4, 5]])
+        pages = Paginator(fetch, cursor=0)
+        self.assertEqual(await pages.collect(), [1, 2, 3, 4, 5])
+        self.assertEqual(fetch.calls, [0, 1, 2])
+        self.assertEqual(pages.pages, 3)
+
+    async def test_prefetch_overlaps_consumer(self):
+        fetch = FakePages([[1], [2], [3]])
+        async for items in Paginator(fetch, cursor=0, prefetch=True):
+            fetch.events.append(f"consume:{items[0]}")
+            await asyncio.sleep(0.01)
+        # 处理第一页时第二页已经在请求
+        self.assertLess(fetch.events.index("fetch:1"), fetch.events.index("consume:2"))
+        self.assertLess(fetch.events.index("fetch:1"), fetch.events.index("consume:1") + 2)
+
+        fetch = FakePages([[1], [2]])
+        async for items in Paginator(fetch, cursor=0, prefetch=False):
+            fetch.events.append(f"consume:{items[0]}")
+            await asyncio.sleep(0.01)
+        self.assertEqual(fetch.events, ["fetch:0", "consume:1", "fetch:1", "consume:2"])
+
+    async def test_max_count_truncates_last_page(self):
+        fetch = FakePages([[1, 2], [3, 4], [5, 6]])
+        pages = Paginator(fetch, cursor=0, max_count=3)
+        self.assertEqual(await pages.collect(), [1, 2, 3])
+        self.assertEqual(fetch.calls, [0, 1])
+
+    async def test_consumer_count_stops_before_next_request(self):
+        fetch = FakePages([[1], [2], [3]])
+        pages = Paginator(fetch, cursor=0, max_count=3)
+        seen = []
+        async for items in pages:
+            seen.extend(items)
+            # 调用方额外计入两条（例如二级评论）
+            pages.count += 2
+        self.assertEqual(seen, [1])
+        self.assertEqual(fetch.calls, [0])
+
+    async def test_stop_on_empty(self):
+        fetch = FakePages([[1], [], [2]])
+        self.assertEqual(await Paginator(fetch, cursor=0).collect(), [1])
+        fetch = FakePages([[1], [], [2]])
+        self.assertEqual(await Paginator(fetch, cursor=0, stop_on_empty=False).collect(), [1, 2])
+
+    async def test_break_cancels_prefetch(self):
+        fetch = FakePages([[1], [2], [3]], delay=0.05)
+        async for _ in Paginator(fetch, cursor=0):
+            # 让预取的请求先发出去
+            await asyncio.sleep(0.01)
+            break
+        await asyncio.sleep(0.01)
+        self.assertEqual(fetch.calls, [0, 1])
+        self.assertEqual(fetch.cancelled, 1)
+
+    async def test_pacing_hook_replaces_interval(self):
+        waits = []
+
+        async def pacing():
+            waits.append(1)
+
+        fetch = FakePages([[1], [2], [3]])
+        await Paginator(fetch, cursor=0, crawl_interval=100, pacing=pacing).collect()
+        # 第一页不等待
+        self.assertEqual(len(waits), 2)
+
+    async def test_fetch_error_propagates(self):
+        async def fetch(cursor):
+            if cursor:
+                raise ValueError("boom")
+            return PageResult([1], 1)
+
+        seen = []
+        with self.assertRaises(ValueError):
+            async for items in Paginator(fetch, cursor=0):
+                seen.extend(items)
+        self.assertEqual(seen, [1])
+
+    async def test_collect_calls_callback_per_page(self):
+        fetch = FakePages([[1, 2], [3]])
+        pages = []
+
+        async def callback(items):
+            pages.append(items)
+
+        await Paginator(fetch, cursor=0).collect(callback)
+        self.assertEqual(pages, [[1, 2], [3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from tools.profiler import SamplingProfiler, classify_stack, frame_label
+
+
+def parse_payloads(seconds: float) -> None:
+    payload = json.dumps({"items": [{"id": i, "title": "标题" * 10} for i in range(200)]})
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        json.loads(payload)
+
+
+class TestClassifyStack(unittest.TestCase):
+    def test_innermost_known_frame_wins(self):
+        stack = (
+            ("/app/main.py", "main"),
+            ("/app/store/xhs/__init__.py", "update_xhs_note"),
+            ("/usr/lib/python3.9/logging/__init__.py", "info"),
+            ("/usr/lib/python3.9/re.py", "sub"),
+        )
+        self.assertEqual(classify_stack(stack), "logging")
+        self.assertEqual(classify_stack(stack[:2]), "store")
+
+    def test_subsystems(self):
+        self.assertEqual(classify_stack((("/app/media_platform/xhs/help.py", "sign"),)), "signing")
+        self.assertEqual(classify_stack((("/app/media_platform/zhihu/help.py", "extract_contents"),)), "parsing")
+        self.assertEqual(classify_stack((("/venv/site-packages/httpx/_client.py", "send"),)), "http")
+        self.assertEqual(classify_stack((("/venv/site-packages/playwright/_impl/_page.py", "goto"),)), "browser")
+        self.assertEqual(classify_stack((("/app/main.py", "main"),)), "other")
+
+    def test_idle(self):
+        stack = (("/usr/lib/python3.9/asyncio/base_events.py", "_run_once"),
+                 ("/usr/lib/python3.9/selectors.py", "select"))
+        self.assertEqual(classify_stack(stack), "idle")
+
+    def test_frame_label(self):
+        self.assertEqual(frame_label("/venv/lib/site-packages/httpx/_client.py", "send"), "httpx/_client.py:send")
+        self.assertEqual(frame_label("/usr/lib/python3.9/json/decoder.py", "decode"), "decoder.py:decode")
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_profile_cpu_and_memory(self):
+        profiler = SamplingProfiler(interval=0.001, trace_memory=True, top_n=5).start()
+        parse_payloads(0.3)
+        kept = [bytearray(100) for _ in range(10000)]
+        profiler.stop()
+
+        self.assertGreater(profiler.samples, 0)
+        self.assertGreater(profiler.subsystem_summary().get("parsing", 0), 0)
+        self.assertTrue(any("parse_payloads" in line for line in profiler.folded_lines()))
+        for line in profiler.folded_lines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(count.isdigit())
+            self.assertIn(";", stack)
+        self.assertLessEqual(len(profiler.top_functions()), 5)
+        self.assertGreater(sum(profiler.memory_summary().values()), len(kept) * 100)
+        self.assertTrue(profiler.top_allocations())
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            folded_path, summary_path = profiler.save(output_dir, "test")
+            self.assertTrue(os.path.getsize(folded_path) > 0)
+            with open(summary_path, encoding="utf-8") as f:
+                summary = f.read()
+            self.assertIn("parsing", summary)
+            self.assertIn("allocation sites", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -42,6 +42,10 @@ class TestRedisCache(unittest.TestCase):
         self.assertIn('key1', keys)
         self.assertIn('key2', keys)
 
+    def test_mget_and_mset(self):
+        self.redis_cache.mset({'key1': 'value1', 'key2': {'a': 1}}, 10)
+        self.assertEqual(self.redis_cache.mget(['key1', 'key2', 'key3']), ['value1', {'a': 1}, None])
+
     def tearDown(self):
         # self.redis_cache._redis_client.flushdb()  # 清空redis数据库
         pass
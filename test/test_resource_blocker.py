@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.resource_blocker import ResourceBlocker
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.action = None
+
+    async def abort(self, error_code=None):
+        self.action = "abort"
+
+    async def continue_(self):
+        self.action = "continue"
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeBrowserContext:
+    def __init__(self):
+        self.handler = None
+        self.listeners = {}
+
+    async def route(self, url, handler):
+        self.handler = handler
+
+    def on(self, event, callback):
+        self.listeners[event] = callback
+
+
+class TestResourceBlocker(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.browser_context = FakeBrowserContext()
+        self.blocker = await ResourceBlocker("xhs").install(self.browser_context)
+
+    async def route(self, url, resource_type):
+        route = FakeRoute(FakeRequest(url, resource_type))
+        await self.browser_context.handler(route)
+        return route.action
+
+    async def test_block_by_resource_type_and_tracker(self):
+        self.assertEqual(await self.route("https://sns-img-qc.xhscdn.com/a.jpg", "image"), "abort")
+        self.assertEqual(await self.route("https://fe-static.xhscdn.com/a.woff2", "font"), "abort")
+        self.assertEqual(await self.route("https://www.google-analytics.com/collect", "xhr"), "abort")
+        self.assertEqual(await self.route("https://edith.xiaohongshu.com/api/sns/web/v1/search/notes", "xhr"), "continue")
+        self.assertEqual(await self.route("https://fe-static.xhscdn.com/main.js", "script"), "continue")
+        stats = self.blocker.stats()
+        self.assertEqual(stats["blocked_requests"], {"image": 1, "font": 1, "tracker": 1})
+        self.assertEqual(stats["blocked_total"], 3)
+
+    async def test_pause_and_resume(self):
+        self.blocker.pause()
+        self.assertEqual(await self.route("https://sns-img-qc.xhscdn.com/qrcode.png", "image"), "continue")
+        self.blocker.resume()
+        self.assertEqual(await self.route("https://sns-img-qc.xhscdn.com/qrcode.png", "image"), "abort")
+
+    async def test_resume_without_install(self):
+        blocker = ResourceBlocker("xhs")
+        blocker.resume()
+        self.assertFalse(blocker.enabled)
+
+    async def test_count_allowed_bytes(self):
+        on_response = self.browser_context.listeners["response"]
+        on_response(FakeResponse({"content-length": "1024"}))
+        on_response(FakeResponse({}))
+        self.assertEqual(self.blocker.stats()["allowed_requests"], 2)
+        self.assertEqual(self.blocker.stats()["allowed_bytes"], 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import IsolatedAsyncioTestCase, mock
+
+import httpx
+
+from base.base_crawler import AbstractApiClient
+from media_platform.tieba.client import BaiduTieBaClient
+from proxy.types import IpInfoModel
+from tools import retry_policy
+from tools.retry_policy import (ERROR_DATA, ERROR_NETWORK, ERROR_OTHER, ERROR_SERVER, ERROR_THROTTLE, ERROR_TIMEOUT,
+                                RetryBudget, RetryPolicy, classify_error)
+
+
+class DataFetchError(Exception):
+    pass
+
+
+class IPBlockError(Exception):
+    pass
+
+
+class FlakyClient(AbstractApiClient):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def request(self, method, url, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"url": url, **kwargs}
+
+    async def update_cookies(self, browser_context):
+        pass
+
+
+class TestRetryPolicy(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.005)
+        retry_policy._retry_policy = self.policy
+
+    def tearDown(self):
+        retry_policy._retry_policy = None
+
+    def test_classify_error(self):
+        self.assertEqual(classify_error(IPBlockError("ip blocked")), ERROR_THROTTLE)
+        self.assertEqual(classify_error(Exception("出现验证码，请求失败")), ERROR_THROTTLE)
+        self.assertEqual(classify_error(httpx.ReadTimeout("timeout")), ERROR_TIMEOUT)
+        self.assertEqual(classify_error(httpx.ConnectError("refused")), ERROR_NETWORK)
+        self.assertEqual(classify_error(Exception("Request failed, status code: 502")), ERROR_SERVER)
+        self.assertEqual(classify_error(DataFetchError("busy")), ERROR_DATA)
+        self.assertEqual(classify_error(KeyError("data")), ERROR_OTHER)
+
+    def test_backoff_is_jittered_and_capped(self):
+        policy = RetryPolicy(base_delay=1, max_delay=4)
+        delays = [policy.backoff(10) for _ in range(50)]
+        self.assertTrue(all(0 <= delay <= 4 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    async def test_client_request_retried_via_abstract_client(self):
+        client = FlakyClient([httpx.ConnectError("refused"), Exception("Request failed, status code: 502")])
+        result = await client.request("GET", "https://example.com/api", params={"a": 1})
+        self.assertEqual(result, {"url": "https://example.com/api", "params": {"a": 1}})
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(self.policy.retries, {ERROR_NETWORK: 1, ERROR_SERVER: 1})
+
+    async def test_data_errors_not_retried_by_default(self):
+        client = FlakyClient([DataFetchError("笔记不存在")])
+        with self.assertRaises(DataFetchError):
+            await client.request("GET", "https://example.com/api")
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(self.policy.stats()["budget_tokens"], 10.2)
+        # 按接口开启
+        self.policy.endpoint_overrides = {"/feed": {"retry_on": ["data"]}}
+        client = FlakyClient([DataFetchError("busy")])
+        await client.request("GET", "https://example.com/feed")
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(self.policy.retries, {ERROR_DATA: 1})
+
+    async def test_throttle_and_other_errors_not_retried(self):
+        client = FlakyClient([IPBlockError("blocked")])
+        with self.assertRaises(IPBlockError):
+            await client.request(method="GET", url="https://example.com/api")
+        client = FlakyClient([KeyError("data")])
+        with self.assertRaises(KeyError):
+            await client.request(method="GET", url="https://example.com/api")
+        self.assertEqual(self.policy.stats()["retries"], {})
+        self.assertEqual(self.policy.stats()["errors"], {ERROR_THROTTLE: 1, ERROR_OTHER: 1})
+
+    async def test_give_up_raises_last_error(self):
+        client = FlakyClient([httpx.ReadTimeout("1"), httpx.ReadTimeout("2"), httpx.ReadTimeout("3")])
+        with self.assertRaises(httpx.ReadTimeout) as ctx:
+            await client.request("GET", "https://example.com/api")
+        self.assertEqual(str(ctx.exception), "3")
+        self.assertEqual(self.policy.gave_up, {ERROR_TIMEOUT: 1})
+
+    async def test_endpoint_override(self):
+        self.policy.endpoint_overrides = {"/search": {"max_attempts": 1}}
+        client = FlakyClient([DataFetchError("busy")])
+        with self.assertRaises(DataFetchError):
+            await client.request("GET", "https://example.com/search?q=1")
+        self.assertEqual(client.calls, 1)
+
+    async def test_budget_limits_retry_storm(self):
+        self.policy.budget = RetryBudget(ratio=0.1, min_tokens=2, max_tokens=2)
+        total_calls = 0
+        for _ in range(10):
+            client = FlakyClient([httpx.ConnectError("refused")] * 3)
+            with self.assertRaises(httpx.ConnectError):
+                await client.request("GET", "https://example.com/api")
+            total_calls += client.calls
+        # 没有预算时是 30 次，预算只允许少量重试
+        self.assertLess(total_calls, 15)
+        self.assertGreater(self.policy.budget.exhausted, 0)
+
+
+
+class TestTiebaProxySwitch(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        retry_policy._retry_policy = RetryPolicy(max_attempts=1)
+        self.ip_pool = mock.Mock(get_proxy=mock.AsyncMock(return_value=IpInfoModel(
+            ip="127.0.0.1", port=8888, user="", password="", expired_time_ts=0)))
+        self.client = BaiduTieBaClient(ip_pool=self.ip_pool)
+
+    def tearDown(self):
+        retry_policy._retry_policy = None
+
+    async def test_switch_proxy_on_network_error(self):
+        responses = [httpx.ConnectError("refused"), "ok"]
+
+        async def request(method, url, **kwargs):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with mock.patch.object(BaiduTieBaClient, "request", side_effect=request):
+            self.assertEqual(await self.client.get("/f"), "ok")
+        self.ip_pool.get_proxy.assert_awaited_once()
+
+    async def test_parse_error_does_not_switch_proxy(self):
+        with mock.patch.object(BaiduTieBaClient, "request", side_effect=ValueError("bad json")):
+            with self.assertRaises(ValueError):
+                await self.client.get("/f")
+        self.ip_pool.get_proxy.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
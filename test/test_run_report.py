@@ -0,0 +1,176 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from base.base_crawler import AbstractApiClient, AbstractStore
+from tools.run_report import RUN_REPORT, client_method_stage, record_response_size
+from var import report_scope_var, source_keyword_var
+
+
+class ReportTestClient(AbstractApiClient):
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+
+    async def request(self, method, url, **kwargs):
+        await asyncio.sleep(self.delay)
+        if kwargs.get("fail"):
+            raise KeyError("data")
+        return {}
+
+    async def update_cookies(self, browser_context):
+        pass
+
+    async def get_note_by_keyword(self, keyword: str):
+        return await self.request("GET", f"https://example.com/search?keyword={keyword}")
+
+    async def get_note_comments(self, note_id: str):
+        return await self.request("GET", f"https://example.com/comments/{note_id}")
+
+    async def get_comments_all_sub_comments(self, note_id: str):
+        await self.request("GET", f"https://example.com/sub_comments/{note_id}")
+        await self.request("GET", f"https://example.com/sub_comments/{note_id}?page=2")
+
+    async def get_note_all_comments(self, note_id: str):
+        await self.get_note_comments(note_id)
+        await self.get_comments_all_sub_comments(note_id)
+
+
+class ReportTestStore(AbstractStore):
+    async def store_content(self, content_item):
+        pass
+
+    async def store_comment(self, comment_item):
+        pass
+
+    async def store_creator(self, creator):
+        pass
+
+
+class TestClientMethodStage(unittest.TestCase):
+    def test_stage_by_method_name(self):
+        self.assertEqual(client_method_stage("get_note_by_keyword"), "search")
+        self.assertEqual(client_method_stage("search_video_by_keyword"), "search")
+        self.assertEqual(client_method_stage("get_note_by_id"), "detail")
+        self.assertEqual(client_method_stage("get_video_info"), "detail")
+        self.assertEqual(client_method_stage("get_video_all_comments"), "comments")
+        self.assertEqual(client_method_stage("get_video_all_level_two_comments"), "sub_comments")
+        self.assertEqual(client_method_stage("get_child_comments"), "sub_comments")
+        self.assertEqual(client_method_stage("get_note_media"), "media")
+        self.assertEqual(client_method_stage("get_creator_info"), "creator")
+        self.assertEqual(client_method_stage("get_user_aweme_posts"), "creator")
+        self.assertIsNone(client_method_stage("request"))
+        self.assertIsNone(client_method_stage("get_wbi_keys"))
+
+
+class TestRunReport(IsolatedAsyncioTestCase):
+    def setUp(self):
+        RUN_REPORT.start("xhs", "search")
+
+    async def test_stage_time_is_exclusive(self):
+        client = ReportTestClient(delay=0.05)
+        source_keyword_var.set("python")
+        await client.get_note_by_keyword("python")
+        await client.get_note_all_comments("n1")
+
+        stats = RUN_REPORT.scopes["keyword:python"]
+        self.assertEqual(stats.pages, 4)
+        self.assertEqual(stats.stage_calls, {"search": 1, "comments": 1, "sub_comments": 1})
+        self.assertAlmostEqual(stats.stage_seconds["comments"], 0.05, delta=0.04)
+        self.assertAlmostEqual(stats.stage_seconds["sub_comments"], 0.1, delta=0.04)
+
+    async def test_concurrent_sub_stages_not_subtracted(self):
+        class ConcurrentClient(ReportTestClient):
+            async def get_note_all_comments(self, note_id: str):
+                await self.get_note_comments(note_id)
+                # 4 个二级评论展开在各自的任务中并发执行
+                await asyncio.gather(*(self.get_comments_all_sub_comments(f"{note_id}-{i}") for i in range(4)))
+
+        source_keyword_var.set("python")
+        await ConcurrentClient(delay=0.05).get_note_all_comments("n1")
+
+        stats = RUN_REPORT.scopes["keyword:python"]
+        # 外层的墙钟时间 0.05 + 0.1 不会被 4 个并发子阶段的 0.4 扣到 0
+        self.assertAlmostEqual(stats.stage_seconds["comments"], 0.15, delta=0.05)
+        self.assertAlmostEqual(stats.stage_seconds["sub_comments"], 0.4, delta=0.08)
+
+    async def test_scopes_and_store_counts(self):
+        client, store = ReportTestClient(delay=0), ReportTestStore()
+
+        async def crawl_creator(user_id: str, notes: int, comments: int):
+            report_scope_var.set(f"creator:{user_id}")
+            await store.store_creator({})
+            for _ in range(notes):
+                await store.store_content({})
+            for _ in range(comments):
+                await store.store_comment({})
+            await client.get_note_comments("n1")
+            try:
+                await client.request("GET", "https://example.com/broken", fail=True)
+            except KeyError:
+                pass
+
+        await asyncio.gather(crawl_creator("u1", 2, 6), crawl_creator("u2", 1, 0))
+
+        report = RUN_REPORT.to_dict()
+        u1, u2 = report["scopes"]["creator:u1"], report["scopes"]["creator:u2"]
+        self.assertEqual((u1["items"], u1["comments"], u1["creators"]), (2, 6, 1))
+        self.assertEqual(u1["comments_per_item"], 3)
+        self.assertEqual((u2["items"], u2["comments"]), (1, 0))
+        self.assertEqual(u1["pages"], 1)
+        self.assertEqual(u1["failed_requests"], 1)
+        self.assertEqual(u1["errors"], {"other": 1})
+        self.assertEqual(u1["stage_calls"]["store"], 9)
+        self.assertEqual(report["totals"]["items"], 3)
+        self.assertEqual(report["totals"]["failed_requests"], 2)
+
+    async def test_blocks_and_retries(self):
+        report_scope_var.set("creator:u1")
+        RUN_REPORT.record_error("throttle")
+        RUN_REPORT.record_error("timeout")
+        RUN_REPORT.record_retry("timeout")
+        RUN_REPORT.record_gave_up("timeout")
+
+        stats = RUN_REPORT.to_dict()["scopes"]["creator:u1"]
+        self.assertEqual((stats["blocks"], stats["retries"], stats["gave_up"]), (1, 1, 1))
+
+    async def test_response_bytes(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"x" * 1024))
+        report_scope_var.set("creator:u1")
+        async with httpx.AsyncClient(transport=transport, event_hooks={"response": [record_response_size]}) as client:
+            response = await client.get("https://example.com/a")
+            await client.get("https://example.com/b")
+        self.assertEqual(len(response.content), 1024)
+        self.assertEqual(RUN_REPORT.scopes["creator:u1"].bytes_downloaded, 2048)
+
+    async def test_save(self):
+        report_scope_var.set("creator:u1")
+        await ReportTestStore().store_content({})
+        RUN_REPORT.finish()
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = RUN_REPORT.save(output_dir)
+            self.assertTrue(os.path.basename(path).startswith("xhs_search_"))
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+        self.assertEqual(report["scopes"]["creator:u1"]["items"], 1)
+        self.assertTrue(any("creator:u1" in line for line in RUN_REPORT.summary_lines()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, mock
+
+from async_sqlite_db import AsyncSqliteDB
+
+
+class TestAsyncSqliteDB(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"), batch_size=50, flush_interval=0.05)
+        await self.db.connect()
+        with open("schema/sqlite_tables.sql", encoding="utf-8") as f:
+            await self.db.execute_script(f.read())
+
+    async def test_wal_mode(self):
+        row = await self.db.get_first("PRAGMA journal_mode")
+        self.assertEqual(row["journal_mode"], "wal")
+
+    async def test_upsert_keeps_add_ts(self):
+        comment = {"comment_id": "c1", "note_id": "n1", "content": "first", "add_ts": 1, "last_modify_ts": 1}
+        await self.db.upsert("xhs_note_comment", comment, conflict_keys=("comment_id",))
+        await self.db.flush()
+        comment.update({"content": "second", "add_ts": 2, "last_modify_ts": 2})
+        await self.db.upsert("xhs_note_comment", comment, conflict_keys=("comment_id",))
+        await self.db.flush()
+
+        rows = await self.db.query("SELECT content, add_ts, last_modify_ts FROM xhs_note_comment WHERE comment_id = ?", "c1")
+        self.assertEqual(rows, [{"content": "second", "add_ts": 1, "last_modify_ts": 2}])
+
+    async def test_bulk_upsert(self):
+        for i in range(500):
+            await self.db.upsert("xhs_note_comment", {
+                "comment_id": str(i % 100), "note_id": "n1", "content": str(i), "add_ts": i, "last_modify_ts": i,
+            }, conflict_keys=("comment_id",))
+        await self.db.flush()
+        row = await self.db.get_first("SELECT COUNT(*) AS cnt FROM xhs_note_comment")
+        self.assertEqual(row["cnt"], 100)
+
+    async def test_bad_row_does_not_drop_batch(self):
+        await self.db.upsert("xhs_note_comment", {"comment_id": None, "add_ts": 1, "last_modify_ts": 1},
+                             conflict_keys=("comment_id",))
+        await self.db.upsert("xhs_note_comment", {"comment_id": "ok", "add_ts": 1, "last_modify_ts": 1},
+                             conflict_keys=("comment_id",))
+        with self.assertLogs("MediaCrawler", level="ERROR") as logs:
+            await self.db.flush()
+        rows = await self.db.query("SELECT comment_id FROM xhs_note_comment")
+        self.assertEqual(rows, [{"comment_id": "ok"}])
+        self.assertIn("{'comment_id': None}", logs.output[0])
+
+    async def test_fallback_is_atomic(self):
+        fields = ("comment_id", "add_ts", "last_modify_ts")
+        groups = {
+            ("xhs_note_comment", fields, ("comment_id",)): [("c1", 1, 1), ("c2", 1, 1)],
+            ("xhs_note_comment", fields + ("content",), ("comment_id",)): [("c3", 1, 1, "x")],
+        }
+        build_upsert_sql = self.db._build_upsert_sql
+
+        def crash_on_second_group(table_name, group_fields, conflict_keys):
+            if group_fields != fields:
+                raise RuntimeError("crash")
+            return build_upsert_sql(table_name, group_fields, conflict_keys)
+
+        with mock.patch.object(self.db, "_build_upsert_sql", side_effect=crash_on_second_group):
+            with self.assertRaises(RuntimeError):
+                await self.db._run(self.db._write_rows_one_by_one, groups)
+        row = await self.db.get_first("SELECT COUNT(*) AS cnt FROM xhs_note_comment")
+        self.assertEqual(row["cnt"], 0)
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
@@ -0,0 +1,118 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+import json
+import logging
+import queue
+import unittest
+from logging.handlers import QueueListener
+
+from tools import structured_log
+from tools.structured_log import JsonFormatter, LazyQueueHandler, get_logger, log_event
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.lines = []
+
+    def emit(self, record):
+        self.records.append(record)
+        self.lines.append(self.format(record))
+
+
+class CountingRepr:
+    def __init__(self):
+        self.calls = 0
+
+    def __repr__(self):
+        self.calls += 1
+        return "counted"
+
+
+class TestStructuredLog(unittest.TestCase):
+    def setUp(self):
+        self.logger = get_logger("test_structured_log")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = ListHandler()
+        self.logger.addHandler(self.handler)
+        structured_log._sample_counts.clear()
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_category_logger_name(self):
+        self.assertEqual(self.logger.name, "MediaCrawler.test_structured_log")
+
+    def test_sampling(self):
+        for i in range(10):
+            log_event(self.logger, "store.test.item", {"i": i}, sample_every=4)
+        self.assertEqual([record.fields["i"] for record in self.handler.records], [0, 4, 8])
+
+    def test_disabled_level_skips_formatting(self):
+        value = CountingRepr()
+        log_event(self.logger, "api.test.dump", {"value": value}, level=logging.DEBUG)
+        self.assertEqual(self.handler.records, [])
+        log_event(self.logger, "api.test.dump", {"value": value})
+        self.assertEqual(value.calls, 1)
+        self.assertIn("value=counted", self.handler.lines[0])
+
+    def test_json_formatter(self):
+        self.handler.setFormatter(JsonFormatter())
+        log_event(self.logger, "store.test.item", {"note_id": "n1", "title": "标题"})
+        self.logger.info("plain message %s", 1)
+        event_line, plain_line = [json.loads(line) for line in self.handler.lines]
+        self.assertEqual(event_line["event"], "store.test.item")
+        self.assertEqual(event_line["fields"], {"note_id": "n1", "title": "标题"})
+        self.assertEqual(event_line["location"].split(":")[0], "test_structured_log.py")
+        self.assertEqual(plain_line["message"], "plain message 1")
+
+    def test_queue_handler_formats_in_listener(self):
+        value = CountingRepr()
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, self.handler)
+        self.logger.removeHandler(self.handler)
+        queue_handler = LazyQueueHandler(log_queue)
+        self.logger.addHandler(queue_handler)
+        try:
+            log_event(self.logger, "store.test.item", {"value": value})
+            self.assertEqual(value.calls, 0)
+            listener.start()
+            listener.stop()
+        finally:
+            self.logger.removeHandler(queue_handler)
+        self.assertEqual(value.calls, 1)
+        self.assertIn("[store.test.item] value=counted", self.handler.lines[0])
+
+    def test_fields_snapshot_before_enqueue(self):
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, self.handler)
+        self.logger.removeHandler(self.handler)
+        queue_handler = LazyQueueHandler(log_queue)
+        self.logger.addHandler(queue_handler)
+        item = {"note_id": "n1"}
+        try:
+            log_event(self.logger, "store.test.item", item)
+            # 存储实现在记录日志之后才加上 add_ts
+            item["add_ts"] = 1
+            listener.start()
+            listener.stop()
+        finally:
+            self.logger.removeHandler(queue_handler)
+        self.assertEqual(self.handler.records[0].fields, {"note_id": "n1"})
+        self.assertNotIn("add_ts", self.handler.lines[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
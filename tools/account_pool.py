@@ -0,0 +1,191 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 多账号池：每个请求从池中选一个账号的cookie，每个账号单独限速（令牌桶），
+#            出现验证码、IP封禁时账号进入冷却，吞吐量随账号数线性增长；目前只有小红书客户端接入
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence
+
+import config
+
+from . import utils
+from .login_state import LoginStateCache
+
+
+class TokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度补充令牌，最多攒 capacity 个
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """
+        距离下一个可用令牌还需要等待的秒数，0 表示现在就有令牌
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+class AccountSession:
+    """一个账号的cookie、限速令牌桶和健康状态"""
+
+    def __init__(self, account: str, cookie_dict: Dict[str, str], rate: float, burst: float) -> None:
+        self.account = account
+        self.set_cookies(cookie_dict)
+        self.bucket = TokenBucket(rate, burst)
+        self.cooldown_until = 0.0
+        self.continuous_failures = 0
+        self.requests = 0
+        self.failures = 0
+
+    def set_cookies(self, cookie_dict: Dict[str, str]) -> None:
+        """
+        更新账号的cookie，保存副本，不随调用方的字典变化
+        :param cookie_dict:
+        :return:
+        """
+        self.cookie_dict = dict(cookie_dict)
+        self.cookie_str = ";".join(f"{key}={value}" for key, value in cookie_dict.items())
+
+    def wait_time(self, now: float) -> float:
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        return self.bucket.wait_time(now)
+
+
+class AccountPool:
+    """
+    单个平台的账号池，acquire() 按轮询顺序返回第一个 不在冷却中且有令牌 的账号，所有账号都不可用时等待
+    """
+
+    def __init__(self, platform: str, sessions: List[AccountSession], cooldown_seconds: float) -> None:
+        if not sessions:
+            raise ValueError("account pool needs at least one account")
+        self.platform = platform
+        self.sessions = sessions
+        self.cooldown_seconds = cooldown_seconds
+        self._next_index = 0
+
+    async def acquire(self) -> AccountSession:
+        """
+        获取一个可用账号，同时消耗该账号的一个令牌
+        :return:
+        """
+        while True:
+            now = time.monotonic()
+            min_wait = None
+            for offset in range(len(self.sessions)):
+                session = self.sessions[(self._next_index + offset) % len(self.sessions)]
+                wait = session.wait_time(now)
+                if wait <= 0:
+                    self._next_index = (self._next_index + offset + 1) % len(self.sessions)
+                    session.bucket.take(now)
+                    session.requests += 1
+                    return session
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+            await asyncio.sleep(min_wait)
+
+    def has_available(self) -> bool:
+        """
+        是否还有不在冷却中的账号
+        :return:
+        """
+        now = time.monotonic()
+        return any(session.cooldown_until <= now for session in self.sessions)
+
+    def update_cookies(self, account: str, cookie_dict: Dict[str, str]) -> None:
+        """
+        账号的cookie更新后（例如重新登录）同步到账号池
+        :param account:
+        :param cookie_dict:
+        :return:
+        """
+        for session in self.sessions:
+            if session.account == account:
+                session.set_cookies(cookie_dict)
+
+    def report_success(self, session: AccountSession) -> None:
+        session.continuous_failures = 0
+
+    def report_failure(self, session: AccountSession, reason: str) -> None:
+        """
+        账号出现验证码、被封禁等情况时调用，账号进入冷却，连续失败时冷却时间翻倍
+        :param session:
+        :param reason:
+        :return:
+        """
+        session.failures += 1
+        session.continuous_failures += 1
+        cooldown = self.cooldown_seconds * 2 ** (session.continuous_failures - 1)
+        session.cooldown_until = time.monotonic() + cooldown
+        utils.logger.warning(f"[AccountPool.report_failure] {self.platform} account {session.account} {reason}, "
+                             f"cool down {cooldown:.0f}s")
+
+    def stats(self) -> List[Dict]:
+        now = time.monotonic()
+        return [
+            {
+                "account": session.account,
+                "requests": session.requests,
+                "failures": session.failures,
+                "cooling_down": session.cooldown_until > now,
+            }
+            for session in self.sessions
+        ]
+
+
+async def create_account_pool(platform: str, cookie_dict: Dict[str, str],
+                              shared_cookie_keys: Sequence[str] = ()) -> Optional[AccountPool]:
+    """
+    按配置创建账号池，当前浏览器登录的账号（LOGIN_ACCOUNT）之外，其他账号的cookie来自登录态缓存
+    :param platform:
+    :param cookie_dict: 当前浏览器登录账号的cookie
+    :param shared_cookie_keys: 必须和浏览器账号一致的cookie（例如小红书签名用到的设备标识 a1），不一致的账号不加入账号池，
+                               否则签名和cookie来自不同会话，请求会触发验证码
+    :return: 未开启账号池时返回 None
+    """
+    if not config.ENABLE_ACCOUNT_POOL:
+        return None
+    rate, burst = config.ACCOUNT_REQUESTS_PER_SECOND, config.ACCOUNT_REQUEST_BURST
+    sessions = [AccountSession(config.LOGIN_ACCOUNT, cookie_dict, rate, burst)]
+    for account in config.ACCOUNT_POOL_ACCOUNTS:
+        if account == config.LOGIN_ACCOUNT:
+            continue
+        state = await LoginStateCache(platform, account).load()
+        if not state or not state.cookies:
+            utils.logger.warning(f"[create_account_pool] {platform} account {account} has no cached login state, skip")
+            continue
+        _, account_cookie_dict = utils.convert_cookies(state.cookies)
+        mismatched_keys = [key for key in shared_cookie_keys if account_cookie_dict.get(key) != cookie_dict.get(key)]
+        if mismatched_keys:
+            utils.logger.warning(f"[create_account_pool] {platform} account {account} cookie {mismatched_keys} "
+                                 f"differs from the signing browser, skip")
+            continue
+        sessions.append(AccountSession(account, account_cookie_dict, rate, burst))
+    utils.logger.info(f"[create_account_pool] {platform} account pool: {[s.account for s in sessions]}")
+    return AccountPool(platform, sessions, config.ACCOUNT_COOLDOWN_SECONDS)
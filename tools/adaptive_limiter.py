@@ -0,0 +1,182 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : AIMD 自适应并发控制：请求健康时线性增加并发，出现验证码、封禁、403 时并发减半
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Optional
+
+import config
+
+from . import utils
+from .metrics import LIMITER_IN_FLIGHT, LIMITER_LIMIT, LIMITER_WAITING
+
+# 出现这些异常说明请求太快被平台限制了
+THROTTLE_ERROR_NAMES = ("IPBlockError", "ForbiddenError")
+THROTTLE_ERROR_KEYWORDS = ("验证码", "blocked", "频繁", "拦截", "status code: 403")
+
+# 当前协程所在的限流器，客户端的 request 方法通过它反馈请求结果
+current_limiter_var: ContextVar[Optional["AdaptiveLimiter"]] = ContextVar("current_limiter", default=None)
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """
+    判断异常是否是平台的限流/封禁信号
+    :param exc:
+    :return:
+    """
+    if type(exc).__name__ in THROTTLE_ERROR_NAMES:
+        return True
+    message = str(exc)
+    return any(keyword in message for keyword in THROTTLE_ERROR_KEYWORDS)
+
+
+class AdaptiveLimiter:
+    """
+    并发数可动态调整的信号量，用法和 asyncio.Semaphore 一致（async with limiter）
+    - 每完成 limit 个健康请求（平均耗时低于阈值），limit + 1
+    - 收到限流信号时 limit 减半，一个退避窗口内的多个限流信号只减一次
+    """
+
+    def __init__(self, name: str, initial_limit: int, min_limit: int = 1, max_limit: Optional[int] = None,
+                 latency_threshold: float = 3.0, decrease_factor: float = 0.5) -> None:
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit or initial_limit, initial_limit)
+        self.limit = float(initial_limit)
+        self.latency_threshold = latency_threshold
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.latency_ewma = 0.0
+        self._healthy_count = 0
+        self._last_decrease_at = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._context_tokens: Dict[asyncio.Task, Token] = {}
+        self.successes = 0
+        self.throttles = 0
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def _report_metrics(self) -> None:
+        LIMITER_LIMIT.set(self.current_limit, limiter=self.name)
+        LIMITER_IN_FLIGHT.set(self.in_flight, limiter=self.name)
+        LIMITER_WAITING.set(len(self._waiters), limiter=self.name)
+
+    def _wake_up(self) -> None:
+        while self._waiters and self.in_flight < self.current_limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        self._report_metrics()
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.current_limit and not self._waiters:
+            self.in_flight += 1
+            self._report_metrics()
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._report_metrics()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake_up()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        await self.acquire()
+        self._context_tokens[asyncio.current_task()] = current_limiter_var.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        current_limiter_var.reset(self._context_tokens.pop(asyncio.current_task()))
+        self.release()
+
+    def on_success(self, latency: float) -> None:
+        """
+        一次请求成功
+        :param latency: 请求耗时（秒）
+        :return:
+        """
+        self.successes += 1
+        self.latency_ewma = latency if not self.latency_ewma else self.latency_ewma * 0.8 + latency * 0.2
+        if not config.ENABLE_ADAPTIVE_CONCURRENCY or self.latency_ewma > self.latency_threshold:
+            self._healthy_count = 0
+            return
+        self._healthy_count += 1
+        if self._healthy_count >= self.current_limit and self.limit < self.max_limit:
+            self._healthy_count = 0
+            self.limit = min(self.max_limit, self.limit + 1)
+            utils.logger.info(f"[AdaptiveLimiter.on_success] {self.name} increase concurrency to {self.current_limit}")
+            self._wake_up()
+
+    def on_throttle(self, reason: str) -> None:
+        """
+        收到限流信号（验证码、封禁、403）
+        :param reason:
+        :return:
+        """
+        self.throttles += 1
+        self._healthy_count = 0
+        now = time.monotonic()
+        # 退避窗口内的限流信号大多来自减并发之前已经发出的请求，不重复减
+        if not config.ENABLE_ADAPTIVE_CONCURRENCY or now - self._last_decrease_at < max(self.latency_ewma, 1.0):
+            return
+        self._last_decrease_at = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._report_metrics()
+        utils.logger.warning(f"[AdaptiveLimiter.on_throttle] {self.name} throttled by {reason}, "
+                             f"decrease concurrency to {self.current_limit}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "successes": self.successes,
+            "throttles": self.throttles,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1),
+        }
+
+
+def limiter_feedback(func: Callable) -> Callable:
+    """
+    客户端 request 方法的装饰器：把每次请求的耗时和限流异常反馈给当前协程所在的限流器
+    AbstractApiClient 的重试策略套在它外层，每次重试都会反馈
+    """
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        limiter = current_limiter_var.get()
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            if limiter and is_throttle_error(e):
+                limiter.on_throttle(repr(e))
+            raise
+        if limiter:
+            limiter.on_success(time.perf_counter() - start)
+        return result
+
+    return wrapper
@@ -0,0 +1,102 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 熔断器：平台连续出现封禁类错误时暂停该平台的请求，冷却结束后先放一个探测请求，成功后恢复
+import asyncio
+import time
+
+import config
+
+from . import utils
+
+
+class CircuitBreaker:
+    """
+    三种状态：
+    - closed: 正常请求，连续失败 failure_threshold 次后打开
+    - open: 所有请求异步等待冷却结束（不阻塞事件循环），冷却结束后进入 half_open
+    - half_open: 只放行一个探测请求，成功则关闭，失败则重新打开并把冷却时间翻倍
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 20,
+                 max_cooldown: float = 300, probe_poll_interval: float = 0.5) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_poll_interval = probe_poll_interval
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.open_count = 0
+
+    async def wait_ready(self) -> None:
+        """
+        请求前调用，熔断打开时等待冷却结束；冷却结束后第一个调用者作为探测请求直接返回，其他调用者等待探测结果
+        :return:
+        """
+        while True:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                remaining = self.open_until - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                self.state = self.HALF_OPEN
+                utils.logger.info(f"[CircuitBreaker.wait_ready] {self.name} cooldown finished, send a probe request")
+                return
+            await asyncio.sleep(self.probe_poll_interval)
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            utils.logger.info(f"[CircuitBreaker.record_success] {self.name} recovered, close the circuit")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+
+    def record_failure(self) -> bool:
+        """
+        记录一次封禁类失败
+        :return: 本次失败是否打开了熔断，打开时调用方负责刷新cookie等恢复操作
+        """
+        if self.state == self.OPEN:
+            return False
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        else:
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return False
+        self.state = self.OPEN
+        self.open_until = time.monotonic() + self.cooldown
+        self.open_count += 1
+        utils.logger.warning(f"[CircuitBreaker.record_failure] {self.name} may be blocked, "
+                             f"pause requests for {self.cooldown:.0f}s")
+        return True
+
+    def stats(self):
+        return {"state": self.state, "open_count": self.open_count, "cooldown": self.cooldown}
+
+
+def create_circuit_breaker(platform: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        platform,
+        failure_threshold=config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        cooldown=config.CIRCUIT_BREAKER_COOLDOWN,
+        max_cooldown=config.CIRCUIT_BREAKER_MAX_COOLDOWN,
+    )
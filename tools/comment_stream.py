@@ -0,0 +1,116 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 评论分页流：客户端把评论按页 yield 出来（一级评论页之后紧跟它的二级评论页），调用方逐页交给存储，
+#            内存里同时只有一页评论，不随评论总数和楼中楼深度增长
+import asyncio
+from typing import Any, AsyncIterator, Callable, Iterable, List, Optional, Tuple
+
+import config
+
+from .adaptive_limiter import AdaptiveLimiter
+
+# (内容ID, 一页评论)
+CommentPage = Tuple[str, List[Any]]
+
+_DONE = object()
+
+
+async def drain_comment_pages(pages: AsyncIterator[CommentPage], callback: Optional[Callable] = None,
+                              collect: bool = False) -> List[Any]:
+    """
+    逐页消费评论分页
+    :param pages: 客户端 iter_ 开头的评论分页生成器
+    :param callback: 每页评论的回调，参数为 (内容ID, 评论列表)，一般是存储函数
+    :param collect: 是否把所有评论汇总返回，默认不保留
+    :return: collect 为 True 时返回所有评论，否则返回空列表
+    """
+    result: List[Any] = []
+    async for content_id, comments in pages:
+        if callback:
+            await callback(content_id, comments)
+        if collect:
+            result.extend(comments)
+    return result
+
+
+async def fan_out_sub_comments(parents: Iterable[Any], expand: Callable[[Any], AsyncIterator[CommentPage]],
+                               limiter: Optional[AdaptiveLimiter] = None, concurrency: Optional[int] = None,
+                               buffer_pages: int = 1) -> AsyncIterator[CommentPage]:
+    """
+    并发展开一页一级评论的二级评论，按一级评论的顺序逐页 yield，存储顺序和串行抓取一致
+    - 一条笔记同时最多展开 concurrency 条一级评论，默认 config.SUB_COMMENT_CONCURRENCY_PER_NOTE，小于等于 1 时串行
+    - 每次取一页时占用 limiter 的一个并发（一般是 CrawlBudget.sub_comment），所有笔记共享平台的二级评论预算，
+      请求结果也反馈给这个限流器；等待调用方取走数据时不占用，避免一条笔记的展开占满预算后其他笔记无法推进
+    - expand 返回的分页不能预取（paginate 传 prefetch=False），否则下一页的请求在释放 limiter 之后才发出，不受预算限制
+    - 排在后面的一级评论最多提前缓存 buffer_pages 页，缓存满后暂停，直到调用方处理到它，内存不随楼中楼数量增长
+    - 调用方提前结束时未完成的展开会被取消
+    :param parents: 一级评论列表
+    :param expand: 按页返回一条一级评论下二级评论的异步生成器函数
+    :param limiter:
+    :param concurrency:
+    :param buffer_pages: 每条一级评论最多缓存的页数
+    :return: (内容ID, 一页二级评论)
+    """
+    if concurrency is None:
+        concurrency = config.SUB_COMMENT_CONCURRENCY_PER_NOTE
+    if concurrency <= 1:
+        for parent in parents:
+            async for page in expand(parent):
+                yield page
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def next_page(pages: AsyncIterator[CommentPage]) -> CommentPage:
+        if not limiter:
+            return await pages.__anext__()
+        async with limiter:
+            return await pages.__anext__()
+
+    async def run(parent: Any, queue: asyncio.Queue) -> None:
+        async with semaphore:
+            pages = expand(parent)
+            try:
+                while True:
+                    try:
+                        page = await next_page(pages)
+                    except StopAsyncIteration:
+                        break
+                    await queue.put(page)
+            except Exception as e:
+                await queue.put(e)
+                return
+            finally:
+                await pages.aclose()
+        await queue.put(_DONE)
+
+    queues: List[asyncio.Queue] = []
+    tasks: List[asyncio.Task] = []
+    for parent in parents:
+        queue = asyncio.Queue(maxsize=buffer_pages)
+        queues.append(queue)
+        tasks.append(asyncio.ensure_future(run(parent, queue)))
+    try:
+        for queue in queues:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,73 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 整个爬取过程共享的并发预算：详情、评论、二级评论、媒体下载分别限流，不随页数叠加
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional
+
+import config
+
+from . import utils
+from .adaptive_limiter import AdaptiveLimiter
+
+
+class CrawlBudget:
+    """
+    一次爬取共享的并发预算，由 CrawlerFactory 创建爬虫时注入
+    - detail: 帖子/视频详情、创作者信息
+    - comment: 一级评论
+    - sub_comment: 二级评论
+    - media: 图片、视频下载
+    评论任务通过 add_background_tasks 放到后台执行，不阻塞下一页的搜索和详情，爬取结束前 join() 等待完成
+    """
+
+    LANES = ("detail", "comment", "sub_comment", "media")
+
+    detail: AdaptiveLimiter
+    comment: AdaptiveLimiter
+    sub_comment: AdaptiveLimiter
+    media: AdaptiveLimiter
+
+    def __init__(self, platform: str, lane_limits: Optional[Dict[str, int]] = None) -> None:
+        self.platform = platform
+        lane_limits = lane_limits or config.CRAWL_BUDGET_LANE_LIMITS
+        for lane in self.LANES:
+            limit = lane_limits.get(lane, config.MAX_CONCURRENCY_NUM)
+            setattr(self, lane, AdaptiveLimiter(
+                f"{platform}.{lane}",
+                initial_limit=limit,
+                max_limit=max(limit, config.ADAPTIVE_CONCURRENCY_MAX) if config.ENABLE_ADAPTIVE_CONCURRENCY else None,
+                latency_threshold=config.ADAPTIVE_LATENCY_THRESHOLD,
+            ))
+        self._background_tasks: List[asyncio.Task] = []
+
+    def add_background_tasks(self, tasks: Iterable[asyncio.Task]) -> None:
+        """
+        登记后台任务（评论抓取等），由 join() 统一等待
+        :param tasks:
+        :return:
+        """
+        self._background_tasks.extend(tasks)
+
+    async def join(self) -> None:
+        """
+        等待所有后台任务完成，单个任务的异常只记录日志，不影响其他任务
+        :return:
+        """
+        while self._background_tasks:
+            tasks, self._background_tasks = self._background_tasks, []
+            for task, result in zip(tasks, await asyncio.gather(*tasks, return_exceptions=True)):
+                if isinstance(result, BaseException):
+                    utils.logger.error(f"[CrawlBudget.join] background task {task.get_name()} error: {result!r}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {lane: getattr(self, lane).stats() for lane in self.LANES}
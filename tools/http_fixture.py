@@ -0,0 +1,302 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : HTTP 录制回放：录制平台接口的请求和响应（去掉签名头和签名参数），回放时在本地返回录制的响应，
+#            可以注入延迟和错误，用于离线压测整个爬取流程
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+import config
+
+from . import utils
+from .metrics import record_http_response
+from .run_report import record_response_size
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+# 签名、登录态相关的请求头和请求参数，每次请求都会变化，不写入录制文件，匹配时也忽略
+SIGNING_HEADERS = (
+    "x-s", "x-t", "x-s-common", "x-b3-traceid", "cookie", "cookies",
+    "x-zse-93", "x-zse-96", "x-zst-81", "authorization",
+)
+SIGNING_PARAMS = ("a_bogus", "x-bogus", "mstoken", "w_rid", "wts", "_signature")
+# 请求体中每次运行都会变化的字段，例如小红书搜索的 search_id
+VOLATILE_BODY_FIELDS = ("search_id",)
+# 回放时响应体已经是解压后的内容，这些响应头不能原样返回
+SKIP_RESPONSE_HEADERS = ("content-encoding", "content-length", "transfer-encoding", "connection")
+# 平台下发的登录态，录制文件会提交到仓库、在 CI 中回放，不能写入
+SESSION_RESPONSE_HEADERS = ("set-cookie", "set-cookie2", "authorization", "x-csrf-token")
+# 图片、视频等二进制响应默认不录制，只有 HTTP_FIXTURE_RECORD_MEDIA 开启时才录制
+MEDIA_CONTENT_TYPES = ("image/", "video/", "audio/", "application/octet-stream")
+
+
+def is_media_response(response: httpx.Response) -> bool:
+    content_type = response.headers.get("content-type", "").lower()
+    return content_type.startswith(MEDIA_CONTENT_TYPES)
+
+
+def normalize_url(url: str) -> str:
+    """
+    去掉签名参数并对剩下的参数排序
+    :param url:
+    :return:
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in SIGNING_PARAMS)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def body_digest(body: bytes) -> str:
+    """
+    请求体摘要，JSON 请求体去掉易变字段后再计算
+    :param body:
+    :return:
+    """
+    if not body:
+        return ""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return hashlib.sha1(body).hexdigest()[:12]
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in VOLATILE_BODY_FIELDS}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:12]
+
+
+def request_key(method: str, url: str, body: bytes = b"") -> str:
+    return f"{method.upper()} {normalize_url(url)} {body_digest(body)}".strip()
+
+
+def _encode_content(content: bytes) -> Dict[str, str]:
+    try:
+        return {"encoding": "text", "body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"encoding": "base64", "body": base64.b64encode(content).decode()}
+
+
+def _decode_content(item: Dict[str, str]) -> bytes:
+    if item.get("encoding") == "base64":
+        return base64.b64decode(item.get("body", ""))
+    return item.get("body", "").encode("utf-8")
+
+
+class FixtureArchive:
+    """
+    录制文件，同一个请求录制了多次时回放按顺序循环返回
+    """
+
+    def __init__(self, path: str = "") -> None:
+        self.path = path
+        self.entries: List[Dict[str, Any]] = []
+        self._index: Dict[str, List[int]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add_entry(self, entry: Dict[str, Any]) -> None:
+        request = entry["request"]
+        key = request_key(request["method"], request["url"], _decode_content(request))
+        self._index[key].append(len(self.entries))
+        self.entries.append(entry)
+
+    def add(self, request: httpx.Request, status_code: int, headers: Dict[str, str], content: bytes) -> None:
+        """
+        录制一对请求和响应
+        """
+        self.add_entry({
+            "request": {
+                "method": request.method,
+                "url": normalize_url(str(request.url)),
+                "headers": {k: v for k, v in request.headers.items() if k.lower() not in SIGNING_HEADERS},
+                **_encode_content(request.content),
+            },
+            "response": {
+                "status_code": status_code,
+                "headers": {k: v for k, v in headers.items()
+                            if k.lower() not in SKIP_RESPONSE_HEADERS and k.lower() not in SESSION_RESPONSE_HEADERS},
+                **_encode_content(content),
+            },
+        })
+
+    def lookup(self, request: httpx.Request) -> Optional[Dict[str, Any]]:
+        key = request_key(request.method, str(request.url), request.content)
+        indexes = self._index.get(key)
+        if not indexes:
+            return None
+        cursor = self._cursor[key]
+        self._cursor[key] = cursor + 1
+        return self.entries[indexes[cursor % len(indexes)]]["response"]
+
+    def load(self) -> "FixtureArchive":
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for entry in json.load(f).get("entries", []):
+                    self.add_entry(entry)
+        return self
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    从录制文件返回响应的 httpx 传输层，不会访问网络
+    - latency / latency_jitter: 每个请求的模拟耗时（秒）
+    - error_rate: 注入错误的概率，error_status 为 0 时抛出连接错误，否则返回该状态码
+    """
+
+    def __init__(self, archive: FixtureArchive, latency: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 0, seed: Optional[int] = None) -> None:
+        self.archive = archive
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self.hits = 0
+        self.misses = 0
+        self.injected_errors = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        delay = self.latency + self._random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.injected_errors += 1
+            if not self.error_status:
+                raise httpx.ConnectError("injected connection error", request=request)
+            return httpx.Response(self.error_status, content=b"", request=request)
+
+        recorded = self.archive.lookup(request)
+        if recorded is None:
+            self.misses += 1
+            utils.logger.warning(f"[ReplayTransport] no recorded response for {request.method} {request.url}")
+            return httpx.Response(404, json={}, request=request)
+        self.hits += 1
+        return httpx.Response(recorded["status_code"], headers=recorded.get("headers", {}),
+                              content=_decode_content(recorded), request=request)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "injected_errors": self.injected_errors}
+
+
+class HttpFixture:
+    """
+    当前生效的录制/回放设置
+    """
+
+    def __init__(self, mode: str, archive: FixtureArchive, record_media: bool = False, **replay_options) -> None:
+        self.mode = mode
+        self.archive = archive
+        self.record_media = record_media
+        self.skipped_media = 0
+        self.transport = ReplayTransport(archive, **replay_options) if mode == MODE_REPLAY else None
+
+    async def record_response(self, response: httpx.Response) -> None:
+        if not self.record_media and is_media_response(response):
+            # 图片、视频下载不录制，避免录制文件里都是 base64，也不会一直占着内存直到 save()
+            self.skipped_media += 1
+            return
+        await response.aread()
+        self.archive.add(response.request, response.status_code, dict(response.headers), response.content)
+
+    def client_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        if self.mode == MODE_REPLAY:
+            # 回放不走代理
+            kwargs.pop("proxies", None)
+            kwargs["transport"] = self.transport
+        elif self.mode == MODE_RECORD:
+            # 用响应事件钩子录制，开启代理时也能录到
+            event_hooks = kwargs.setdefault("event_hooks", {})
+            event_hooks["response"] = event_hooks.get("response", []) + [self.record_response]
+        return kwargs
+
+
+_http_fixture: Optional[HttpFixture] = None
+_http_fixture_loaded = False
+
+
+def install_http_fixture(fixture: Optional[HttpFixture]) -> None:
+    """
+    手动设置录制/回放（压测、单测使用），传 None 恢复为直接访问网络
+    :param fixture:
+    :return:
+    """
+    global _http_fixture, _http_fixture_loaded
+    _http_fixture = fixture
+    _http_fixture_loaded = True
+
+
+def get_http_fixture() -> Optional[HttpFixture]:
+    """
+    按配置创建录制/回放设置，HTTP_FIXTURE_MODE 为空时返回 None
+    :return:
+    """
+    global _http_fixture, _http_fixture_loaded
+    if not _http_fixture_loaded:
+        _http_fixture_loaded = True
+        mode = config.HTTP_FIXTURE_MODE
+        if mode in (MODE_RECORD, MODE_REPLAY):
+            archive = FixtureArchive(config.HTTP_FIXTURE_PATH.format(platform=config.PLATFORM))
+            if mode == MODE_REPLAY:
+                archive.load()
+                utils.logger.info(f"[get_http_fixture] replay {len(archive)} recorded responses from {archive.path}")
+            _http_fixture = HttpFixture(
+                mode, archive,
+                record_media=config.HTTP_FIXTURE_RECORD_MEDIA,
+                latency=config.HTTP_REPLAY_LATENCY,
+                latency_jitter=config.HTTP_REPLAY_LATENCY_JITTER,
+                error_rate=config.HTTP_REPLAY_ERROR_RATE,
+                error_status=config.HTTP_REPLAY_ERROR_STATUS,
+            )
+    return _http_fixture
+
+
+def create_http_client(**kwargs) -> httpx.AsyncClient:
+    """
+    平台客户端统一通过这里创建 httpx.AsyncClient，统计响应状态码，开启录制/回放时自动接入
+    :param kwargs: httpx.AsyncClient 的参数
+    :return:
+    """
+    kwargs["event_hooks"] = {"response": [record_http_response, record_response_size]}
+    fixture = get_http_fixture()
+    if fixture:
+        kwargs = fixture.client_kwargs(kwargs)
+    return httpx.AsyncClient(**kwargs)
+
+
+def save_http_fixture() -> None:
+    """
+    录制模式下把录制的请求写入文件
+    :return:
+    """
+    fixture = get_http_fixture()
+    if fixture and fixture.mode == MODE_RECORD and len(fixture.archive):
+        fixture.archive.save()
+        utils.logger.info(f"[save_http_fixture] saved {len(fixture.archive)} responses to {fixture.archive.path}")
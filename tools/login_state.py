@@ -0,0 +1,270 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 登录态缓存：按 平台+账号 保存 cookies、签名用到的 localStorage 值以及最近一次校验通过的时间，
+#            多次运行、多个进程之间共享，有效期内启动时跳过 pong 检查；API 模式也从这里恢复登录态，不启动浏览器
+import json
+import os
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import aiofiles
+from playwright.async_api import BrowserContext, Page
+from pydantic import BaseModel, Field
+
+import config
+
+from . import utils
+from .page_pool import PagePool
+
+# 各平台登录后才会下发的cookie，用于不发请求的快速校验
+LOGIN_COOKIE_NAMES: Dict[str, str] = {
+    "xhs": "web_session",
+    "dy": "sessionid",
+    "ks": "passToken",
+    "bili": "SESSDATA",
+    "wb": "SUB",
+    "zhihu": "z_c0",
+}
+
+# 各平台签名需要的 localStorage 值
+LOCAL_STORAGE_TOKEN_NAMES: Dict[str, List[str]] = {
+    "xhs": ["b1"],
+    "dy": ["xmst"],
+    "bili": ["wbi_img_urls"],
+}
+
+# 登录失效的错误信息关键字，出现时作废缓存的登录态
+AUTH_ERROR_KEYWORDS = ("未登录", "登录已过期", "登录失效", "请先登录", "重新登录", "not login", "status code: 401")
+
+# redis 中登录态的保存时间，过了 LOGIN_STATE_TTL 的登录态仍然可以恢复 cookies，只是需要重新 pong
+LOGIN_STATE_REDIS_EXPIRE = 30 * 24 * 3600
+
+
+class LoginState(BaseModel):
+    """一个账号的登录态"""
+    platform: str = Field(title="平台")
+    account: str = Field(title="账号名")
+    cookies: List[Dict] = Field(default_factory=list, title="BrowserContext.cookies() 返回的完整cookie")
+    tokens: Dict[str, str] = Field(default_factory=dict, title="签名用到的 localStorage 值")
+    validated_at: int = Field(default=0, title="最近一次校验通过的时间戳")
+
+    def is_fresh(self, ttl: int) -> bool:
+        """
+        轻量校验：登录cookie存在且没过期，并且距离上次 pong 校验通过不超过 ttl 秒
+        :param ttl:
+        :return:
+        """
+        now = time.time()
+        if now - self.validated_at > ttl:
+            return False
+        cookie_name = LOGIN_COOKIE_NAMES.get(self.platform)
+        if not cookie_name:
+            return True
+        for cookie in self.cookies:
+            if cookie.get("name") == cookie_name and cookie.get("value"):
+                expires = cookie.get("expires", -1)
+                return expires == -1 or expires > now
+        return False
+
+
+class StoredBrowserContext:
+    """
+    只读的登录态，提供和 BrowserContext 相同的 cookies() 接口，
+    API 模式下用它代替真正的浏览器来创建客户端（create_xxx_client / update_cookies）
+    """
+
+    def __init__(self, state: LoginState) -> None:
+        self.state = state
+
+    async def cookies(self, urls: Optional[List[str]] = None) -> List[Dict]:
+        return self.state.cookies
+
+
+class LoginStateCache:
+    """
+    登录态缓存，LOGIN_STATE_CACHE_TYPE 为 file 时保存在 browser_data/login_state 目录下，为 redis 时保存在 redis 中
+    """
+
+    def __init__(self, platform: str, account: Optional[str] = None) -> None:
+        self.platform = platform
+        self.account = account or config.LOGIN_ACCOUNT
+        self.cache_key = f"login_state:{platform}:{self.account}"
+        self.state: Optional[LoginState] = None
+        self._redis_cache = None
+
+    @property
+    def state_file(self) -> str:
+        return os.path.join(os.getcwd(), "browser_data", "login_state", f"{self.platform}_{self.account}.json")
+
+    @property
+    def tokens(self) -> Dict[str, str]:
+        return self.state.tokens if self.state else {}
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self.state) and self.state.is_fresh(config.LOGIN_STATE_TTL)
+
+    def _get_redis_cache(self):
+        if self._redis_cache is None:
+            from cache.cache_factory import CacheFactory
+            self._redis_cache = CacheFactory.create_async_cache(config.CACHE_TYPE_REDIS)
+        return self._redis_cache
+
+    async def load(self) -> Optional[LoginState]:
+        """
+        读取缓存的登录态，不存在或者数据损坏时返回 None
+        :return:
+        """
+        try:
+            if config.LOGIN_STATE_CACHE_TYPE == config.CACHE_TYPE_REDIS:
+                value = await self._get_redis_cache().get(self.cache_key)
+            else:
+                if not os.path.exists(self.state_file):
+                    return None
+                async with aiofiles.open(self.state_file, mode="r", encoding="utf-8") as f:
+                    value = json.loads(await f.read())
+            return LoginState(**value) if value else None
+        except Exception as e:
+            utils.logger.warning(f"[LoginStateCache.load] load {self.cache_key} error: {e}")
+            return None
+
+    async def _dump(self, state: LoginState) -> None:
+        value = state.model_dump()
+        if config.LOGIN_STATE_CACHE_TYPE == config.CACHE_TYPE_REDIS:
+            await self._get_redis_cache().set(self.cache_key, value, LOGIN_STATE_REDIS_EXPIRE)
+            return
+        # 先写临时文件再替换，避免多个进程同时写入时读到写了一半的文件
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        async with aiofiles.open(tmp_file, mode="w", encoding="utf-8") as f:
+            await f.write(json.dumps(value, ensure_ascii=False))
+        os.replace(tmp_file, self.state_file)
+
+    async def _load_cookies(self) -> bool:
+        """
+        读取缓存的登录态，命令行指定了 cookie 登录时不使用缓存
+        :return: 有缓存的 cookies 时返回 True
+        """
+        if config.LOGIN_TYPE == "cookie" and config.COOKIES:
+            utils.logger.info(f"[LoginStateCache.restore] login with the given cookies, skip cached {self.cache_key}")
+            return False
+        self.state = await self.load()
+        if not self.state or not self.state.cookies:
+            return False
+        utils.logger.info(f"[LoginStateCache.restore] restore {self.cache_key}, validated at "
+                          f"{utils.get_time_str_from_unix_time(self.state.validated_at)}, fresh: {self.fresh}")
+        return True
+
+    async def restore(self, browser_context: BrowserContext) -> bool:
+        """
+        把缓存的 cookies 恢复到浏览器上下文中
+        :param browser_context:
+        :return: 登录态在有效期内、可以跳过 pong 检查时返回 True
+        """
+        if not await self._load_cookies():
+            return False
+        await browser_context.add_cookies(self.state.cookies)
+        return self.fresh
+
+    async def restore_stored(self) -> Optional[StoredBrowserContext]:
+        """
+        API 模式：不启动浏览器，把缓存的登录态包装成只读的浏览器上下文，是否可以跳过 pong 看 fresh
+        :return: 没有缓存的登录态时返回 None
+        """
+        if not await self._load_cookies():
+            return None
+        return StoredBrowserContext(self.state)
+
+    async def invalidate(self) -> None:
+        """
+        作废登录态的校验时间，下次启动时重新 pong，cookies 仍然保留
+        :return:
+        """
+        if not self.state:
+            return
+        self.state.validated_at = 0
+        await self._dump(self.state)
+        utils.logger.warning(f"[LoginStateCache.invalidate] invalidate {self.cache_key} login state")
+
+    async def save(self, browser_context: BrowserContext, page: Optional[Union[Page, PagePool]] = None) -> None:
+        """
+        pong 校验通过或者登录成功后保存登录态
+        :param browser_context:
+        :param page: 用来读取 localStorage 的页面，API 模式下没有页面，沿用缓存里的值
+        :return:
+        """
+        tokens: Dict[str, str] = dict(self.tokens) if page is None else {}
+        token_names = LOCAL_STORAGE_TOKEN_NAMES.get(self.platform)
+        if page is not None and token_names:
+            local_storage: Dict = await page.evaluate("() => window.localStorage")
+            tokens = {name: local_storage[name] for name in token_names if local_storage.get(name)}
+        self.state = LoginState(
+            platform=self.platform,
+            account=self.account,
+            cookies=await browser_context.cookies(),
+            tokens=tokens,
+            validated_at=int(time.time()),
+        )
+        await self._dump(self.state)
+        utils.logger.info(f"[LoginStateCache.save] save {self.cache_key} login state")
+
+
+def is_auth_error(exc: BaseException) -> bool:
+    """
+    判断异常是否是登录失效
+    :param exc:
+    :return:
+    """
+    message = str(exc)
+    return any(keyword in message for keyword in AUTH_ERROR_KEYWORDS)
+
+
+def install_auth_failure_fallback(client: Any, cache: LoginStateCache,
+                                  check_login: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+    """
+    登录态在有效期内跳过了 pong 时调用：客户端第一次出现登录失效的错误，作废缓存的登录态，再执行 check_login（pong/重新登录）
+    :param client: API 客户端，request 方法出现登录失效的错误时调用 client.auth_failure_handler
+    :param cache:
+    :param check_login: API 模式下没有浏览器可以重新登录，不传，只作废缓存，下次启动时重新 pong 或启动浏览器登录
+    :return:
+    """
+
+    async def handler(exc: BaseException) -> None:
+        # 只处理一次，check_login 里的 pong 请求失败时不会再次进入
+        client.auth_failure_handler = None
+        utils.logger.warning(f"[install_auth_failure_fallback] {cache.cache_key} auth failure: {exc!r}, "
+                             f"check login again")
+        await cache.invalidate()
+        if check_login:
+            await check_login()
+
+    client.auth_failure_handler = handler
+
+
+def watch_auth_failure(func: Callable) -> Callable:
+    """
+    客户端 request 方法的装饰器：登录失效的错误先交给 auth_failure_handler 处理，再照常抛出
+    """
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        try:
+            return await func(self, *args, **kwargs)
+        except Exception as e:
+            handler = getattr(self, "auth_failure_handler", None)
+            if handler and is_auth_error(e):
+                await handler(e)
+            raise
+
+    return wrapper
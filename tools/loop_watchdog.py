@@ -0,0 +1,188 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 事件循环卡顿检测：协程定时心跳测量循环延迟，后台线程发现心跳超时后抓取事件循环线程的调用栈，
+#            按调用栈聚合阻塞点，退出时输出报告
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import config
+from tools import utils
+from tools.metrics import LOOP_LAG_SECONDS, LOOP_STALLS_TOTAL
+
+StackKey = Tuple[Tuple[str, int, str], ...]
+
+
+class StallRecord:
+    """
+    同一调用栈上的阻塞统计
+    """
+
+    __slots__ = ("stack", "count", "total_seconds", "max_seconds")
+
+    def __init__(self, stack: List[traceback.FrameSummary]) -> None:
+        self.stack = stack
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total_seconds, 3),
+            "max_seconds": round(self.max_seconds, 3),
+            "stack": "".join(traceback.format_list(self.stack)),
+        }
+
+
+class LoopWatchdog:
+    """
+    事件循环看门狗
+    心跳协程每 interval 秒醒来一次，实际醒来时间比预期晚的部分就是循环延迟；
+    后台线程发现心跳超过 threshold 秒没有按时醒来，说明有回调在阻塞事件循环，立即抓取事件循环线程当前的调用栈
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, max_depth: int = 20,
+                 max_samples: int = 10000) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+        self._stalls: Dict[StackKey, StallRecord] = {}
+        self._lag_samples: Deque[float] = deque(maxlen=max_samples)
+        self._lag_max = 0.0
+        self._ticks = 0
+        self._deadline = 0.0
+        self._captured_deadline = 0.0
+        self._pending: Optional[StallRecord] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    async def start(self) -> "LoopWatchdog":
+        self._loop_thread_id = threading.get_ident()
+        self._deadline = time.perf_counter() + self.interval
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        return self
+
+    async def stop(self, report: bool = True) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if report:
+            self.log_report()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._deadline = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - self._deadline, 0.0)
+            self._record_lag(lag)
+
+    def _record_lag(self, lag: float) -> None:
+        self._ticks += 1
+        self._lag_samples.append(lag)
+        self._lag_max = max(self._lag_max, lag)
+        LOOP_LAG_SECONDS.observe(lag)
+        with self._lock:
+            # 阻塞结束后才知道一共卡了多久，记到阻塞期间抓到的调用栈上
+            if self._pending is not None:
+                self._pending.add(lag)
+                self._pending = None
+
+    def _watch(self) -> None:
+        check_interval = max(self.threshold / 4, 0.005)
+        while not self._stopped.wait(check_interval):
+            deadline = self._deadline
+            if deadline == self._captured_deadline:
+                continue
+            if time.perf_counter() - deadline >= self.threshold:
+                self._captured_deadline = deadline
+                self._capture()
+
+    def _capture(self) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame, limit=self.max_depth)
+        del frame
+        key: StackKey = tuple((item.filename, item.lineno, item.name) for item in stack)
+        with self._lock:
+            record = self._stalls.get(key)
+            if record is None:
+                record = self._stalls[key] = StallRecord(stack)
+            record.count += 1
+            self._pending = record
+        LOOP_STALLS_TOTAL.inc()
+
+    def report(self) -> List[Dict]:
+        """
+        阻塞点列表，按总阻塞时间从大到小排序
+        :return:
+        """
+        with self._lock:
+            records = sorted(self._stalls.values(), key=lambda record: (record.total_seconds, record.count), reverse=True)
+            return [record.to_dict() for record in records]
+
+    def stats(self) -> Dict:
+        samples = sorted(self._lag_samples)
+        p99 = samples[min(int(len(samples) * 0.99), len(samples) - 1)] if samples else 0.0
+        with self._lock:
+            stalls = sum(record.count for record in self._stalls.values())
+        return {
+            "ticks": self._ticks,
+            "lag_p99_ms": round(p99 * 1000, 2),
+            "lag_max_ms": round(self._lag_max * 1000, 2),
+            "stalls": stalls,
+            "blocking_sites": len(self._stalls),
+        }
+
+    def log_report(self, top: int = 10) -> None:
+        utils.logger.info(f"[LoopWatchdog] event loop stats: {self.stats()}")
+        for index, item in enumerate(self.report()[:top], start=1):
+            utils.logger.warning(
+                f"[LoopWatchdog] blocking call #{index}: blocked {item['count']} times, "
+                f"total {item['total_seconds']}s, max {item['max_seconds']}s\n{item['stack']}"
+            )
+
+
+async def start_loop_watchdog() -> Optional[LoopWatchdog]:
+    """
+    按配置启动事件循环看门狗，未开启时返回 None
+    :return:
+    """
+    if not config.ENABLE_LOOP_WATCHDOG:
+        return None
+    return await LoopWatchdog(threshold=config.LOOP_WATCHDOG_THRESHOLD,
+                              interval=config.LOOP_WATCHDOG_INTERVAL).start()
@@ -0,0 +1,328 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬虫内部指标：计数器、直方图、仪表盘，按 Prometheus 文本格式输出，
+#            可以在爬取过程中通过 HTTP 端口抓取，也可以定时写入文件给 node_exporter 的 textfile collector
+import asyncio
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import config
+
+from . import utils
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 包含数字且较长的路径片段大多是笔记、用户ID，合并成一个接口
+_ID_SEGMENT_PATTERN = re.compile(r"^(?=.*\d)[\w-]{6,}$")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names: Sequence[str], label_values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, float] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [每个桶的计数..., 总数, 总和]
+        self._histograms: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram[index] += 1
+                break
+        histogram[-2] += 1
+        histogram[-1] += value
+
+    def count(self, **labels) -> int:
+        histogram = self._histograms.get(self._key(labels))
+        return int(histogram[-2]) if histogram else 0
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels) -> Callable:
+        """
+        协程函数的装饰器，记录每次调用的耗时
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, histogram in self._histograms.items():
+            labels = _format_labels(self.label_names, key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {histogram[-2]}")
+            lines.append(f"{self.name}_count{labels} {histogram[-2]}")
+            lines.append(f"{self.name}_sum{labels} {histogram[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS_TOTAL: Counter = REGISTRY.register(Counter(
+    "crawler_requests_total", "API requests by client, endpoint and outcome (ok or exception class)",
+    ("client", "endpoint", "outcome")))
+REQUEST_SECONDS: Histogram = REGISTRY.register(Histogram(
+    "crawler_request_seconds", "API request latency including response parsing", ("client", "endpoint")))
+HTTP_RESPONSES_TOTAL: Counter = REGISTRY.register(Counter(
+    "crawler_http_responses_total", "HTTP responses by host and status code", ("host", "status")))
+SIGN_SECONDS: Histogram = REGISTRY.register(Histogram(
+    "crawler_sign_seconds", "Request signing latency", ("platform",)))
+PARSE_SECONDS: Histogram = REGISTRY.register(Histogram(
+    "crawler_parse_seconds", "HTML/JSON extraction time", ("platform", "parser")))
+STORE_WRITE_SECONDS: Histogram = REGISTRY.register(Histogram(
+    "crawler_store_write_seconds", "Store write latency", ("store", "kind")))
+LIMITER_LIMIT: Gauge = REGISTRY.register(Gauge(
+    "crawler_limiter_limit", "Current concurrency limit of each limiter", ("limiter",)))
+LIMITER_IN_FLIGHT: Gauge = REGISTRY.register(Gauge(
+    "crawler_limiter_in_flight", "Tasks holding a limiter slot", ("limiter",)))
+LIMITER_WAITING: Gauge = REGISTRY.register(Gauge(
+    "crawler_limiter_waiting", "Tasks queued on a limiter", ("limiter",)))
+RETRIES_TOTAL: Counter = REGISTRY.register(Counter(
+    "crawler_retries_total", "Retries by error type", ("error_type",)))
+RETRY_GAVE_UP_TOTAL: Counter = REGISTRY.register(Counter(
+    "crawler_retry_gave_up_total", "Requests that failed after retries or ran out of retry budget", ("error_type",)))
+LOOP_LAG_SECONDS: Histogram = REGISTRY.register(Histogram(
+    "crawler_loop_lag_seconds", "How late the event loop heartbeat woke up"))
+LOOP_STALLS_TOTAL: Counter = REGISTRY.register(Counter(
+    "crawler_loop_stalls_total", "Callbacks that blocked the event loop longer than the watchdog threshold"))
+
+
+@lru_cache(maxsize=4096)
+def _endpoint(netloc: str, path: str) -> str:
+    segments = [":id" if _ID_SEGMENT_PATTERN.match(segment) else segment for segment in path.split("/")]
+    return netloc + "/".join(segments)
+
+
+def endpoint_label(url: str) -> str:
+    """
+    URL 去掉参数，ID 类的路径片段替换为 :id
+    :param url:
+    :return:
+    """
+    parts = urlsplit(url)
+    return _endpoint(parts.netloc, parts.path)
+
+
+def instrument_request(func: Callable) -> Callable:
+    """
+    客户端 request 方法的装饰器，记录每次请求（每次重试单独记录）的接口、结果和耗时
+    """
+
+    @wraps(func)
+    async def wrapper(self, method, url, **kwargs):
+        client = type(self).__name__
+        endpoint = endpoint_label(url)
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await func(self, method, url, **kwargs)
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, client=client, endpoint=endpoint)
+            REQUESTS_TOTAL.inc(client=client, endpoint=endpoint, outcome=outcome)
+
+    return wrapper
+
+
+def timed_extractor(platform: str) -> Callable:
+    """
+    解析类的装饰器，记录所有 extract_ 开头的方法的耗时
+    """
+
+    def decorator(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("extract_") and callable(method):
+                setattr(cls, name, _timed_method(method, platform, name))
+        return cls
+
+    return decorator
+
+
+def _timed_method(method: Callable, platform: str, parser: str) -> Callable:
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with PARSE_SECONDS.time(platform=platform, parser=parser):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+async def record_http_response(response) -> None:
+    """
+    httpx 的响应事件钩子，按状态码计数
+    """
+    HTTP_RESPONSES_TOTAL.inc(host=response.request.url.host, status=str(response.status_code))
+
+
+class MetricsExporter:
+    """
+    - port > 0 时启动一个只返回指标的 HTTP 服务，供 Prometheus 抓取
+    - textfile_path 不为空时每隔 interval 秒写一次文件，爬取结束时再写一次
+    """
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = "127.0.0.1", port: int = 0,
+                 textfile_path: str = "", interval: float = 15) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.textfile_path = textfile_path
+        self.interval = interval
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = self.registry.render().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def write_textfile(self) -> None:
+        os.makedirs(os.path.dirname(self.textfile_path) or ".", exist_ok=True)
+        tmp_path = f"{self.textfile_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.textfile_path)
+
+    async def _write_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.write_textfile()
+
+    async def start(self) -> "MetricsExporter":
+        if self.port:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            utils.logger.info(f"[MetricsExporter.start] serving metrics on http://{self.host}:{self.port}/metrics")
+        if self.textfile_path:
+            self._writer_task = asyncio.create_task(self._write_periodically())
+        return self
+
+    async def stop(self) -> None:
+        if self._writer_task:
+            self._writer_task.cancel()
+            self.write_textfile()
+            utils.logger.info(f"[MetricsExporter.stop] metrics written to {self.textfile_path}")
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+async def start_metrics_exporter() -> Optional[MetricsExporter]:
+    """
+    按配置启动指标导出，未开启时返回 None
+    :return:
+    """
+    if not config.ENABLE_METRICS:
+        return None
+    return await MetricsExporter(host=config.METRICS_HOST, port=config.METRICS_PORT,
+                                 textfile_path=config.METRICS_TEXTFILE_PATH,
+                                 interval=config.METRICS_TEXTFILE_INTERVAL).start()
@@ -0,0 +1,172 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 同一个 BrowserContext 下的页面池，多个协程并发在不同页面上执行签名等 evaluate 调用
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Error, Page
+
+from . import utils
+
+
+class PagePool:
+    """
+    页面池：N 个打开了同一个站点的页面，每个页面同一时间只被一个协程使用（页面的JS是单线程执行的），
+    空闲页面按先进先出的顺序借出；页面崩溃、被关闭或者被导航到其他站点时自动重新打开。
+    对外提供和 Page 相同的 evaluate 接口，可以直接作为各平台客户端的 playwright_page 使用。
+    """
+
+    def __init__(self, browser_context: BrowserContext, url: str, size: int = 1,
+                 first_page: Optional[Page] = None) -> None:
+        """
+        :param browser_context: 所有页面共享的浏览器上下文（cookie、localStorage 共享）
+        :param url: 页面打开的站点首页
+        :param size: 页面数量
+        :param first_page: 已经打开的页面，作为池中的第一个页面，一般是爬虫的 context_page
+        """
+        self.browser_context = browser_context
+        self.url = url
+        self.size = max(size, 1)
+        self._origin = urlparse(url).netloc
+        self._first_page = first_page
+        self._pages: List[Page] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._crashed: Set[Page] = set()
+        # evaluate 出错的页面，下次借出前重新打开首页
+        self._stale: Set[Page] = set()
+        self._started_at = 0.0
+        # 池的指标
+        self._checkout_count = 0
+        self._evaluate_count = 0
+        self._error_count = 0
+        self._recycle_count = 0
+        self._in_use = 0
+        self._in_use_max = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._busy_total = 0.0
+
+    async def start(self) -> "PagePool":
+        """
+        打开并预热所有页面
+        :return:
+        """
+        self._idle = asyncio.Queue()
+        self._started_at = time.perf_counter()
+        if self._first_page is not None:
+            self._add_page(self._first_page)
+        new_pages = await asyncio.gather(*[self._new_page() for _ in range(self.size - len(self._pages))])
+        for page in new_pages:
+            self._add_page(page)
+        utils.logger.info(f"[PagePool.start] {self.size} pages are ready for {self.url}")
+        return self
+
+    def _add_page(self, page: Page) -> None:
+        page.on("crash", lambda: self._crashed.add(page))
+        self._pages.append(page)
+        self._idle.put_nowait(page)
+
+    async def _new_page(self) -> Page:
+        page = await self.browser_context.new_page()
+        try:
+            await page.goto(self.url)
+        except Exception:
+            await page.close()
+            raise
+        return page
+
+    async def _recycle(self, page: Page) -> Page:
+        """
+        页面不可用时重新打开：崩溃或已关闭的页面换成新页面，被导航走的页面重新打开首页
+        新页面打开成功后才替换旧页面，打开失败时旧页面原样归还，下次借出时再重试
+        """
+        self._recycle_count += 1
+        if page in self._crashed or page.is_closed():
+            new_page = await self._new_page()
+            new_page.on("crash", lambda: self._crashed.add(new_page))
+            self._pages[self._pages.index(page)] = new_page
+            self._crashed.discard(page)
+            self._stale.discard(page)
+            if not page.is_closed():
+                await page.close()
+            return new_page
+        await page.goto(self.url)
+        self._stale.discard(page)
+        return page
+
+    def _is_usable(self, page: Page) -> bool:
+        return (page not in self._crashed and page not in self._stale and not page.is_closed()
+                and urlparse(page.url).netloc == self._origin)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        借出一个空闲页面，用完自动归还
+        :return:
+        """
+        start = time.perf_counter()
+        page: Page = await self._idle.get()
+        wait = time.perf_counter() - start
+        self._checkout_count += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._in_use += 1
+        self._in_use_max = max(self._in_use_max, self._in_use)
+        busy_start = time.perf_counter()
+        try:
+            if not self._is_usable(page):
+                page = await self._recycle(page)
+            yield page
+        finally:
+            self._busy_total += time.perf_counter() - busy_start
+            self._in_use -= 1
+            self._idle.put_nowait(page)
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        """
+        在一个空闲页面上执行js，页面上下文被销毁（崩溃、跳转）时重新打开页面再试一次
+        :param expression:
+        :param arg:
+        :return:
+        """
+        async with self.page() as page:
+            self._evaluate_count += 1
+            try:
+                return await page.evaluate(expression, arg)
+            except Error as e:
+                self._error_count += 1
+                utils.logger.warning(f"[PagePool.evaluate] evaluate error: {e}, recycle page and retry")
+                self._stale.add(page)
+        async with self.page() as page:
+            return await page.evaluate(expression, arg)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        页面池状态，utilization 为所有页面被占用时间的占比，持续接近1且 wait 偏高时可以调大页面数
+        :return:
+        """
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "size": self.size,
+            "in_use": self._in_use,
+            "in_use_max": self._in_use_max,
+            "evaluate_count": self._evaluate_count,
+            "error_count": self._error_count,
+            "recycle_count": self._recycle_count,
+            "wait_avg_ms": round(self._wait_total * 1000 / self._checkout_count, 3) if self._checkout_count else 0.0,
+            "wait_max_ms": round(self._wait_max * 1000, 3),
+            "utilization": round(self._busy_total / (elapsed * self.size), 4) if elapsed else 0.0,
+        }
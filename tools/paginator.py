@@ -0,0 +1,133 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 通用分页：各平台只需要写“按游标取一页”的函数，循环、间隔、最大数量、结束条件由 Paginator 统一处理，
+#            调用方处理（存储）当前页时下一页已经在请求中
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, NamedTuple, Optional
+
+import config
+
+
+class PageResult(NamedTuple):
+    items: List[Any]
+    # 下一页的游标，传给下一次 fetch_page
+    cursor: Any = None
+    has_more: bool = True
+
+
+# 按游标取一页，返回 None 表示出错或没有数据，分页结束
+FetchPage = Callable[[Any], Awaitable[Optional[PageResult]]]
+
+
+class Paginator:
+    """
+    async for items in Paginator(fetch_page, ...):
+        ...
+    - 结束条件：fetch_page 返回 None、has_more 为 False、空页（stop_on_empty）、达到 max_count（最后一页按剩余数量截断）
+    - 两次请求之间等待 crawl_interval 秒，也可以传入 pacing 协程函数自定义间隔（例如接入限流器）
+    - prefetch 为 True 时，上一页交给调用方的同时就开始请求下一页，请求耗时和调用方的处理时间重叠；
+      调用方提前 break 时未完成的请求会被取消
+    - count 是已经交给调用方的条数，调用方可以把额外计入 max_count 的条目（例如随一级评论一起爬的二级评论）加到 count 上
+    """
+
+    def __init__(self, fetch_page: FetchPage, cursor: Any = None, max_count: int = 0, crawl_interval: float = 0,
+                 prefetch: bool = True, stop_on_empty: bool = True,
+                 pacing: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        self.fetch_page = fetch_page
+        self.cursor = cursor
+        self.max_count = max_count
+        self.crawl_interval = crawl_interval
+        self.prefetch = prefetch
+        self.stop_on_empty = stop_on_empty
+        self.pacing = pacing
+        self.count = 0
+        self.pages = 0
+
+    def __aiter__(self) -> AsyncIterator[List[Any]]:
+        return self._iterate()
+
+    async def _wait(self) -> None:
+        if self.pacing:
+            await self.pacing()
+        else:
+            await asyncio.sleep(self.crawl_interval)
+
+    async def _fetch(self, cursor: Any, wait: bool) -> Optional[PageResult]:
+        if wait:
+            await self._wait()
+            # 等待期间调用方可能已经在 count 上加了数量，达到 max_count 就不再请求
+            remaining = self._remaining()
+            if remaining is not None and remaining <= 0:
+                return None
+        return await self.fetch_page(cursor)
+
+    def _remaining(self) -> Optional[int]:
+        return self.max_count - self.count if self.max_count else None
+
+    async def _iterate(self) -> AsyncIterator[List[Any]]:
+        task: Optional[asyncio.Future] = asyncio.ensure_future(self._fetch(self.cursor, wait=False))
+        try:
+            while task is not None:
+                page = await task
+                task = None
+                if page is None:
+                    return
+                items = page.items or []
+                if not items and self.stop_on_empty:
+                    return
+                remaining = self._remaining()
+                if remaining is not None:
+                    if remaining <= 0:
+                        return
+                    items = items[:remaining]
+                self.count += len(items)
+                self.pages += 1
+                self.cursor = page.cursor
+                has_more = page.has_more and self._remaining() != 0
+                if has_more and self.prefetch:
+                    task = asyncio.ensure_future(self._fetch(page.cursor, wait=True))
+                yield items
+                if has_more and task is None:
+                    task = asyncio.ensure_future(self._fetch(page.cursor, wait=True))
+        finally:
+            if task is not None:
+                if task.done():
+                    if not task.cancelled():
+                        task.exception()
+                else:
+                    task.cancel()
+
+    async def collect(self, callback: Optional[Callable[[List[Any]], Awaitable[Any]]] = None) -> List[Any]:
+        """
+        取完所有页，每页先交给 callback，再汇总返回
+        :param callback:
+        :return:
+        """
+        result: List[Any] = []
+        async for items in self:
+            if callback:
+                await callback(items)
+            result.extend(items)
+        return result
+
+
+def paginate(fetch_page: FetchPage, cursor: Any = None, max_count: int = 0, crawl_interval: float = 0,
+             prefetch: Optional[bool] = None, **kwargs) -> Paginator:
+    """
+    创建分页器，prefetch 默认取 config.ENABLE_PAGE_PREFETCH
+    """
+    if prefetch is None:
+        prefetch = config.ENABLE_PAGE_PREFETCH
+    return Paginator(fetch_page, cursor=cursor, max_count=max_count, crawl_interval=crawl_interval,
+                     prefetch=prefetch, **kwargs)
@@ -0,0 +1,283 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取过程的采样分析：后台线程定时采样所有线程的调用栈，按子系统（签名、解析、存储、日志、HTTP、浏览器）汇总，
+#            输出 flamegraph.pl / speedscope 可读的 folded 格式文件和 Top N 摘要，可选用 tracemalloc 统计内存分配
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import config
+from tools import utils
+
+SUBSYSTEM_IDLE = "idle"
+SUBSYSTEM_OTHER = "other"
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))).replace("\\", "/") + "/"
+
+_HTTP_PATHS = ("/httpx/", "/httpcore/", "/h11/", "/h2/", "/anyio/", "/requests/", "/urllib3/", "/ssl.py")
+_STORE_PATHS = ("/store/", "/aiofiles/", "/aiomysql/", "/aiosqlite/", "/sqlite3/", "/csv.py",
+                "/async_db.py", "/async_sqlite_db.py")
+_PARSING_PATHS = ("/json/", "/parsel/", "/lxml/", "/help.py", "/pydantic/")
+_IDLE_FUNCTIONS = {"selectors.py": ("select",), "threading.py": ("wait",), "queue.py": ("get",)}
+
+# 一个调用栈，(文件名, 函数名) 从最外层到最内层
+Stack = Tuple[Tuple[str, str], ...]
+
+
+@lru_cache(maxsize=8192)
+def subsystem_of_frame(filename: str, name: str = "") -> Optional[str]:
+    """
+    根据文件路径和函数名判断一帧属于哪个子系统，无法判断时返回 None
+    :param filename:
+    :param name: tracemalloc 的帧没有函数名，传空字符串
+    :return:
+    """
+    path = filename.replace("\\", "/")
+    if "/execjs/" in path or ("/media_platform/" in path and "sign" in name):
+        return "signing"
+    if "/logging/" in path or path.endswith("/structured_log.py"):
+        return "logging"
+    if any(part in path for part in _PARSING_PATHS) or name.startswith("extract"):
+        return "parsing"
+    if any(part in path for part in _STORE_PATHS):
+        return "store"
+    if any(part in path for part in _HTTP_PATHS):
+        return "http"
+    if "/playwright/" in path:
+        return "browser"
+    return None
+
+
+def classify_stack(stack: Stack) -> str:
+    """
+    从最内层往外找第一个能判断子系统的帧；最内层停在 select/wait 上的线程算空闲
+    :param stack:
+    :return:
+    """
+    if not stack:
+        return SUBSYSTEM_OTHER
+    filename, name = stack[-1]
+    if name in _IDLE_FUNCTIONS.get(os.path.basename(filename), ()):
+        return SUBSYSTEM_IDLE
+    for filename, name in reversed(stack):
+        subsystem = subsystem_of_frame(filename, name)
+        if subsystem:
+            return subsystem
+    return SUBSYSTEM_OTHER
+
+
+@lru_cache(maxsize=8192)
+def frame_label(filename: str, name: str) -> str:
+    """
+    火焰图中的帧名：项目内文件用相对路径，第三方库从 site-packages 之后开始，标准库只保留文件名
+    """
+    path = filename.replace("\\", "/")
+    if path.startswith(_PROJECT_ROOT):
+        path = path[len(_PROJECT_ROOT):]
+    elif "/site-packages/" in path:
+        path = path.split("/site-packages/", 1)[1]
+    else:
+        path = os.path.basename(path)
+    return f"{path}:{name}"
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class SamplingProfiler:
+    """
+    采样分析器，不需要修改被分析的代码；每 interval 秒采样一次，开销与采样频率成正比，与爬取的请求量无关
+    """
+
+    def __init__(self, interval: float = 0.005, trace_memory: bool = False, memory_frames: int = 25,
+                 top_n: int = 20) -> None:
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.memory_frames = memory_frames
+        self.top_n = top_n
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._duration = 0.0
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> "SamplingProfiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+        self._started_at = time.perf_counter()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self._duration = time.perf_counter() - self._started_at
+        if self.trace_memory and tracemalloc.is_tracing():
+            self._snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            tracemalloc.stop()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            self._sample(own_ident)
+
+    def _sample(self, own_ident: int) -> None:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            self._stacks[(thread_names.get(ident, str(ident)), tuple(codes))] += 1
+        self.samples += 1
+
+    def stacks(self) -> Iterable[Tuple[str, Stack, int]]:
+        for (thread_name, codes), count in self._stacks.items():
+            yield thread_name, tuple((code.co_filename, code.co_name) for code in codes), count
+
+    def folded_lines(self) -> List[str]:
+        """
+        folded 格式：线程名;外层帧;...;内层帧 采样次数，flamegraph.pl 和 speedscope 都能直接读取
+        :return:
+        """
+        lines = []
+        for thread_name, stack, count in self.stacks():
+            labels = [thread_name.replace(";", ":")] + [frame_label(filename, name) for filename, name in stack]
+            lines.append(f"{';'.join(labels)} {count}")
+        return sorted(lines)
+
+    def subsystem_summary(self) -> Dict[str, int]:
+        """
+        各子系统的采样次数（所有线程合计），idle 是停在 select/wait 上的采样
+        :return:
+        """
+        summary: Dict[str, int] = defaultdict(int)
+        for _, stack, count in self.stacks():
+            summary[classify_stack(stack)] += count
+        return dict(sorted(summary.items(), key=lambda item: item[1], reverse=True))
+
+    def top_functions(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        按自身采样次数（调用栈最内层）排序的函数，不含空闲采样
+        :param n:
+        :return:
+        """
+        counter: Counter = Counter()
+        for _, stack, count in self.stacks():
+            if stack and classify_stack(stack) != SUBSYSTEM_IDLE:
+                counter[frame_label(*stack[-1])] += count
+        return counter.most_common(n or self.top_n)
+
+    def memory_summary(self) -> Dict[str, int]:
+        """
+        tracemalloc 统计的仍存活的内存按子系统汇总（字节）
+        :return:
+        """
+        summary: Dict[str, int] = defaultdict(int)
+        if self._snapshot is None:
+            return {}
+        for stat in self._snapshot.statistics("traceback"):
+            stack = tuple((frame.filename, "") for frame in stat.traceback)
+            summary[classify_stack(stack)] += stat.size
+        return dict(sorted(summary.items(), key=lambda item: item[1], reverse=True))
+
+    def top_allocations(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """
+        分配内存最多的代码行：(文件:行号, 字节数, 对象数)
+        :param n:
+        :return:
+        """
+        if self._snapshot is None:
+            return []
+        result = []
+        for stat in self._snapshot.statistics("lineno")[:n or self.top_n]:
+            frame = stat.traceback[0]
+            result.append((f"{frame_label(frame.filename, '')}{frame.lineno}", stat.size, stat.count))
+        return result
+
+    def summary_lines(self) -> List[str]:
+        lines = [f"duration: {self._duration:.1f}s, samples: {self.samples}, interval: {self.interval * 1000:.1f}ms"]
+        total = sum(self.subsystem_summary().values()) or 1
+        lines.append("subsystems (samples across all threads):")
+        for subsystem, count in self.subsystem_summary().items():
+            lines.append(f"  {subsystem:<10} {count:>8} {count * 100 / total:6.1f}%")
+        lines.append(f"top {self.top_n} functions by self samples (idle excluded):")
+        for label, count in self.top_functions():
+            lines.append(f"  {count:>8}  {label}")
+        if self._snapshot is not None:
+            lines.append("live allocations by subsystem:")
+            for subsystem, size in self.memory_summary().items():
+                lines.append(f"  {subsystem:<10} {_format_size(size):>12}")
+            lines.append(f"top {self.top_n} allocation sites:")
+            for location, size, count in self.top_allocations():
+                lines.append(f"  {_format_size(size):>12} {count:>8} objects  {location}")
+        return lines
+
+    def save(self, output_dir: str, name: str) -> Tuple[str, str]:
+        """
+        写入 folded 文件和摘要文件
+        :param output_dir:
+        :param name: 文件名前缀
+        :return: (folded 文件路径, 摘要文件路径)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        prefix = os.path.join(output_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+        folded_path, summary_path = f"{prefix}.folded", f"{prefix}_summary.txt"
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.folded_lines()) + "\n")
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.summary_lines()) + "\n")
+        return folded_path, summary_path
+
+    def finish(self, output_dir: str, name: str) -> None:
+        """
+        停止采样，写入文件并输出摘要
+        """
+        self.stop()
+        folded_path, summary_path = self.save(output_dir, name)
+        utils.logger.info("[SamplingProfiler] profile summary:\n" + "\n".join(self.summary_lines()))
+        utils.logger.info(f"[SamplingProfiler] flamegraph stacks saved to {folded_path}, summary saved to {summary_path}")
+
+
+def start_profiler() -> Optional[SamplingProfiler]:
+    """
+    按配置启动采样分析，未开启时返回 None
+    :return:
+    """
+    if not config.ENABLE_PROFILE:
+        return None
+    return SamplingProfiler(interval=config.PROFILE_INTERVAL, trace_memory=config.PROFILE_MEMORY,
+                            top_n=config.PROFILE_TOP_N).start()
@@ -0,0 +1,108 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 浏览器请求拦截，按资源类型和URL拦截图片、视频、字体和统计埋点，减少浏览器的CPU和代理流量
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+
+from playwright.async_api import BrowserContext, Request, Response, Route
+
+import config
+from constant.resource_block import BLOCK_RESOURCE_TYPES, COMMON_TRACKER_PATTERNS, PLATFORM_TRACKER_PATTERNS
+
+from . import utils
+
+
+class ResourceBlocker:
+    """
+    在 BrowserContext 上拦截无用请求，对该上下文下的所有页面生效。
+    登录时需要展示二维码/滑块图片，可以先 pause() 暂停拦截，登录成功后 resume()。
+    被拦截的请求不会下载，拿不到实际大小，这里记录拦截的请求数以及放行请求的下载字节数，
+    打开/关闭拦截各跑一次就能对比出节省的流量。
+    """
+
+    def __init__(self, platform: str, resource_types: Optional[Iterable[str]] = None) -> None:
+        self.platform = platform
+        self.resource_types = frozenset(resource_types or BLOCK_RESOURCE_TYPES)
+        self.url_patterns = COMMON_TRACKER_PATTERNS + PLATFORM_TRACKER_PATTERNS.get(platform, ())
+        self._installed = False
+        self.enabled = False
+        self.blocked_requests: Counter = Counter()
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+
+    async def install(self, browser_context: BrowserContext) -> "ResourceBlocker":
+        """
+        给浏览器上下文注册拦截规则
+        :param browser_context:
+        :return:
+        """
+        await browser_context.route("**/*", self._handle_route)
+        browser_context.on("response", self._on_response)
+        self._installed = self.enabled = True
+        return self
+
+    def pause(self) -> None:
+        self.enabled = False
+
+    def resume(self) -> None:
+        self.enabled = self._installed
+
+    def should_block(self, request: Request) -> Optional[str]:
+        """
+        判断请求是否需要拦截
+        :param request:
+        :return: 需要拦截时返回拦截原因（资源类型或者 tracker），否则返回 None
+        """
+        if request.resource_type in self.resource_types:
+            return request.resource_type
+        url = request.url
+        if any(pattern in url for pattern in self.url_patterns):
+            return "tracker"
+        return None
+
+    async def _handle_route(self, route: Route) -> None:
+        reason = self.should_block(route.request) if self.enabled else None
+        if reason:
+            self.blocked_requests[reason] += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    def _on_response(self, response: Response) -> None:
+        self.allowed_requests += 1
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            self.allowed_bytes += int(content_length)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "blocked_requests": dict(self.blocked_requests),
+            "blocked_total": sum(self.blocked_requests.values()),
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes,
+        }
+
+
+async def install_resource_blocker(browser_context: BrowserContext, platform: str) -> ResourceBlocker:
+    """
+    按配置给浏览器上下文注册请求拦截，未开启时返回一个不拦截任何请求的 ResourceBlocker
+    :param browser_context:
+    :param platform:
+    :return:
+    """
+    blocker = ResourceBlocker(platform, config.BLOCK_RESOURCE_TYPES)
+    if not config.ENABLE_BLOCK_RESOURCES:
+        return blocker
+    await blocker.install(browser_context)
+    utils.logger.info(f"[install_resource_blocker] block {sorted(blocker.resource_types)} and trackers for {platform}")
+    return blocker
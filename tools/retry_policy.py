@@ -0,0 +1,203 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 统一的请求重试策略：按错误类型判断是否重试、带随机抖动的指数退避、全局重试预算防止重试风暴
+import asyncio
+import random
+import re
+from collections import Counter
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+
+import config
+
+from . import utils
+from .adaptive_limiter import is_throttle_error
+from .metrics import RETRIES_TOTAL, RETRY_GAVE_UP_TOTAL
+from .run_report import RUN_REPORT
+
+# 错误类型
+ERROR_THROTTLE = "throttle"  # 验证码、封禁、403，重试只会加重封禁，交给限流器和熔断器处理
+ERROR_TIMEOUT = "timeout"
+ERROR_NETWORK = "network"
+ERROR_SERVER = "server"  # 5xx
+ERROR_DATA = "data"  # 平台返回了错误数据，例如 DataFetchError（笔记不存在、登录失效等），默认不重试
+ERROR_OTHER = "other"  # 代码异常等，重试也没用
+
+# 默认只重试临时性错误，个别接口的 DataFetchError 需要重试时通过 RETRY_ENDPOINT_POLICIES 的 retry_on 开启
+DEFAULT_RETRYABLE_ERRORS = (ERROR_TIMEOUT, ERROR_NETWORK, ERROR_SERVER)
+# 换一个代理IP可能恢复的错误：重试策略已经放弃的网络错误，或者IP被封
+PROXY_SWITCH_ERRORS = (ERROR_THROTTLE, ERROR_TIMEOUT, ERROR_NETWORK, ERROR_SERVER)
+
+_SERVER_ERROR_PATTERN = re.compile(r"status code: 5\d\d")
+
+
+def classify_error(exc: BaseException) -> str:
+    """
+    把请求异常归类
+    :param exc:
+    :return:
+    """
+    if is_throttle_error(exc):
+        return ERROR_THROTTLE
+    if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return ERROR_TIMEOUT
+    if isinstance(exc, httpx.TransportError):
+        return ERROR_NETWORK
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code >= 500:
+        return ERROR_SERVER
+    if _SERVER_ERROR_PATTERN.search(str(exc)):
+        return ERROR_SERVER
+    if type(exc).__name__ == "DataFetchError":
+        return ERROR_DATA
+    return ERROR_OTHER
+
+
+class RetryBudget:
+    """
+    全局重试预算：每个请求存入 ratio 个令牌，每次重试消耗 1 个，令牌不足时不再重试
+    平台大面积出错时重试次数最多是请求数的 ratio 倍，不会因为每个请求都重试几次而把流量放大
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10, max_tokens: float = 100) -> None:
+        self.ratio = ratio
+        self.max_tokens = max(max_tokens, min_tokens)
+        self.tokens = float(min_tokens)
+        self.exhausted = 0
+
+    def record_request(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+class RetryPolicy:
+    """
+    重试策略，endpoint_overrides 按 URL 片段覆盖默认的最大尝试次数和可重试的错误类型，例如：
+    {"/api/sns/web/v1/search/notes": {"max_attempts": 2, "retry_on": ["timeout", "network"]}}
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 10.0,
+                 retryable_errors: Iterable[str] = DEFAULT_RETRYABLE_ERRORS,
+                 endpoint_overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+                 budget: Optional[RetryBudget] = None) -> None:
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable_errors = tuple(retryable_errors)
+        self.endpoint_overrides = endpoint_overrides or {}
+        self.budget = budget or RetryBudget()
+        self.requests = 0
+        self.errors: Counter = Counter()
+        self.retries: Counter = Counter()
+        self.gave_up: Counter = Counter()
+
+    def _endpoint_config(self, url: str) -> Dict[str, Any]:
+        for pattern, override in self.endpoint_overrides.items():
+            if pattern in url:
+                return override
+        return {}
+
+    def backoff(self, attempt: int) -> float:
+        """
+        full jitter：在 [0, min(max_delay, base_delay * 2^attempt)] 之间随机等待，避免大量请求同时重试
+        :param attempt: 已经失败的次数，从 1 开始
+        :return:
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, func: Callable, *args, url: str = "", **kwargs) -> Any:
+        """
+        按策略执行 func，不可重试或者重试用完时抛出最后一次的异常
+        :param func:
+        :param url: 请求的URL，用于匹配 endpoint_overrides
+        :return:
+        """
+        endpoint_config = self._endpoint_config(url)
+        max_attempts = endpoint_config.get("max_attempts", self.max_attempts)
+        retryable_errors = endpoint_config.get("retry_on", self.retryable_errors)
+        self.requests += 1
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                error_type = classify_error(e)
+                self.errors[error_type] += 1
+                RUN_REPORT.record_error(error_type)
+                if error_type not in retryable_errors:
+                    raise
+                if attempt >= max_attempts or not self.budget.try_spend():
+                    self.gave_up[error_type] += 1
+                    RETRY_GAVE_UP_TOTAL.inc(error_type=error_type)
+                    RUN_REPORT.record_gave_up(error_type)
+                    utils.logger.error(f"[RetryPolicy.call] give up {url} after {attempt} attempts, "
+                                       f"error type: {error_type}, err: {e}")
+                    raise
+                self.retries[error_type] += 1
+                RETRIES_TOTAL.inc(error_type=error_type)
+                RUN_REPORT.record_retry(error_type)
+                delay = self.backoff(attempt)
+                utils.logger.warning(f"[RetryPolicy.call] {error_type} error on {url}, "
+                                     f"retry {attempt}/{max_attempts - 1} after {delay:.2f}s, err: {e}")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "retries": dict(self.retries),
+            "gave_up": dict(self.gave_up),
+            "budget_tokens": round(self.budget.tokens, 1),
+            "budget_exhausted": self.budget.exhausted,
+        }
+
+
+_retry_policy: Optional[RetryPolicy] = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    所有平台客户端共享的重试策略，第一次使用时按配置创建（命令行参数已经生效）
+    :return:
+    """
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy(
+            max_attempts=config.RETRY_MAX_ATTEMPTS,
+            base_delay=config.RETRY_BASE_DELAY,
+            max_delay=config.RETRY_MAX_DELAY,
+            endpoint_overrides=config.RETRY_ENDPOINT_POLICIES,
+            budget=RetryBudget(ratio=config.RETRY_BUDGET_RATIO),
+        )
+    return _retry_policy
+
+
+def with_retry_policy(func: Callable) -> Callable:
+    """
+    客户端 request 方法的装饰器，由 AbstractApiClient 自动套在子类的 request 外层
+    """
+
+    @wraps(func)
+    async def wrapper(self, method, url, **kwargs):
+        return await get_retry_policy().call(func, self, method, url, url=url, **kwargs)
+
+    return wrapper
@@ -0,0 +1,337 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取结果报告：按关键词/创作者汇总请求页数、保存条数、评论数、下载字节数、各阶段耗时、重试和被限流次数，
+#            爬取结束后输出 JSON 和文字摘要，用于估算定时任务需要的时间和资源
+import asyncio
+import inspect
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from tools import utils
+from var import crawler_type_var, report_scope_var, source_keyword_var
+
+STAGE_SEARCH = "search"
+STAGE_DETAIL = "detail"
+STAGE_COMMENTS = "comments"
+STAGE_SUB_COMMENTS = "sub_comments"
+STAGE_MEDIA = "media"
+STAGE_CREATOR = "creator"
+STAGE_STORE = "store"
+
+# 客户端方法名对应的阶段，按顺序匹配
+CLIENT_STAGE_PATTERNS = (
+    (STAGE_SUB_COMMENTS, re.compile(r"sub_comments|level_two_comments|child_comments")),
+    (STAGE_COMMENTS, re.compile(r"comments")),
+    (STAGE_MEDIA, re.compile(r"media|image|play_url")),
+    (STAGE_SEARCH, re.compile(r"keyword|tieba_name")),
+    (STAGE_CREATOR, re.compile(r"creator|creater|user|fans|followings|dynamics")),
+    (STAGE_DETAIL, re.compile(r"by_id|_info$|html|short_url")),
+)
+
+# 被限流/风控的错误类型，与 tools.retry_policy.ERROR_THROTTLE 一致
+BLOCK_ERROR_TYPE = "throttle"
+
+
+def current_scope() -> str:
+    """
+    当前统计归属的范围：创作者模式为 creator:ID，搜索模式为 keyword:关键词，其它为爬取类型
+    :return:
+    """
+    scope = report_scope_var.get()
+    if scope:
+        return scope
+    keyword = source_keyword_var.get()
+    if keyword:
+        return f"keyword:{keyword}"
+    return crawler_type_var.get() or "run"
+
+
+class ScopeStats:
+    def __init__(self) -> None:
+        self.pages = 0
+        self.failed_requests = 0
+        self.bytes_downloaded = 0
+        self.items = 0
+        self.comments = 0
+        self.creators = 0
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.stage_calls: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.gave_up: Dict[str, int] = defaultdict(int)
+
+    def merge(self, other: "ScopeStats") -> None:
+        for name in ("pages", "failed_requests", "bytes_downloaded", "items", "comments", "creators"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for name in ("stage_seconds", "stage_calls", "errors", "retries", "gave_up"):
+            target = getattr(self, name)
+            for key, value in getattr(other, name).items():
+                target[key] += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "failed_requests": self.failed_requests,
+            "bytes_downloaded": self.bytes_downloaded,
+            "items": self.items,
+            "comments": self.comments,
+            "creators": self.creators,
+            "comments_per_item": round(self.comments / self.items, 2) if self.items else 0,
+            "stage_seconds": {stage: round(seconds, 3) for stage, seconds in sorted(self.stage_seconds.items())},
+            "stage_calls": dict(sorted(self.stage_calls.items())),
+            "errors": dict(self.errors),
+            "retries": sum(self.retries.values()),
+            "retries_by_error": dict(self.retries),
+            "gave_up": sum(self.gave_up.values()),
+            "blocks": self.errors.get(BLOCK_ERROR_TYPE, 0),
+        }
+
+
+class RunReport:
+    def __init__(self) -> None:
+        self.scopes: Dict[str, ScopeStats] = defaultdict(ScopeStats)
+        self.platform = ""
+        self.crawler_type = ""
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def start(self, platform: str, crawler_type: str) -> None:
+        self.__init__()
+        self.platform = platform
+        self.crawler_type = crawler_type
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+
+    @property
+    def current(self) -> ScopeStats:
+        return self.scopes[current_scope()]
+
+    def record_request(self, ok: bool) -> None:
+        if ok:
+            self.current.pages += 1
+        else:
+            self.current.failed_requests += 1
+
+    def record_bytes(self, size: int) -> None:
+        self.current.bytes_downloaded += size
+
+    def record_store(self, kind: str) -> None:
+        stats = self.current
+        if kind == "content":
+            stats.items += 1
+        elif kind == "comment":
+            stats.comments += 1
+        elif kind == "creator":
+            stats.creators += 1
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        stats = self.current
+        stats.stage_seconds[stage] += seconds
+        stats.stage_calls[stage] += 1
+
+    def record_error(self, error_type: str) -> None:
+        self.current.errors[error_type] += 1
+
+    def record_retry(self, error_type: str) -> None:
+        self.current.retries[error_type] += 1
+
+    def record_gave_up(self, error_type: str) -> None:
+        self.current.gave_up[error_type] += 1
+
+    def totals(self) -> ScopeStats:
+        total = ScopeStats()
+        for stats in self.scopes.values():
+            total.merge(stats)
+        return total
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished_at = self.finished_at or time.time()
+        return {
+            "platform": self.platform,
+            "crawler_type": self.crawler_type,
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+            "duration_seconds": round(finished_at - self.started_at, 1),
+            "totals": self.totals().to_dict(),
+            "scopes": {scope: stats.to_dict() for scope, stats in self.scopes.items()},
+        }
+
+    def summary_lines(self) -> List[str]:
+        report = self.to_dict()
+        lines = [f"platform: {report['platform']}, type: {report['crawler_type']}, "
+                 f"duration: {report['duration_seconds']}s"]
+        for scope, stats in [("total", report["totals"])] + list(report["scopes"].items()):
+            stages = ", ".join(f"{stage} {seconds}s" for stage, seconds in stats["stage_seconds"].items())
+            lines.append(
+                f"  {scope}: pages {stats['pages']} (failed {stats['failed_requests']}), items {stats['items']}, "
+                f"comments {stats['comments']} ({stats['comments_per_item']}/item), creators {stats['creators']}, "
+                f"downloaded {stats['bytes_downloaded'] / 1024 / 1024:.2f} MiB, retries {stats['retries']}, "
+                f"blocks {stats['blocks']}, gave up {stats['gave_up']}"
+            )
+            if stages:
+                lines.append(f"    stages: {stages}")
+        return lines
+
+    def save(self, output_dir: str) -> str:
+        """
+        写入 JSON 报告，文件名带平台、爬取类型和开始时间
+        :param output_dir:
+        :return: 文件路径
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        started = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started_at))
+        path = os.path.join(output_dir, f"{self.platform}_{self.crawler_type}_{started}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+RUN_REPORT = RunReport()
+
+
+class _StageFrame:
+    __slots__ = ("stage", "child_seconds", "task")
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.child_seconds = 0.0
+        # 新建的任务会复制上下文里的外层阶段，并发执行的子阶段和外层重叠，不能从外层扣除
+        self.task = asyncio.current_task()
+
+
+_stage_var: ContextVar[Optional[_StageFrame]] = ContextVar("run_report_stage", default=None)
+
+
+def track_stage(stage: str) -> Callable:
+    """
+    记录协程函数在某个阶段的耗时；嵌套的同一阶段只记录最外层，嵌套的其它阶段从外层扣除，各阶段的耗时不重复计算；
+    在其他任务中并发执行的子阶段不从外层扣除
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            parent = _stage_var.get()
+            if parent is not None and parent.stage == stage:
+                return await func(*args, **kwargs)
+            frame = _StageFrame(stage)
+            token = _stage_var.set(frame)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _stage_var.reset(token)
+                if parent is not None and parent.task is frame.task:
+                    parent.child_seconds += elapsed
+                RUN_REPORT.record_stage(stage, max(elapsed - frame.child_seconds, 0.0))
+
+        return wrapper
+
+    return decorator
+
+
+def client_method_stage(name: str) -> Optional[str]:
+    """
+    根据客户端方法名判断所属阶段，request/get/post 等底层方法返回 None
+    :param name:
+    :return:
+    """
+    if not name.startswith(("get_", "search_")):
+        return None
+    for stage, pattern in CLIENT_STAGE_PATTERNS:
+        if pattern.search(name):
+            return stage
+    return None
+
+
+def track_client_stages(cls) -> None:
+    """
+    给客户端类中按名字能判断阶段的协程方法加上阶段计时
+    :param cls:
+    :return:
+    """
+    for name, method in list(vars(cls).items()):
+        stage = client_method_stage(name)
+        if stage and inspect.iscoroutinefunction(method):
+            setattr(cls, name, track_stage(stage)(method))
+
+
+def track_request(func: Callable) -> Callable:
+    """
+    客户端 request 方法的装饰器，统计每次请求（含重试）成功或失败
+    """
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            RUN_REPORT.record_request(ok=False)
+            raise
+        RUN_REPORT.record_request(ok=True)
+        return result
+
+    return wrapper
+
+
+def track_store(kind: str) -> Callable:
+    """
+    存储方法的装饰器，统计保存条数并记入 store 阶段耗时
+    """
+
+    def decorator(func: Callable) -> Callable:
+        timed = track_stage(STAGE_STORE)(func)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            result = await timed(*args, **kwargs)
+            RUN_REPORT.record_store(kind)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+async def record_response_size(response) -> None:
+    """
+    httpx 的响应事件钩子，统计下载的字节数（钩子里先读取响应体，之后调用方读取时直接用缓存）
+    """
+    await response.aread()
+    RUN_REPORT.record_bytes(len(response.content))
+
+
+def start_run_report() -> None:
+    RUN_REPORT.start(config.PLATFORM, config.CRAWLER_TYPE)
+
+
+def save_run_report() -> None:
+    """
+    爬取结束时输出摘要并写入 JSON 报告
+    :return:
+    """
+    if not config.ENABLE_RUN_REPORT:
+        return
+    RUN_REPORT.finish()
+    path = RUN_REPORT.save(config.RUN_REPORT_DIR)
+    utils.logger.info("[RunReport] crawl summary:\n" + "\n".join(RUN_REPORT.summary_lines()))
+    utils.logger.info(f"[RunReport] report saved to {path}")
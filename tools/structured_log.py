@@ -0,0 +1,152 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
+# 1. 不得用于任何商业用途。  
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
+# 3. 不得进行大规模爬取或对平台造成运营干扰。  
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
+# 5. 不得用于任何非法或不当的用途。
+#   
+# 详细许可条款请参阅项目根目录下的LICENSE文件。  
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 结构化日志：按类别设置日志级别、逐条数据的日志按比例采样、字段延迟格式化、可选 JSON 输出，
+#            日志写入放到后台线程，爬取的协程里只做入队
+import atexit
+import json
+import logging
+import queue
+from collections import defaultdict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import config
+
+LOGGER_NAME = "MediaCrawler"
+TEXT_FORMAT = "%(asctime)s %(name)s %(levelname)s (%(filename)s:%(lineno)d) - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_sample_counts: Dict[str, int] = defaultdict(int)
+_listener: Optional[QueueListener] = None
+
+
+class LazyFields:
+    """
+    日志字段只在真正输出时才格式化，被级别或采样过滤掉的日志没有格式化开销
+    """
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: Dict[str, Any]) -> None:
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{key}={value!r}" for key, value in self.fields.items())
+
+
+def get_logger(category: str) -> logging.Logger:
+    """
+    获取某个类别的日志对象，例如 store、api，级别由 config.LOG_CATEGORY_LEVELS 控制
+    :param category:
+    :return:
+    """
+    return logging.getLogger(f"{LOGGER_NAME}.{category}")
+
+
+def log_event(logger: logging.Logger, event: str, fields: Optional[Dict[str, Any]] = None,
+              level: int = logging.INFO, sample_every: int = 1) -> None:
+    """
+    记录一条结构化日志
+    :param logger:
+    :param event: 事件名，例如 store.xhs.update_xhs_note
+    :param fields: 日志字段
+    :param level:
+    :param sample_every: 同一事件每 sample_every 条只输出 1 条，用于逐条数据的日志
+    :return:
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_every > 1:
+        count = _sample_counts[event]
+        _sample_counts[event] = count + 1
+        if count % sample_every:
+            return
+    # 后台线程格式化时调用方可能已经修改了字典（例如存储前加上 add_ts），入队前复制一份
+    fields = dict(fields) if fields else {}
+    logger.log(level, "[%s] %s", event, LazyFields(fields), extra={"event": event, "fields": fields}, stacklevel=2)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    每条日志输出为一行 JSON
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+        }
+        event = getattr(record, "event", None)
+        if event:
+            data["event"] = event
+            data["fields"] = getattr(record, "fields", {})
+        else:
+            data["message"] = record.getMessage()
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    标准库的 QueueHandler 入队前会格式化日志，这里原样入队，格式化在后台线程中完成
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def stop_logging() -> None:
+    """
+    停止后台日志线程，把队列里剩下的日志写完
+    :return:
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, LazyQueueHandler):
+                root.removeHandler(handler)
+        for handler in _listener.handlers:
+            root.addHandler(handler)
+        _listener = None
+
+
+def setup_logging() -> None:
+    """
+    按配置设置日志格式、类别级别和异步写入，可以重复调用（命令行参数解析后会再调用一次）
+    :return:
+    """
+    global _listener
+    root = logging.getLogger()
+    handlers = list(_listener.handlers) if _listener else list(root.handlers)
+    formatter = JsonFormatter() if config.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    for category, level in config.LOG_CATEGORY_LEVELS.items():
+        get_logger(category).setLevel(level)
+
+    if config.ENABLE_ASYNC_LOG and _listener is None and handlers:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        for handler in handlers:
+            root.removeHandler(handler)
+        root.addHandler(LazyQueueHandler(log_queue))
+        _listener.start()
+        atexit.register(stop_logging)
+    elif not config.ENABLE_ASYNC_LOG and _listener is not None:
+        stop_logging()
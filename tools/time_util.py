@@ -16,6 +16,7 @@
 
 import time
 from datetime import datetime, timedelta, timezone
+from typing import List
 
 
 def get_current_timestamp() -> int:
@@ -111,6 +112,18 @@ def rfc2822_to_timestamp(rfc2822_time):
     return timestamp
 
 
+def get_date_range(start_day: str, end_day: str) -> List[datetime]:
+    """
+    获取 start_day 到 end_day 之间（包含首尾）的每一天
+    :param start_day: 开始日期，格式 2024-01-01
+    :param end_day: 结束日期，格式 2024-01-01
+    :return:
+    """
+    start = datetime.strptime(start_day, "%Y-%m-%d")
+    end = datetime.strptime(end_day, "%Y-%m-%d")
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
 if __name__ == '__main__':
     # 示例用法
     _rfc2822_time = "Sat Dec 23 17:12:54 +0800 2023"
@@ -13,9 +13,18 @@ import argparse
 import logging
 
 from .crawler_util import *
-from .slider_util import *
 from .time_util import *
 
+# 滑块相关的工具依赖 opencv 和 numpy，导入较慢，只在第一次使用时加载
+_LAZY_SLIDER_ATTRS = ("Slide", "get_track_simple", "get_tracks")
+
+
+def __getattr__(name):
+    if name in _LAZY_SLIDER_ATTRS:
+        from . import slider_util
+        return getattr(slider_util, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def init_loging_config():
     level = logging.INFO
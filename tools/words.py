@@ -15,9 +15,6 @@ import logging
 from collections import Counter
 
 import aiofiles
-import jieba
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
 
 import config
 from tools import utils
@@ -26,19 +23,27 @@ plot_lock = asyncio.Lock()
 
 class AsyncWordCloudGenerator:
     def __init__(self):
-        logging.getLogger('jieba').setLevel(logging.WARNING)
+        # jieba/matplotlib/wordcloud 导入很慢，各个JSON存储类在导入时就会创建该对象，所以延迟到第一次生成词云时再加载
         self.stop_words_file = config.STOP_WORDS_FILE
         self.lock = asyncio.Lock()
-        self.stop_words = self.load_stop_words()
+        self.stop_words = None
         self.custom_words = config.CUSTOM_WORDS
-        for word, group in self.custom_words.items():
-            jieba.add_word(word)
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
+    def init_jieba(self):
+        import jieba
+        logging.getLogger('jieba').setLevel(logging.WARNING)
+        self.stop_words = self.load_stop_words()
+        for word, group in self.custom_words.items():
+            jieba.add_word(word)
+
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
+        import jieba
+        if self.stop_words is None:
+            self.init_jieba()
         all_text = ' '.join(item['content'] for item in data)
         words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
         word_freq = Counter(words)
@@ -56,6 +61,9 @@ class AsyncWordCloudGenerator:
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
+
         await plot_lock.acquire()
         top_20_word_freq = {word: freq for word, freq in
                             sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
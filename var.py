@@ -9,17 +9,18 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
 
 
-from asyncio.tasks import Task
 from contextvars import ContextVar
-from typing import List
 
 import aiomysql
 
 from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
 
 request_keyword_var: ContextVar[str] = ContextVar("request_keyword", default="")
 crawler_type_var: ContextVar[str] = ContextVar("crawler_type", default="")
-comment_tasks_var: ContextVar[List[Task]] = ContextVar("comment_tasks", default=[])
 media_crawler_db_var: ContextVar[AsyncMysqlDB] = ContextVar("media_crawler_db_var")
 db_conn_pool_var: ContextVar[aiomysql.Pool] = ContextVar("db_conn_pool_var")
-source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
\ No newline at end of file
+source_keyword_var: ContextVar[str] = ContextVar("source_keyword", default="")
+# 爬取报告的统计范围，创作者模式下为 creator:创作者ID
+report_scope_var: ContextVar[str] = ContextVar("report_scope", default="")
+sqlite_db_var: ContextVar[AsyncSqliteDB] = ContextVar("sqlite_db_var")